@@ -14,6 +14,7 @@ from app.agents.tools import (
     MCPClient, get_mcp_client,
     fetch_with_retry
 )
+from app.services.emotion_cycle import classify_emotion_cycle
 
 
 class ReviewAgent:
@@ -267,29 +268,8 @@ class ReviewAgent:
         ))
 
     def _calculate_emotion_cycle(self, zt_count: int, zbgc_count: int, dtgc_count: int, highest_board: int) -> Dict:
-        """
-        情绪周期判断
-        做什么：判断当前处于哪个情绪周期阶段
-        为什么做：周期决定仓位和策略
-        怎么做：通过涨停家数、炸板率、跌停家数、最高板等指标综合判断
-        判断标准：基于游资实战经验总结的量化标准
-        """
-        zbgc_rate = zbgc_count / max(zt_count, 1) * 100 if zt_count > 0 else 100
-
-        if zt_count >= 80 and zbgc_rate < 15:
-            return {"phase": "高潮", "description": "市场情绪高涨，涨停家数多，炸板率低", "reason": "涨停家数>=80且炸板率<15%", "basis": "赚钱效应最好阶段", "position": 80, "strategy": "积极做多，跟随主线龙头", "risk": "注意分化风险"}
-        elif zt_count >= 50 and zbgc_rate < 25:
-            return {"phase": "发酵", "description": "市场情绪回暖，涨停家数增加", "reason": "涨停家数50-80，炸板率<25%", "basis": "赚钱效应扩散", "position": 70, "strategy": "积极做多，寻找主线龙头", "risk": "关注炸板率变化"}
-        elif zt_count >= 30 and zbgc_rate < 30:
-            return {"phase": "启动", "description": "市场开始活跃", "reason": "涨停家数30-50", "basis": "资金开始试盘", "position": 50, "strategy": "轻仓试盘，关注首板和二板机会", "risk": "不确定性强，控制仓位"}
-        elif zt_count >= 20 and zbgc_rate >= 30:
-            return {"phase": "分歧", "description": "市场出现分歧", "reason": "涨停家数20-50，炸板率>=30%", "basis": "高位股开始兑现", "position": 30, "strategy": "谨慎操作，关注低位首板", "risk": "追高容易被套"}
-        elif zt_count >= 10 and zt_count < 20:
-            return {"phase": "退潮", "description": "市场情绪衰退", "reason": "涨停家数10-20", "basis": "亏钱效应明显", "position": 20, "strategy": "防守为主，尽量空仓或轻仓", "risk": "容易出现大幅亏损"}
-        elif zt_count < 10 or dtgc_count > 20:
-            return {"phase": "冰点", "description": "市场情绪冰点", "reason": "涨停<10或跌停>20", "basis": "否极泰来", "position": 10, "strategy": "空仓等待，等待反弹机会", "risk": "难以预测"}
-        else:
-            return {"phase": "震荡", "description": "市场处于震荡状态", "reason": "中间状态", "basis": "无明显方向", "position": 40, "strategy": "控制仓位，快进快出", "risk": "注意大盘方向"}
+        """情绪周期判断 (与历史情绪周期表使用同一套标准)"""
+        return classify_emotion_cycle(zt_count, zbgc_count, dtgc_count, highest_board)
 
     async def _generate_report(self, context: ReviewContext):
         """生成最终报告"""
@@ -1,12 +1,13 @@
 """
 游资复盘 API 路由
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 from fastapi import APIRouter, HTTPException
 from typing import Optional
 
 from app.agents.models import AnalyzeRequest, AnalyzeResponse, ReviewResult
 from app.agents.review_agent import get_review_agent
+from app.services.emotion_cycle import EmotionCycleService
 
 router = APIRouter(prefix="/api/review", tags=["游资复盘"])
 
@@ -69,14 +70,22 @@ async def get_review_history(
     - **start_date**: 开始日期
     - **end_date**: 结束日期
     - **limit**: 返回数量限制
+
+    记录取自情绪周期历史表 (每个交易日的涨停/炸板/跌停家数、最高板和周期阶段)，按日期倒序
     """
-    # TODO: 实现历史记录查询
+    start_date = start_date or (datetime.now() - timedelta(days=365)).strftime("%Y%m%d")
+    try:
+        records = await EmotionCycleService.history_async(start_date, end_date)
+    except Exception as e:
+        return {"code": 1, "msg": "error", "error": str(e)}
+
+    records.reverse()
     return {
         "code": 0,
         "msg": "success",
         "data": {
-            "list": [],
-            "total": 0
+            "list": records[:limit],
+            "total": len(records)
         }
     }
 
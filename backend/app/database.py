@@ -1,27 +1,142 @@
 import pymysql
 pymysql.install_as_MySQLdb()
 
-from typing import Generator
+from typing import AsyncGenerator, Dict, Generator
 from sqlmodel import SQLModel, Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.pool import StaticPool
 from app.config import settings
 
-connect_args = {}
-if "sqlite" in settings.DATABASE_URL:
-    connect_args = {"check_same_thread": False}
+# 同步驱动 -> 异步驱动
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args=connect_args,
-    poolclass=StaticPool if "sqlite" in settings.DATABASE_URL else None,
+
+def engine_options(url: str) -> dict:
+    """连接池配置：SQLite 单连接，MySQL 按 settings 设置池大小并在取出时检测断线"""
+    if "sqlite" in url:
+        return {"connect_args": {"check_same_thread": False}, "poolclass": StaticPool}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def async_url(url: str) -> str:
+    """同步连接串 -> 异步驱动连接串 (mysql -> aiomysql, sqlite -> aiosqlite)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"不支持异步访问的数据库: {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+
+# 行情库 (DataService / 同步脚本)，与业务库同一连接串时共用连接池
+market_engine = (
+    engine if settings.MARKET_DATABASE_URL == settings.DATABASE_URL
+    else create_engine(settings.MARKET_DATABASE_URL, **engine_options(settings.MARKET_DATABASE_URL))
 )
 
 
-def get_db() -> Generator[Session, None]:
+# 连接串 -> 异步引擎 (首次使用时创建)
+_async_engines: Dict[str, AsyncEngine] = {}
+
+
+def _create_async_engine(url: str) -> AsyncEngine:
+    if url not in _async_engines:
+        _async_engines[url] = create_async_engine(async_url(url), **engine_options(url))
+    return _async_engines[url]
+
+
+def get_async_engine() -> AsyncEngine:
+    """业务库异步引擎 (首次使用时创建，需要安装 aiomysql / aiosqlite)"""
+    return _create_async_engine(settings.DATABASE_URL)
+
+
+def get_async_market_engine() -> AsyncEngine:
+    """行情库异步引擎 (与业务库同一连接串时共用)"""
+    return _create_async_engine(settings.MARKET_DATABASE_URL)
+
+
+def reset_engines_after_fork():
+    """
+    子进程初始化 (ProcessPoolExecutor initializer)：丢弃从父进程继承的连接池，
+    子进程按需新建连接，避免多个进程读写同一个 MySQL 连接；不关闭父进程仍在使用的连接
+    """
+    engine.dispose(close=False)
+    if market_engine is not engine:
+        market_engine.dispose(close=False)
+    _async_engines.clear()
+
+
+def get_db() -> Generator[Session, None, None]:
     """统一的数据库会话依赖"""
     with Session(engine) as session:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """异步数据库会话依赖 (用于 async def 路由)"""
+    async with AsyncSession(get_async_engine()) as session:
+        yield session
+
+
+async def dispose_async_engines():
+    """关闭异步连接池 (应用退出时调用)"""
+    for async_engine in list(_async_engines.values()):
+        await async_engine.dispose()
+    _async_engines.clear()
+
+
+# 已有表上后来新增的列 (表名 -> 列名)，create_all 只建新表，启动时补上缺失的列
+ADDED_COLUMNS: Dict[str, list] = {
+    "strategy_signals": ["source", "trade_date"],
+}
+
+
+def add_missing_columns(bind: Engine = None) -> list:
+    """
+    为已存在的表补上 ADDED_COLUMNS 中缺失的列及其单列索引
+
+    Returns:
+        新增的 "表.列" 列表
+    """
+    import app.models  # noqa: F401  注册全部模型的表结构
+
+    bind = bind or engine
+    inspector = inspect(bind)
+    tables = set(inspector.get_table_names())
+    added = []
+    with bind.begin() as conn:
+        for table_name, column_names in ADDED_COLUMNS.items():
+            if table_name not in tables:
+                continue
+            table = SQLModel.metadata.tables[table_name]
+            present = {c["name"] for c in inspector.get_columns(table_name)}
+            for name in column_names:
+                if name in present:
+                    continue
+                column = table.columns[name]
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {table_name} ADD COLUMN {name} {column.type.compile(dialect=bind.dialect)}"
+                )
+                for index in table.indexes:
+                    if list(index.columns) == [column]:
+                        index.create(conn)
+                added.append(f"{table_name}.{name}")
+    return added
+
+
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    add_missing_columns(engine)
@@ -1,15 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 
-from app.database import create_db_and_tables
+from app.database import create_db_and_tables, dispose_async_engines
 from app.config import settings
+from app.responses import ORJSONResponse
 from app.routers import daily
 from app.routers.backtest_strategy import router as backtest_strategy_router
 from app.routers import optimizer_enhanced
+from app.routers import backtest
 from app.routers import positions, trades
+from app.routers import signals
+from app.routers import screener
 from app.routers import akshare
 from app.routers import yz_board
+from app.routers import kline
 
 
 @asynccontextmanager
@@ -45,14 +51,27 @@ async def lifespan(app: FastAPI):
     thread.daemon = True
     thread.start()
 
+    # 预计算成交额最大股票的日K线缩放金字塔 (图表 LOD 接口)
+    def warm_chart_lod_background():
+        try:
+            from app.services.chart_lod import ChartLodService
+            ChartLodService.warm()
+        except Exception as e:
+            print(f"启动时预计算K线缩放金字塔失败: {e}")
+
+    threading.Thread(target=warm_chart_lod_background, daemon=True).start()
+
     yield
 
+    await dispose_async_engines()
+
 
 app = FastAPI(
     title="A-Stock Trade API",
     description="股票交易计划管理系统 API",
     version="2.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS 配置
@@ -64,17 +83,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 超过阈值的响应 gzip 压缩 (已由接口 br 压缩的跳过)
+app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESS_MIN_SIZE, compresslevel=6)
 
 # 核心功能
 app.include_router(daily.router)                    # 计划与复盘
 app.include_router(backtest_strategy_router)       # 自定义策略
 app.include_router(optimizer_enhanced.router)       # 参数优化
+app.include_router(backtest.router)                 # 批量回测
 app.include_router(akshare.router)                 # AKShare测试
 app.include_router(yz_board.router)                # 游资看板
+app.include_router(kline.router)                   # K线行情
 
 # 业务数据
 app.include_router(positions.router)               # 持仓管理
 app.include_router(trades.router)                  # 成交记录
+app.include_router(signals.router)                 # 策略信号
+app.include_router(screener.router)                # 选股器
 
 
 @app.get("/health")
@@ -8,6 +8,7 @@ from app.models.trading import (
     Order,
     Trade,
     StrategySignal,
+    StrategySignalState,
 )
 
 __all__ = [
@@ -22,4 +23,5 @@ __all__ = [
     "Order",
     "Trade",
     "StrategySignal",
+    "StrategySignalState",
 ]
@@ -7,6 +7,7 @@
 本文件只包含：持仓、委托、成交、策略信号
 """
 from datetime import date, datetime
+from sqlalchemy import Column, Text, UniqueConstraint
 from sqlmodel import Field, SQLModel
 from typing import Optional
 
@@ -167,6 +168,11 @@ class StrategySignal(SQLModel, table=True):
     # 原因
     reason: Optional[str] = Field(default=None, description="信号原因")
 
+    # 来源与交易日：engine 为增量信号引擎 (内置/预置策略)，scan 为全市场扫描 (自定义策略)，
+    # 重复运行同一交易日时按 (来源, 策略, 交易日) 覆盖
+    source: Optional[str] = Field(default=None, max_length=10, index=True, description="信号来源: engine/scan")
+    trade_date: Optional[date] = Field(default=None, index=True, alias="tradeDate", description="信号交易日")
+
     # 关联计划
     plan_id: Optional[int] = Field(default=None, description="关联计划ID")
 
@@ -175,3 +181,24 @@ class StrategySignal(SQLModel, table=True):
 
     class Config:
         populate_by_name = True
+
+
+class StrategySignalState(SQLModel, table=True):
+    """策略信号状态 - 增量信号引擎按 (策略, 股票) 持久化的指标状态"""
+    __tablename__ = "strategy_signal_states"
+    __table_args__ = (UniqueConstraint("strategy_id", "stock_code", name="uk_strategy_stock"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    strategy_id: int = Field(foreign_key="backtest_strategies.id", index=True, alias="strategyId")
+    stock_code: str = Field(max_length=10, alias="stockCode", description="股票代码")
+
+    # 指标累加器 (最近窗口收盘价、EMA 等) 的 JSON
+    state: str = Field(default="{}", sa_column=Column(Text), description="指标状态")
+    position: bool = Field(default=False, description="策略当前是否持仓")
+    last_date: date = Field(alias="lastDate", description="状态对应的最后一根K线日期")
+
+    updated_at: datetime = Field(default_factory=datetime.now, alias="updatedAt")
+
+    class Config:
+        populate_by_name = True
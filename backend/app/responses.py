@@ -0,0 +1,354 @@
+"""
+响应编码
+全局 JSON 响应使用 orjson (ORJSONResponse)：numpy/pandas 标量、日期、Decimal、SQLModel 对象直接序列化，
+NaN/Inf 输出为 null；ORJSONRoute 路由的返回值跳过 jsonable_encoder 直接序列化。
+
+K线、分时、权益曲线等大列表接口按 Accept 头协商格式：
+- application/vnd.apache.arrow.stream: Arrow IPC 列式流 (表格数据)
+- application/msgpack (application/x-msgpack): 表格数据按列打包 {列名: [值...]}，其他结构原样打包
+- 其他: JSON (行字典列表)，与原接口一致
+超过 COMPRESS_MIN_SIZE 且客户端支持时以 br 压缩 (需要 brotli)，否则交给 GZipMiddleware
+
+多只股票的批量数据 (table_stream) 逐只流式返回：Arrow IPC 流 (每只一个 record batch) 或 NDJSON (每只一行)，不经过 gzip
+
+ETagRoute 路由的 GET 响应附带内容摘要 ETag，请求头 If-None-Match 与之相同时返回 304 (无响应体)
+"""
+import asyncio
+import functools
+import hashlib
+import importlib.util
+import io
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Coroutine, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi import Request, status
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+from app.config import settings
+
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 流式响应的响应头：声明不压缩，GZipMiddleware 据此跳过，否则会缓冲小块数据，逐条返回失去意义
+STREAM_HEADERS = {"Content-Encoding": "identity", "X-Accel-Buffering": "no"}
+
+# brotli 压缩等级 (0-11)，5 左右压缩率接近 gzip -9、速度快得多
+BROTLI_QUALITY = 5
+
+
+def _orjson_default(value: Any) -> Any:
+    """orjson 不能直接序列化的类型"""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (pd.Timedelta, timedelta)):
+        return value.total_seconds()
+    if isinstance(value, BaseModel):
+        return value.model_dump(by_alias=True)
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict("records")
+    if isinstance(value, pd.Series):
+        return value.tolist()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"无法序列化的类型: {type(value)}")
+
+
+def dumps(content: Any) -> bytes:
+    """orjson 序列化 (numpy 数组/标量、非字符串键，NaN/Inf -> null)"""
+    return orjson.dumps(
+        content, default=_orjson_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    )
+
+
+class ORJSONResponse(JSONResponse):
+    """orjson 序列化的 JSON 响应 (应用默认响应类)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _as_response(result: Any) -> Response:
+    return result if isinstance(result, Response) else ORJSONResponse(result)
+
+
+def _direct_json(endpoint: Callable) -> Callable:
+    """包装路由函数：返回值直接构造 ORJSONResponse，FastAPI 不再调用 jsonable_encoder"""
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            return _as_response(await endpoint(*args, **kwargs))
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        return _as_response(endpoint(*args, **kwargs))
+    return wrapper
+
+
+class ORJSONRoute(APIRoute):
+    """
+    返回大列表的路由使用：返回值由 orjson 一次序列化，跳过逐对象的 jsonable_encoder。
+    声明了 response_model 或 status_code 的路由保持 FastAPI 默认处理
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        response_model = kwargs.get("response_model")
+        if (response_model is None or isinstance(response_model, DefaultPlaceholder)) and kwargs.get("status_code") is None:
+            endpoint = _direct_json(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def etag(body: bytes) -> str:
+    """响应体摘要 (弱 ETag：gzip/br 压缩后内容等价)"""
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, tag: str) -> bool:
+    """If-None-Match 是否包含 tag (弱比较)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [t.strip() for t in header.split(",")]
+    return "*" in candidates or tag.removeprefix("W/") in [t.removeprefix("W/") for t in candidates]
+
+
+def conditional_response(request: Request, response: Response) -> Response:
+    """
+    GET 成功响应附加 ETag (流式响应除外)，客户端已有相同内容时改为 304
+
+    Returns:
+        原响应，或只带 ETag/Vary 头的 304 响应
+    """
+    if request.method != "GET" or response.status_code != status.HTTP_200_OK or not hasattr(response, "body"):
+        return response
+    tag = etag(response.body)
+    if etag_matches(request, tag):
+        headers = {"ETag": tag}
+        if "vary" in response.headers:
+            headers["Vary"] = response.headers["vary"]
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers["ETag"] = tag
+    response.headers.setdefault("Cache-Control", "no-cache")
+    return response
+
+
+class ETagRoute(ORJSONRoute):
+    """
+    轮询刷新的数据接口使用：在 ORJSONRoute 基础上按响应体生成 ETag，未变化时返回 304，
+    客户端带 If-None-Match 重复请求时几乎不产生流量
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            return conditional_response(request, await handler(request))
+        return route_handler
+
+
+@lru_cache(maxsize=None)
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def accepted_types(accept: Optional[str]) -> List[str]:
+    """Accept 头中的媒体类型，按 q 值降序 (同 q 值保持原顺序)"""
+    types = []
+    for i, part in enumerate((accept or "").split(",")):
+        fields = [f.strip() for f in part.split(";")]
+        if not fields[0]:
+            continue
+        q = 1.0
+        for field in fields[1:]:
+            if field.startswith("q="):
+                try:
+                    q = float(field[2:])
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            types.append((-q, i, fields[0].lower()))
+    return [media for _, _, media in sorted(types)]
+
+
+def response_format(request: Request, tabular: bool = True) -> str:
+    """
+    协商响应格式
+
+    Returns:
+        arrow / msgpack / json (客户端优先的格式未安装对应库时依次退回)
+    """
+    for media in accepted_types(request.headers.get("accept")):
+        if media == ARROW_MEDIA_TYPE and tabular and _installed("pyarrow"):
+            return "arrow"
+        if media in MSGPACK_MEDIA_TYPES and _installed("msgpack"):
+            return "msgpack"
+        if media in (JSON_MEDIA_TYPE, "application/*", "*/*"):
+            return "json"
+    return "json"
+
+
+def _compressed(request: Request, body: bytes, media_type: str) -> Response:
+    """超过阈值且客户端支持 br 时用 brotli 压缩，否则原样返回 (gzip 由中间件处理)"""
+    headers = {"Vary": "Accept"}
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if len(body) >= settings.COMPRESS_MIN_SIZE and "br" in accept_encoding and _installed("brotli"):
+        import brotli
+        body = brotli.compress(body, quality=BROTLI_QUALITY)
+        headers["Content-Encoding"] = "br"
+        headers["Vary"] = "Accept, Accept-Encoding"
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _text_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """日期 -> YYYY-MM-DD，时间 (Timedelta) -> HH:MM，其余列不变"""
+    out = frame.copy()
+    for column in out.columns:
+        values = out[column]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            out[column] = values.dt.strftime("%Y-%m-%d")
+        elif pd.api.types.is_timedelta64_dtype(values):
+            seconds = values.dt.total_seconds()
+            out[column] = [
+                None if pd.isna(s) else f"{int(s) // 3600:02d}:{int(s) % 3600 // 60:02d}" for s in seconds
+            ]
+        elif values.dtype == object and len(values) and isinstance(values.iloc[0], date):
+            out[column] = values.map(lambda d: d.isoformat() if d is not None else None)
+    return out
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, pd.Timedelta):
+        return value.total_seconds()
+    raise TypeError(f"无法编码的类型: {type(value)}")
+
+
+def _msgpack(payload: Any) -> bytes:
+    import msgpack
+    return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+
+
+def _arrow_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """日期 -> date (Arrow date32)，时间 (Timedelta) -> HH:MM"""
+    out = frame.copy()
+    for column in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[column]):
+            out[column] = out[column].dt.date
+        elif pd.api.types.is_timedelta64_dtype(out[column]):
+            out[column] = _text_columns(out[[column]])[column]
+    return out
+
+
+def _arrow(frame: pd.DataFrame) -> bytes:
+    import pyarrow as pa
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def table_response(request: Request, frame: pd.DataFrame) -> Response:
+    """
+    表格数据响应 (K线、分时等)
+
+    Args:
+        request: 当前请求 (读取 Accept / Accept-Encoding)
+        frame: 数据，日期列为 datetime64 或 date，时间列为 Timedelta
+
+    Returns:
+        Arrow IPC 流 / 按列打包的 msgpack / 行字典 JSON
+    """
+    fmt = response_format(request, tabular=True)
+    if fmt == "arrow":
+        return _compressed(request, _arrow(_arrow_columns(frame)), ARROW_MEDIA_TYPE)
+
+    out = _text_columns(frame)
+    if fmt == "msgpack":
+        out = out.astype(object).where(out.notna(), None)
+        return _compressed(request, _msgpack(out.to_dict("list")), MSGPACK_MEDIA_TYPES[0])
+    return _compressed(request, dumps(out.to_dict("records")), JSON_MEDIA_TYPE)
+
+
+def object_response(request: Request, payload: Dict[str, Any]) -> Response:
+    """
+    嵌套结构响应 (回测结果等，含权益曲线列表)，支持 msgpack，其余为 JSON
+    """
+    if response_format(request, tabular=False) == "msgpack":
+        return _compressed(request, _msgpack(payload), MSGPACK_MEDIA_TYPES[0])
+    return _compressed(request, dumps(payload), JSON_MEDIA_TYPE)
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
+
+
+def _arrow_batches(chunks: Iterator[Tuple[str, pd.DataFrame]], empty: pd.DataFrame) -> Iterator[bytes]:
+    import pyarrow as pa
+    sink = io.BytesIO()
+    writer = schema = None
+    for _, frame in chunks:
+        batch = pa.RecordBatch.from_pandas(_arrow_columns(frame), schema=schema, preserve_index=False)
+        if writer is None:
+            schema = batch.schema
+            writer = pa.ipc.new_stream(sink, schema)
+        writer.write_batch(batch)
+        yield _drain(sink)
+    if writer is None:
+        writer = pa.ipc.new_stream(sink, pa.Schema.from_pandas(_arrow_columns(empty), preserve_index=False))
+    writer.close()
+    yield _drain(sink)
+
+
+def _ndjson_lines(chunks: Iterator[Tuple[str, pd.DataFrame]], key: str) -> Iterator[bytes]:
+    for value, frame in chunks:
+        records = _text_columns(frame.drop(columns=[key], errors="ignore")).to_dict("records")
+        yield dumps({key: value, "data": records}) + b"\n"
+
+
+def table_stream(
+    request: Request,
+    chunks: Iterator[Tuple[str, pd.DataFrame]],
+    empty: pd.DataFrame,
+    key: str = "stock_code"
+) -> StreamingResponse:
+    """
+    分组表格数据的流式响应 (批量K线等)，每组就绪即发送，内存中只保留当前一组
+
+    Args:
+        request: 当前请求 (读取 Accept)
+        chunks: (分组键, DataFrame) 迭代器，DataFrame 含 key 列
+        empty: 没有任何数据时 Arrow 流使用的空表 (确定列)
+        key: 分组键列名
+
+    Returns:
+        Arrow IPC 流 (每组一个 record batch，含 key 列) 或 NDJSON (每组一行 {key: 值, "data": [行字典...]})；
+        不压缩 (见 STREAM_HEADERS)
+    """
+    headers = {"Vary": "Accept", **STREAM_HEADERS}
+    if response_format(request, tabular=True) == "arrow":
+        return StreamingResponse(_arrow_batches(chunks, empty), media_type=ARROW_MEDIA_TYPE, headers=headers)
+    return StreamingResponse(_ndjson_lines(chunks, key), media_type=NDJSON_MEDIA_TYPE, headers=headers)
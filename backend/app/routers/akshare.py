@@ -1,14 +1,16 @@
 """
 AKShare 通用接口测试路由
-支持动态调用 provider/akshare 中的所有函数
+支持动态调用 provider/akshare 中的所有函数，/local 下为已同步到本地数据库的数据 (异步查询)
 """
 from typing import Any, Optional
 from fastapi import APIRouter, Query, Body
 from pydantic import BaseModel
 
+from app.responses import ETagRoute
 from app.services.akshare_service import AkshareService
+from app.services.data_service import DataService
 
-router = APIRouter(prefix="/akshare", tags=["AKShare"])
+router = APIRouter(prefix="/akshare", tags=["AKShare"], route_class=ETagRoute)
 
 
 class AkshareCallRequest(BaseModel):
@@ -71,3 +73,49 @@ async def call_function_post(request: AkshareCallRequest):
         return {"error": str(e)}
     except Exception as e:
         return {"error": str(e), "function": request.function}
+
+
+# ============ 本地数据 (异步查询数据库) ============
+
+@router.get("/local/stock_info")
+async def local_stock_info(code: Optional[str] = None, limit: int = Query(100, ge=1, le=10000)):
+    """本地股票基本信息"""
+    try:
+        return await DataService.stock_info_async(code, limit)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@router.get("/local/kline/{stock_code}")
+async def local_kline(
+    stock_code: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    since: Optional[str] = Query(None, description="增量刷新：只返回该交易日及之后的K线 (含当日)")
+):
+    """
+    本地日K线 (按日期倒序)
+
+    示例:
+    - GET /akshare/local/kline/000001?start_date=20260101&end_date=20260210
+    - GET /akshare/local/kline/000001?since=20260210 (前端已有数据的最后一个交易日)
+    """
+    try:
+        return await DataService.stock_kline_async(stock_code, start_date, end_date, limit, since)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@router.get("/local/minute/{stock_code}")
+async def local_minute(
+    stock_code: str,
+    trade_date: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    since: Optional[str] = Query(None, description="增量刷新：只返回该时间及之后的K线，如 2026-02-10 10:30")
+):
+    """本地5分钟K线 (早于数据库保留期的交易日从冷存储读取)"""
+    try:
+        return await DataService.stock_kline_minute_async(stock_code, trade_date, limit, since)
+    except Exception as e:
+        return {"error": str(e)}
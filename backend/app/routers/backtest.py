@@ -0,0 +1,232 @@
+"""
+回测 API
+"""
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Union
+
+from app.responses import STREAM_HEADERS, object_response
+from app.services.chart_lod import downsample_points
+from app.services.data_service import DataService
+from app.services.batch_backtest import BatchBacktestService
+from app.services.portfolio_backtest import PortfolioBacktester
+from app.services.execution_model import AShareExecutionModel
+from app.services.intraday_backtest import IntradayBacktester
+
+router = APIRouter(prefix="/api/backtest", tags=["backtest"])
+
+
+class BatchBacktestRequest(BaseModel):
+    """批量回测请求"""
+    start_date: str
+    end_date: str
+
+    # 策略：内置策略类型 或 BacktestStrategy id 二选一
+    strategy_type: Optional[str] = None
+    strategy_id: Optional[int] = None
+    params: Dict[str, Any] = {}
+
+    # 股票池: list=指定列表, all=stock_info 全部, filter=按条件过滤
+    universe: str = "list"
+    stock_codes: Optional[List[str]] = None
+    code_prefixes: Optional[List[str]] = None
+    exclude_st: bool = True
+    limit: Optional[int] = None
+
+    initial_capital: float = 100000
+    n_jobs: int = 4
+    shard_size: int = 50
+    min_bars: int = 50
+    # 内置策略使用向量化引擎 + A股成交模型 (T+1、涨跌停、整手、印花税)
+    fast: bool = False
+    # 复权类型: qfq前复权/hfq后复权/空字符串不复权
+    adjust: str = ""
+
+    # 汇总：排序指标 (batch_backtest.METRIC_KEYS) 和最好/最差股票数量
+    objective: str = "total_return"
+    top_n: int = 10
+
+    # 是否以 NDJSON 流式返回逐只结果
+    stream: bool = True
+
+
+def _resolve_universe(request: BatchBacktestRequest) -> List[str]:
+    if request.universe == "list":
+        if not request.stock_codes:
+            raise HTTPException(status_code=400, detail="universe=list 时必须提供 stock_codes")
+        return list(dict.fromkeys(request.stock_codes))
+    if request.universe == "all":
+        stocks = DataService.stock_universe(limit=request.limit)
+    elif request.universe == "filter":
+        stocks = DataService.stock_universe(
+            stock_codes=request.stock_codes,
+            code_prefixes=request.code_prefixes,
+            exclude_st=request.exclude_st,
+            limit=request.limit,
+        )
+    else:
+        raise HTTPException(status_code=400, detail=f"不支持的股票池类型: {request.universe}")
+    return [s.code for s in stocks]
+
+
+@router.post("/batch")
+def run_batch_backtest(request: BatchBacktestRequest):
+    """
+    批量回测：同一策略在股票池上并行运行
+
+    stream=true 时返回 application/x-ndjson，每只股票一行 {"type": "result", ...}，
+    最后一行为 {"type": "summary", ...}
+    """
+    try:
+        BatchBacktestService.check_objective(request.objective)
+        service = BatchBacktestService(
+            strategy_type=request.strategy_type,
+            strategy_id=request.strategy_id,
+            params=request.params,
+            initial_capital=request.initial_capital,
+            n_jobs=request.n_jobs,
+            shard_size=request.shard_size,
+            min_bars=request.min_bars,
+            fast=request.fast,
+            adjust=request.adjust,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    stock_codes = _resolve_universe(request)
+    if not stock_codes:
+        raise HTTPException(status_code=404, detail="股票池为空")
+
+    if request.stream:
+        return StreamingResponse(
+            service.run_ndjson(
+                stock_codes, request.start_date, request.end_date,
+                objective=request.objective, top_n=request.top_n,
+            ),
+            media_type="application/x-ndjson",
+            headers=STREAM_HEADERS,
+        )
+
+    results = list(service.run(stock_codes, request.start_date, request.end_date))
+    return {
+        "results": results,
+        "summary": BatchBacktestService.summarize(
+            results, objective=request.objective, top_n=request.top_n
+        ),
+    }
+
+
+class PortfolioBacktestRequest(BaseModel):
+    """组合回测请求"""
+    start_date: str
+    end_date: str
+
+    # 股票池，不传则为全市场
+    stock_codes: Optional[List[str]] = None
+    code_prefixes: Optional[List[str]] = None
+    exclude_st: bool = True
+
+    initial_capital: float = 1000000
+    factor: str = "momentum"
+    factor_window: int = 5
+    top_n: int = 3
+    max_positions: int = 3
+    rebalance: Union[int, str] = 5
+    commission: float = 0.001
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    min_amount: Optional[float] = None
+    # 按A股规则成交 (整手、涨跌停、印花税、最低佣金)，开启时忽略 commission
+    a_share_rules: bool = True
+    # 权益曲线最多返回的点数 (LTTB 降采样)，不传返回全部
+    max_points: Optional[int] = None
+
+
+@router.post("/portfolio")
+def run_portfolio_backtest(request: PortfolioBacktestRequest, http_request: Request):
+    """组合回测：按因子截面排序选 top_n，定期调仓 (Accept: application/msgpack 时返回 msgpack)"""
+    try:
+        backtester = PortfolioBacktester(
+            initial_capital=request.initial_capital,
+            factor=request.factor,
+            factor_window=request.factor_window,
+            top_n=request.top_n,
+            max_positions=request.max_positions,
+            rebalance=request.rebalance,
+            commission=request.commission,
+            min_price=request.min_price,
+            max_price=request.max_price,
+            min_amount=request.min_amount,
+            execution_model=AShareExecutionModel() if request.a_share_rules else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    stock_codes = request.stock_codes
+    if request.code_prefixes or request.exclude_st:
+        stock_codes = [
+            s.code for s in DataService.stock_universe(
+                stock_codes=request.stock_codes,
+                code_prefixes=request.code_prefixes,
+                exclude_st=request.exclude_st,
+            )
+        ]
+
+    try:
+        result = backtester.run(request.start_date, request.end_date, stock_codes)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    result["equity_curve"] = downsample_points(result["equity_curve"], "equity", request.max_points)
+    return object_response(http_request, result)
+
+
+class IntradayBacktestRequest(BaseModel):
+    """分钟级回测请求"""
+    stock_code: str
+    start_date: str
+    end_date: str
+
+    strategy: str = "limit_up"
+    initial_capital: float = 100000
+    lookback: int = 20
+    stop_loss_pct: Optional[float] = 5.0
+    take_profit_pct: Optional[float] = 10.0
+    max_hold_days: int = 1
+    exit_time: str = "14:50"
+    chunk_days: int = Field(20, ge=1)
+    # 权益曲线最多返回的点数 (LTTB 降采样)，不传返回全部
+    max_points: Optional[int] = None
+
+
+@router.post("/intraday")
+def run_intraday_backtest(request: IntradayBacktestRequest):
+    """分钟级回测：基于 stock_kline_minute 按交易日流式回测，支持打板和日内止盈止损"""
+    try:
+        backtester = IntradayBacktester(
+            strategy=request.strategy,
+            initial_capital=request.initial_capital,
+            lookback=request.lookback,
+            stop_loss_pct=request.stop_loss_pct,
+            take_profit_pct=request.take_profit_pct,
+            max_hold_days=request.max_hold_days,
+            exit_time=request.exit_time,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    stocks = DataService.stock_universe(stock_codes=[request.stock_code])
+    result = backtester.run(
+        request.stock_code,
+        request.start_date,
+        request.end_date,
+        stock_name=stocks[0].name if stocks else None,
+        chunk_days=request.chunk_days,
+    )
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    if "equity_curve" in result:
+        result["equity_curve"] = downsample_points(result["equity_curve"], "equity", request.max_points)
+    return result
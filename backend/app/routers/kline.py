@@ -0,0 +1,238 @@
+"""
+K线行情 API
+日K/周K/月K 与 5/15/30/60/120 分钟K线，按 Accept 头返回 JSON / Arrow IPC / msgpack
+/lod 接口按目标点数返回合并后的K线或 LTTB 降采样折线，返回大小与时间跨度无关
+since 参数只返回该时间及之后的K线 (增量刷新)，响应带 ETag，未变化时返回 304
+/bulk 一次查询多只股票的K线，逐只流式返回 (NDJSON / Arrow IPC 流)
+"""
+import itertools
+from datetime import datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+from fastapi import APIRouter, HTTPException, Query, Request
+from pydantic import BaseModel
+
+from app.responses import ETagRoute, table_response, table_stream
+from app.services.chart_lod import ChartLodService, DEFAULT_POINTS, MAX_POINTS, MIN_POINTS
+from app.services.data_service import DataService, KLINE_PANEL_COLUMNS, filter_since, parse_since
+from app.services.resample import ResampleService, DAILY_PERIODS, MINUTE_PERIODS, resample_daily
+
+router = APIRouter(prefix="/api/kline", tags=["K线"], route_class=ETagRoute)
+
+# 默认返回的自然日数
+DEFAULT_DAYS = 365
+
+# 批量接口一次最多的股票数
+MAX_BULK_CODES = 500
+
+# 增量查询时向前多读的自然日数，保证 since 所在的周/月K线完整
+SINCE_LOOKBACK_DAYS = {"daily": 0, "weekly": 7, "monthly": 31}
+
+
+def _since_start(since: str, period: str, start_date: Optional[str]) -> str:
+    """增量查询的读取起点：since 所在周期的开始，不早于 start_date"""
+    since_date = parse_since(since)[0] - timedelta(days=SINCE_LOOKBACK_DAYS.get(period, 0))
+    start = since_date.strftime("%Y%m%d")
+    return max(start, start_date.replace("-", "")) if start_date else start
+
+
+@router.get("/{stock_code}")
+def get_kline(
+    request: Request,
+    stock_code: str,
+    period: str = Query("daily", description="daily/weekly/monthly"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    adjust: str = Query("", description="qfq前复权/hfq后复权/空字符串不复权"),
+    since: Optional[str] = Query(None, description="增量刷新：只返回该交易日及之后的K线 (含 since 所在周期)"),
+):
+    """
+    日K/周K/月K
+
+    - **start_date**: 开始日期 YYYYMMDD，默认一年前
+    - **end_date**: 结束日期 YYYYMMDD，默认今天
+    - **since**: 前端已有数据的最后一个交易日，只返回之后新增或可能更新的K线 (最后一根会重新返回)
+
+    Accept: application/vnd.apache.arrow.stream 或 application/msgpack 时返回列式二进制
+    """
+    end_date = end_date or datetime.now().strftime("%Y%m%d")
+    try:
+        if since:
+            start_date = _since_start(since, period, start_date)
+        start_date = start_date or (datetime.now() - timedelta(days=DEFAULT_DAYS)).strftime("%Y%m%d")
+        if period == "daily":
+            frame = DataService.get_kline_panel([stock_code], start_date, end_date, adjust=adjust)
+        elif period in DAILY_PERIODS:
+            frame = ResampleService.kline(period, [stock_code], start_date, end_date, adjust=adjust)
+        else:
+            raise ValueError(f"不支持的周期: {period}. 支持: daily/{'/'.join(DAILY_PERIODS)}")
+        frame = filter_since(frame, since) if since else frame
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return table_response(request, frame.drop(columns=['stock_code']))
+
+
+@router.get("/{stock_code}/minute")
+def get_minute_kline(
+    request: Request,
+    stock_code: str,
+    period: int = Query(5, description="5/15/30/60/120"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    since: Optional[str] = Query(None, description="增量刷新：只返回该时间及之后的K线，如 2026-02-10 10:30"),
+):
+    """
+    分钟K线 (由5分钟数据合成，早于数据库保留期的交易日从冷存储读取)
+
+    - **start_date**: 开始日期 YYYYMMDD，默认今天
+    - **end_date**: 结束日期 YYYYMMDD，默认同 start_date
+    - **since**: 前端已有数据的最后一根K线时间，只返回该根 (可能未走完) 及之后的K线
+    """
+    try:
+        if since:
+            start_date = _since_start(since, "daily", start_date)
+            end_date = end_date or datetime.now().strftime("%Y%m%d")
+        else:
+            start_date = start_date or datetime.now().strftime("%Y%m%d")
+            end_date = end_date or start_date
+        if period == 5:
+            frame = ResampleService.load_minute(stock_code, start_date, end_date)
+        elif period in MINUTE_PERIODS:
+            frame = ResampleService.minute(stock_code, period, start_date, end_date)
+        else:
+            raise ValueError(f"不支持的分钟周期: {period}. 支持: 5/{'/'.join(map(str, MINUTE_PERIODS))}")
+        frame = filter_since(frame, since) if since else frame
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return table_response(request, frame)
+
+
+@router.get("/{stock_code}/lod")
+def get_kline_lod(
+    request: Request,
+    stock_code: str,
+    points: int = Query(DEFAULT_POINTS, ge=MIN_POINTS, le=MAX_POINTS, description="目标K线根数"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    adjust: str = Query("", description="qfq前复权/hfq后复权/空字符串不复权"),
+):
+    """
+    按目标根数合并的日K线 (开盘取首根、收盘取末根、高低取极值、量额累加)
+
+    - **points**: 目标根数 (约等于图表像素宽度)，区间内交易日少于该值时返回原始日K
+    - **start_date**/**end_date**: YYYYMMDD，默认全部历史
+
+    每根附 start_date (第一个交易日) 与 bars (合并的交易日数)，trade_date 为最后一个交易日
+    """
+    try:
+        frame = ChartLodService.daily(stock_code, points, start_date, end_date, adjust)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return table_response(request, frame)
+
+
+@router.get("/{stock_code}/minute/lod")
+def get_minute_kline_lod(
+    request: Request,
+    stock_code: str,
+    points: int = Query(DEFAULT_POINTS, ge=MIN_POINTS, le=MAX_POINTS, description="目标K线根数"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+):
+    """
+    按目标根数合并的5分钟K线
+
+    - **start_date**: 开始日期 YYYYMMDD，默认今天
+    - **end_date**: 结束日期 YYYYMMDD，默认同 start_date
+    """
+    start_date = start_date or datetime.now().strftime("%Y%m%d")
+    try:
+        frame = ChartLodService.minute(stock_code, points, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return table_response(request, frame)
+
+
+@router.get("/{stock_code}/line")
+def get_kline_line(
+    request: Request,
+    stock_code: str,
+    field: str = Query("close", description="K线字段 (close/volume/turnover_rate 等)"),
+    points: int = Query(DEFAULT_POINTS, ge=MIN_POINTS, le=MAX_POINTS, description="目标点数"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    adjust: str = Query("", description="qfq前复权/hfq后复权/空字符串不复权"),
+):
+    """
+    单个字段的折线，LTTB 降采样到 points 个点 (保留峰谷)
+
+    - **start_date**/**end_date**: YYYYMMDD，默认全部历史
+    """
+    try:
+        frame = ChartLodService.line(stock_code, field, points, start_date, end_date, adjust)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return table_response(request, frame)
+
+
+class BulkKlineRequest(BaseModel):
+    """批量K线请求"""
+    stock_codes: List[str]
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    period: str = "daily"
+    adjust: str = ""
+    columns: Optional[List[str]] = None
+
+
+def _empty_panel(columns: Optional[List[str]]) -> pd.DataFrame:
+    return pd.DataFrame(columns=['stock_code', 'trade_date'] + (columns or KLINE_PANEL_COLUMNS))
+
+
+def _bulk_chunks(
+    stock_codes: List[str], request: BulkKlineRequest, start_date: str, end_date: str
+) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """逐只产出K线 (周/月线逐只合成)，最后补上没有K线的股票 (空表)"""
+    seen = set()
+    chunks = DataService.iter_kline_panel(stock_codes, start_date, end_date, request.columns, request.adjust)
+    for stock_code, frame in chunks:
+        seen.add(stock_code)
+        yield stock_code, frame if request.period == "daily" else resample_daily(frame, request.period)
+    for stock_code in stock_codes:
+        if stock_code not in seen:
+            yield stock_code, _empty_panel(request.columns)
+
+
+@router.post("/bulk")
+def get_bulk_kline(request: BulkKlineRequest, http_request: Request):
+    """
+    批量日K/周K/月K (自选股列表等)：一次查询，按股票代码顺序逐只流式返回
+
+    - **stock_codes**: 股票代码列表，最多 MAX_BULK_CODES 只
+    - **start_date**/**end_date**: YYYYMMDD，默认近一年
+    - **period**: daily/weekly/monthly
+
+    默认返回 NDJSON，每只股票一行 {"stock_code": ..., "data": [...]}，没有K线的股票在最后返回空列表；
+    Accept: application/vnd.apache.arrow.stream 时返回 Arrow IPC 流，每只股票一个 record batch
+    """
+    stock_codes = list(dict.fromkeys(request.stock_codes))
+    if not stock_codes:
+        raise HTTPException(status_code=400, detail="stock_codes 不能为空")
+    if len(stock_codes) > MAX_BULK_CODES:
+        raise HTTPException(status_code=400, detail=f"一次最多查询 {MAX_BULK_CODES} 只股票")
+    if request.period != "daily" and request.period not in DAILY_PERIODS:
+        raise HTTPException(
+            status_code=400, detail=f"不支持的周期: {request.period}. 支持: daily/{'/'.join(DAILY_PERIODS)}"
+        )
+    end_date = request.end_date or datetime.now().strftime("%Y%m%d")
+    start_date = request.start_date or (datetime.now() - timedelta(days=DEFAULT_DAYS)).strftime("%Y%m%d")
+
+    chunks = _bulk_chunks(stock_codes, request, start_date, end_date)
+    try:
+        # 先读出第一只股票：查询参数错误在开始流式返回前以 400 返回
+        first = next(chunks, None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    chunks = itertools.chain([first] if first is not None else [], chunks)
+    return table_stream(http_request, chunks, _empty_panel(request.columns))
@@ -1,11 +1,15 @@
 """
 参数优化 API
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional, Dict, List, Any
 
+from app.responses import object_response
 from app.services.backtest_engine import BacktestEngine
+from app.services.chart_lod import downsample_points
+from app.services.data_service import DataService
 from app.services.optimizer import ParameterOptimizer
+from app.services.walk_forward import WalkForwardOptimizer
 
 router = APIRouter(prefix="/api/optimizer", tags=["optimizer"])
 
@@ -48,8 +52,15 @@ def run_optimization(
     n_iter: Optional[int] = 50,
     objective: str = "sharpe_ratio",
     param_overrides: Optional[str] = None,
+    fast: bool = False,
+    adjust: str = "",
 ):
-    """运行参数优化"""
+    """
+    运行参数优化
+
+    fast=true 时使用向量化引擎和A股成交模型 (T+1、涨跌停、整手、印花税)，适合大参数网格；
+    adjust=qfq/hfq 使用前复权/后复权价格
+    """
     if strategy_type not in STRATEGY_PARAM_GRIDS:
         raise HTTPException(
             status_code=400,
@@ -67,11 +78,10 @@ def run_optimization(
 
     engine = BacktestEngine(initial_capital)
 
-    df = engine.get_kline_dataframe(
-        stock_code,
-        start_date,
-        end_date
-    )
+    try:
+        df = engine.get_kline_dataframe(stock_code, start_date, end_date, adjust)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     if df is None or df.empty or len(df) < 50:
         raise HTTPException(
@@ -84,25 +94,25 @@ def run_optimization(
         param_grid.update(overrides)
 
     # 映射策略类型到回测函数
-    strategy_map = {
-        "ma_cross": lambda df, **p: engine.run_ma_cross(df, p.get('fast_period', 10), p.get('slow_period', 20)),
-        "rsi": lambda df, **p: engine.run_rsi(df, p.get('rsi_period', 14), p.get('rsi_upper', 70), p.get('rsi_lower', 30)),
-        "macd": lambda df, **p: engine.run_macd(df, p.get('macd_fast', 12), p.get('macd_slow', 26), p.get('macd_signal', 9)),
-        "bollinger": lambda df, **p: engine.run_bollinger(df, p.get('bb_period', 20), p.get('bb_std', 2.0)),
-        "stop_loss_profit": lambda df, **p: engine.run_stop_loss_profit(df, p.get('stop_loss_pct', 10), p.get('stop_profit_pct', 10)),
-    }
-
-    backtest_func = strategy_map.get(strategy_type)
-    if not backtest_func:
+    if strategy_type not in engine.BUILTIN_STRATEGIES:
         raise HTTPException(
             status_code=400,
             detail=f"不支持的策略类型: {strategy_type}"
         )
 
+    if fast:
+        stocks = DataService.stock_universe(stock_codes=[stock_code])
+        stock_name = stocks[0].name if stocks else None
+
+        def backtest_func(df, **p):
+            return engine.run_fast(strategy_type, df, p, stock_code=stock_code, stock_name=stock_name)
+    else:
+        def backtest_func(df, **p):
+            return engine.run_strategy(strategy_type, df, p)
+
     optimizer = ParameterOptimizer(
         param_grid=param_grid,
-        objective=objective,
-        maximize=objective != "max_drawdown"
+        objective=objective
     )
 
     optimizer.optimize(
@@ -124,6 +134,80 @@ def run_optimization(
     }
 
 
+@router.post("/walk-forward")
+def run_walk_forward(
+    request: Request,
+    stock_code: str = Query(...),
+    start_date: str = Query(...),
+    end_date: str = Query(...),
+    strategy_type: str = Query(...),
+    initial_capital: float = 100000,
+    method: str = "grid",
+    n_iter: Optional[int] = 50,
+    objective: str = "sharpe_ratio",
+    param_overrides: Optional[str] = None,
+    train_size: int = 250,
+    test_size: int = 60,
+    step: Optional[int] = None,
+    anchored: bool = False,
+    n_jobs: int = 4,
+    adjust: str = "",
+    max_points: Optional[int] = Query(None, ge=3, description="样本外权益曲线最多返回的点数 (LTTB 降采样)"),
+):
+    """
+    滚动前推优化
+
+    按交易日切分训练/测试窗口 (anchored=true 为锚定窗口)，每折在训练窗口选参、
+    测试窗口样本外验证，各折并行运行，返回拼接后的样本外权益曲线和每折参数；
+    adjust=qfq/hfq 使用前复权/后复权价格；Accept: application/msgpack 时返回 msgpack
+    """
+    if strategy_type not in STRATEGY_PARAM_GRIDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的策略类型: {strategy_type}. 支持: {list(STRATEGY_PARAM_GRIDS.keys())}"
+        )
+
+    param_grid = STRATEGY_PARAM_GRIDS[strategy_type].copy()
+    if param_overrides:
+        import json
+        try:
+            param_grid.update(json.loads(param_overrides))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="param_overrides 不是有效的 JSON")
+
+    engine = BacktestEngine(initial_capital)
+    try:
+        df = engine.get_kline_dataframe(stock_code, start_date, end_date, adjust)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if df is None or df.empty or len(df) <= train_size:
+        raise HTTPException(
+            status_code=404,
+            detail=f"未找到股票 {stock_code} 的足够K线数据 (需要多于 {train_size} 条)"
+        )
+
+    stocks = DataService.stock_universe(stock_codes=[stock_code])
+    try:
+        optimizer = WalkForwardOptimizer(
+            strategy_type=strategy_type,
+            param_grid=param_grid,
+            objective=objective,
+            train_size=train_size,
+            test_size=test_size,
+            step=step,
+            anchored=anchored,
+            method=method,
+            n_iter=n_iter or 50,
+            initial_capital=initial_capital,
+            n_jobs=n_jobs,
+        )
+        result = optimizer.run(df, stock_code=stock_code, stock_name=stocks[0].name if stocks else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["oos_equity_curve"] = downsample_points(result["oos_equity_curve"], "equity", max_points)
+    return object_response(request, result)
+
+
 @router.get("/param-grids")
 def get_param_grids():
     """获取策略参数模板"""
@@ -136,6 +220,6 @@ def get_objectives():
     return [
         {"id": "sharpe_ratio", "name": "夏普比率", "description": "风险调整后收益，越高越好"},
         {"id": "total_return", "name": "总收益率", "description": "策略总收益，越高越好"},
-        {"id": "max_drawdown", "name": "最大回撤", "description": "最大回撤幅度，越小越好"},
+        {"id": "max_drawdown", "name": "最大回撤", "description": "最大回撤 (负值)，越接近 0 越好"},
         {"id": "win_rate", "name": "胜率", "description": "盈利交易占比，越高越好"},
     ]
@@ -0,0 +1,56 @@
+"""
+选股器 API
+"""
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional, List
+
+from app.services.screener import ScreenerService
+
+router = APIRouter(prefix="/api/screener", tags=["选股器"])
+
+
+@router.get("")
+def screen_stocks(
+    min_turnover_rate: Optional[float] = None,
+    max_turnover_rate: Optional[float] = None,
+    min_volume_ratio: Optional[float] = None,
+    max_volume_ratio: Optional[float] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_amplitude: Optional[float] = None,
+    max_amplitude: Optional[float] = None,
+    min_change_pct: Optional[float] = None,
+    max_change_pct: Optional[float] = None,
+    min_consecutive_limit: Optional[int] = None,
+    limit_up_days: Optional[int] = None,
+    min_market_cap: Optional[float] = None,
+    max_market_cap: Optional[float] = None,
+    min_circulating_market_cap: Optional[float] = None,
+    max_circulating_market_cap: Optional[float] = None,
+    min_amount: Optional[float] = None,
+    exclude_st: bool = True,
+    code_prefixes: Optional[List[str]] = Query(None),
+    sort_by: str = "turnover_rate",
+    ascending: bool = False,
+    limit: int = 100,
+):
+    """
+    全市场条件选股 (最新交易日)
+
+    过滤字段与游资策略参数一致，市值单位为亿元 (按成交额/换手率估算)，
+    limit_up_days 为近5日涨停次数下限
+    """
+    filters = {
+        key: value for key, value in locals().items()
+        if key not in ("sort_by", "ascending", "limit")
+    }
+    try:
+        return ScreenerService.screen(filters, sort_by=sort_by, ascending=ascending, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/refresh")
+def refresh_screener(trade_date: Optional[str] = None):
+    """重建指标表 (默认最新交易日) 并清空筛选缓存"""
+    return ScreenerService.refresh(trade_date)
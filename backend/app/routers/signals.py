@@ -0,0 +1,77 @@
+"""
+策略信号 API
+"""
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional, List
+from datetime import datetime
+
+from app.services.signal_engine import SignalEngine
+from app.services.strategy_scanner import StrategyScanner
+
+router = APIRouter(prefix="/api/signals", tags=["策略信号"])
+
+
+@router.get("")
+def get_signals(
+    strategy_id: Optional[int] = None,
+    stock_code: Optional[str] = None,
+    signal_type: Optional[str] = None,
+    source: Optional[str] = Query(None, description="engine: 增量信号引擎，scan: 全市场扫描"),
+    limit: int = 100,
+    offset: int = 0,
+):
+    """获取策略信号列表"""
+    return SignalEngine.list_signals(
+        strategy_id=strategy_id,
+        stock_code=stock_code,
+        signal_type=signal_type,
+        source=source,
+        limit=limit,
+        offset=offset,
+    )
+
+
+@router.post("/run")
+def run_signals(
+    trade_date: Optional[str] = None,
+    strategy_ids: Optional[List[int]] = Query(None),
+    stock_codes: Optional[List[str]] = Query(None),
+):
+    """
+    增量生成策略信号
+
+    每个 (策略, 股票) 只推进到 trade_date 的一根K线，信号写入 strategy_signals
+
+    Args:
+        trade_date: 交易日期，格式 YYYYMMDD，默认今天
+    """
+    trade_date = trade_date or datetime.now().strftime("%Y%m%d")
+    try:
+        datetime.strptime(trade_date, "%Y%m%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="trade_date 格式应为 YYYYMMDD")
+    return SignalEngine().run(trade_date, strategy_ids=strategy_ids, stock_codes=stock_codes)
+
+
+@router.post("/scan")
+def scan_signals(
+    trade_date: Optional[str] = None,
+    strategy_ids: Optional[List[int]] = Query(None),
+    stock_codes: Optional[List[str]] = Query(None),
+    lookback: int = 120,
+    n_jobs: int = 4,
+    dry_run: bool = False,
+):
+    """
+    全市场策略扫描
+
+    对启用的自定义代码策略 (或指定策略) 在进程池中并行扫描当日信号，内置/预置策略由 /run 的增量信号引擎负责；
+    同一交易日重复扫描会覆盖此前的扫描信号
+    """
+    trade_date = trade_date or datetime.now().strftime("%Y%m%d")
+    try:
+        datetime.strptime(trade_date, "%Y%m%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="trade_date 格式应为 YYYYMMDD")
+    scanner = StrategyScanner(lookback=lookback, n_jobs=n_jobs)
+    return scanner.run(trade_date, strategy_ids=strategy_ids, stock_codes=stock_codes, dry_run=dry_run)
@@ -1,14 +1,22 @@
 """
 游资看板 API
-调用 DataService 获取 AKShare 数据
+调用 DataService 获取 AKShare 数据，历史日期从行情快照读取 (SnapshotService)
+响应带 ETag，前端刷新时带 If-None-Match，数据未变化返回 304
 """
 from fastapi import APIRouter, Query
 from typing import Optional
 from datetime import datetime, timedelta
 
+from app.responses import ETagRoute
 from app.services.data_service import DataService
+from app.services.limit_ladder import LimitLadderService
+from app.services.lhb_analytics import LhbEventStudy
+from app.services.lhb_seats import LhbSeatService
+from app.services.market_breadth import MarketBreadthService
+from app.services.emotion_cycle import EmotionCycleService
+from app.services.snapshot_service import SnapshotService
 
-router = APIRouter(prefix="/api/yz", tags=["游资看板"])
+router = APIRouter(prefix="/api/yz", tags=["游资看板"], route_class=ETagRoute)
 
 
 def _get_today() -> str:
@@ -60,8 +68,7 @@ def get_zt_pool(date: Optional[str] = None):
     if not date:
         date = _get_today()
     try:
-        result = DataService.get_zt_pool_em(date)
-        return {"data": result}
+        return SnapshotService.serve("zt_pool", date)
     except Exception as e:
         return {"error": str(e), "data": []}
 
@@ -72,8 +79,7 @@ def get_zt_pool_yesterday(date: Optional[str] = None):
     if not date:
         date = _get_yesterday()
     try:
-        result = DataService.get_zt_pool_previous_em(date)
-        return {"data": result}
+        return SnapshotService.serve("zt_pool_previous", date)
     except Exception as e:
         return {"error": str(e), "data": []}
 
@@ -84,8 +90,7 @@ def get_zt_pool_dtgc(date: Optional[str] = None):
     if not date:
         date = _get_today()
     try:
-        result = DataService.get_zt_pool_dtgc_em(date)
-        return {"data": result}
+        return SnapshotService.serve("zt_pool_dtgc", date)
     except Exception as e:
         return {"error": str(e), "data": []}
 
@@ -96,8 +101,43 @@ def get_zt_pool_zbgc(date: Optional[str] = None):
     if not date:
         date = _get_today()
     try:
-        result = DataService.get_zt_pool_zbgc_em(date)
-        return {"data": result}
+        return SnapshotService.serve("zt_pool_zbgc", date)
+    except Exception as e:
+        return {"error": str(e), "data": []}
+
+
+@router.get("/ladder")
+def get_limit_ladder(date: Optional[str] = None):
+    """获取连板天梯 (本地K线计算，支持任意历史交易日)"""
+    try:
+        return {"data": LimitLadderService.ladder(date)}
+    except Exception as e:
+        return {"error": str(e), "data": {}}
+
+
+@router.get("/ladder/history")
+def get_limit_ladder_history(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """获取逐日涨停/跌停/炸板数和最高连板 (默认近30天)"""
+    if not end_date:
+        end_date = _get_today()
+    if not start_date:
+        start_date = (datetime.strptime(end_date, "%Y%m%d") - timedelta(days=30)).strftime("%Y%m%d")
+    try:
+        return {"data": LimitLadderService.history(start_date, end_date)}
+    except Exception as e:
+        return {"error": str(e), "data": []}
+
+
+# ============ 行情快照 ============
+
+@router.get("/snapshots")
+def get_snapshots(dataset: Optional[str] = None, date: Optional[str] = None):
+    """获取已保存的行情快照目录"""
+    try:
+        return {"data": SnapshotService.list_snapshots(dataset, date)}
     except Exception as e:
         return {"error": str(e), "data": []}
 
@@ -105,11 +145,10 @@ def get_zt_pool_zbgc(date: Optional[str] = None):
 # ============ 资金流向 ============
 
 @router.get("/fund-flow/market")
-def get_market_fund_flow():
-    """获取大盘资金流向"""
+def get_market_fund_flow(date: Optional[str] = None, time: Optional[str] = None):
+    """获取大盘资金流向 (date/time 指定时读取历史快照)"""
     try:
-        result = DataService.get_market_fund_flow()
-        return {"data": result}
+        return SnapshotService.serve("market_fund_flow", date, time)
     except Exception as e:
         return {"error": str(e), "data": []}
 
@@ -117,22 +156,28 @@ def get_market_fund_flow():
 @router.get("/fund-flow/sector")
 def get_sector_fund_flow(
     indicator: str = "今日",
-    sector_type: str = "行业资金流"
+    sector_type: str = "行业资金流",
+    date: Optional[str] = None,
+    time: Optional[str] = None
 ):
-    """获取板块资金流"""
+    """获取板块资金流 (date/time 指定时读取历史快照)"""
     try:
-        result = DataService.get_sector_fund_flow_rank(indicator, sector_type)
-        return {"data": result}
+        return SnapshotService.serve(
+            "sector_fund_flow", date, time, indicator=indicator, sector_type=sector_type
+        )
     except Exception as e:
         return {"error": str(e), "data": []}
 
 
 @router.get("/fund-flow/individual")
-def get_individual_fund_flow(indicator: str = "今日"):
-    """获取个股资金流排名"""
+def get_individual_fund_flow(
+    indicator: str = "今日",
+    date: Optional[str] = None,
+    time: Optional[str] = None
+):
+    """获取个股资金流排名 (date/time 指定时读取历史快照)"""
     try:
-        result = DataService.get_individual_fund_flow_rank(indicator)
-        return {"data": result}
+        return SnapshotService.serve("individual_fund_flow", date, time, indicator=indicator)
     except Exception as e:
         return {"error": str(e), "data": []}
 
@@ -154,18 +199,118 @@ def get_lhb_detail(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
 ):
-    """获取龙虎榜详情"""
+    """获取龙虎榜详情 (历史区间优先读取每日快照)"""
     if not start_date:
         start_date = _get_today()
     if not end_date:
         end_date = _get_today()
     try:
+        if start_date == end_date:
+            return SnapshotService.serve("lhb_detail", start_date)
+        if end_date < _get_today():
+            rows = SnapshotService.get_range("lhb_detail", start_date, end_date)
+            if rows:
+                return {"data": rows}
         result = DataService.get_lhb_detail_em(start_date, end_date)
         return {"data": result}
     except Exception as e:
         return {"error": str(e), "data": []}
 
 
+@router.get("/lhb/event-study")
+def get_lhb_event_study(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    group_by: Optional[str] = "reason",
+    reason: Optional[str] = None,
+    stock_code: Optional[str] = None,
+    min_count: int = 1
+):
+    """
+    龙虎榜事件研究 (默认近一年)
+
+    基于已保存的龙虎榜快照，统计上榜后 1/3/5/10 日收益、胜率、最大回撤，
+    group_by 为 reason (上榜原因) / stock (个股)，不传为全部汇总
+    """
+    if not end_date:
+        end_date = _get_today()
+    if not start_date:
+        start_date = (datetime.strptime(end_date, "%Y%m%d") - timedelta(days=365)).strftime("%Y%m%d")
+    try:
+        return {"data": LhbEventStudy.study(start_date, end_date, group_by or None, reason, stock_code, min_count)}
+    except Exception as e:
+        return {"error": str(e), "data": {}}
+
+
+@router.get("/lhb/event-study/stock")
+def get_lhb_stock_events(
+    stock_code: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """个股逐次上榜及后续表现 (默认近一年)"""
+    if not end_date:
+        end_date = _get_today()
+    if not start_date:
+        start_date = (datetime.strptime(end_date, "%Y%m%d") - timedelta(days=365)).strftime("%Y%m%d")
+    try:
+        return {"data": LhbEventStudy.stock_events(stock_code, start_date, end_date)}
+    except Exception as e:
+        return {"error": str(e), "data": []}
+
+
+@router.get("/lhb/seats/search")
+def search_lhb_seats(keyword: str, limit: int = 20):
+    """按关键字查找营业部"""
+    try:
+        return {"data": LhbSeatService.search(keyword, limit)}
+    except Exception as e:
+        return {"error": str(e), "data": []}
+
+
+@router.get("/lhb/seats/ranking")
+def get_lhb_seat_ranking(
+    window: str = "1m",
+    order_by: str = "win_rate_3",
+    min_trades: int = 5,
+    limit: int = 50
+):
+    """营业部排行：窗口 1m/3m/6m/1y 内净买入后的跟随收益和胜率"""
+    try:
+        return {"data": LhbSeatService.ranking(window, order_by, min_trades, limit)}
+    except Exception as e:
+        return {"error": str(e), "data": []}
+
+
+@router.get("/lhb/seats/trades")
+def get_lhb_seat_trades(
+    seat_name: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    net_buy_only: bool = True
+):
+    """某营业部的上榜交易及跟随表现 (默认近一月)"""
+    if not end_date:
+        end_date = _get_today()
+    if not start_date:
+        start_date = (datetime.strptime(end_date, "%Y%m%d") - timedelta(days=30)).strftime("%Y%m%d")
+    try:
+        return {"data": LhbSeatService.seat_trades(seat_name, start_date, end_date, net_buy_only)}
+    except Exception as e:
+        return {"error": str(e), "data": {}}
+
+
+@router.get("/lhb/seats/stock")
+def get_lhb_stock_seats(stock_code: str, date: Optional[str] = None):
+    """某只股票某日的上榜席位 (本地席位索引)"""
+    if not date:
+        date = _get_today()
+    try:
+        return {"data": LhbSeatService.stock_seats(stock_code, date)}
+    except Exception as e:
+        return {"error": str(e), "data": []}
+
+
 @router.get("/lhb/yybph")
 def get_lhb_yybph(symbol: str = "近一月"):
     """获取营业部排行"""
@@ -281,30 +426,67 @@ def get_dzjy_mrtj(
 # ============ 市场情绪 ============
 
 @router.get("/market/activity")
-def get_market_activity():
-    """获取赚钱效应分析"""
+def get_market_activity(date: Optional[str] = None, time: Optional[str] = None):
+    """获取赚钱效应分析 (date/time 指定时读取历史快照)"""
     try:
-        result = DataService.get_market_activity_legu()
-        return {"data": result}
+        return SnapshotService.serve("market_activity", date, time)
     except Exception as e:
         return {"error": str(e), "data": []}
 
 
 @router.get("/market/high-low")
-def get_high_low_statistics(symbol: str = "all"):
-    """获取创新高/新低"""
+def get_high_low_statistics(symbol: str = "all", date: Optional[str] = None):
+    """获取创新高/新低 (date 指定时读取历史快照)"""
     try:
-        result = DataService.get_a_high_low_statistics(symbol)
-        return {"data": result}
+        return SnapshotService.serve("high_low", date, symbol=symbol)
+    except Exception as e:
+        return {"error": str(e), "data": []}
+
+
+@router.get("/market/breadth")
+def get_market_breadth(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """
+    获取逐日市场宽度 (本地K线计算，默认近90天)
+
+    涨跌家数、涨跌停数、20/60/120 日新高新低家数、站上均线比例
+    """
+    if not end_date:
+        end_date = _get_today()
+    if not start_date:
+        start_date = (datetime.strptime(end_date, "%Y%m%d") - timedelta(days=90)).strftime("%Y%m%d")
+    try:
+        return {"data": MarketBreadthService.history(start_date, end_date)}
+    except Exception as e:
+        return {"error": str(e), "data": []}
+
+
+@router.get("/emotion-cycle")
+def get_emotion_cycle(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """
+    获取逐日情绪周期 (默认近120天)
+
+    涨停家数、炸板率、跌停家数、最高板及对应的周期阶段和建议仓位
+    """
+    if not end_date:
+        end_date = _get_today()
+    if not start_date:
+        start_date = (datetime.strptime(end_date, "%Y%m%d") - timedelta(days=120)).strftime("%Y%m%d")
+    try:
+        return {"data": EmotionCycleService.history(start_date, end_date)}
     except Exception as e:
         return {"error": str(e), "data": []}
 
 
 @router.get("/market/hot-rank")
-def get_hot_rank():
-    """获取股票热度排名"""
+def get_hot_rank(date: Optional[str] = None, time: Optional[str] = None):
+    """获取股票热度排名 (date/time 指定时读取历史快照)"""
     try:
-        result = DataService.get_hot_rank_em()
-        return {"data": result}
+        return SnapshotService.serve("hot_rank", date, time)
     except Exception as e:
         return {"error": str(e), "data": []}
@@ -0,0 +1,276 @@
+"""
+复权因子 Service
+stock_kline 保存不复权K线，除权除息日由本地K线识别：涨跌幅按除权参考价计算，
+前收盘与 close / (1 + change_pct) 还原的参考价不一致的交易日即为除权日，
+两者之比为当日复权比例，写入 stock_adj_factor。
+查询时按累计因子向量化换算前复权/后复权价格，分红送转只需刷新因子，不用重新下载K线
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import DataService, _get_astock_conn, _query_dataframe, mark_synced, mysql_reads
+
+
+# 支持的复权类型 ("" 不复权)
+ADJUST_TYPES = ("", "qfq", "hfq")
+
+# 需要复权的价格字段
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+# 前收盘与还原参考价相差超过 max(MIN_GAP, 收盘价 * GAP_RATIO) 视为除权 (涨跌幅保留两位小数带来的还原误差远小于此)
+MIN_GAP = 0.006
+GAP_RATIO = 0.00015
+
+# 增量更新时回溯重扫的自然日数 (K线同步会覆盖最近的数据)
+RESCAN_DAYS = 30
+
+# 组合键: 股票序号 * DAY_SPAN + 日期序号 (1970 年以来的天数)
+DAY_SPAN = 100000
+
+
+def adjust_ratios(panel: pd.DataFrame, seed: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """
+    识别除权除息日并计算当日复权比例
+
+    参考价 = round(close / (1 + change_pct / 100), 2)，比例 = 前收盘 / 参考价 (后复权价格在除权日乘以该比例)。
+
+    Args:
+        panel: 长表K线 (需 close/change_pct)，按 (stock_code, trade_date) 排序
+        seed: {股票代码: 区间前最后一个收盘价}，区间第一根K线的前收盘
+
+    Returns:
+        stock_code, ex_date, ratio 的 DataFrame
+    """
+    frame = panel.dropna(subset=['close', 'change_pct'])
+    if frame.empty:
+        return pd.DataFrame(columns=['stock_code', 'ex_date', 'ratio'])
+
+    codes = frame['stock_code'].to_numpy()
+    close = frame['close'].to_numpy(dtype=float)
+    change_pct = frame['change_pct'].to_numpy(dtype=float)
+
+    new_code = np.ones(len(frame), dtype=bool)
+    new_code[1:] = codes[1:] != codes[:-1]
+    prev_close = np.empty(len(frame))
+    prev_close[1:] = close[:-1]
+    prev_close[new_code] = [seed.get(code, np.nan) for code in codes[new_code]] if seed else np.nan
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        reference = np.round(close / (1 + change_pct / 100), 2)
+        gap = np.abs(prev_close - reference)
+        is_ex = (gap > np.maximum(MIN_GAP, close * GAP_RATIO)) & (reference > 0) & (prev_close > 0)
+        ratio = prev_close / reference
+
+    return pd.DataFrame({
+        'stock_code': codes[is_ex],
+        'ex_date': frame['trade_date'].to_numpy()[is_ex],
+        'ratio': ratio[is_ex],
+    })
+
+
+class AdjFactorService:
+    """复权因子 (进程内缓存累计因子)"""
+
+    _lock = threading.Lock()
+    # 组合键 (升序)、对应的股票序号、累计后复权因子、每只股票的最新累计因子、股票代码 -> 序号
+    _table: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, int]]] = None
+    _version: Tuple = ()
+    _checked_at: float = 0.0
+
+    # 检查因子表是否更新的间隔 (秒)
+    CHECK_INTERVAL = 60
+
+    # ============ 计算与写入 ============
+
+    @staticmethod
+    def _seed_closes(before_date: str, stock_codes: List[str]) -> Dict[str, float]:
+        """每只股票在 before_date 之前最后一个交易日的收盘价"""
+        df = _query_dataframe(
+            f"""
+            SELECT k.stock_code, k.close FROM stock_kline k
+            JOIN (
+                SELECT stock_code, MAX(trade_date) AS trade_date FROM stock_kline
+                WHERE trade_date < %s AND stock_code IN ({', '.join(['%s'] * len(stock_codes))})
+                GROUP BY stock_code
+            ) m ON k.stock_code = m.stock_code AND k.trade_date = m.trade_date
+            """,
+            [before_date, *stock_codes],
+        )
+        if df.empty:
+            return {}
+        return {code: float(close) for code, close in zip(df['stock_code'], df['close']) if close is not None}
+
+    @classmethod
+    @mysql_reads()
+    def build(
+        cls,
+        start_date: str = None,
+        end_date: str = None,
+        stock_codes: List[str] = None,
+        shard_size: int = 500
+    ) -> Dict[str, Any]:
+        """
+        识别区间内的除权除息日并写入 stock_adj_factor (按股票分片，区间内原有记录先删除)
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD，不传则从最早的K线开始
+            end_date: 结束日期，格式 YYYYMMDD，默认今天
+            stock_codes: 股票代码，默认 stock_info 全部
+            shard_size: 每次查询的股票数
+
+        Returns:
+            {"events": 除权次数, "stocks": 股票数}
+        """
+        end_date = end_date or datetime.now().strftime("%Y%m%d")
+        codes = stock_codes or [s.code for s in DataService.stock_universe()]
+
+        events = 0
+        for i in range(0, len(codes), shard_size):
+            shard = codes[i:i + shard_size]
+            panel = DataService.get_kline_panel(
+                stock_codes=shard,
+                start_date=start_date,
+                end_date=end_date,
+                columns=['close', 'change_pct'],
+            )
+            seed = cls._seed_closes(start_date, shard) if start_date else None
+            events += cls._save(shard, adjust_ratios(panel, seed), start_date, end_date)
+
+        mark_synced('stock_adj_factor')
+        with cls._lock:
+            cls._checked_at = 0.0
+        return {"events": events, "stocks": len(codes)}
+
+    @classmethod
+    @mysql_reads()
+    def update(cls, end_date: str = None) -> Dict[str, Any]:
+        """
+        增量更新：重扫最近 RESCAN_DAYS 天的K线；因子表为空时全量计算
+        """
+        df = _query_dataframe("SELECT COUNT(*) AS cnt FROM stock_adj_factor")
+        if int(df['cnt'].iloc[0]) == 0:
+            return {"start_date": None, **cls.build(end_date=end_date)}
+        start_date = (datetime.now() - timedelta(days=RESCAN_DAYS)).strftime("%Y%m%d")
+        return {"start_date": start_date, **cls.build(start_date, end_date)}
+
+    @staticmethod
+    def _save(stock_codes: List[str], ratios: pd.DataFrame, start_date: Optional[str], end_date: str) -> int:
+        conn = _get_astock_conn()
+        try:
+            cursor = conn.cursor()
+            query = f"DELETE FROM stock_adj_factor WHERE stock_code IN ({', '.join(['%s'] * len(stock_codes))}) AND ex_date <= %s"
+            params = [*stock_codes, end_date]
+            if start_date:
+                query += " AND ex_date >= %s"
+                params.append(start_date)
+            cursor.execute(query, params)
+            if not ratios.empty:
+                cursor.executemany(
+                    "INSERT INTO stock_adj_factor (stock_code, ex_date, ratio) VALUES (%s, %s, %s)",
+                    [
+                        (code, pd.Timestamp(day).strftime("%Y-%m-%d"), float(ratio))
+                        for code, day, ratio in ratios.itertuples(index=False)
+                    ],
+                )
+            conn.commit()
+        finally:
+            conn.close()
+        return len(ratios)
+
+    # ============ 累计因子 ============
+
+    @staticmethod
+    def _data_version() -> Tuple:
+        df = _query_dataframe("SELECT COUNT(*) AS cnt, MAX(updated_at) AS updated_at FROM stock_adj_factor")
+        return int(df['cnt'].iloc[0]), str(df['updated_at'].iloc[0])
+
+    @classmethod
+    def _load_table(cls) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, int]]:
+        """读取全部复权比例并按股票累乘为后复权因子 (缓存，因子表变化时重建)"""
+        if time.time() - cls._checked_at >= cls.CHECK_INTERVAL:
+            version = cls._data_version()
+            with cls._lock:
+                cls._checked_at = time.time()
+                if version != cls._version:
+                    cls._version = version
+                    cls._table = None
+        if cls._table is not None:
+            return cls._table
+
+        df = _query_dataframe("SELECT stock_code, ex_date, ratio FROM stock_adj_factor ORDER BY stock_code, ex_date")
+        if df.empty:
+            table = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0), np.empty(0), {})
+        else:
+            codes, ids = np.unique(df['stock_code'].to_numpy(), return_inverse=True)
+            days = pd.to_datetime(df['ex_date']).to_numpy().astype('datetime64[D]').astype(np.int64)
+            factors = df['ratio'].astype(float).groupby(ids).cumprod().to_numpy()
+            latest = np.ones(len(codes))
+            latest[ids] = factors  # 按日期升序，最后写入的即最新因子
+            table = (ids * DAY_SPAN + days, ids, factors, latest, {code: i for i, code in enumerate(codes)})
+
+        with cls._lock:
+            cls._table = table
+        return table
+
+    @classmethod
+    def factors(cls, stock_codes: np.ndarray, trade_dates: np.ndarray, adjust: str) -> np.ndarray:
+        """
+        每行K线的价格乘数
+
+        Args:
+            stock_codes: 每行的股票代码
+            trade_dates: 每行的交易日期 (datetime64)
+            adjust: qfq 前复权 (以最新价格为基准) / hfq 后复权 (以上市首日为基准) / "" 不复权
+
+        Returns:
+            与输入等长的乘数数组
+        """
+        if adjust not in ADJUST_TYPES:
+            raise ValueError(f"不支持的复权类型: {adjust}. 支持: qfq/hfq/空字符串")
+        multiplier = np.ones(len(stock_codes))
+        if not adjust or len(stock_codes) == 0:
+            return multiplier
+
+        keys, ids, factors, latest, index = cls._load_table()
+        if len(keys) == 0:
+            return multiplier
+
+        row_ids = pd.Series(stock_codes).map(index).fillna(-1).to_numpy(dtype=np.int64)
+        days = np.asarray(trade_dates).astype('datetime64[D]').astype(np.int64)
+        pos = np.searchsorted(keys, row_ids * DAY_SPAN + days, side="right") - 1
+        known = row_ids >= 0
+        hit = known & (pos >= 0) & (ids[np.maximum(pos, 0)] == row_ids)
+        multiplier[hit] = factors[pos[hit]]
+        if adjust == "qfq":
+            multiplier[known] /= latest[row_ids[known]]
+        return multiplier
+
+    @classmethod
+    def adjust_panel(cls, panel: pd.DataFrame, adjust: str) -> pd.DataFrame:
+        """按复权类型换算长表K线的价格字段 (成交量、成交额、涨跌幅不变)"""
+        columns = [c for c in PRICE_COLUMNS if c in panel.columns]
+        multiplier = cls.factors(panel['stock_code'].to_numpy(), panel['trade_date'].to_numpy(), adjust)
+        if not adjust or panel.empty or not columns:
+            return panel
+        panel[columns] = panel[columns].to_numpy(dtype=float) * multiplier[:, None]
+        return panel
+
+    # ============ 查询 ============
+
+    @staticmethod
+    def history(stock_code: str) -> List[Dict[str, Any]]:
+        """单只股票的除权除息记录及累计后复权因子"""
+        df = _query_dataframe(
+            "SELECT ex_date, ratio FROM stock_adj_factor WHERE stock_code = %s ORDER BY ex_date",
+            [stock_code],
+        )
+        records = []
+        factor = 1.0
+        for row in df.itertuples():
+            factor *= float(row.ratio)
+            records.append({"ex_date": str(row.ex_date), "ratio": round(float(row.ratio), 6), "factor": round(factor, 6)})
+        return records
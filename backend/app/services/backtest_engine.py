@@ -1,14 +1,69 @@
 """
 回测引擎 Service
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import numpy as np
 import pandas as pd
 from app.services.data_service import DataService
 
 
+TRADING_DAYS_PER_YEAR = 252
+
+
+def performance_metrics(equity: pd.Series, initial_capital: float) -> Dict[str, Any]:
+    """根据权益曲线计算绩效指标 (百分比口径与 _format_stats 一致，最大回撤为负值)"""
+    returns = equity.pct_change().dropna()
+    final_value = float(equity.iloc[-1])
+    total_return = (final_value / initial_capital - 1) * 100
+    years = max(len(equity) / TRADING_DAYS_PER_YEAR, 1e-9)
+    annual_return = ((max(final_value, 0) / initial_capital) ** (1 / years) - 1) * 100
+    std = returns.std()
+    sharpe = returns.mean() / std * np.sqrt(TRADING_DAYS_PER_YEAR) if std and std > 0 else 0.0
+    drawdown = equity / equity.cummax() - 1
+
+    return {
+        "initial_capital": initial_capital,
+        "final_value": round(final_value, 2),
+        "total_return": round(float(total_return), 4),
+        "annual_return": round(float(annual_return), 4),
+        "sharpe_ratio": round(float(sharpe), 4),
+        "max_drawdown": round(float(drawdown.min() * 100), 4),
+    }
+
+
+def simulation_result(sim: Dict[str, Any], index: pd.Index, initial_capital: float) -> Dict[str, Any]:
+    """将 simulate_signals 的结果整理为与 run_strategy 一致的回测结果"""
+    equity = pd.Series(sim["equity"], index=index)
+    result = performance_metrics(equity, initial_capital)
+
+    closed = [t["pnl_pct"] for t in sim["trades"] if t["exit_time"]]
+    result.update({
+        "win_rate": sum(1 for r in closed if r > 0) / len(closed) * 100 if closed else 0.0,
+        "total_trades": len(sim["trades"]),
+        "best_trade": max(closed) if closed else 0.0,
+        "worst_trade": min(closed) if closed else 0.0,
+        "avg_trade": sum(closed) / len(closed) if closed else 0.0,
+        "blocked_buys": sim["blocked_buys"],
+        "blocked_sells": sim["blocked_sells"],
+    })
+    result['trades'] = sim["trades"]
+    result['equity_curve'] = [{'equity': float(v), 'i': i} for i, v in enumerate(sim["equity"])]
+    return result
+
+
 class BacktestEngine:
     """增强的回测引擎，返回详细交易记录"""
 
+    # 内置策略: 策略类型 -> (回测方法, 参数名及默认值，按方法参数顺序)
+    BUILTIN_STRATEGIES = {
+        "ma_cross": ("run_ma_cross", {"fast_period": 10, "slow_period": 20}),
+        "rsi": ("run_rsi", {"rsi_period": 14, "rsi_upper": 70, "rsi_lower": 30}),
+        "macd": ("run_macd", {"macd_fast": 12, "macd_slow": 26, "macd_signal": 9}),
+        "bollinger": ("run_bollinger", {"bb_period": 20, "bb_std": 2.0}),
+        "stop_loss_profit": ("run_stop_loss_profit", {"stop_loss_pct": 10, "stop_profit_pct": 10}),
+        "simple_trend": ("run_simple_trend", {}),
+    }
+
     def __init__(self, initial_capital: float = 100000):
         self.initial_capital = initial_capital
         self.trades: List[Dict] = []
@@ -18,14 +73,82 @@ class BacktestEngine:
         self,
         stock_code: str,
         start_date: str,
-        end_date: str
+        end_date: str,
+        adjust: str = ""
     ) -> pd.DataFrame:
         return DataService.get_kline_dataframe(
             stock_code=stock_code,
             start_date=start_date,
-            end_date=end_date
+            end_date=end_date,
+            adjust=adjust
+        )
+
+    def run_strategy(
+        self,
+        strategy_type: str,
+        df: pd.DataFrame,
+        params: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """按策略类型运行内置策略，未传的参数使用默认值"""
+        if strategy_type not in self.BUILTIN_STRATEGIES:
+            raise ValueError(
+                f"不支持的策略类型: {strategy_type}. 支持: {list(self.BUILTIN_STRATEGIES.keys())}"
+            )
+
+        method_name, defaults = self.BUILTIN_STRATEGIES[strategy_type]
+        params = params or {}
+        args = [params.get(name, default) for name, default in defaults.items()]
+        return getattr(self, method_name)(df, *args)
+
+    def run_fast(
+        self,
+        strategy_type: str,
+        df: pd.DataFrame,
+        params: Dict[str, Any] = None,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None,
+        model=None
+    ) -> Dict[str, Any]:
+        """
+        向量化快速回测 (A股成交规则)
+
+        信号由 signals 模块向量化生成，成交遵循 T+1、涨跌停买卖限制、100股整手、
+        印花税和最低佣金。返回格式与 run_* 方法一致，可直接用于参数优化和批量回测。
+
+        Args:
+            strategy_type: 内置策略类型
+            df: K线 DataFrame(Open, High, Low, Close, Volume)
+            params: 策略参数
+            stock_code: 股票代码，用于确定涨跌停比例 (默认按主板 10%)
+            stock_name: 股票名称，用于识别 ST
+            model: AShareExecutionModel，默认使用标准费率
+        """
+        from app.services.signals import generate_signals
+        from app.services.execution_model import AShareExecutionModel, limit_pct, simulate_signals
+
+        params = params or {}
+        df = df[['Open', 'High', 'Low', 'Close', 'Volume']].astype(float)
+        entries, exits = generate_signals(strategy_type, df, params)
+
+        stop_loss_pct = stop_profit_pct = None
+        if strategy_type == "stop_loss_profit":
+            _, defaults = self.BUILTIN_STRATEGIES[strategy_type]
+            stop_loss_pct = params.get("stop_loss_pct", defaults["stop_loss_pct"])
+            stop_profit_pct = params.get("stop_profit_pct", defaults["stop_profit_pct"])
+
+        sim = simulate_signals(
+            df,
+            entries.to_numpy(),
+            exits.to_numpy(),
+            model or AShareExecutionModel(),
+            initial_capital=self.initial_capital,
+            pct=limit_pct(stock_code, stock_name) if stock_code else 0.10,
+            stop_loss_pct=stop_loss_pct,
+            stop_profit_pct=stop_profit_pct,
         )
 
+        return simulation_result(sim, df.index, self.initial_capital)
+
     def run_ma_cross(
         self,
         df: pd.DataFrame,
@@ -51,28 +174,12 @@ class BacktestEngine:
                 )
 
             def next(self):
-                equity = self.equity
-                self.equity_curve.append({
-                    'date': self.data.index[-1] if hasattr(self.data, 'index') else len(self.equity_curve),
-                    'equity': equity
-                })
-
                 if crossover(self.sma1, self.sma2):
                     if not self.position:
                         self.buy()
-                        self.trades.append({
-                            'type': 'buy',
-                            'price': self.data.Close[-1],
-                            'index': len(self.trades)
-                        })
                 elif crossover(self.sma2, self.sma1):
                     if self.position:
                         self.sell()
-                        self.trades.append({
-                            'type': 'sell',
-                            'price': self.data.Close[-1],
-                            'index': len(self.trades)
-                        })
 
         bt = Backtest(
             df, SmaCross,
@@ -123,11 +230,9 @@ class BacktestEngine:
                 if not self.position:
                     if self.rsi[-1] < self.rsi_lower:
                         self.buy()
-                        self.trades.append({'type': 'buy', 'price': self.data.Close[-1]})
                 else:
                     if self.rsi[-1] > self.rsi_upper:
                         self.position.close()
-                        self.trades.append({'type': 'sell', 'price': self.data.Close[-1]})
 
         bt = Backtest(
             df, RsiStrategy,
@@ -175,11 +280,9 @@ class BacktestEngine:
                 if not self.position:
                     if crossover(self.hist, 0):
                         self.buy()
-                        self.trades.append({'type': 'buy', 'price': self.data.Close[-1]})
                 else:
                     if crossover(0, self.hist):
                         self.position.close()
-                        self.trades.append({'type': 'sell', 'price': self.data.Close[-1]})
 
         bt = Backtest(
             df, MacdStrategy,
@@ -221,11 +324,9 @@ class BacktestEngine:
                 if not self.position:
                     if self.data.Close[-1] < self.lower[-1]:
                         self.buy()
-                        self.trades.append({'type': 'buy', 'price': self.data.Close[-1]})
                 else:
                     if self.data.Close[-1] > self.upper[-1]:
                         self.position.close()
-                        self.trades.append({'type': 'sell', 'price': self.data.Close[-1]})
 
         bt = Backtest(
             df, BollingerStrategy,
@@ -258,11 +359,9 @@ class BacktestEngine:
                 # 阳线买入
                 if not self.position and self.data.Close[-1] > self.data.Open[-1]:
                     self.buy()
-                    self.trades.append({'type': 'buy', 'price': self.data.Close[-1]})
                 # 阴线卖出
                 elif self.position and self.data.Close[-1] < self.data.Open[-1]:
                     self.position.close()
-                    self.trades.append({'type': 'sell', 'price': self.data.Close[-1]})
 
         bt = Backtest(
             df, SimpleTrendStrategy,
@@ -301,24 +400,12 @@ class BacktestEngine:
                 if not self.position:
                     self.buy()
                     self.entry_price = self.data.Close[-1]
-                    self.trades.append({
-                        'type': 'buy',
-                        'price': self.data.Close[-1],
-                        'reason': '开仓'
-                    })
                 else:
                     pnl_pct = (self.data.Close[-1] - self.entry_price) / self.entry_price * 100
 
                     # 止损或止盈
                     if pnl_pct <= -self.stop_loss * 100 or pnl_pct >= self.stop_profit * 100:
                         self.position.close()
-                        reason = '止盈' if pnl_pct >= self.stop_profit * 100 else '止损'
-                        self.trades.append({
-                            'type': 'sell',
-                            'price': self.data.Close[-1],
-                            'reason': reason,
-                            'pnl_pct': pnl_pct
-                        })
 
         bt = Backtest(
             df, StopLossProfitStrategy,
@@ -395,18 +482,25 @@ class BacktestEngine:
             except:
                 return default
 
+        def stat(*keys):
+            # backtesting.py 不同版本的字段名不同: 'Return (%)' / 'Return [%]'
+            for key in keys:
+                if key in stats:
+                    return stats.get(key)
+            return None
+
         return {
-            "initial_capital": safe_float(stats.get('Start Equity'), self.initial_capital),
-            "final_value": safe_float(stats.get('End Equity'), 0),
-            "total_return": safe_float(stats.get('Return (%)'), 0),
-            "annual_return": safe_float(stats.get('Return (Ann.) (%)'), 0),
-            "sharpe_ratio": safe_float(stats.get('Sharpe Ratio'), 0),
-            "max_drawdown": safe_float(stats.get('Max. Drawdown (%)'), 0),
-            "win_rate": safe_float(stats.get('Win Rate (%)'), 0),
-            "total_trades": int(stats.get('# Trades', 0)),
-            "best_trade": safe_float(stats.get('Best Trade (%)'), 0),
-            "worst_trade": safe_float(stats.get('Worst Trade (%)'), 0),
-            "avg_trade": safe_float(stats.get('Avg. Trade (%)'), 0),
+            "initial_capital": safe_float(stat('Start Equity'), self.initial_capital),
+            "final_value": safe_float(stat('End Equity', 'Equity Final [$]'), 0),
+            "total_return": safe_float(stat('Return (%)', 'Return [%]'), 0),
+            "annual_return": safe_float(stat('Return (Ann.) (%)', 'Return (Ann.) [%]'), 0),
+            "sharpe_ratio": safe_float(stat('Sharpe Ratio'), 0),
+            "max_drawdown": safe_float(stat('Max. Drawdown (%)', 'Max. Drawdown [%]'), 0),
+            "win_rate": safe_float(stat('Win Rate (%)', 'Win Rate [%]'), 0),
+            "total_trades": int(stat('# Trades') or 0),
+            "best_trade": safe_float(stat('Best Trade (%)', 'Best Trade [%]'), 0),
+            "worst_trade": safe_float(stat('Worst Trade (%)', 'Worst Trade [%]'), 0),
+            "avg_trade": safe_float(stat('Avg. Trade (%)', 'Avg. Trade [%]'), 0),
         }
 
     def _get_trade_records(self, stats) -> List[Dict]:
@@ -415,6 +509,18 @@ class BacktestEngine:
         if hasattr(stats, '_trades') and stats._trades is not None:
             df = stats._trades
             for idx, row in df.iterrows():
+                # backtesting.py 0.3.x 字段: EntryTime/ExitTime/EntryPrice/ExitPrice/PnL/ReturnPct(小数)
+                if 'EntryTime' in row:
+                    trades.append({
+                        'entry_time': str(row['EntryTime']),
+                        'exit_time': str(row['ExitTime']),
+                        'entry_price': float(row.get('EntryPrice', 0)),
+                        'exit_price': float(row.get('ExitPrice', 0)),
+                        'size': int(row.get('Size', 0)),
+                        'pnl': float(row.get('PnL', 0)),
+                        'pnl_pct': float(row.get('ReturnPct', 0)) * 100,
+                    })
+                    continue
                 trades.append({
                     'entry_time': str(idx[0]) if isinstance(idx, tuple) else str(idx),
                     'exit_time': str(idx[1]) if isinstance(idx, tuple) else '',
@@ -431,7 +537,7 @@ class BacktestEngine:
         if hasattr(stats, '_equity_curve') and stats._equity_curve is not None:
             return [
                 {'equity': float(v), 'i': i}
-                for i, v in enumerate(stats._equity_curve)
+                for i, v in enumerate(stats._equity_curve['Equity'])
             ]
         return []
 
@@ -0,0 +1,270 @@
+"""
+批量回测 Service
+同一策略在整个股票池上并行回测：按分片分配到进程池，每个分片一次性批量加载K线
+"""
+import json
+from typing import Dict, Any, List, Optional, Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+from app.database import reset_engines_after_fork
+from app.services.data_service import DataService
+from app.services.backtest_engine import BacktestEngine
+from app.services.adj_factor import ADJUST_TYPES
+
+
+# 每只股票输出的指标
+METRIC_KEYS = [
+    "total_return",
+    "annual_return",
+    "sharpe_ratio",
+    "max_drawdown",
+    "win_rate",
+    "total_trades",
+    "final_value",
+]
+
+
+def _run_shard(
+    stock_codes: List[str],
+    start_date: str,
+    end_date: str,
+    strategy_type: Optional[str],
+    code: Optional[str],
+    params: Dict[str, Any],
+    initial_capital: float,
+    min_bars: int,
+    fast: bool = False,
+    names: Optional[Dict[str, str]] = None,
+    adjust: str = ""
+) -> List[Dict[str, Any]]:
+    """
+    回测一个分片 (在子进程中执行)
+
+    一次查询加载分片内所有股票的K线，再逐只回测。
+    fast=True 时内置策略使用向量化引擎和A股成交模型 (names 用于识别 ST)，
+    adjust 为复权类型
+    """
+    panel = DataService.get_kline_panel(
+        stock_codes=stock_codes,
+        start_date=start_date,
+        end_date=end_date,
+        columns=['open', 'high', 'low', 'close', 'volume'],
+        adjust=adjust
+    )
+    frames = DataService.split_kline_panel(panel)
+    engine = BacktestEngine(initial_capital)
+
+    results = []
+    for stock_code in stock_codes:
+        df = frames.get(stock_code)
+        bars = 0 if df is None else len(df)
+        if bars < min_bars:
+            results.append({
+                "stock_code": stock_code,
+                "status": "skipped",
+                "bars": bars,
+                "error": f"K线不足 {min_bars} 条",
+            })
+            continue
+
+        try:
+            if code:
+                result = engine.run_custom_strategy(df, code, params)
+            elif fast:
+                result = engine.run_fast(
+                    strategy_type, df, params,
+                    stock_code=stock_code, stock_name=(names or {}).get(stock_code),
+                )
+            else:
+                result = engine.run_strategy(strategy_type, df, params)
+        except Exception as e:
+            result = {"error": str(e)}
+
+        if "error" in result:
+            results.append({
+                "stock_code": stock_code,
+                "status": "error",
+                "bars": bars,
+                "error": result["error"],
+            })
+            continue
+
+        item = {"stock_code": stock_code, "status": "ok", "bars": bars}
+        item.update({k: result.get(k, 0) for k in METRIC_KEYS})
+        results.append(item)
+
+    return results
+
+
+class BatchBacktestService:
+    """批量回测服务"""
+
+    def __init__(
+        self,
+        strategy_type: Optional[str] = None,
+        strategy_id: Optional[int] = None,
+        params: Optional[Dict[str, Any]] = None,
+        initial_capital: float = 100000,
+        n_jobs: int = 4,
+        shard_size: int = 50,
+        min_bars: int = 50,
+        fast: bool = False,
+        adjust: str = ""
+    ):
+        if not strategy_type and not strategy_id:
+            raise ValueError("必须指定 strategy_type 或 strategy_id")
+        if strategy_type and strategy_type not in BacktestEngine.BUILTIN_STRATEGIES:
+            raise ValueError(
+                f"不支持的策略类型: {strategy_type}. 支持: {list(BacktestEngine.BUILTIN_STRATEGIES.keys())}"
+            )
+
+        self.strategy_type = strategy_type
+        self.strategy_id = strategy_id
+        self.params = dict(params or {})
+        self.initial_capital = initial_capital
+        self.n_jobs = max(1, n_jobs)
+        self.shard_size = max(1, shard_size)
+        self.min_bars = min_bars
+        self.fast = fast and not strategy_id
+        if adjust not in ADJUST_TYPES:
+            raise ValueError(f"不支持的复权类型: {adjust}. 支持: qfq/hfq/空字符串")
+        self.adjust = adjust
+        self.code: Optional[str] = None
+
+        if strategy_id:
+            self._load_strategy(strategy_id)
+
+    def _load_strategy(self, strategy_id: int):
+        """加载 BacktestStrategy 的代码，并用参数定义的默认值补全参数"""
+        from app.services.backtest_strategy_service import BacktestStrategyService
+
+        strategy = BacktestStrategyService.get(strategy_id)
+        if not strategy:
+            raise ValueError(f"策略 {strategy_id} 不存在")
+        if not strategy.get("code"):
+            raise ValueError(f"策略 {strategy_id} 没有代码")
+
+        self.code = strategy["code"]
+        defaults = {
+            p["name"]: p.get("default")
+            for p in strategy.get("params_definition") or []
+            if "name" in p and p.get("default") is not None
+        }
+        self.params = {**defaults, **self.params}
+
+    def _shards(self, stock_codes: List[str]) -> List[List[str]]:
+        return [
+            stock_codes[i:i + self.shard_size]
+            for i in range(0, len(stock_codes), self.shard_size)
+        ]
+
+    def run(self, stock_codes: List[str], start_date: str, end_date: str) -> Iterator[Dict[str, Any]]:
+        """
+        执行批量回测，按分片完成顺序逐只产出结果
+
+        Args:
+            stock_codes: 股票池
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD
+
+        Yields:
+            单只股票的回测指标
+        """
+        shards = self._shards(stock_codes)
+        names = None
+        if self.fast:
+            names = {s.code: s.name for s in DataService.stock_universe(stock_codes=stock_codes)}
+        shard_args = (
+            start_date, end_date, self.strategy_type, self.code,
+            self.params, self.initial_capital, self.min_bars, self.fast, names, self.adjust,
+        )
+
+        if self.n_jobs == 1 or len(shards) == 1:
+            for shard in shards:
+                yield from _run_shard(shard, *shard_args)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=reset_engines_after_fork) as executor:
+            futures = {executor.submit(_run_shard, shard, *shard_args): shard for shard in shards}
+            for future in as_completed(futures):
+                try:
+                    yield from future.result()
+                except Exception as e:
+                    for stock_code in futures[future]:
+                        yield {"stock_code": stock_code, "status": "error", "bars": 0, "error": str(e)}
+
+    def run_ndjson(self, stock_codes: List[str], start_date: str, end_date: str,
+                   objective: str = "total_return", top_n: int = 10) -> Iterator[str]:
+        """以 NDJSON 流输出：每只股票一行，最后一行为汇总报告"""
+        results = []
+        for item in self.run(stock_codes, start_date, end_date):
+            results.append(item)
+            yield json.dumps({"type": "result", **item}, ensure_ascii=False) + "\n"
+
+        summary = self.summarize(results, objective=objective, top_n=top_n)
+        yield json.dumps({"type": "summary", **summary}, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def check_objective(objective: str):
+        """校验排序指标 (流式输出前调用，避免全部结果发送后才报错)"""
+        if objective not in METRIC_KEYS:
+            raise ValueError(f"不支持的排序指标: {objective}. 支持: {METRIC_KEYS}")
+
+    @classmethod
+    def summarize(
+        cls,
+        results: List[Dict[str, Any]],
+        objective: str = "total_return",
+        top_n: int = 10
+    ) -> Dict[str, Any]:
+        """
+        汇总批量回测结果
+
+        Args:
+            results: run 产出的结果列表
+            objective: 排序指标，见 METRIC_KEYS
+            top_n: 最好/最差股票数量
+
+        Returns:
+            汇总报告：分布统计、最好/最差股票
+        """
+        cls.check_objective(objective)
+        df = pd.DataFrame(results)
+        summary = {
+            "total": len(df),
+            "ok": 0,
+            "skipped": int((df["status"] == "skipped").sum()) if not df.empty else 0,
+            "error": int((df["status"] == "error").sum()) if not df.empty else 0,
+            "objective": objective,
+            "distribution": {},
+            "best": [],
+            "worst": [],
+        }
+        if df.empty:
+            return summary
+
+        ok = df[df["status"] == "ok"]
+        summary["ok"] = len(ok)
+        if ok.empty:
+            return summary
+
+        for key in METRIC_KEYS:
+            values = ok[key].astype(float)
+            summary["distribution"][key] = {
+                "mean": round(float(values.mean()), 4),
+                "std": round(float(values.std(ddof=0)), 4),
+                "min": round(float(values.min()), 4),
+                "p25": round(float(values.quantile(0.25)), 4),
+                "median": round(float(values.median()), 4),
+                "p75": round(float(values.quantile(0.75)), 4),
+                "max": round(float(values.max()), 4),
+            }
+        summary["positive_ratio"] = round(float((ok["total_return"] > 0).mean() * 100), 2)
+
+        # backtesting.py 的最大回撤为负值，所有指标均为越大越好
+        ranked = ok.sort_values(objective, ascending=False)
+        columns = ["stock_code"] + METRIC_KEYS
+        summary["best"] = ranked.head(top_n)[columns].to_dict(orient="records")
+        summary["worst"] = ranked.tail(top_n)[columns].iloc[::-1].to_dict(orient="records")
+        return summary
@@ -59,3 +59,26 @@ class CacheService:
                 json.dump(data, f, ensure_ascii=False, indent=2)
         except Exception as e:
             print(f"保存交易日历失败: {e}")
+
+    @classmethod
+    def is_trading_day(cls, date: str) -> bool:
+        """
+        判断是否为交易日
+
+        Args:
+            date: 日期，格式 YYYYMMDD
+
+        Returns:
+            本地交易日历中有该日期则为交易日；没有本地日历时按周一至周五判断
+        """
+        day = datetime.strptime(date, "%Y%m%d")
+        calendar = cls._get_trade_calendar_from_local(date, date)
+        if not calendar:
+            return day.weekday() < 5
+
+        dates = {str(item.get("trade_date", item.get("日期", "")))[:10] for item in calendar}
+        target = day.strftime("%Y-%m-%d")
+        # 本地日历未覆盖的日期同样按周一至周五判断
+        if target > max(dates):
+            return day.weekday() < 5
+        return target in dates
@@ -0,0 +1,295 @@
+"""
+图表多级细节 (LOD) Service
+图表只需要与像素宽度相当的点数，返回的数据量应与时间跨度无关：
+- K线按固定根数合并为 OHLC 柱 (开盘取首根、收盘取末根、高低取极值、量额累加、涨跌幅连乘)；
+- 权益曲线、指标等折线用 LTTB (Largest-Triangle-Three-Buckets) 降采样，保留形态上的拐点。
+
+日K线的缩放金字塔 (每级合并 2 倍根数，从上市首日对齐) 按股票缓存在进程内，
+最近请求过的股票和启动时成交额最大的股票预先计算，K线/复权因子同步后失效
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import DataService, _query_dataframe, sync_versions
+
+
+# 默认/最少/最多返回点数
+DEFAULT_POINTS = 1000
+MIN_POINTS = 10
+MAX_POINTS = 10000
+
+# 累加的字段
+SUM_COLUMNS = ['volume', 'amount', 'turnover_rate']
+
+# 金字塔最粗一级的根数上限
+PYRAMID_MIN_BARS = 64
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    LTTB 降采样，返回保留点的下标 (含首尾)
+
+    每个桶选出与上一个已选点、下一个桶均值构成三角形面积最大的点
+
+    Args:
+        x: 横坐标 (单调递增的数值)
+        y: 纵坐标，NaN 的点不会被选中 (除首尾)
+        threshold: 目标点数
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+        if next_start >= n - 1 or next_end <= next_start:
+            next_start, next_end = n - 1, n
+        with np.errstate(invalid="ignore"):
+            avg_x = x[next_start:next_end].mean()
+            avg_y = np.nanmean(y[next_start:next_end]) if not np.isnan(y[next_start:next_end]).all() else y[a]
+            area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def downsample_points(records: List[Dict[str, Any]], y_key: str, max_points: Optional[int]) -> List[Dict[str, Any]]:
+    """按 LTTB 对字典列表 (权益曲线等，按时间排序) 降采样，max_points 为空时原样返回"""
+    if not max_points or len(records) <= max_points:
+        return records
+    y = np.array([r.get(y_key) if r.get(y_key) is not None else np.nan for r in records], dtype=float)
+    return [records[i] for i in lttb_indices(np.arange(len(records)), y, max(max_points, 3))]
+
+
+def aggregate_bars(frame: pd.DataFrame, size: int) -> pd.DataFrame:
+    """
+    每 size 根连续K线合并为一根 (可结合：由上一级再合并与直接由原始K线合并结果相同)
+
+    Args:
+        frame: 按时间排序的K线，可含 open/high/low/close、SUM_COLUMNS、change_pct、amplitude、avg_price；
+               其余列 (trade_date/time_minute 等) 取每组最后一根的值；bars 列为每根包含的原始根数
+        size: 每组根数
+
+    Returns:
+        相同列的 DataFrame (附 bars)
+    """
+    frame = frame if 'bars' in frame.columns else frame.assign(bars=1)
+    n = len(frame)
+    if size <= 1 or n == 0:
+        return frame.reset_index(drop=True)
+
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n) - 1
+    out = {}
+    for column in frame.columns:
+        values = frame[column].to_numpy()
+        if column == 'open':
+            out[column] = values[starts]
+        elif column == 'high':
+            out[column] = np.fmax.reduceat(values.astype(float), starts)
+        elif column == 'low':
+            out[column] = np.fmin.reduceat(values.astype(float), starts)
+        elif column in SUM_COLUMNS or column == 'bars':
+            out[column] = np.add.reduceat(np.nan_to_num(values.astype(float)), starts)
+        elif column in ('change_pct', 'amplitude', 'avg_price'):
+            continue
+        else:
+            out[column] = values[ends]
+
+    if 'change_pct' in frame.columns:
+        growth = np.multiply.reduceat(1 + np.nan_to_num(frame['change_pct'].to_numpy(dtype=float)) / 100, starts)
+        out['change_pct'] = (growth - 1) * 100
+        if 'amplitude' in frame.columns and {'high', 'low', 'close'} <= set(frame.columns):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out['amplitude'] = (out['high'] - out['low']) / (out['close'].astype(float) / growth) * 100
+    if 'avg_price' in frame.columns:
+        volume = np.nan_to_num(frame['volume'].to_numpy(dtype=float))
+        weighted = np.add.reduceat(np.nan_to_num(frame['avg_price'].to_numpy(dtype=float)) * volume, starts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out['avg_price'] = np.where(out['volume'] > 0, weighted / out['volume'], out['close'])
+
+    bars = pd.DataFrame(out)
+    bars['bars'] = bars['bars'].astype(int)
+    return bars[list(frame.columns)]
+
+
+def bucket_size(bars: int, points: int) -> int:
+    """bars 根K线压缩到不超过 points 根时每组的根数"""
+    return max(1, math.ceil(bars / max(points, 1)))
+
+
+class ChartLodService:
+    """图表 LOD (日K线缩放金字塔进程内缓存)"""
+
+    _lock = threading.Lock()
+    # (股票代码, 复权类型) -> [第 0 级原始K线, 第 1 级每 2 根合并, 第 2 级每 4 根合并, ...]，按最近使用排序
+    _pyramids: "OrderedDict[Tuple[str, str], List[pd.DataFrame]]" = OrderedDict()
+    _version: Tuple = ()
+    _checked_at: float = 0.0
+
+    CHECK_INTERVAL = 60
+    # 缓存金字塔的股票数 (最近请求的优先保留)
+    CACHE_SIZE = 200
+    # 启动时预计算的股票数 (最近一个交易日成交额最大)
+    WARM_SIZE = 50
+
+    SOURCES = ["stock_kline", "stock_adj_factor"]
+
+    @classmethod
+    def _check_version(cls):
+        if time.time() - cls._checked_at >= cls.CHECK_INTERVAL:
+            version = sync_versions(cls.SOURCES)
+            with cls._lock:
+                cls._checked_at = time.time()
+                if version != cls._version:
+                    cls._version = version
+                    cls._pyramids.clear()
+
+    @staticmethod
+    def build_pyramid(frame: pd.DataFrame) -> List[pd.DataFrame]:
+        """由原始日K线逐级合并，直到最粗一级不超过 PYRAMID_MIN_BARS 根"""
+        levels = [aggregate_bars(frame, 1)]
+        while len(levels[-1]) > PYRAMID_MIN_BARS:
+            levels.append(aggregate_bars(levels[-1], 2))
+        return levels
+
+    @classmethod
+    def _store(cls, key: Tuple[str, str], levels: List[pd.DataFrame]):
+        with cls._lock:
+            cls._pyramids[key] = levels
+            cls._pyramids.move_to_end(key)
+            while len(cls._pyramids) > cls.CACHE_SIZE:
+                cls._pyramids.popitem(last=False)
+
+    @classmethod
+    def pyramid(cls, stock_code: str, adjust: str = "") -> List[pd.DataFrame]:
+        """单只股票的缩放金字塔 (缓存，未缓存时读取全部历史日K线计算)"""
+        cls._check_version()
+        key = (stock_code, adjust)
+        with cls._lock:
+            levels = cls._pyramids.get(key)
+            if levels is not None:
+                cls._pyramids.move_to_end(key)
+                return levels
+        panel = DataService.get_kline_panel([stock_code], adjust=adjust)
+        levels = cls.build_pyramid(panel.drop(columns=['stock_code']))
+        cls._store(key, levels)
+        return levels
+
+    @classmethod
+    def precompute(cls, stock_codes: List[str], adjust: str = "") -> int:
+        """批量预计算金字塔 (一次查询多只股票)，返回计算的股票数"""
+        cls._check_version()
+        if not stock_codes:
+            return 0
+        panel = DataService.get_kline_panel(stock_codes, adjust=adjust)
+        for stock_code, frame in panel.groupby('stock_code', sort=False):
+            cls._store((stock_code, adjust), cls.build_pyramid(frame.drop(columns=['stock_code'])))
+        return panel['stock_code'].nunique() if not panel.empty else 0
+
+    @classmethod
+    def warm(cls) -> int:
+        """预计算最近一个交易日成交额最大的 WARM_SIZE 只股票"""
+        df = _query_dataframe(
+            """
+            SELECT stock_code FROM stock_kline
+            WHERE trade_date = (SELECT MAX(trade_date) FROM stock_kline)
+            ORDER BY amount DESC LIMIT %s
+            """,
+            [cls.WARM_SIZE],
+        )
+        return cls.precompute(df['stock_code'].tolist() if not df.empty else [])
+
+    @classmethod
+    def daily(
+        cls,
+        stock_code: str,
+        points: int = DEFAULT_POINTS,
+        start_date: str = None,
+        end_date: str = None,
+        adjust: str = ""
+    ) -> pd.DataFrame:
+        """
+        日K线 LOD：区间内不超过 points 根 (另加首尾两根不完整的柱)
+
+        Args:
+            stock_code: 股票代码
+            points: 目标根数
+            start_date: 开始日期，格式 YYYYMMDD，默认上市首日
+            end_date: 结束日期，格式 YYYYMMDD，默认最新
+            adjust: 复权类型：qfq前复权/hfq后复权/空字符串不复权
+
+        Returns:
+            DataFrame，列为 trade_date (柱内最后一个交易日)、start_date (柱内第一个交易日)、
+            K线字段及 bars (合并的交易日数)
+        """
+        points = min(max(points, MIN_POINTS), MAX_POINTS)
+        levels = cls.pyramid(stock_code, adjust)
+        base = levels[0]
+        if base.empty:
+            return base.assign(start_date=base['trade_date'])
+
+        dates = base['trade_date'].to_numpy()
+        first = np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date))) if start_date else 0
+        last = np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), side="right") if end_date else len(dates)
+        if last <= first:
+            return base.iloc[0:0].assign(start_date=base['trade_date'].iloc[0:0])
+
+        # 每级合并 2^level 根，取满足点数的最细一级
+        level = min(math.ceil(math.log2(bucket_size(last - first, points))), len(levels) - 1)
+        size = 2 ** level
+        lo, hi = first // size, (last - 1) // size + 1
+        bars = levels[level].iloc[lo:hi].reset_index(drop=True)
+        bars.insert(1, 'start_date', dates[np.arange(lo, hi) * size])
+        return bars
+
+    @staticmethod
+    def minute(stock_code: str, points: int = DEFAULT_POINTS, start_date: str = None, end_date: str = None) -> pd.DataFrame:
+        """
+        分钟K线 LOD：区间内的5分钟K线按固定根数合并到不超过 points 根 (不跨交易日边界对齐，按根数连续合并)
+
+        Returns:
+            DataFrame，列为 trade_date, time_minute (柱内最后一根的时间)、K线字段及 bars
+        """
+        from app.services.resample import ResampleService
+        points = min(max(points, MIN_POINTS), MAX_POINTS)
+        frame = ResampleService.load_minute(stock_code, start_date, end_date or start_date)
+        return aggregate_bars(frame, bucket_size(len(frame), points))
+
+    @classmethod
+    def line(
+        cls,
+        stock_code: str,
+        field: str = "close",
+        points: int = DEFAULT_POINTS,
+        start_date: str = None,
+        end_date: str = None,
+        adjust: str = ""
+    ) -> pd.DataFrame:
+        """
+        单个字段的折线 (收盘价、换手率等)，按 LTTB 降采样到 points 个点
+
+        Returns:
+            DataFrame，列为 trade_date 和 field
+        """
+        points = min(max(points, MIN_POINTS), MAX_POINTS)
+        panel = DataService.get_kline_panel([stock_code], start_date, end_date, [field], adjust)
+        if panel.empty:
+            return panel[['trade_date', field]]
+        x = panel['trade_date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+        keep = lttb_indices(x, panel[field].to_numpy(dtype=float), points)
+        return panel[['trade_date', field]].iloc[keep].reset_index(drop=True)
@@ -0,0 +1,202 @@
+"""
+分时数据冷存储 Service
+超出保留期的分时分区在删除前按 月份/代码段 写入 zstd 压缩的 Parquet 文件，
+文件内按 (stock_code, trade_date, time_minute) 排序，读取时只解码所需列，
+并按行组统计信息跳过不相关的股票和日期 (谓词下推)
+
+目录结构: ARCHIVE_DIR/stock_kline_minute/YYYYMM/{代码段}.parquet (整月合并后)
+         ARCHIVE_DIR/stock_kline_minute/YYYYMM/{代码段}-YYYYMMDD.parquet (逐日归档，月末合并)
+"""
+import glob
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.services.data_service import _query_mysql
+
+
+TABLE = "stock_kline_minute"
+
+MINUTE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'amount', 'avg_price']
+
+SCHEMA = pa.schema(
+    [("stock_code", pa.string()), ("trade_date", pa.date32()), ("time_minute", pa.duration("s"))]
+    + [(c, pa.float64()) for c in MINUTE_COLUMNS]
+)
+
+SORT_KEYS = ["stock_code", "trade_date", "time_minute"]
+
+
+def code_bucket(stock_code: str) -> str:
+    """代码段: 代码前三位 (600/601/000/002/300/688 ...)"""
+    return stock_code[:3]
+
+
+def _to_date(value) -> date:
+    if isinstance(value, str):
+        return datetime.strptime(value.replace("-", ""), "%Y%m%d").date()
+    return value.date() if isinstance(value, datetime) else value
+
+
+class ColdArchive:
+    """分时数据冷存储"""
+
+    ARCHIVE_DIR = "data/archive"
+
+    # Parquet 行组行数：约 100 只股票一个月的5分钟K线，按股票过滤时大部分行组可跳过
+    ROW_GROUP_SIZE = 100_000
+    COMPRESSION = "zstd"
+
+    @classmethod
+    def _month_dir(cls, month: str) -> str:
+        return os.path.join(cls.ARCHIVE_DIR, TABLE, month)
+
+    @staticmethod
+    def _write(frame: pd.DataFrame, path: str):
+        """排序后原子写入 (先写临时文件再替换)"""
+        frame = frame.sort_values(SORT_KEYS).drop_duplicates(SORT_KEYS, keep="last")
+        table = pa.Table.from_pandas(frame[SCHEMA.names], schema=SCHEMA, preserve_index=False)
+        tmp = f"{path}.tmp"
+        pq.write_table(table, tmp, compression=ColdArchive.COMPRESSION, row_group_size=ColdArchive.ROW_GROUP_SIZE)
+        os.replace(tmp, path)
+
+    # ============ 归档 ============
+
+    @classmethod
+    def archive_day(cls, trade_date) -> int:
+        """
+        将一个交易日的分时数据从数据库写入冷存储 (每个代码段一个文件，重复归档同一天会覆盖)
+
+        Args:
+            trade_date: 交易日期 (date 或 YYYYMMDD)
+
+        Returns:
+            归档行数
+        """
+        day = _to_date(trade_date)
+        df = _query_mysql(
+            f"SELECT stock_code, trade_date, time_minute, {', '.join(MINUTE_COLUMNS)} FROM {TABLE} WHERE trade_date = %s",
+            [day.isoformat()],
+        )
+        if df.empty:
+            return 0
+        df[MINUTE_COLUMNS] = df[MINUTE_COLUMNS].astype(float)
+        df['time_minute'] = pd.to_timedelta(df['time_minute'])
+
+        month_dir = cls._month_dir(day.strftime("%Y%m"))
+        os.makedirs(month_dir, exist_ok=True)
+        for bucket, group in df.groupby(df['stock_code'].map(code_bucket)):
+            cls._write(group, os.path.join(month_dir, f"{bucket}-{day.strftime('%Y%m%d')}.parquet"))
+        return len(df)
+
+    @classmethod
+    def archive_before(cls, cutoff: date) -> Dict[str, Any]:
+        """
+        归档数据库中 cutoff 之前的全部交易日 (删除分区前调用)
+
+        Returns:
+            {"days": 归档交易日数, "rows": 行数}
+        """
+        days = _query_mysql(
+            f"SELECT DISTINCT trade_date FROM {TABLE} WHERE trade_date < %s ORDER BY trade_date",
+            [_to_date(cutoff).isoformat()],
+        )
+        rows = sum(cls.archive_day(d) for d in days['trade_date']) if not days.empty else 0
+        return {"days": len(days), "rows": rows}
+
+    @classmethod
+    def compact(cls, month: str) -> int:
+        """
+        将某月的逐日文件按代码段合并为一个文件
+
+        Args:
+            month: 月份 YYYYMM
+
+        Returns:
+            合并的逐日文件数
+        """
+        month_dir = cls._month_dir(month)
+        parts = sorted(glob.glob(os.path.join(month_dir, "*-*.parquet")))
+        by_bucket: Dict[str, List[str]] = {}
+        for path in parts:
+            by_bucket.setdefault(os.path.basename(path).split("-")[0], []).append(path)
+
+        for bucket, paths in by_bucket.items():
+            target = os.path.join(month_dir, f"{bucket}.parquet")
+            sources = ([target] if os.path.exists(target) else []) + paths
+            frame = pd.concat([pq.read_table(p).to_pandas() for p in sources], ignore_index=True)
+            cls._write(frame, target)
+            for path in paths:
+                os.remove(path)
+        return len(parts)
+
+    @classmethod
+    def compact_finished(cls, today: Optional[date] = None) -> List[str]:
+        """合并所有已结束月份的逐日文件，返回合并的月份"""
+        current = (today or date.today()).strftime("%Y%m")
+        root = os.path.join(cls.ARCHIVE_DIR, TABLE)
+        months = sorted(os.listdir(root)) if os.path.isdir(root) else []
+        compacted = []
+        for month in months:
+            if month < current and glob.glob(os.path.join(cls._month_dir(month), "*-*.parquet")):
+                cls.compact(month)
+                compacted.append(month)
+        return compacted
+
+    # ============ 读取 ============
+
+    @classmethod
+    def files(cls, stock_code: str, start_date, end_date) -> List[str]:
+        """区间内包含该股票所在代码段的文件"""
+        start, end = _to_date(start_date), _to_date(end_date)
+        bucket = code_bucket(stock_code)
+        paths = []
+        month = date(start.year, start.month, 1)
+        while month <= end:
+            month_dir = cls._month_dir(month.strftime("%Y%m"))
+            paths.extend(sorted(glob.glob(os.path.join(month_dir, f"{bucket}.parquet"))))
+            paths.extend(sorted(glob.glob(os.path.join(month_dir, f"{bucket}-*.parquet"))))
+            month = (month + timedelta(days=32)).replace(day=1)
+        return paths
+
+    @classmethod
+    def read_minute(
+        cls,
+        stock_code: str,
+        start_date,
+        end_date,
+        columns: List[str] = None
+    ) -> pd.DataFrame:
+        """
+        读取冷存储中的分时数据
+
+        Args:
+            stock_code: 股票代码
+            start_date: 开始日期 (date 或 YYYYMMDD)
+            end_date: 结束日期 (date 或 YYYYMMDD)
+            columns: 需要的行情字段，默认 MINUTE_COLUMNS
+
+        Returns:
+            DataFrame，列为 trade_date(date), time_minute(Timedelta) 及所选字段，按时间排序
+        """
+        columns = columns or MINUTE_COLUMNS
+        start, end = _to_date(start_date), _to_date(end_date)
+        filters = [("stock_code", "=", stock_code), ("trade_date", ">=", start), ("trade_date", "<=", end)]
+
+        frames = [
+            pq.read_table(path, columns=['trade_date', 'time_minute'] + columns, filters=filters).to_pandas()
+            for path in cls.files(stock_code, start, end)
+        ]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=['trade_date', 'time_minute'] + columns)
+        frame = pd.concat(frames, ignore_index=True)
+        frame['time_minute'] = frame['time_minute'].astype('timedelta64[ns]')
+        # 同一天可能同时存在于合并文件和重复归档的逐日文件中
+        return frame.drop_duplicates(['trade_date', 'time_minute'], keep="last").sort_values(
+            ['trade_date', 'time_minute']
+        ).reset_index(drop=True)
@@ -1,32 +1,228 @@
 """
 统一数据服务层
-- stock_info, stock_kline, stock_kline_minute: 查询数据库
+- stock_info, stock_kline, stock_kline_minute: 查询数据库 (MySQL，或 MARKET_DB_BACKEND 指定的嵌入式 DuckDB/SQLite)
 - 其他方法: 直接调用 provider/akshare 接口
 """
-from typing import List, Optional, Any
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Any, Dict, Iterator, Tuple
 from datetime import date, datetime, timedelta
 import pymysql
+import numpy as np
 import pandas as pd
 from sqlmodel import Session, select
 
+from app.config import settings
+from app.database import market_engine, get_async_market_engine
 from app.models.stock_info import StockInfo
 from app.models.stock_kline import StockKline
 from app.models.stock_kline_minute import StockKlineMinute
+from app.services.market_store import format_time
 
-# astock 数据库连接配置
-ASTOCK_DB_CONFIG = {
-    'host': '127.0.0.1',
-    'port': 13306,
-    'user': 'root',
-    'password': 'asset123456',
-    'database': 'astock',
-    'charset': 'utf8mb4'
-}
+# get_kline_panel 支持的字段
+KLINE_PANEL_COLUMNS = [
+    'open', 'high', 'low', 'close', 'volume',
+    'amount', 'amplitude', 'change_pct', 'turnover_rate',
+]
 
 
 def _get_astock_conn():
-    """获取astock数据库连接"""
-    return pymysql.connect(**ASTOCK_DB_CONFIG)
+    """获取astock数据库连接 (取自 market_engine 连接池，close() 归还连接)"""
+    return market_engine.raw_connection()
+
+
+# mysql_reads() 范围内的读取不走嵌入式库
+_force_mysql: ContextVar[bool] = ContextVar("force_mysql", default=False)
+
+
+def _embedded() -> bool:
+    """读取查询是否走嵌入式行情库"""
+    return settings.MARKET_DB_BACKEND != "mysql" and not _force_mysql.get()
+
+
+@contextmanager
+def mysql_reads():
+    """
+    范围内的读取查询一律查 MySQL (可作装饰器)
+
+    嵌入式库是导出时的只读副本，先读后写 MySQL 的任务 (因子/连板/宽度/情绪周期的增量更新、
+    分区管理、冷存储归档) 必须基于 MySQL 中的最新数据，否则会按过期数据删除或改写
+    """
+    token = _force_mysql.set(True)
+    try:
+        yield
+    finally:
+        _force_mysql.reset(token)
+
+
+def _query_mysql(query: str, params: list = None) -> pd.DataFrame:
+    """在 MySQL 上执行查询并返回 DataFrame (不受 MARKET_DB_BACKEND 影响)"""
+    conn = _get_astock_conn()
+    try:
+        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        cursor.execute(query, params or [])
+        results = cursor.fetchall()
+    finally:
+        conn.close()
+    return pd.DataFrame(results)
+
+
+def _query_dataframe(query: str, params: list = None) -> pd.DataFrame:
+    """执行查询并返回 DataFrame (嵌入式后端时查询本地行情库；写入和 mysql_reads() 范围内的读取走 MySQL)"""
+    if _embedded():
+        from app.services.market_store import query_dataframe
+        return query_dataframe(query, params)
+    return _query_mysql(query, params)
+
+
+async def _query_dataframe_async(query: str, params: list = None) -> pd.DataFrame:
+    """异步执行查询并返回 DataFrame (async def 路由使用，等待数据库时不占用线程池)"""
+    if _embedded():
+        # 嵌入式库在进程内执行，没有网络等待，放到线程中避免阻塞事件循环
+        from app.services.market_store import query_dataframe
+        return await asyncio.to_thread(query_dataframe, query, params)
+    async with get_async_market_engine().connect() as conn:
+        result = await conn.exec_driver_sql(query, tuple(params or []))
+        results = [dict(r) for r in result.mappings().all()]
+    return pd.DataFrame(results)
+
+
+def _iter_query(query: str, params: list = None, batch_size: int = 50_000) -> Iterator[pd.DataFrame]:
+    """
+    分批读取查询结果 (MySQL 使用服务端游标，内存中最多保留一批)，用于流式响应
+    """
+    if _embedded():
+        from app.services.market_store import iter_query
+        yield from iter_query(query, params, batch_size)
+        return
+    conn = _get_astock_conn()
+    try:
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        cursor.execute(query, params or [])
+        columns = [c[0] for c in cursor.description]
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield pd.DataFrame(list(rows), columns=columns)
+        finally:
+            # 提前结束时读完剩余结果，连接才能归还连接池
+            cursor.close()
+    finally:
+        conn.close()
+
+
+HOT_MINUTE_START_SQL = "SELECT MIN(trade_date) AS trade_date FROM stock_kline_minute"
+
+
+def _clip_cold_range(start_date: str, end_date: str, hot: pd.DataFrame) -> Optional[Tuple[date, date]]:
+    start = datetime.strptime(str(start_date).replace("-", ""), "%Y%m%d").date()
+    end = datetime.strptime(str(end_date).replace("-", ""), "%Y%m%d").date()
+    hot_start = hot['trade_date'].iloc[0] if not hot.empty else None
+    if hot_start is not None:
+        end = min(end, hot_start - timedelta(days=1))
+    return (start, end) if start <= end else None
+
+
+def _cold_minute_range(start_date: str, end_date: str) -> Optional[Tuple[date, date]]:
+    """
+    区间内需要从冷存储读取的部分：数据库中最早的分时交易日之前的日期
+
+    Returns:
+        (开始, 结束) 日期，全部在数据库中时返回 None
+    """
+    return _clip_cold_range(start_date, end_date, _query_dataframe(HOT_MINUTE_START_SQL))
+
+
+async def _cold_minute_range_async(start_date: str, end_date: str) -> Optional[Tuple[date, date]]:
+    """_cold_minute_range 的异步版本"""
+    return _clip_cold_range(start_date, end_date, await _query_dataframe_async(HOT_MINUTE_START_SQL))
+
+
+def _read_cold_minute(stock_code: str, start_date, end_date, columns: List[str] = None) -> pd.DataFrame:
+    """冷存储中的分时数据 (需要时才导入 pyarrow)"""
+    from app.services.cold_archive import ColdArchive
+    return ColdArchive.read_minute(stock_code, start_date, end_date, columns)
+
+
+def mark_synced(dataset: str):
+    """记录数据集 (表名) 的同步时间，进程内缓存据此判断是否失效"""
+    conn = _get_astock_conn()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO data_sync_version (dataset, synced_at) VALUES (%s, NOW(6))
+            ON DUPLICATE KEY UPDATE synced_at=VALUES(synced_at)
+            """,
+            [dataset],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def sync_versions(datasets: List[str]) -> Tuple:
+    """数据集最近一次同步时间，未记录的为 None"""
+    df = _query_dataframe(
+        f"SELECT dataset, synced_at FROM data_sync_version WHERE dataset IN ({', '.join(['%s'] * len(datasets))})",
+        list(datasets),
+    )
+    synced = dict(zip(df['dataset'], df['synced_at'])) if not df.empty else {}
+    return tuple(str(synced.get(d)) for d in datasets)
+
+
+def parse_since(since: str) -> Tuple[date, Optional[timedelta]]:
+    """
+    解析增量查询的起点
+
+    Args:
+        since: 交易日 YYYYMMDD / YYYY-MM-DD，或时间戳 YYYYMMDD HH:MM、ISO 时间 (2024-01-02T10:30)、Unix 秒
+
+    Returns:
+        (交易日, 当日时间)，只给出日期时时间为 None
+    """
+    text = str(since).strip()
+    try:
+        if text.isdigit() and len(text) == 8:
+            return datetime.strptime(text, "%Y%m%d").date(), None
+        if text.isdigit():
+            moment = pd.Timestamp(datetime.fromtimestamp(int(text)))
+        else:
+            moment = pd.Timestamp(text.replace("T", " ") if len(text) > 8 and text[8] in " T" else text)
+    except (ValueError, OverflowError):
+        raise ValueError(f"无效的 since: {since}，应为 YYYYMMDD、YYYY-MM-DD HH:MM 或 Unix 时间戳")
+    if moment.tzinfo is not None:
+        moment = moment.tz_convert(None)
+    has_time = any(c in text for c in ": T") or text.isdigit()
+    return moment.date(), (moment - moment.normalize()).to_pytimedelta() if has_time else None
+
+
+def filter_since(frame: pd.DataFrame, since: str) -> pd.DataFrame:
+    """
+    保留 since 及之后的行 (含 since 当日/当根，其数据可能在收盘前被更新)
+
+    Args:
+        frame: 含 trade_date (日期) 列，分钟数据另含 time_minute (Timedelta，K线结束时间)
+        since: 见 parse_since
+    """
+    if frame.empty:
+        return frame
+    since_date, since_time = parse_since(since)
+    dates = pd.to_datetime(frame['trade_date'])
+    mask = dates >= pd.Timestamp(since_date)
+    if since_time is not None and 'time_minute' in frame.columns:
+        mask = (dates > pd.Timestamp(since_date)) | (
+            (dates == pd.Timestamp(since_date)) & (frame['time_minute'] >= pd.Timedelta(since_time))
+        )
+    return frame[mask.to_numpy()].reset_index(drop=True)
+
+
+def _records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """查询结果 -> 字典列表 (缺失值为 None)"""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
 
 
 class DataService:
@@ -34,6 +230,66 @@ class DataService:
 
     # ============ 数据库查询方法 ============
 
+    @staticmethod
+    def _stock_info_query(code: str = None, limit: int = 100) -> Tuple[str, list]:
+        if code:
+            return "SELECT * FROM stock_info WHERE code = %s LIMIT %s", [code, limit]
+        return "SELECT * FROM stock_info LIMIT %s", [limit]
+
+    @staticmethod
+    def _stock_kline_query(
+        stock_code: str, start_date: str, end_date: str, limit: int, since: str = None
+    ) -> Tuple[str, list]:
+        query = "SELECT * FROM stock_kline WHERE stock_code = %s"
+        params = [stock_code]
+
+        if since:
+            query += " AND trade_date >= %s"
+            params.append(parse_since(since)[0].isoformat())
+        if start_date:
+            query += " AND trade_date >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND trade_date <= %s"
+            params.append(end_date)
+
+        query += " ORDER BY trade_date DESC LIMIT %s"
+        params.append(limit)
+        return query, params
+
+    @staticmethod
+    def _stock_kline_minute_query(
+        stock_code: str, trade_date: str, limit: int, since: str = None
+    ) -> Tuple[str, list]:
+        query = "SELECT * FROM stock_kline_minute WHERE stock_code = %s"
+        params = [stock_code]
+
+        if trade_date:
+            query += " AND trade_date = %s"
+            params.append(trade_date)
+        if since:
+            since_date, since_time = parse_since(since)
+            if since_time is None:
+                query += " AND trade_date >= %s"
+                params.append(since_date.isoformat())
+            else:
+                query += " AND (trade_date > %s OR (trade_date = %s AND time_minute >= %s))"
+                params.extend([since_date.isoformat(), since_date.isoformat(), format_time(since_time)])
+
+        query += " ORDER BY trade_date ASC, time_minute ASC LIMIT %s"
+        params.append(limit)
+        return query, params
+
+    @staticmethod
+    def _cold_minute_records(stock_code: str, df: pd.DataFrame) -> List[StockKlineMinute]:
+        return [
+            StockKlineMinute(
+                stock_code=stock_code,
+                **{**r, "time_minute": (datetime.min + r["time_minute"]).time()},
+            )
+            for r in df.to_dict("records")
+        ]
+
     @staticmethod
     def stock_info(code: str = None, limit: int = 100) -> List[StockInfo]:
         """
@@ -46,25 +302,22 @@ class DataService:
         Returns:
             股票信息列表
         """
-        conn = _get_astock_conn()
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
-
-        if code:
-            cursor.execute("SELECT * FROM stock_info WHERE code = %s LIMIT %s", (code, limit))
-        else:
-            cursor.execute("SELECT * FROM stock_info LIMIT %s", (limit,))
+        df = _query_dataframe(*DataService._stock_info_query(code, limit))
+        return [StockInfo(**r) for r in _records(df)]
 
-        results = cursor.fetchall()
-        conn.close()
-
-        return [StockInfo(**r) for r in results]
+    @staticmethod
+    async def stock_info_async(code: str = None, limit: int = 100) -> List[StockInfo]:
+        """stock_info 的异步版本"""
+        df = await _query_dataframe_async(*DataService._stock_info_query(code, limit))
+        return [StockInfo(**r) for r in _records(df)]
 
     @staticmethod
     def stock_kline(
         stock_code: str,
         start_date: str = None,
         end_date: str = None,
-        limit: int = 1000
+        limit: int = 1000,
+        since: str = None
     ) -> List[StockKline]:
         """
         查询日K线数据
@@ -74,37 +327,34 @@ class DataService:
             start_date: 开始日期，格式 YYYYMMDD
             end_date: 结束日期，格式 YYYYMMDD
             limit: 返回数量限制
+            since: 增量查询，只返回该交易日及之后的K线 (含当日，收盘前可能被更新)
 
         Returns:
             K线数据列表
         """
-        conn = _get_astock_conn()
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
-
-        query = "SELECT * FROM stock_kline WHERE stock_code = %s"
-        params = [stock_code]
-
-        if start_date:
-            query += " AND trade_date >= %s"
-            params.append(start_date)
-        if end_date:
-            query += " AND trade_date <= %s"
-            params.append(end_date)
+        df = _query_dataframe(*DataService._stock_kline_query(stock_code, start_date, end_date, limit, since))
+        return [StockKline(**r) for r in _records(df)]
 
-        query += " ORDER BY trade_date DESC LIMIT %s"
-        params.append(limit)
-
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
-
-        return [StockKline(**r) for r in results]
+    @staticmethod
+    async def stock_kline_async(
+        stock_code: str,
+        start_date: str = None,
+        end_date: str = None,
+        limit: int = 1000,
+        since: str = None
+    ) -> List[StockKline]:
+        """stock_kline 的异步版本"""
+        df = await _query_dataframe_async(
+            *DataService._stock_kline_query(stock_code, start_date, end_date, limit, since)
+        )
+        return [StockKline(**r) for r in _records(df)]
 
     @staticmethod
     def stock_kline_minute(
         stock_code: str,
         trade_date: str = None,
-        limit: int = 1000
+        limit: int = 1000,
+        since: str = None
     ) -> List[StockKlineMinute]:
         """
         查询分时数据
@@ -113,34 +363,134 @@ class DataService:
             stock_code: 股票代码
             trade_date: 交易日期，格式 YYYYMMDD
             limit: 返回数量限制
+            since: 增量查询，只返回该时间及之后的K线 (交易日或 YYYY-MM-DD HH:MM，含该根)
 
         Returns:
-            分时数据列表
+            分时数据列表 (早于数据库保留期的交易日从冷存储读取)
         """
-        conn = _get_astock_conn()
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
+        if trade_date and _cold_minute_range(trade_date, trade_date):
+            df = _read_cold_minute(stock_code, trade_date, trade_date)
+            df = filter_since(df, since) if since else df
+            return DataService._cold_minute_records(stock_code, df.head(limit))
 
-        query = "SELECT * FROM stock_kline_minute WHERE stock_code = %s"
-        params = [stock_code]
+        df = _query_dataframe(*DataService._stock_kline_minute_query(stock_code, trade_date, limit, since))
+        return [StockKlineMinute(**r) for r in _records(df)]
 
-        if trade_date:
-            query += " AND trade_date = %s"
-            params.append(trade_date)
+    @staticmethod
+    async def stock_kline_minute_async(
+        stock_code: str,
+        trade_date: str = None,
+        limit: int = 1000,
+        since: str = None
+    ) -> List[StockKlineMinute]:
+        """stock_kline_minute 的异步版本 (冷存储为本地文件，读取放到线程中执行)"""
+        if trade_date and await _cold_minute_range_async(trade_date, trade_date):
+            df = await asyncio.to_thread(_read_cold_minute, stock_code, trade_date, trade_date)
+            df = filter_since(df, since) if since else df
+            return DataService._cold_minute_records(stock_code, df.head(limit))
+
+        df = await _query_dataframe_async(
+            *DataService._stock_kline_minute_query(stock_code, trade_date, limit, since)
+        )
+        return [StockKlineMinute(**r) for r in _records(df)]
 
-        query += " ORDER BY time_minute ASC LIMIT %s"
-        params.append(limit)
+    @staticmethod
+    def iter_minute_days(
+        stock_code: str,
+        start_date: str,
+        end_date: str,
+        chunk_days: int = 20
+    ) -> Iterator[Tuple[date, pd.DataFrame]]:
+        """
+        按交易日流式读取分时数据 (用于分钟级回测)
 
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        conn.close()
+        先查询区间内有分时数据的交易日，再每 chunk_days 个交易日查询一次，
+        内存中最多保留一个分块，适合长区间回测。早于数据库保留期的交易日
+        按月从冷存储读取。
 
-        return [StockKlineMinute(**r) for r in results]
+        Args:
+            stock_code: 股票代码
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD
+            chunk_days: 每次查询的交易日数
+
+        Yields:
+            (trade_date, DataFrame)，DataFrame 列为 time(距当日0点的 Timedelta),
+            open, high, low, close, volume, amount，按时间排序
+        """
+        columns = ['open', 'high', 'low', 'close', 'volume', 'amount']
+        cold = _cold_minute_range(start_date, end_date)
+        if cold:
+            month_start, cold_end = cold
+            while month_start <= cold_end:
+                next_month = (month_start.replace(day=1) + timedelta(days=32)).replace(day=1)
+                df = _read_cold_minute(stock_code, month_start, min(next_month - timedelta(days=1), cold_end), columns)
+                df['time'] = df['time_minute']
+                for trade_date, group in df.groupby('trade_date', sort=True):
+                    yield trade_date, group[['time'] + columns].reset_index(drop=True)
+                month_start = next_month
+
+        days = _query_dataframe(
+            """
+            SELECT DISTINCT trade_date FROM stock_kline_minute
+            WHERE stock_code = %s AND trade_date >= %s AND trade_date <= %s
+            ORDER BY trade_date ASC
+            """,
+            [stock_code, start_date, end_date],
+        )
+        if days.empty:
+            return
+
+        trade_dates = days['trade_date'].tolist()
+        chunk_days = max(1, chunk_days)
+        for i in range(0, len(trade_dates), chunk_days):
+            chunk = trade_dates[i:i + chunk_days]
+            df = _query_dataframe(
+                f"""
+                SELECT trade_date, time_minute, {', '.join(columns)}
+                FROM stock_kline_minute
+                WHERE stock_code = %s AND trade_date >= %s AND trade_date <= %s
+                ORDER BY trade_date ASC, time_minute ASC
+                """,
+                [stock_code, chunk[0], chunk[-1]],
+            )
+            if df.empty:
+                continue
+            df[columns] = df[columns].astype(float)
+            df['time'] = pd.to_timedelta(df['time_minute'])
+            for trade_date, group in df.groupby('trade_date', sort=True):
+                yield trade_date, group[['time'] + columns].reset_index(drop=True)
+
+    @staticmethod
+    def get_prev_close(stock_code: str, trade_date: str) -> Optional[float]:
+        """
+        获取某交易日之前最近一个交易日的收盘价 (日K线)
+
+        Args:
+            stock_code: 股票代码
+            trade_date: 交易日期，格式 YYYYMMDD
+
+        Returns:
+            收盘价，没有数据返回 None
+        """
+        df = _query_dataframe(
+            """
+            SELECT close FROM stock_kline
+            WHERE stock_code = %s AND trade_date < %s
+            ORDER BY trade_date DESC LIMIT 1
+            """,
+            [stock_code, trade_date],
+        )
+        if df.empty or df['close'].iloc[0] is None:
+            return None
+        return float(df['close'].iloc[0])
 
     @staticmethod
     def get_kline_dataframe(
         stock_code: str,
         start_date: str,
-        end_date: str
+        end_date: str,
+        adjust: str = ""
     ) -> pd.DataFrame:
         """
         获取K线DataFrame (用于回测)
@@ -149,31 +499,275 @@ class DataService:
             stock_code: 股票代码
             start_date: 开始日期，格式 YYYYMMDD
             end_date: 结束日期，格式 YYYYMMDD
+            adjust: 复权类型：qfq前复权/hfq后复权/空字符串不复权
 
         Returns:
             DataFrame
         """
-        conn = _get_astock_conn()
-        cursor = conn.cursor(pymysql.cursors.DictCursor)
-
-        query = """
+        df = _query_dataframe(
+            """
             SELECT trade_date, open, high, low, close, volume
             FROM stock_kline
             WHERE stock_code = %s AND trade_date >= %s AND trade_date <= %s
             ORDER BY trade_date ASC
-        """
-        cursor.execute(query, (stock_code, start_date, end_date))
-        results = cursor.fetchall()
-        conn.close()
-
-        if not results:
+            """,
+            [stock_code, start_date, end_date],
+        )
+        if df.empty:
             return pd.DataFrame()
 
-        df = pd.DataFrame(results)
         df.columns = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
         df.set_index('Date', inplace=True)
+        if adjust:
+            from app.services.adj_factor import AdjFactorService
+            multiplier = AdjFactorService.factors(
+                np.full(len(df), stock_code), pd.to_datetime(df.index).to_numpy(), adjust
+            )
+            prices = ['Open', 'High', 'Low', 'Close']
+            df[prices] = df[prices].to_numpy(dtype=float) * multiplier[:, None]
+        return df
+
+    @staticmethod
+    def stock_universe(
+        stock_codes: List[str] = None,
+        code_prefixes: List[str] = None,
+        exclude_st: bool = False,
+        limit: int = None
+    ) -> List[StockInfo]:
+        """
+        查询股票池
+
+        Args:
+            stock_codes: 指定股票代码，不传则取 stock_info 全部
+            code_prefixes: 代码前缀过滤，如 ["60", "00"]
+            exclude_st: 是否剔除 ST/*ST
+            limit: 返回数量限制
+
+        Returns:
+            股票信息列表 (按代码排序)
+        """
+        results = _records(_query_dataframe("SELECT code, name FROM stock_info ORDER BY code"))
+
+        wanted = set(stock_codes) if stock_codes else None
+        prefixes = tuple(code_prefixes) if code_prefixes else None
+
+        universe = []
+        for r in results:
+            if wanted is not None and r['code'] not in wanted:
+                continue
+            if prefixes and not r['code'].startswith(prefixes):
+                continue
+            if exclude_st and 'ST' in (r['name'] or '').upper():
+                continue
+            universe.append(StockInfo(**r))
+            if limit and len(universe) >= limit:
+                break
+        return universe
+
+    @staticmethod
+    def get_kline_panel(
+        stock_codes: List[str] = None,
+        start_date: str = None,
+        end_date: str = None,
+        columns: List[str] = None,
+        adjust: str = ""
+    ) -> pd.DataFrame:
+        """
+        批量获取多只股票的K线 (一次查询，长表格式)
+
+        Args:
+            stock_codes: 股票代码列表，不传则取全市场
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD
+            columns: 需要的字段，默认 KLINE_PANEL_COLUMNS
+            adjust: 复权类型：qfq前复权/hfq后复权/空字符串不复权 (只换算开高低收)
+
+        Returns:
+            DataFrame，列为 stock_code, trade_date 及所选字段，按 (stock_code, trade_date) 排序
+        """
+        query, params, columns = DataService._kline_panel_query(stock_codes, start_date, end_date, columns)
+        return DataService._kline_panel_frame(_query_dataframe(query, params), columns, adjust)
+
+    @staticmethod
+    async def get_kline_panel_async(
+        stock_codes: List[str] = None,
+        start_date: str = None,
+        end_date: str = None,
+        columns: List[str] = None,
+        adjust: str = ""
+    ) -> pd.DataFrame:
+        """get_kline_panel 的异步版本 (复权因子使用进程内缓存)"""
+        query, params, columns = DataService._kline_panel_query(stock_codes, start_date, end_date, columns)
+        return DataService._kline_panel_frame(await _query_dataframe_async(query, params), columns, adjust)
+
+    @staticmethod
+    def iter_kline_panel(
+        stock_codes: List[str],
+        start_date: str = None,
+        end_date: str = None,
+        columns: List[str] = None,
+        adjust: str = "",
+        batch_size: int = 50_000
+    ) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """
+        批量读取多只股票的K线，逐只产出 (一次查询，按股票顺序流式读取)
+
+        内存中最多保留一批结果和一只股票的K线，第一只股票读完即可产出，适合批量接口流式返回
+
+        Args:
+            stock_codes: 股票代码列表
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD
+            columns: 需要的字段，默认 KLINE_PANEL_COLUMNS
+            adjust: 复权类型：qfq前复权/hfq后复权/空字符串不复权
+            batch_size: 每批读取的行数
+
+        Yields:
+            (stock_code, DataFrame)，DataFrame 格式同 get_kline_panel；没有K线的股票不产出
+        """
+        query, params, columns = DataService._kline_panel_query(stock_codes, start_date, end_date, columns)
+        pending = None
+        for batch in _iter_query(query, params, batch_size):
+            if pending is not None:
+                batch = pd.concat([pending, batch], ignore_index=True)
+            codes = batch['stock_code'].to_numpy()
+            # 批内最后一只股票可能延续到下一批
+            last = np.flatnonzero(codes != codes[-1])
+            cut = last[-1] + 1 if len(last) else 0
+            pending = batch.iloc[cut:].reset_index(drop=True)
+            if cut:
+                for stock_code, frame in batch.iloc[:cut].groupby('stock_code', sort=False):
+                    yield stock_code, DataService._kline_panel_frame(frame.reset_index(drop=True), columns, adjust)
+        if pending is not None and not pending.empty:
+            yield pending['stock_code'].iloc[0], DataService._kline_panel_frame(pending, columns, adjust)
+
+    @staticmethod
+    def _kline_panel_query(
+        stock_codes: List[str], start_date: str, end_date: str, columns: List[str]
+    ) -> Tuple[str, list, List[str]]:
+        columns = columns or KLINE_PANEL_COLUMNS
+        invalid = set(columns) - set(KLINE_PANEL_COLUMNS)
+        if invalid:
+            raise ValueError(f"不支持的K线字段: {sorted(invalid)}")
+
+        query = f"SELECT stock_code, trade_date, {', '.join(columns)} FROM stock_kline WHERE 1=1"
+        params = []
+
+        if stock_codes:
+            query += f" AND stock_code IN ({', '.join(['%s'] * len(stock_codes))})"
+            params.extend(stock_codes)
+        if start_date:
+            query += " AND trade_date >= %s"
+            params.append(start_date)
+        if end_date:
+            query += " AND trade_date <= %s"
+            params.append(end_date)
+
+        query += " ORDER BY stock_code ASC, trade_date ASC"
+        return query, params, columns
+
+    @staticmethod
+    def _kline_panel_frame(df: pd.DataFrame, columns: List[str], adjust: str) -> pd.DataFrame:
+        if df.empty:
+            return pd.DataFrame(columns=['stock_code', 'trade_date'] + columns)
+
+        # DECIMAL -> float，便于向量化计算
+        df[columns] = df[columns].astype(float)
+        df['trade_date'] = pd.to_datetime(df['trade_date'])
+        if adjust:
+            from app.services.adj_factor import AdjFactorService
+            df = AdjFactorService.adjust_panel(df, adjust)
         return df
 
+    @staticmethod
+    def split_kline_panel(panel: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        将长表K线拆分为按股票的回测 DataFrame (与 get_kline_dataframe 格式一致)
+
+        Args:
+            panel: get_kline_panel 返回的长表
+
+        Returns:
+            {stock_code: DataFrame(Open, High, Low, Close, Volume)}
+        """
+        frames = {}
+        if panel.empty:
+            return frames
+
+        renamed = panel.rename(columns={
+            'trade_date': 'Date', 'open': 'Open', 'high': 'High',
+            'low': 'Low', 'close': 'Close', 'volume': 'Volume',
+        })
+        for stock_code, group in renamed.groupby('stock_code', sort=False):
+            frames[stock_code] = group.set_index('Date')[['Open', 'High', 'Low', 'Close', 'Volume']]
+        return frames
+
+    @staticmethod
+    def pivot_kline_panel(panel: pd.DataFrame, fields: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        将长表K线转换为宽表 (日期 x 股票代码)
+
+        Args:
+            panel: get_kline_panel 返回的长表
+            fields: 需要转换的字段
+
+        Returns:
+            {field: DataFrame(index=trade_date, columns=stock_code)}，所有字段行列对齐
+        """
+        if panel.empty:
+            return {field: pd.DataFrame() for field in fields}
+
+        wide = panel.pivot(index='trade_date', columns='stock_code', values=fields).sort_index()
+        return {field: wide[field] for field in fields}
+
+    @staticmethod
+    def get_kline_resampled(
+        period: str,
+        stock_codes: List[str] = None,
+        start_date: str = None,
+        end_date: str = None,
+        columns: List[str] = None,
+        adjust: str = ""
+    ) -> pd.DataFrame:
+        """
+        由日K线合成周线/月线 (长表格式，结果缓存至下次K线同步)
+
+        Args:
+            period: weekly/monthly
+            stock_codes: 股票代码列表，不传则取全市场
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD
+            columns: 需要的字段，默认 KLINE_PANEL_COLUMNS
+            adjust: 复权类型：qfq前复权/hfq后复权/空字符串不复权
+
+        Returns:
+            DataFrame，列为 stock_code, trade_date(周期内最后一个交易日) 及所选字段
+        """
+        from app.services.resample import ResampleService
+        return ResampleService.kline(period, stock_codes, start_date, end_date, columns, adjust)
+
+    @staticmethod
+    def get_minute_resampled(
+        stock_code: str,
+        period: int,
+        start_date: str,
+        end_date: str = None
+    ) -> pd.DataFrame:
+        """
+        由5分钟数据合成 15/30/60/120 分钟K线 (结果缓存至下次分时同步)
+
+        Args:
+            stock_code: 股票代码
+            period: 分钟数
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD，默认同 start_date
+
+        Returns:
+            DataFrame，列为 trade_date, time_minute(K线结束时间), open, high, low, close, volume, amount, avg_price
+        """
+        from app.services.resample import ResampleService
+        return ResampleService.minute(stock_code, period, start_date, end_date)
+
     # ============ AKShare 接口方法 ============
 
     @staticmethod
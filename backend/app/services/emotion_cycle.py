@@ -0,0 +1,229 @@
+"""
+情绪周期 Service
+为每个历史交易日计算情绪周期输入 (涨停数、炸板率、跌停数、最高板) 和周期阶段，写入 emotion_cycle。
+优先使用已保存的涨停/炸板/跌停池快照，没有快照的交易日由本地连板表 (stock_limit_streak) 推算
+"""
+from datetime import datetime
+from typing import Dict, Any, List, Tuple
+import pandas as pd
+
+from app.services.data_service import _get_astock_conn, _query_dataframe, _query_dataframe_async, mysql_reads
+from app.services.snapshot_service import SnapshotService
+
+
+# 增量更新时回溯重算的自然日数 (收盘后才补上的快照可以覆盖本地推算结果)
+RECOMPUTE_DAYS = 7
+
+CYCLE_COLUMNS = ["zt_count", "zbgc_count", "dtgc_count", "highest_board", "zbgc_rate", "phase", "position", "source"]
+
+
+def calc_zbgc_rate(zt_count: int, zbgc_count: int) -> float:
+    """炸板率 (%)，无涨停时按 100 计 (与周期判断口径一致)"""
+    return zbgc_count / zt_count * 100 if zt_count > 0 else 100.0
+
+
+def classify_emotion_cycle(zt_count: int, zbgc_count: int, dtgc_count: int, highest_board: int) -> Dict[str, Any]:
+    """
+    情绪周期判断
+    做什么：判断当前处于哪个情绪周期阶段
+    为什么做：周期决定仓位和策略
+    怎么做：通过涨停家数、炸板率、跌停家数、最高板等指标综合判断
+    判断标准：基于游资实战经验总结的量化标准
+    """
+    zbgc_rate = calc_zbgc_rate(zt_count, zbgc_count)
+
+    if zt_count >= 80 and zbgc_rate < 15:
+        return {"phase": "高潮", "description": "市场情绪高涨，涨停家数多，炸板率低", "reason": "涨停家数>=80且炸板率<15%", "basis": "赚钱效应最好阶段", "position": 80, "strategy": "积极做多，跟随主线龙头", "risk": "注意分化风险"}
+    elif zt_count >= 50 and zbgc_rate < 25:
+        return {"phase": "发酵", "description": "市场情绪回暖，涨停家数增加", "reason": "涨停家数50-80，炸板率<25%", "basis": "赚钱效应扩散", "position": 70, "strategy": "积极做多，寻找主线龙头", "risk": "关注炸板率变化"}
+    elif zt_count >= 30 and zbgc_rate < 30:
+        return {"phase": "启动", "description": "市场开始活跃", "reason": "涨停家数30-50", "basis": "资金开始试盘", "position": 50, "strategy": "轻仓试盘，关注首板和二板机会", "risk": "不确定性强，控制仓位"}
+    elif zt_count >= 20 and zbgc_rate >= 30:
+        return {"phase": "分歧", "description": "市场出现分歧", "reason": "涨停家数20-50，炸板率>=30%", "basis": "高位股开始兑现", "position": 30, "strategy": "谨慎操作，关注低位首板", "risk": "追高容易被套"}
+    elif zt_count >= 10 and zt_count < 20:
+        return {"phase": "退潮", "description": "市场情绪衰退", "reason": "涨停家数10-20", "basis": "亏钱效应明显", "position": 20, "strategy": "防守为主，尽量空仓或轻仓", "risk": "容易出现大幅亏损"}
+    elif zt_count < 10 or dtgc_count > 20:
+        return {"phase": "冰点", "description": "市场情绪冰点", "reason": "涨停<10或跌停>20", "basis": "否极泰来", "position": 10, "strategy": "空仓等待，等待反弹机会", "risk": "难以预测"}
+    else:
+        return {"phase": "震荡", "description": "市场处于震荡状态", "reason": "中间状态", "basis": "无明显方向", "position": 40, "strategy": "控制仓位，快进快出", "risk": "注意大盘方向"}
+
+
+class EmotionCycleService:
+    """情绪周期历史"""
+
+    # ============ 输入数据 ============
+
+    @staticmethod
+    def local_inputs(start_date: str, end_date: str) -> pd.DataFrame:
+        """由本地连板表按日聚合涨停/炸板/跌停数和最高板 (一次查询)"""
+        df = _query_dataframe(
+            """
+            SELECT trade_date, SUM(is_limit_up) AS zt_count, SUM(is_broken) AS zbgc_count,
+                   SUM(is_limit_down) AS dtgc_count, MAX(streak) AS highest_board
+            FROM stock_limit_streak
+            WHERE trade_date >= %s AND trade_date <= %s
+            GROUP BY trade_date
+            """,
+            [start_date, end_date],
+        )
+        if df.empty:
+            return pd.DataFrame(columns=["zt_count", "zbgc_count", "dtgc_count", "highest_board"])
+        df['trade_date'] = pd.to_datetime(df['trade_date'])
+        return df.set_index('trade_date').astype(int)
+
+    @staticmethod
+    def snapshot_inputs(start_date: str, end_date: str) -> pd.DataFrame:
+        """由涨停/炸板/跌停池快照计算输入，只保留三个池都有快照的交易日"""
+        counts: Dict[str, Dict[pd.Timestamp, int]] = {}
+        for dataset in ("zt_pool_zbgc", "zt_pool_dtgc"):
+            counts[dataset] = {
+                pd.Timestamp(day): len(rows)
+                for day, rows in SnapshotService.iter_days(dataset, start_date, end_date)
+            }
+
+        records = []
+        for day, rows in SnapshotService.iter_days("zt_pool", start_date, end_date):
+            day = pd.Timestamp(day)
+            if day not in counts["zt_pool_zbgc"] or day not in counts["zt_pool_dtgc"]:
+                continue
+            boards = [row.get("连板数") or 1 for row in rows]
+            records.append({
+                "trade_date": day,
+                "zt_count": len(rows),
+                "zbgc_count": counts["zt_pool_zbgc"][day],
+                "dtgc_count": counts["zt_pool_dtgc"][day],
+                "highest_board": max(boards) if boards else 0,
+            })
+        if not records:
+            return pd.DataFrame(columns=["zt_count", "zbgc_count", "dtgc_count", "highest_board"])
+        return pd.DataFrame(records).set_index('trade_date')
+
+    # ============ 计算与写入 ============
+
+    @classmethod
+    def compute(cls, local: pd.DataFrame, snapshot: pd.DataFrame) -> pd.DataFrame:
+        """
+        合并两种来源并逐日判断周期阶段
+
+        Returns:
+            index 为 trade_date，列为 CYCLE_COLUMNS
+        """
+        merged = pd.concat([snapshot.assign(source="snapshot"), local.assign(source="local")])
+        # 同一天两种来源都有时取快照
+        merged = merged[~merged.index.duplicated(keep="first")].sort_index()
+        if merged.empty:
+            return pd.DataFrame(columns=CYCLE_COLUMNS)
+
+        cycles = [
+            classify_emotion_cycle(int(r.zt_count), int(r.zbgc_count), int(r.dtgc_count), int(r.highest_board))
+            for r in merged.itertuples()
+        ]
+        merged["zbgc_rate"] = [
+            round(calc_zbgc_rate(int(r.zt_count), int(r.zbgc_count)), 2) for r in merged.itertuples()
+        ]
+        merged["phase"] = [c["phase"] for c in cycles]
+        merged["position"] = [c["position"] for c in cycles]
+        return merged[CYCLE_COLUMNS]
+
+    @classmethod
+    @mysql_reads()
+    def build(cls, start_date: str, end_date: str = None) -> int:
+        """
+        计算区间内每个交易日的情绪周期并写入 emotion_cycle
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD，默认今天
+
+        Returns:
+            写入的交易日数
+        """
+        end_date = end_date or datetime.now().strftime("%Y%m%d")
+        cycles = cls.compute(cls.local_inputs(start_date, end_date), cls.snapshot_inputs(start_date, end_date))
+        if cycles.empty:
+            return 0
+
+        columns = ["trade_date"] + CYCLE_COLUMNS
+        values = [
+            (day.strftime("%Y-%m-%d"), int(r.zt_count), int(r.zbgc_count), int(r.dtgc_count),
+             int(r.highest_board), float(r.zbgc_rate), r.phase, int(r.position), r.source)
+            for day, r in zip(cycles.index, cycles.itertuples(index=False))
+        ]
+        updates = ", ".join(f"{c}=VALUES({c})" for c in CYCLE_COLUMNS)
+        conn = _get_astock_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                f"INSERT INTO emotion_cycle ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON DUPLICATE KEY UPDATE {updates}",
+                values,
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return len(values)
+
+    @classmethod
+    @mysql_reads()
+    def update(cls, end_date: str = None) -> Dict[str, Any]:
+        """
+        增量更新：从 emotion_cycle 最后一个交易日前 RECOMPUTE_DAYS 天算到 end_date
+
+        表为空时从连板表最早一天开始
+        """
+        df = _query_dataframe("SELECT MAX(trade_date) AS trade_date FROM emotion_cycle")
+        last = df['trade_date'].iloc[0] if not df.empty else None
+        if last is None:
+            first = _query_dataframe("SELECT MIN(trade_date) AS trade_date FROM stock_limit_streak")['trade_date'].iloc[0]
+            if first is None:
+                return {"start_date": None, "days": 0}
+            start_date = pd.Timestamp(first).strftime("%Y%m%d")
+        else:
+            start_date = (pd.Timestamp(last) - pd.Timedelta(days=RECOMPUTE_DAYS)).strftime("%Y%m%d")
+        return {"start_date": start_date, "days": cls.build(start_date, end_date)}
+
+    # ============ 查询 ============
+
+    @staticmethod
+    def history(start_date: str, end_date: str = None) -> List[Dict[str, Any]]:
+        """
+        逐日情绪周期
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD，默认今天
+        """
+        df = _query_dataframe(*EmotionCycleService._history_query(start_date, end_date))
+        return EmotionCycleService._history_records(df)
+
+    @staticmethod
+    async def history_async(start_date: str, end_date: str = None) -> List[Dict[str, Any]]:
+        """history 的异步版本 (async def 路由使用)"""
+        df = await _query_dataframe_async(*EmotionCycleService._history_query(start_date, end_date))
+        return EmotionCycleService._history_records(df)
+
+    @staticmethod
+    def _history_query(start_date: str, end_date: str = None) -> Tuple[str, list]:
+        end_date = end_date or datetime.now().strftime("%Y%m%d")
+        return (
+            f"SELECT trade_date, {', '.join(CYCLE_COLUMNS)} FROM emotion_cycle "
+            "WHERE trade_date >= %s AND trade_date <= %s ORDER BY trade_date",
+            [start_date, end_date],
+        )
+
+    @staticmethod
+    def _history_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+        return [
+            {
+                "trade_date": str(r.trade_date),
+                "zt_count": int(r.zt_count),
+                "zbgc_count": int(r.zbgc_count),
+                "dtgc_count": int(r.dtgc_count),
+                "highest_board": int(r.highest_board),
+                "zbgc_rate": float(r.zbgc_rate),
+                "phase": r.phase,
+                "position": int(r.position),
+                "source": r.source,
+            }
+            for r in df.itertuples()
+        ]
@@ -0,0 +1,307 @@
+"""
+A股成交模型
+向量化的A股交易规则：T+1、涨跌停价、100股整手、印花税、最低佣金
+"""
+from typing import Dict, Any, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+
+# ============ 涨跌停规则 ============
+
+def get_board(code: str) -> str:
+    """
+    根据代码前缀判断板块
+
+    Returns:
+        main=主板, chinext=创业板, star=科创板, bse=北交所
+    """
+    if code.startswith(("688", "689")):
+        return "star"
+    if code.startswith(("300", "301")):
+        return "chinext"
+    if code.startswith(("8", "43", "92")):
+        return "bse"
+    return "main"
+
+
+def is_st(name: Optional[str]) -> bool:
+    """是否为 ST/*ST 股票"""
+    return bool(name) and "ST" in name.upper()
+
+
+def limit_pct(code: str, name: Optional[str] = None) -> float:
+    """
+    涨跌幅限制比例
+
+    主板 10%，主板 ST 5%，创业板/科创板 20% (含 ST)，北交所 30%
+    """
+    board = get_board(code)
+    if board in ("star", "chinext"):
+        return 0.20
+    if board == "bse":
+        return 0.30
+    if is_st(name):
+        return 0.05
+    return 0.10
+
+
+def limit_pct_array(codes: Sequence[str], names: Optional[Dict[str, str]] = None) -> np.ndarray:
+    """批量获取涨跌幅限制比例，与 codes 顺序一致"""
+    names = names or {}
+    return np.array([limit_pct(code, names.get(code)) for code in codes], dtype=float)
+
+
+def limit_prices(prev_close, pct):
+    """
+    计算涨停价/跌停价 (四舍五入到分)
+
+    Args:
+        prev_close: 前收盘价 (标量/数组/DataFrame)
+        pct: 涨跌幅限制比例，可按列广播
+
+    Returns:
+        (涨停价, 跌停价)
+    """
+    up = np.floor(prev_close * (1 + pct) * 100 + 0.5) / 100
+    down = np.floor(prev_close * (1 - pct) * 100 + 0.5) / 100
+    return up, down
+
+
+# ============ 成交模型 ============
+
+class AShareExecutionModel:
+    """A股成交模型：费用、整手、涨跌停限制"""
+
+    def __init__(
+        self,
+        commission_rate: float = 0.00025,
+        min_commission: float = 5.0,
+        stamp_duty: float = 0.0005,
+        transfer_fee: float = 0.00001,
+        lot_size: int = 100,
+        slippage: float = 0.0,
+        tick_tolerance: float = 0.005
+    ):
+        """
+        Args:
+            commission_rate: 佣金费率 (双向)
+            min_commission: 单笔最低佣金 (元)
+            stamp_duty: 印花税 (仅卖出)
+            transfer_fee: 过户费 (双向)
+            lot_size: 每手股数
+            slippage: 滑点比例，买入价上浮/卖出价下浮
+            tick_tolerance: 判断触及涨跌停价的容差 (元)
+        """
+        self.commission_rate = commission_rate
+        self.min_commission = min_commission
+        self.stamp_duty = stamp_duty
+        self.transfer_fee = transfer_fee
+        self.lot_size = lot_size
+        self.slippage = slippage
+        self.tick_tolerance = tick_tolerance
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "commission_rate": self.commission_rate,
+            "min_commission": self.min_commission,
+            "stamp_duty": self.stamp_duty,
+            "transfer_fee": self.transfer_fee,
+            "lot_size": self.lot_size,
+            "slippage": self.slippage,
+        }
+
+    # ---- 费用 ----
+
+    def _commission(self, value):
+        value = np.asarray(value, dtype=float)
+        fee = np.maximum(value * self.commission_rate, self.min_commission)
+        return np.where(value > 0, fee, 0.0)
+
+    def buy_cost(self, value):
+        """买入费用：佣金(含最低) + 过户费"""
+        value = np.asarray(value, dtype=float)
+        return self._commission(value) + value * self.transfer_fee
+
+    def sell_cost(self, value):
+        """卖出费用：佣金(含最低) + 过户费 + 印花税"""
+        value = np.asarray(value, dtype=float)
+        return self._commission(value) + value * (self.transfer_fee + self.stamp_duty)
+
+    # ---- 数量与价格 ----
+
+    def round_lots(self, shares):
+        """向下取整到整手"""
+        return np.floor(np.asarray(shares, dtype=float) / self.lot_size) * self.lot_size
+
+    def affordable_shares(self, cash, price):
+        """可用资金能买入的整手股数 (含费用)"""
+        price = np.asarray(price, dtype=float)
+        gross = 1 + self.commission_rate + self.transfer_fee
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shares = self.round_lots(np.where(price > 0, cash / (price * gross), 0.0))
+        # 最低佣金可能使资金不足，退一手
+        over = shares * price + self.buy_cost(shares * price) > cash
+        return np.where(over, np.maximum(shares - self.lot_size, 0), shares)
+
+    def buy_price(self, price):
+        return np.asarray(price, dtype=float) * (1 + self.slippage)
+
+    def sell_price(self, price):
+        return np.asarray(price, dtype=float) * (1 - self.slippage)
+
+    # ---- 涨跌停 ----
+
+    def can_buy(self, price, up_limit):
+        """成交价在涨停价买不进"""
+        price = np.asarray(price, dtype=float)
+        return ~np.isnan(price) & (price < np.asarray(up_limit, dtype=float) - self.tick_tolerance)
+
+    def can_sell(self, price, down_limit):
+        """成交价在跌停价卖不出"""
+        price = np.asarray(price, dtype=float)
+        return ~np.isnan(price) & (price > np.asarray(down_limit, dtype=float) + self.tick_tolerance)
+
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    """next_idx[i] = i 及之后第一个 True 的位置，不存在为 len(mask)"""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+
+def simulate_signals(
+    df: pd.DataFrame,
+    entries: np.ndarray,
+    exits: np.ndarray,
+    model: AShareExecutionModel,
+    initial_capital: float = 100000,
+    pct: float = 0.10,
+    stop_loss_pct: Optional[float] = None,
+    stop_profit_pct: Optional[float] = None,
+    trade_on_close: bool = False
+) -> Dict[str, Any]:
+    """
+    单标的信号回测 (A股成交规则)
+
+    信号在收盘产生，默认次日开盘成交 (与 backtesting.py 一致)；trade_on_close=True 时当日收盘成交。
+    只在交易事件之间循环，区间内的扫描和估值均为数组运算。
+
+    Args:
+        df: K线 DataFrame(Open, High, Low, Close, Volume)，索引为日期
+        entries: 买入信号 (bool 数组)
+        exits: 卖出信号 (bool 数组)
+        model: 成交模型
+        initial_capital: 初始资金
+        pct: 涨跌幅限制比例
+        stop_loss_pct: 收盘相对买入价跌幅达到该值 (%) 时卖出
+        stop_profit_pct: 收盘相对买入价涨幅达到该值 (%) 时卖出
+        trade_on_close: 是否当日收盘成交
+
+    Returns:
+        {"equity": np.ndarray, "trades": List[Dict], "blocked_buys": int, "blocked_sells": int}
+    """
+    open_ = df['Open'].to_numpy(dtype=float)
+    close = df['Close'].to_numpy(dtype=float)
+    n = len(close)
+    dates = df.index
+
+    prev_close = np.r_[np.nan, close[:-1]]
+    up_limit, down_limit = limit_prices(prev_close, pct)
+    fill_price = close if trade_on_close else open_
+    offset = 0 if trade_on_close else 1
+
+    buyable = model.can_buy(fill_price, up_limit)
+    sellable = model.can_sell(fill_price, down_limit)
+    # 首日无前收盘，不限制
+    buyable[0] = sellable[0] = not np.isnan(fill_price[0])
+
+    entries = np.asarray(entries, dtype=bool)
+    exits = np.asarray(exits, dtype=bool)
+
+    # 买入成交日: 信号日 + offset 且可买
+    entry_fill_ok = np.zeros(n, dtype=bool)
+    entry_fill_ok[:n - offset] = entries[:n - offset] & buyable[offset:]
+    next_entry = _next_true(entry_fill_ok)
+    next_sellable = _next_true(sellable)
+
+    equity = np.full(n, float(initial_capital))
+    cash = float(initial_capital)
+    trades: List[Dict[str, Any]] = []
+    # 空仓时的买入信号因涨停未成交 (持仓期间的信号本来就不会开仓，不计入)
+    blocked_entry = np.zeros(n, dtype=bool)
+    blocked_entry[:n - offset] = entries[:n - offset] & ~buyable[offset:]
+    blocked_before = np.r_[0, np.cumsum(blocked_entry)]
+    blocked_buys = 0
+    blocked_sells = 0
+
+    i = 0
+    while i < n:
+        signal = next_entry[i]
+        blocked_buys += int(blocked_before[min(signal, n)] - blocked_before[i])
+        if signal >= n:
+            break
+        buy_idx = signal + offset
+        price = float(model.buy_price(fill_price[buy_idx]))
+        shares = float(model.affordable_shares(cash, price))
+        if shares <= 0:
+            break
+
+        value = shares * price
+        buy_fee = float(model.buy_cost(value))
+        cash -= value + buy_fee
+
+        # 卖出信号: 买入成交日之后 (T+1) 的 exits 或止盈止损
+        start = buy_idx + 1 if trade_on_close else buy_idx
+        exit_mask = exits[start:].copy()
+        if stop_loss_pct is not None:
+            exit_mask |= close[start:] <= price * (1 - stop_loss_pct / 100)
+        if stop_profit_pct is not None:
+            exit_mask |= close[start:] >= price * (1 + stop_profit_pct / 100)
+
+        sell_idx = n
+        if exit_mask.any():
+            exit_signal = start + int(np.argmax(exit_mask))
+            wanted = exit_signal + offset
+            if wanted < n:
+                # T+1: 卖出成交日必须晚于买入成交日；跌停卖不出则顺延
+                sell_idx = next_sellable[max(wanted, buy_idx + 1)]
+                if sell_idx > wanted:
+                    blocked_sells += 1
+
+        # 持仓区间估值 (停牌日沿用最近收盘价)
+        held = pd.Series(close[buy_idx:sell_idx]).ffill().to_numpy()
+        equity[buy_idx:sell_idx] = cash + shares * held
+
+        if sell_idx >= n:
+            trades.append(_trade_record(dates, buy_idx, None, price, None, shares, buy_fee, 0.0))
+            break
+
+        sell_price = float(model.sell_price(fill_price[sell_idx]))
+        proceeds = shares * sell_price
+        sell_fee = float(model.sell_cost(proceeds))
+        cash += proceeds - sell_fee
+        trades.append(_trade_record(dates, buy_idx, sell_idx, price, sell_price, shares, buy_fee, sell_fee))
+        equity[sell_idx:] = cash
+
+        # 卖出当日收盘后才能再次产生买入信号 (收盘成交模式下需再等一根K线)
+        i = sell_idx + 1 if trade_on_close else sell_idx
+
+    return {"equity": equity, "trades": trades,
+            "blocked_buys": blocked_buys, "blocked_sells": blocked_sells}
+
+
+def _trade_record(dates, buy_idx, sell_idx, buy_price, sell_price, shares, buy_fee, sell_fee) -> Dict[str, Any]:
+    """交易记录，字段与 BacktestEngine._get_trade_records 一致"""
+    cost = buy_price * shares
+    pnl = ((sell_price or 0) * shares - cost - buy_fee - sell_fee) if sell_price is not None else 0.0
+    return {
+        'entry_time': str(dates[buy_idx]),
+        'exit_time': str(dates[sell_idx]) if sell_idx is not None else '',
+        'entry_price': float(buy_price),
+        'exit_price': float(sell_price) if sell_price is not None else 0.0,
+        'size': int(shares),
+        'pnl': float(pnl),
+        'pnl_pct': float(pnl / cost * 100) if cost and sell_price is not None else 0.0,
+        'fees': float(buy_fee + sell_fee),
+    }
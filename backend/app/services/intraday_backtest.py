@@ -0,0 +1,288 @@
+"""
+分钟级回测 Service
+基于 stock_kline_minute 的日内回测：按交易日分块流式读取分时数据，跨日保持滚动状态，
+每个交易日内的信号和止盈止损均为数组运算，支持打板和日内退出逻辑
+"""
+from collections import deque
+from datetime import date
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import DataService
+from app.services.backtest_engine import performance_metrics
+from app.services.execution_model import AShareExecutionModel, limit_pct, limit_prices
+
+
+# 日内入场策略
+INTRADAY_STRATEGIES = {
+    "limit_up": "打板：盘中触及涨停价买入 (一字板买不进)",
+    "breakout": "突破：盘中突破前 N 日最高价买入",
+}
+
+
+class IntradayBacktester:
+    """分钟级回测引擎 (单只股票)"""
+
+    def __init__(
+        self,
+        strategy: str = "limit_up",
+        initial_capital: float = 100000,
+        lookback: int = 20,
+        stop_loss_pct: Optional[float] = 5.0,
+        take_profit_pct: Optional[float] = 10.0,
+        max_hold_days: int = 1,
+        exit_time: str = "14:50",
+        execution_model: Optional[AShareExecutionModel] = None
+    ):
+        """
+        Args:
+            strategy: 入场策略，见 INTRADAY_STRATEGIES
+            initial_capital: 初始资金
+            lookback: breakout 策略的前高窗口 (交易日)
+            stop_loss_pct: 止损比例 (%)，盘中最低价触及即卖出
+            take_profit_pct: 止盈比例 (%)，盘中最高价触及即卖出
+            max_hold_days: 最长持有交易日数，到期后在 exit_time 之后的第一根K线收盘卖出
+            exit_time: 到期卖出时间，格式 HH:MM
+            execution_model: A股成交模型，默认使用标准费率
+        """
+        if strategy not in INTRADAY_STRATEGIES:
+            raise ValueError(f"不支持的日内策略: {strategy}. 支持: {list(INTRADAY_STRATEGIES.keys())}")
+        if max_hold_days < 1:
+            raise ValueError("max_hold_days 必须大于 0 (T+1)")
+
+        self.strategy = strategy
+        self.initial_capital = initial_capital
+        self.lookback = lookback
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.max_hold_days = max_hold_days
+        self.exit_time = pd.Timedelta(f"{exit_time}:00")
+        self.model = execution_model or AShareExecutionModel()
+
+    # ============ 入场 ============
+
+    def entry_signal(self, bars: Dict[str, np.ndarray], state: Dict[str, Any]) -> Tuple[int, float]:
+        """
+        计算当日入场点
+
+        Args:
+            bars: 当日分时数组 (time/open/high/low/close/volume/amount)
+            state: 跨日滚动状态 (prev_close, up_limit, down_limit, highs 等)
+
+        Returns:
+            (K线位置, 成交价)，不入场返回 (-1, nan)
+        """
+        tol = self.model.tick_tolerance
+        up_limit = state["up_limit"]
+        if np.isnan(up_limit):
+            return -1, np.nan
+
+        if self.strategy == "limit_up":
+            # 触及涨停且该K线内有低于涨停价的成交 (排队可成交)，一字封死买不进
+            touched = (bars["high"] >= up_limit - tol) & (bars["low"] < up_limit - tol)
+            idx = int(np.argmax(touched)) if touched.any() else -1
+            return idx, up_limit
+
+        if len(state["highs"]) < self.lookback:
+            return -1, np.nan
+        level = max(state["highs"])
+        broke = (bars["high"] > level) & self.model.can_buy(np.maximum(bars["open"], level), up_limit)
+        if not broke.any():
+            return -1, np.nan
+        idx = int(np.argmax(broke))
+        return idx, float(max(bars["open"][idx], level))
+
+    # ============ 出场 ============
+
+    def exit_signal(
+        self,
+        bars: Dict[str, np.ndarray],
+        state: Dict[str, Any],
+        entry_price: float,
+        held_days: int
+    ) -> Tuple[int, float, str]:
+        """
+        计算持仓日的出场点 (买入次日起才可卖出)
+
+        同一根K线同时触及止损和止盈时按止损处理；跌停封死的K线卖不出，顺延到下一根可卖K线。
+
+        Returns:
+            (K线位置, 成交价, 原因)，不出场返回 (-1, nan, "")
+        """
+        n = len(bars["close"])
+        candidates = []
+
+        if self.stop_loss_pct is not None:
+            stop = entry_price * (1 - self.stop_loss_pct / 100)
+            hit = bars["low"] <= stop
+            if hit.any():
+                idx = int(np.argmax(hit))
+                candidates.append((idx, 0, min(bars["open"][idx], stop), "stop_loss"))
+        if self.take_profit_pct is not None:
+            target = entry_price * (1 + self.take_profit_pct / 100)
+            hit = bars["high"] >= target
+            if hit.any():
+                idx = int(np.argmax(hit))
+                candidates.append((idx, 1, max(bars["open"][idx], target), "take_profit"))
+        if held_days >= self.max_hold_days:
+            hit = bars["time"] >= self.exit_time
+            idx = int(np.argmax(hit)) if hit.any() else n - 1
+            candidates.append((idx, 2, bars["close"][idx], "time_exit"))
+
+        if not candidates:
+            return -1, np.nan, ""
+
+        idx, _, price, reason = min(candidates)
+        down_limit = state["down_limit"]
+        if not np.isnan(down_limit):
+            # 整根K线在跌停价 (封死) 时无法卖出
+            sealed = bars["high"] <= down_limit + self.model.tick_tolerance
+            if sealed[idx]:
+                sellable = np.flatnonzero(~sealed[idx:])
+                if not len(sellable):
+                    return -1, np.nan, ""
+                idx = idx + int(sellable[0])
+                price = bars["open"][idx]
+                reason = f"{reason}_delayed"
+        return idx, float(price), reason
+
+    # ============ 回测 ============
+
+    def run(
+        self,
+        stock_code: str,
+        start_date: str,
+        end_date: str,
+        stock_name: Optional[str] = None,
+        days: Iterable[Tuple[date, pd.DataFrame]] = None,
+        chunk_days: int = 20
+    ) -> Dict[str, Any]:
+        """
+        运行分钟级回测
+
+        Args:
+            stock_code: 股票代码
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD
+            stock_name: 股票名称，用于识别 ST 的涨跌幅限制
+            days: (交易日, 分时 DataFrame) 迭代器，不传则从 DataService.iter_minute_days 流式读取
+            chunk_days: 每次从数据库读取的交易日数
+
+        Returns:
+            回测结果：指标、逐日权益曲线、交易记录
+        """
+        if days is None:
+            days = DataService.iter_minute_days(stock_code, start_date, end_date, chunk_days=chunk_days)
+
+        pct = limit_pct(stock_code, stock_name)
+        model = self.model
+        state: Dict[str, Any] = {
+            "prev_close": None,
+            "highs": deque(maxlen=max(1, self.lookback)),
+        }
+        cash = float(self.initial_capital)
+        position: Optional[Dict[str, Any]] = None
+        trades: List[Dict[str, Any]] = []
+        equity_dates: List[str] = []
+        equity_values: List[float] = []
+
+        for trade_date, day in days:
+            if day.empty:
+                continue
+            bars = {col: day[col].to_numpy() for col in day.columns}
+            bars["time"] = day["time"].to_numpy(dtype="timedelta64[ns]")
+            day_str = pd.Timestamp(trade_date).strftime("%Y-%m-%d")
+
+            if state["prev_close"] is None:
+                state["prev_close"] = DataService.get_prev_close(stock_code, day_str.replace("-", ""))
+            prev_close = state["prev_close"] if state["prev_close"] is not None else np.nan
+            state["up_limit"], state["down_limit"] = limit_prices(prev_close, pct)
+
+            sold_today = False
+            if position is not None:
+                position["held_days"] += 1
+                idx, price, reason = self.exit_signal(bars, state, position["entry_price"], position["held_days"])
+                if idx >= 0:
+                    price = float(model.sell_price(price))
+                    proceeds = position["shares"] * price
+                    fee = float(model.sell_cost(proceeds))
+                    cash += proceeds - fee
+                    trades.append(self._trade_record(position, day_str, bars["time"][idx], price, fee, reason))
+                    position = None
+                    sold_today = True
+
+            if position is None and not sold_today:
+                idx, price = self.entry_signal(bars, state)
+                if idx >= 0:
+                    price = float(model.buy_price(price))
+                    shares = float(model.affordable_shares(cash, price))
+                    if shares > 0:
+                        fee = float(model.buy_cost(shares * price))
+                        cash -= shares * price + fee
+                        position = {
+                            "entry_date": day_str,
+                            "entry_time": bars["time"][idx],
+                            "entry_price": price,
+                            "shares": shares,
+                            "fee": fee,
+                            "held_days": 0,
+                        }
+
+            close = float(bars["close"][-1])
+            equity_dates.append(day_str)
+            equity_values.append(cash + (position["shares"] * close if position else 0.0))
+
+            # 滚动状态
+            state["prev_close"] = close
+            state["highs"].append(float(bars["high"].max()))
+
+        if not equity_values:
+            return {"error": f"未找到股票 {stock_code} 的分时数据"}
+
+        equity = pd.Series(equity_values, index=pd.to_datetime(equity_dates))
+        result = performance_metrics(equity, self.initial_capital)
+
+        closed = [t["pnl_pct"] for t in trades]
+        result.update({
+            "win_rate": sum(1 for r in closed if r > 0) / len(closed) * 100 if closed else 0.0,
+            "total_trades": len(trades) + (1 if position else 0),
+            "best_trade": max(closed) if closed else 0.0,
+            "worst_trade": min(closed) if closed else 0.0,
+            "avg_trade": sum(closed) / len(closed) if closed else 0.0,
+            "trading_days": len(equity),
+            "open_position": {
+                "entry_date": position["entry_date"],
+                "entry_price": position["entry_price"],
+                "shares": int(position["shares"]),
+            } if position else None,
+        })
+        result["trades"] = trades
+        result["equity_curve"] = [
+            {"date": d, "equity": round(float(v), 2)} for d, v in zip(equity_dates, equity_values)
+        ]
+        return result
+
+    @staticmethod
+    def _trade_record(position: Dict[str, Any], exit_date: str, exit_time, exit_price: float,
+                      sell_fee: float, reason: str) -> Dict[str, Any]:
+        """交易记录，字段与 BacktestEngine 一致，时间精确到分钟"""
+        cost = position["entry_price"] * position["shares"]
+        pnl = exit_price * position["shares"] - cost - position["fee"] - sell_fee
+        return {
+            "entry_time": f"{position['entry_date']} {_format_time(position['entry_time'])}",
+            "exit_time": f"{exit_date} {_format_time(exit_time)}",
+            "entry_price": float(position["entry_price"]),
+            "exit_price": float(exit_price),
+            "size": int(position["shares"]),
+            "pnl": float(pnl),
+            "pnl_pct": float(pnl / cost * 100) if cost else 0.0,
+            "fees": float(position["fee"] + sell_fee),
+            "reason": reason,
+        }
+
+
+def _format_time(value) -> str:
+    """Timedelta -> HH:MM"""
+    minutes = int(pd.Timedelta(value).total_seconds() // 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
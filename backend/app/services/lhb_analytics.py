@@ -0,0 +1,269 @@
+"""
+龙虎榜事件研究 Service
+将已保存的龙虎榜快照 (market_snapshot.lhb_detail) 与 stock_kline 关联，
+一次向量化计算全部上榜事件的后续 1/3/5/10 日收益、最大回撤和最大涨幅，
+事件表常驻内存，按上榜原因/个股的统计查询只做分组聚合
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import DataService, _query_dataframe
+from app.services.snapshot_service import SnapshotService
+
+
+# 后续收益的持有交易日数
+HORIZONS = [1, 3, 5, 10]
+
+# 最大回撤/最大涨幅的观察窗口 (交易日)
+PATH_WINDOW = 10
+
+# 分组维度 -> 事件表列
+GROUP_COLUMNS = {
+    "reason": "reason",
+    "stock": "stock_code",
+}
+
+
+def _forward(values: np.ndarray, codes: np.ndarray, k: int) -> np.ndarray:
+    """长表内按股票向后取第 k 行的值 (跨股票为 NaN)"""
+    out = np.full(len(values), np.nan)
+    if k < len(values):
+        same = codes[k:] == codes[:-k]
+        out[:-k] = np.where(same, values[k:], np.nan)
+    return out
+
+
+def forward_metrics(panel: pd.DataFrame) -> pd.DataFrame:
+    """
+    在长表K线上计算每个交易日之后的收益路径
+
+    以当日收盘价为基准，ret_N 为第 N 个交易日收盘涨幅 (%)，
+    max_drawdown/max_gain 为之后 PATH_WINDOW 个交易日内最低价/最高价相对基准的幅度 (%)
+
+    Args:
+        panel: get_kline_panel 返回的长表 (需 close/high/low)，按 (stock_code, trade_date) 排序
+
+    Returns:
+        stock_code, trade_date, close 及收益列
+    """
+    codes = panel['stock_code'].to_numpy()
+    close = panel['close'].to_numpy(dtype=float)
+    high = panel['high'].to_numpy(dtype=float)
+    low = panel['low'].to_numpy(dtype=float)
+
+    result = panel[['stock_code', 'trade_date', 'close']].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for h in HORIZONS:
+            result[f'ret_{h}'] = (_forward(close, codes, h) / close - 1) * 100
+
+        lows = np.vstack([_forward(low, codes, k) for k in range(1, PATH_WINDOW + 1)])
+        highs = np.vstack([_forward(high, codes, k) for k in range(1, PATH_WINDOW + 1)])
+        has_path = ~np.isnan(lows).all(axis=0)
+        min_low = np.where(has_path, np.nanmin(np.where(np.isnan(lows), np.inf, lows), axis=0), np.nan)
+        max_high = np.where(has_path, np.nanmax(np.where(np.isnan(highs), -np.inf, highs), axis=0), np.nan)
+        result['max_drawdown'] = (min_low / close - 1) * 100
+        result['max_gain'] = (max_high / close - 1) * 100
+    return result
+
+
+class LhbEventStudy:
+    """龙虎榜事件研究 (进程内缓存事件表)"""
+
+    _lock = threading.Lock()
+    # (start_date, end_date) -> (数据版本, 事件表)
+    _events: Dict[Tuple[str, str], Tuple[Tuple, pd.DataFrame]] = {}
+    _version: Tuple = ()
+    _checked_at: float = 0.0
+
+    # 检查快照/K线是否更新的间隔 (秒)
+    CHECK_INTERVAL = 60
+    CACHE_SIZE = 8
+
+    # ============ 事件表 ============
+
+    @staticmethod
+    def load_listings(start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        读取区间内已保存的龙虎榜上榜记录
+
+        Returns:
+            stock_code, stock_name, trade_date, reason, net_buy 的 DataFrame，
+            同一股票同一天同一原因只保留一条
+        """
+        frames = []
+        for day, rows in SnapshotService.iter_days("lhb_detail", start_date, end_date):
+            if not rows:
+                continue
+            df = pd.DataFrame(rows)
+            frames.append(pd.DataFrame({
+                "stock_code": df.get("代码"),
+                "stock_name": df.get("名称"),
+                # 上游缺少上榜日时取快照日期
+                "trade_date": pd.to_datetime(df.get("上榜日", pd.Series([None] * len(df)))).fillna(pd.Timestamp(day)),
+                "reason": df.get("上榜原因", pd.Series([None] * len(df))).fillna("未知"),
+                "net_buy": pd.to_numeric(df.get("龙虎榜净买额"), errors="coerce"),
+            }))
+        if not frames:
+            return pd.DataFrame(columns=["stock_code", "stock_name", "trade_date", "reason", "net_buy"])
+
+        listings = pd.concat(frames, ignore_index=True).dropna(subset=["stock_code"])
+        return listings.drop_duplicates(["stock_code", "trade_date", "reason"]).reset_index(drop=True)
+
+    @classmethod
+    def build_events(cls, listings: pd.DataFrame, panel: pd.DataFrame) -> pd.DataFrame:
+        """上榜记录关联K线后续收益 (一次 merge)"""
+        if listings.empty or panel.empty:
+            return listings.assign(**{c: pd.Series(dtype=float) for c in cls.metric_columns()})
+        metrics = forward_metrics(panel)
+        return listings.merge(metrics, on=["stock_code", "trade_date"], how="inner")
+
+    @staticmethod
+    def metric_columns() -> List[str]:
+        return [f"ret_{h}" for h in HORIZONS] + ["max_drawdown", "max_gain"]
+
+    @staticmethod
+    def _data_version() -> Tuple:
+        """龙虎榜快照和K线的最新日期，任一变化即重建事件表"""
+        snapshot = _query_dataframe(
+            "SELECT MAX(trade_date) AS trade_date, COUNT(*) AS cnt FROM market_snapshot WHERE dataset = 'lhb_detail'"
+        )
+        kline = _query_dataframe("SELECT MAX(trade_date) AS trade_date FROM stock_kline")
+        return (
+            str(snapshot['trade_date'].iloc[0]), int(snapshot['cnt'].iloc[0]),
+            str(kline['trade_date'].iloc[0]),
+        )
+
+    @classmethod
+    def events(cls, start_date: str, end_date: str = None) -> pd.DataFrame:
+        """
+        获取区间内的事件表 (缓存)
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD，默认今天
+
+        Returns:
+            每个上榜事件一行，含后续收益列
+        """
+        end_date = end_date or datetime.now().strftime("%Y%m%d")
+        key = (start_date, end_date)
+
+        if time.time() - cls._checked_at >= cls.CHECK_INTERVAL:
+            cls._version = cls._data_version()
+            cls._checked_at = time.time()
+        cached = cls._events.get(key)
+        if cached is not None and cached[0] == cls._version:
+            return cached[1]
+
+        listings = cls.load_listings(start_date, end_date)
+        panel = pd.DataFrame()
+        if not listings.empty:
+            # 后续收益需要上榜日之后 PATH_WINDOW 个交易日的K线
+            kline_end = (pd.Timestamp(end_date) + pd.Timedelta(days=PATH_WINDOW * 2 + 10)).strftime("%Y%m%d")
+            panel = DataService.get_kline_panel(
+                stock_codes=sorted(listings['stock_code'].unique()),
+                start_date=start_date,
+                end_date=kline_end,
+                columns=['close', 'high', 'low'],
+            )
+        events = cls.build_events(listings, panel)
+
+        with cls._lock:
+            if len(cls._events) >= cls.CACHE_SIZE:
+                cls._events.pop(next(iter(cls._events)))
+            cls._events[key] = (cls._version, events)
+        return events
+
+    # ============ 统计 ============
+
+    @classmethod
+    def summarize(cls, events: pd.DataFrame, group_by: Optional[str] = "reason") -> List[Dict[str, Any]]:
+        """
+        分组统计：事件数、各持有期平均/中位收益和胜率、平均最大回撤/最大涨幅
+
+        Args:
+            events: 事件表
+            group_by: reason/stock，None 为全部事件一组
+        """
+        if group_by is not None and group_by not in GROUP_COLUMNS:
+            raise ValueError(f"不支持的分组: {group_by}. 支持: {list(GROUP_COLUMNS.keys())}")
+        if events.empty:
+            return []
+
+        column = GROUP_COLUMNS[group_by] if group_by else None
+        keys = events[column] if column else pd.Series("全部", index=events.index)
+        grouped = events.groupby(keys, sort=False)
+
+        stats = pd.DataFrame({"count": grouped.size()})
+        for h in HORIZONS:
+            col = f"ret_{h}"
+            stats[f"avg_ret_{h}"] = grouped[col].mean()
+            stats[f"median_ret_{h}"] = grouped[col].median()
+            stats[f"win_rate_{h}"] = (events[col] > 0).groupby(keys).sum() / grouped[col].count() * 100
+        stats["avg_max_drawdown"] = grouped["max_drawdown"].mean()
+        stats["avg_max_gain"] = grouped["max_gain"].mean()
+        if group_by == "stock":
+            stats["stock_name"] = grouped["stock_name"].last()
+
+        stats = stats.sort_values("count", ascending=False).round(2).rename_axis("key").reset_index()
+        return stats.astype(object).where(stats.notna(), None).to_dict("records")
+
+    @classmethod
+    def study(
+        cls,
+        start_date: str,
+        end_date: str = None,
+        group_by: Optional[str] = "reason",
+        reason: Optional[str] = None,
+        stock_code: Optional[str] = None,
+        min_count: int = 1
+    ) -> Dict[str, Any]:
+        """
+        龙虎榜事件研究
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD
+            group_by: reason/stock，None 为全部事件汇总
+            reason: 上榜原因关键字过滤
+            stock_code: 股票代码过滤
+            min_count: 分组最少事件数
+
+        Returns:
+            {"events": 事件数, "groups": 分组统计}
+        """
+        events = cls.events(start_date, end_date)
+        if reason:
+            events = events[events['reason'].str.contains(reason, regex=False)]
+        if stock_code:
+            events = events[events['stock_code'] == stock_code]
+
+        groups = cls.summarize(events, group_by)
+        return {
+            "events": len(events),
+            "horizons": HORIZONS,
+            "groups": [g for g in groups if g["count"] >= min_count],
+        }
+
+    @classmethod
+    def stock_events(cls, stock_code: str, start_date: str, end_date: str = None) -> List[Dict[str, Any]]:
+        """单只股票的逐次上榜及后续表现"""
+        events = cls.events(start_date, end_date)
+        events = events[events['stock_code'] == stock_code].sort_values('trade_date')
+        records = []
+        for row in events.itertuples(index=False):
+            item = {
+                "trade_date": row.trade_date.strftime("%Y-%m-%d"),
+                "reason": row.reason,
+                "net_buy": None if pd.isna(row.net_buy) else float(row.net_buy),
+                "close": float(row.close),
+            }
+            for column in cls.metric_columns():
+                value = getattr(row, column)
+                item[column] = None if pd.isna(value) else round(float(value), 2)
+            records.append(item)
+        return records
@@ -0,0 +1,329 @@
+"""
+龙虎榜营业部席位 Service
+按上榜日抓取每只上榜股票的买卖席位明细写入 lhb_seat_trade (营业部 -> 日期/股票/净额 的倒排索引)，
+并预计算每个营业部在 1m/3m/6m/1y 窗口内净买入后的跟随收益和胜率 (lhb_seat_stats)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import DataService, _get_astock_conn, _query_dataframe, mysql_reads
+from app.services.lhb_analytics import PATH_WINDOW, forward_metrics
+from app.services.snapshot_service import SnapshotService
+
+
+# 统计窗口 -> 自然日数
+STAT_WINDOWS = {"1m": 30, "3m": 90, "6m": 180, "1y": 365}
+
+# 统计的跟随收益持有期
+STAT_HORIZONS = [1, 3, 5]
+
+# 排行支持的排序字段
+RANKING_FIELDS = ["trades", "stocks", "net_amount"] + \
+    [f"avg_ret_{h}" for h in STAT_HORIZONS] + [f"win_rate_{h}" for h in STAT_HORIZONS]
+
+
+class LhbSeatService:
+    """营业部席位索引"""
+
+    # ============ 抓取 ============
+
+    @staticmethod
+    def _fetch_stock(stock_code: str, trade_date: str) -> List[Tuple]:
+        """抓取一只股票一天的买入/卖出席位，同一营业部合并为一行"""
+        seats: Dict[str, Tuple] = {}
+        for flag in ("买入", "卖出"):
+            for row in DataService.get_lhb_stock_detail_em(stock_code, trade_date, flag):
+                if not row.交易营业部名称:
+                    continue
+                buy = row.买入金额 or 0.0
+                sell = row.卖出金额 or 0.0
+                net = row.净额 if row.净额 is not None else buy - sell
+                seats[row.交易营业部名称] = (row.交易营业部名称, trade_date, stock_code, buy, sell, net)
+        return list(seats.values())
+
+    @classmethod
+    @mysql_reads()
+    def ingest(cls, trade_date: str, n_jobs: int = 4, force: bool = False) -> Dict[str, Any]:
+        """
+        抓取某日全部上榜股票的席位明细
+
+        上榜股票取自龙虎榜快照 (缺失时回补)，已抓取过的股票跳过
+
+        Args:
+            trade_date: 交易日期，格式 YYYYMMDD
+            n_jobs: 并发请求数
+            force: 是否重新抓取已有数据
+
+        Returns:
+            {"stocks": 上榜股票数, "fetched": 本次抓取数, "rows": 写入行数, "errors": 失败股票}
+        """
+        listings = SnapshotService.serve("lhb_detail", trade_date).get("data", [])
+        codes = sorted({
+            (row.get("代码") if isinstance(row, dict) else row.代码) for row in listings
+        } - {None})
+
+        if not force and codes:
+            done = _query_dataframe(
+                "SELECT DISTINCT stock_code FROM lhb_seat_trade WHERE trade_date = %s", [trade_date]
+            )
+            existing = set(done['stock_code']) if not done.empty else set()
+            todo = [code for code in codes if code not in existing]
+        else:
+            todo = codes
+
+        rows: List[Tuple] = []
+        errors: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=max(1, n_jobs)) as executor:
+            futures = {code: executor.submit(cls._fetch_stock, code, trade_date) for code in todo}
+            for code, future in futures.items():
+                try:
+                    rows.extend(future.result())
+                except Exception as e:
+                    errors[code] = str(e)
+
+        if rows:
+            conn = _get_astock_conn()
+            try:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    """
+                    INSERT INTO lhb_seat_trade (seat_name, trade_date, stock_code, buy_amount, sell_amount, net_amount)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        buy_amount=VALUES(buy_amount), sell_amount=VALUES(sell_amount), net_amount=VALUES(net_amount)
+                    """,
+                    rows,
+                )
+                conn.commit()
+            finally:
+                conn.close()
+
+        return {"stocks": len(codes), "fetched": len(todo) - len(errors), "rows": len(rows), "errors": errors}
+
+    # ============ 统计 ============
+
+    @staticmethod
+    def _load_trades(
+        start_date: str,
+        end_date: str,
+        seat_name: str = None,
+        net_buy_only: bool = True
+    ) -> pd.DataFrame:
+        query = """
+            SELECT seat_name, trade_date, stock_code, buy_amount, sell_amount, net_amount
+            FROM lhb_seat_trade WHERE trade_date >= %s AND trade_date <= %s
+        """
+        params: List[Any] = [start_date, end_date]
+        if seat_name:
+            query += " AND seat_name = %s"
+            params.append(seat_name)
+        if net_buy_only:
+            query += " AND net_amount > 0"
+
+        df = _query_dataframe(query, params)
+        if df.empty:
+            return pd.DataFrame(columns=['seat_name', 'trade_date', 'stock_code',
+                                         'buy_amount', 'sell_amount', 'net_amount'])
+        df[['buy_amount', 'sell_amount', 'net_amount']] = df[['buy_amount', 'sell_amount', 'net_amount']].astype(float)
+        df['trade_date'] = pd.to_datetime(df['trade_date'])
+        return df
+
+    @staticmethod
+    def _with_returns(trades: pd.DataFrame, end_date: str) -> pd.DataFrame:
+        """席位明细关联上榜后的跟随收益 (一次查询全部相关股票的K线)"""
+        if trades.empty:
+            return trades.assign(**{f"ret_{h}": pd.Series(dtype=float) for h in STAT_HORIZONS})
+        kline_end = (pd.Timestamp(end_date) + pd.Timedelta(days=PATH_WINDOW * 2 + 10)).strftime("%Y%m%d")
+        panel = DataService.get_kline_panel(
+            stock_codes=sorted(trades['stock_code'].unique()),
+            start_date=trades['trade_date'].min().strftime("%Y%m%d"),
+            end_date=kline_end,
+            columns=['close', 'high', 'low'],
+        )
+        if panel.empty:
+            return trades.assign(**{f"ret_{h}": np.nan for h in STAT_HORIZONS})
+        metrics = forward_metrics(panel)
+        return trades.merge(metrics, on=['stock_code', 'trade_date'], how='left')
+
+    @classmethod
+    def compute_stats(cls, trades: pd.DataFrame, as_of: pd.Timestamp) -> pd.DataFrame:
+        """
+        按窗口分组计算营业部统计
+
+        Args:
+            trades: 含跟随收益的净买入明细
+            as_of: 统计截止日期
+
+        Returns:
+            seat_name, window_name 及 RANKING_FIELDS 列
+        """
+        frames = []
+        for window, days in STAT_WINDOWS.items():
+            recent = trades[trades['trade_date'] > as_of - pd.Timedelta(days=days)]
+            if recent.empty:
+                continue
+            grouped = recent.groupby('seat_name', sort=False)
+            stats = pd.DataFrame({
+                "trades": grouped.size(),
+                "stocks": grouped['stock_code'].nunique(),
+                "net_amount": grouped['net_amount'].sum(),
+            })
+            for h in STAT_HORIZONS:
+                col = f"ret_{h}"
+                stats[f"avg_ret_{h}"] = grouped[col].mean()
+                stats[f"win_rate_{h}"] = (recent[col] > 0).groupby(recent['seat_name']).sum() / grouped[col].count() * 100
+            stats["window_name"] = window
+            frames.append(stats.rename_axis("seat_name").reset_index())
+        if not frames:
+            return pd.DataFrame(columns=["seat_name", "window_name"] + RANKING_FIELDS)
+        return pd.concat(frames, ignore_index=True)
+
+    @classmethod
+    @mysql_reads()
+    def refresh_stats(cls, as_of: str = None) -> Dict[str, Any]:
+        """
+        重算全部营业部的滚动统计并覆盖写入 lhb_seat_stats
+
+        Args:
+            as_of: 统计截止日期，格式 YYYYMMDD，默认今天
+        """
+        as_of = as_of or datetime.now().strftime("%Y%m%d")
+        start = (pd.Timestamp(as_of) - pd.Timedelta(days=max(STAT_WINDOWS.values()))).strftime("%Y%m%d")
+        trades = cls._with_returns(cls._load_trades(start, as_of), as_of)
+        stats = cls.compute_stats(trades, pd.Timestamp(as_of))
+
+        columns = ["seat_name", "window_name"] + RANKING_FIELDS
+        values = [
+            (row[0], row[1], *[None if pd.isna(v) else float(v) for v in row[2:]], as_of)
+            for row in stats[columns].itertuples(index=False)
+        ]
+        conn = _get_astock_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM lhb_seat_stats")
+            if values:
+                cursor.executemany(
+                    f"INSERT INTO lhb_seat_stats ({', '.join(columns)}, as_of) "
+                    f"VALUES ({', '.join(['%s'] * (len(columns) + 1))})",
+                    values,
+                )
+            conn.commit()
+        finally:
+            conn.close()
+        return {"as_of": as_of, "trades": len(trades), "rows": len(values)}
+
+    # ============ 查询 ============
+
+    @staticmethod
+    def search(keyword: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """按关键字查找营业部 (按上榜次数排序)"""
+        df = _query_dataframe(
+            """
+            SELECT seat_name, COUNT(*) AS trades, MAX(trade_date) AS last_date FROM lhb_seat_trade
+            WHERE seat_name LIKE %s GROUP BY seat_name ORDER BY trades DESC LIMIT %s
+            """,
+            [f"%{keyword}%", limit],
+        )
+        return [
+            {"seat_name": r.seat_name, "trades": int(r.trades), "last_date": str(r.last_date)}
+            for r in df.itertuples()
+        ]
+
+    @staticmethod
+    def ranking(
+        window: str = "1m",
+        order_by: str = "win_rate_3",
+        min_trades: int = 5,
+        limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """营业部排行 (读取预计算统计)"""
+        if window not in STAT_WINDOWS:
+            raise ValueError(f"不支持的窗口: {window}. 支持: {list(STAT_WINDOWS.keys())}")
+        if order_by not in RANKING_FIELDS:
+            raise ValueError(f"不支持的排序字段: {order_by}. 支持: {RANKING_FIELDS}")
+
+        df = _query_dataframe(
+            f"""
+            SELECT seat_name, as_of, {', '.join(RANKING_FIELDS)} FROM lhb_seat_stats
+            WHERE window_name = %s AND trades >= %s
+            ORDER BY {order_by} IS NULL, {order_by} DESC LIMIT %s
+            """,
+            [window, min_trades, limit],
+        )
+        return [_clean(row) for row in df.to_dict("records")]
+
+    @classmethod
+    def seat_trades(
+        cls,
+        seat_name: str,
+        start_date: str,
+        end_date: str = None,
+        net_buy_only: bool = True
+    ) -> Dict[str, Any]:
+        """
+        某营业部区间内的上榜交易及跟随表现
+
+        Args:
+            seat_name: 营业部名称 (完整名称，可先用 search 查找)
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD，默认今天
+            net_buy_only: 只看净买入
+
+        Returns:
+            {"seat_name", "stats": 区间统计, "trades": 逐笔明细}
+        """
+        end_date = end_date or datetime.now().strftime("%Y%m%d")
+        trades = cls._with_returns(cls._load_trades(start_date, end_date, seat_name, net_buy_only), end_date)
+        if trades.empty:
+            return {"seat_name": seat_name, "stats": {"trades": 0}, "trades": []}
+        names = {s.code: s.name for s in DataService.stock_universe(stock_codes=trades['stock_code'].unique().tolist())}
+        trades['stock_name'] = trades['stock_code'].map(names)
+
+        stats: Dict[str, Any] = {"trades": len(trades), "net_amount": round(float(trades['net_amount'].sum()), 2)}
+        for h in STAT_HORIZONS:
+            col = trades[f"ret_{h}"].dropna()
+            stats[f"avg_ret_{h}"] = round(float(col.mean()), 2) if len(col) else None
+            stats[f"win_rate_{h}"] = round(float((col > 0).mean() * 100), 2) if len(col) else None
+
+        columns = ['trade_date', 'stock_code', 'stock_name', 'buy_amount', 'sell_amount', 'net_amount'] + \
+            [f"ret_{h}" for h in STAT_HORIZONS] + ['max_drawdown']
+        rows = trades.sort_values('trade_date', ascending=False).reindex(columns=columns)
+        rows['trade_date'] = rows['trade_date'].dt.strftime("%Y-%m-%d")
+        return {
+            "seat_name": seat_name,
+            "stats": stats,
+            "trades": [_clean(row) for row in rows.to_dict("records")],
+        }
+
+    @staticmethod
+    def stock_seats(stock_code: str, trade_date: str) -> List[Dict[str, Any]]:
+        """某只股票某日的上榜席位 (按净额排序)"""
+        df = _query_dataframe(
+            """
+            SELECT seat_name, buy_amount, sell_amount, net_amount FROM lhb_seat_trade
+            WHERE trade_date = %s AND stock_code = %s ORDER BY net_amount DESC
+            """,
+            [trade_date, stock_code],
+        )
+        return [_clean(row) for row in df.to_dict("records")]
+
+
+def _clean(row: Dict[str, Any]) -> Dict[str, Any]:
+    """DECIMAL/numpy/NaN -> JSON 友好的值"""
+    cleaned = {}
+    for key, value in row.items():
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            cleaned[key] = None
+        elif isinstance(value, (float, np.floating, Decimal)):
+            cleaned[key] = round(float(value), 4)
+        elif isinstance(value, np.integer):
+            cleaned[key] = int(value)
+        elif hasattr(value, "isoformat"):
+            cleaned[key] = str(value)[:10]
+        else:
+            cleaned[key] = value
+    return cleaned
@@ -0,0 +1,340 @@
+"""
+连板天梯 Service
+由 stock_kline 的涨跌幅按板块涨跌停规则向量化计算涨停/跌停/炸板标记和连板数，
+写入 stock_limit_streak；每日只需从上一交易日的连板数继续推进
+"""
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import DataService, _get_astock_conn, _query_dataframe, mysql_reads
+from app.services.execution_model import limit_pct_array, limit_prices
+
+
+# 价格容差 (半分)
+PRICE_TOLERANCE = 0.005
+
+# 涨跌幅超过限制比例这么多 (百分点) 视为无涨跌幅限制的交易日 (如新股上市前5日)
+NO_LIMIT_MARGIN = 1.0
+
+WRITE_BATCH_SIZE = 5000
+
+# 增量更新时回溯重算的自然日数 (晚于上次计算才同步K线的股票在窗口内补上)
+RESCAN_DAYS = 30
+
+
+def limit_flags(panel: pd.DataFrame, names: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    计算涨停/跌停/炸板标记
+
+    前收盘由 close / (1 + change_pct) 还原，涨跌停价按板块比例四舍五入到分。
+    ST 按当前股票名称判断。
+
+    Args:
+        panel: 长表K线，需包含 stock_code, close, high, change_pct
+        names: {股票代码: 名称}，用于识别 ST
+
+    Returns:
+        增加 is_limit_up, is_limit_down, is_broken 列的 DataFrame
+    """
+    frame = panel.copy()
+    codes = frame['stock_code'].to_numpy()
+    unique, inverse = np.unique(codes, return_inverse=True)
+    pct = limit_pct_array(unique, names)[inverse]
+
+    close = frame['close'].to_numpy(dtype=float)
+    high = frame['high'].to_numpy(dtype=float)
+    change_pct = frame['change_pct'].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prev_close = close / (1 + change_pct / 100)
+    up, down = limit_prices(prev_close, pct)
+
+    limited = np.abs(change_pct) <= pct * 100 + NO_LIMIT_MARGIN
+    frame['is_limit_up'] = limited & (close >= up - PRICE_TOLERANCE)
+    frame['is_limit_down'] = limited & (close <= down + PRICE_TOLERANCE)
+    frame['is_broken'] = limited & (high >= up - PRICE_TOLERANCE) & ~frame['is_limit_up'].to_numpy()
+    return frame
+
+
+def streak_counts(stock_codes: np.ndarray, is_limit_up: np.ndarray, seed: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    向量化计算连板数
+
+    Args:
+        stock_codes: 股票代码数组，按 (stock_code, trade_date) 排序
+        is_limit_up: 涨停标记
+        seed: 每行对应股票在区间之前的连板数，只加到每只股票区间开头的连续涨停上
+
+    Returns:
+        连板数数组 (未涨停为 0)
+    """
+    n = len(stock_codes)
+    if n == 0:
+        return np.zeros(0, dtype=int)
+
+    flag = is_limit_up.astype(int)
+    new_code = np.ones(n, dtype=bool)
+    new_code[1:] = stock_codes[1:] != stock_codes[:-1]
+
+    # 未涨停或换股票时开始新的一段，段内涨停数累加即连板数
+    reset = new_code | (flag == 0)
+    group = np.cumsum(reset) - 1
+    total = np.cumsum(flag)
+    base = (total - flag)[reset]
+    streak = (total - base[group]) * flag
+
+    if seed is not None:
+        # 每行所属股票的首行；首行未涨停时该股票没有延续区间之前的连板
+        first = np.maximum.accumulate(np.where(new_code, np.arange(n), 0))
+        leading = (group == group[first]) & (flag[first] == 1)
+        streak = streak + leading * flag * seed.astype(int)
+    return streak
+
+
+class LimitLadderService:
+    """连板天梯"""
+
+    # ============ 计算与写入 ============
+
+    @staticmethod
+    def _seed_streaks(before_date: str) -> Dict[str, int]:
+        """每只股票在 before_date 之前最后一个交易日的连板数"""
+        df = _query_dataframe(
+            """
+            SELECT s.stock_code, s.streak FROM stock_limit_streak s
+            JOIN (
+                SELECT stock_code, MAX(trade_date) AS trade_date FROM stock_limit_streak
+                WHERE trade_date < %s GROUP BY stock_code
+            ) m ON s.stock_code = m.stock_code AND s.trade_date = m.trade_date
+            """,
+            [before_date],
+        )
+        if df.empty:
+            return {}
+        return dict(zip(df['stock_code'], df['streak'].astype(int)))
+
+    @classmethod
+    @mysql_reads()
+    def build(
+        cls,
+        start_date: str = None,
+        end_date: str = None,
+        stock_codes: List[str] = None,
+        shard_size: int = 500
+    ) -> Dict[str, Any]:
+        """
+        计算区间内的涨跌停标记和连板数并写入 stock_limit_streak (按股票分片)
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD，不传则从 stock_kline 最早一天开始全量重建
+            end_date: 结束日期，格式 YYYYMMDD
+            stock_codes: 指定股票，不传则为全市场
+            shard_size: 每个分片的股票数
+
+        Returns:
+            {"rows": 写入行数, "stocks": 股票数}
+        """
+        universe = DataService.stock_universe(stock_codes=stock_codes)
+        names = {s.code: s.name for s in universe}
+        codes = [s.code for s in universe]
+        seeds = cls._seed_streaks(start_date) if start_date else {}
+
+        rows = 0
+        for i in range(0, len(codes), shard_size):
+            panel = DataService.get_kline_panel(
+                stock_codes=codes[i:i + shard_size],
+                start_date=start_date,
+                end_date=end_date,
+                columns=['close', 'high', 'change_pct'],
+            )
+            panel = panel.dropna(subset=['close', 'change_pct'])
+            if panel.empty:
+                continue
+
+            frame = limit_flags(panel, names)
+            shard_codes = frame['stock_code'].to_numpy()
+            seed = np.array([seeds.get(code, 0) for code in shard_codes], dtype=int) if seeds else None
+            frame['streak'] = streak_counts(shard_codes, frame['is_limit_up'].to_numpy(), seed)
+            rows += cls._save(frame)
+
+        return {"rows": rows, "stocks": len(codes)}
+
+    @classmethod
+    @mysql_reads()
+    def update(cls, end_date: str = None) -> Dict[str, Any]:
+        """
+        增量更新：从 stock_limit_streak 最后一个交易日前 RESCAN_DAYS 天重算到 end_date
+
+        最后交易日是全表的，之后才同步K线的股票在回溯窗口内补算 (按 upsert 覆盖)，
+        窗口起点之前的连板数作为种子。表为空时全量重建
+        """
+        df = _query_dataframe("SELECT MAX(trade_date) AS trade_date FROM stock_limit_streak")
+        last = df['trade_date'].iloc[0] if not df.empty else None
+        if last is None:
+            start_date = None
+        else:
+            start_date = (pd.Timestamp(last) - pd.Timedelta(days=RESCAN_DAYS)).strftime("%Y%m%d")
+            if end_date and start_date > end_date:
+                return {"rows": 0, "stocks": 0, "start_date": start_date}
+
+        result = cls.build(start_date=start_date, end_date=end_date)
+        result["start_date"] = start_date
+        return result
+
+    @staticmethod
+    def _save(frame: pd.DataFrame) -> int:
+        sql = """
+            INSERT INTO stock_limit_streak
+                (trade_date, stock_code, close, change_pct, is_limit_up, is_limit_down, is_broken, streak)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                close=VALUES(close), change_pct=VALUES(change_pct), is_limit_up=VALUES(is_limit_up),
+                is_limit_down=VALUES(is_limit_down), is_broken=VALUES(is_broken), streak=VALUES(streak)
+        """
+        values = list(zip(
+            frame['trade_date'].dt.strftime("%Y-%m-%d"),
+            frame['stock_code'],
+            frame['close'].astype(float),
+            frame['change_pct'].astype(float),
+            frame['is_limit_up'].astype(int),
+            frame['is_limit_down'].astype(int),
+            frame['is_broken'].astype(int),
+            frame['streak'].astype(int),
+        ))
+        conn = _get_astock_conn()
+        try:
+            cursor = conn.cursor()
+            for i in range(0, len(values), WRITE_BATCH_SIZE):
+                cursor.executemany(sql, values[i:i + WRITE_BATCH_SIZE])
+            conn.commit()
+        finally:
+            conn.close()
+        return len(values)
+
+    # ============ 查询 ============
+
+    @staticmethod
+    def latest_date() -> Optional[str]:
+        df = _query_dataframe("SELECT MAX(trade_date) AS trade_date FROM stock_limit_streak")
+        if df.empty or df['trade_date'].iloc[0] is None:
+            return None
+        return pd.Timestamp(df['trade_date'].iloc[0]).strftime("%Y%m%d")
+
+    @staticmethod
+    def _day_rows(where: str, params: list) -> pd.DataFrame:
+        return _query_dataframe(
+            f"""
+            SELECT s.trade_date, s.stock_code, i.name, s.close, s.change_pct,
+                   s.is_limit_up, s.is_limit_down, s.is_broken, s.streak
+            FROM stock_limit_streak s LEFT JOIN stock_info i ON i.code = s.stock_code
+            WHERE {where} AND (s.is_limit_up = 1 OR s.is_limit_down = 1 OR s.is_broken = 1)
+            """,
+            params,
+        )
+
+    @classmethod
+    def ladder(cls, trade_date: str = None) -> Dict[str, Any]:
+        """
+        某日连板天梯
+
+        Args:
+            trade_date: 交易日期，格式 YYYYMMDD，默认最新
+
+        Returns:
+            涨停/跌停/炸板数、封板率、各高度股票及相对上一交易日的晋级率
+        """
+        trade_date = trade_date or cls.latest_date()
+        if trade_date is None:
+            return {"trade_date": None, "ladder": []}
+
+        day = _query_dataframe(
+            "SELECT MAX(trade_date) AS trade_date FROM stock_limit_streak WHERE trade_date <= %s",
+            [trade_date],
+        )['trade_date'].iloc[0]
+        if day is None:
+            return {"trade_date": None, "ladder": []}
+        prev_day = _query_dataframe(
+            "SELECT MAX(trade_date) AS trade_date FROM stock_limit_streak WHERE trade_date < %s",
+            [day],
+        )['trade_date'].iloc[0]
+
+        rows = cls._day_rows("s.trade_date = %s", [day])
+        if rows.empty:
+            rows = pd.DataFrame(columns=['stock_code', 'name', 'close', 'change_pct',
+                                         'is_limit_up', 'is_limit_down', 'is_broken', 'streak'])
+        # 上一交易日各高度的涨停数，用于计算晋级率
+        prev_heights: Dict[int, int] = {}
+        if prev_day is not None:
+            prev = _query_dataframe(
+                "SELECT streak, COUNT(*) AS cnt FROM stock_limit_streak "
+                "WHERE trade_date = %s AND is_limit_up = 1 GROUP BY streak",
+                [prev_day],
+            )
+            prev_heights = {int(r.streak): int(r.cnt) for r in prev.itertuples()}
+
+        limit_up = rows[rows['is_limit_up'].astype(int) == 1]
+        broken = int(rows['is_broken'].astype(int).sum())
+        ladder = []
+        for height, group in sorted(limit_up.groupby(limit_up['streak'].astype(int)), key=lambda x: -x[0]):
+            # 晋级率: 今日 height 板数 / 昨日 height-1 板数 (首板无晋级率)
+            base = prev_heights.get(height - 1, 0) if height > 1 else 0
+            ladder.append({
+                "streak": height,
+                "count": len(group),
+                "promotion_rate": round(len(group) / base * 100, 2) if base else None,
+                "stocks": [
+                    {
+                        "code": r.stock_code,
+                        "name": r.name,
+                        "close": float(r.close),
+                        "change_pct": float(r.change_pct),
+                    }
+                    for r in group.sort_values('change_pct', ascending=False).itertuples()
+                ],
+            })
+
+        return {
+            "trade_date": pd.Timestamp(day).strftime("%Y-%m-%d"),
+            "prev_trade_date": pd.Timestamp(prev_day).strftime("%Y-%m-%d") if prev_day is not None else None,
+            "limit_up_count": len(limit_up),
+            "limit_down_count": int(rows['is_limit_down'].astype(int).sum()),
+            "broken_count": broken,
+            "seal_rate": round(len(limit_up) / (len(limit_up) + broken) * 100, 2) if len(limit_up) + broken else None,
+            "max_streak": int(limit_up['streak'].max()) if len(limit_up) else 0,
+            "ladder": ladder,
+        }
+
+    @staticmethod
+    def history(start_date: str, end_date: str = None) -> List[Dict[str, Any]]:
+        """
+        逐日涨跌停统计
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD，默认今天
+
+        Returns:
+            [{trade_date, limit_up_count, limit_down_count, broken_count, max_streak}]
+        """
+        end_date = end_date or datetime.now().strftime("%Y%m%d")
+        df = _query_dataframe(
+            """
+            SELECT trade_date, SUM(is_limit_up) AS limit_up_count, SUM(is_limit_down) AS limit_down_count,
+                   SUM(is_broken) AS broken_count, MAX(streak) AS max_streak
+            FROM stock_limit_streak
+            WHERE trade_date >= %s AND trade_date <= %s
+            GROUP BY trade_date ORDER BY trade_date
+            """,
+            [start_date, end_date],
+        )
+        return [
+            {
+                "trade_date": pd.Timestamp(r.trade_date).strftime("%Y-%m-%d"),
+                "limit_up_count": int(r.limit_up_count),
+                "limit_down_count": int(r.limit_down_count),
+                "broken_count": int(r.broken_count),
+                "max_streak": int(r.max_streak),
+            }
+            for r in df.itertuples()
+        ]
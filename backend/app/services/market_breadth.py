@@ -0,0 +1,193 @@
+"""
+市场宽度 Service
+由本地 stock_kline 长表向量化计算每个交易日的涨跌家数、涨跌停数、20/60/120 日新高新低
+和站上均线比例，写入 market_breadth，每日只计算新增交易日
+"""
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import DataService, _get_astock_conn, _query_dataframe, mysql_reads
+from app.services.limit_ladder import limit_flags
+
+
+# 新高新低/均线窗口 (交易日)
+WINDOWS = [20, 60, 120]
+
+# 计算最长窗口需要的历史 (自然日)
+WARMUP_DAYS = int(max(WINDOWS) * 1.6) + 10
+
+# 全量重建时每段的自然日数
+CHUNK_DAYS = 365
+
+BREADTH_COLUMNS = (
+    ["total", "advance", "decline", "flat", "limit_up", "limit_down"]
+    + [f"new_{kind}_{n}" for n in WINDOWS for kind in ("high", "low")]
+    + [f"above_ma_{n}" for n in WINDOWS]
+    + ["median_change_pct", "amount"]
+)
+
+
+def compute_breadth(panel: pd.DataFrame, names: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    由长表K线计算逐日市场宽度
+
+    窗口按每只股票自己的交易日滚动 (停牌日不计入)：整列做一次 rolling，
+    再剔除跨越股票边界的窗口。新高/新低为收盘价达到最近 N 个交易日 (含当日) 收盘价的最高/最低，
+    站上均线比例的分母为当日已有 N 日均线的股票数
+
+    Args:
+        panel: get_kline_panel 返回的长表 (需 close/high/change_pct/amount)，按 (stock_code, trade_date) 排序
+        names: {股票代码: 名称}，用于识别 ST 的涨跌停比例
+
+    Returns:
+        index 为 trade_date，列为 BREADTH_COLUMNS
+    """
+    frame = panel.dropna(subset=['close', 'change_pct'])
+    if frame.empty:
+        return pd.DataFrame(columns=BREADTH_COLUMNS)
+
+    frame = limit_flags(frame, names).reset_index(drop=True)
+    codes = frame['stock_code'].to_numpy()
+    close = frame['close']
+    change = frame['change_pct'].to_numpy(dtype=float)
+
+    # 每行在所属股票内的序号
+    new_code = np.ones(len(frame), dtype=bool)
+    new_code[1:] = codes[1:] != codes[:-1]
+    starts = np.flatnonzero(new_code)
+    position = np.arange(len(frame)) - np.repeat(starts, np.diff(np.append(starts, len(frame))))
+
+    flags = pd.DataFrame({
+        "trade_date": frame['trade_date'],
+        "total": 1,
+        "advance": change > 0,
+        "decline": change < 0,
+        "flat": change == 0,
+        "limit_up": frame['is_limit_up'],
+        "limit_down": frame['is_limit_down'],
+        "amount": frame['amount'].fillna(0.0),
+    })
+    values = close.to_numpy(dtype=float)
+    for n in WINDOWS:
+        valid = position >= n - 1
+        rolling = close.rolling(n)
+        flags[f"new_high_{n}"] = valid & (values >= rolling.max().to_numpy())
+        flags[f"new_low_{n}"] = valid & (values <= rolling.min().to_numpy())
+        flags[f"above_ma_{n}"] = valid & (values > rolling.mean().to_numpy())
+        flags[f"_has_ma_{n}"] = valid
+
+    daily = flags.groupby('trade_date').sum(numeric_only=True)
+    for n in WINDOWS:
+        has_ma = daily.pop(f"_has_ma_{n}")
+        daily[f"above_ma_{n}"] = (daily[f"above_ma_{n}"] / has_ma.where(has_ma > 0) * 100).round(4)
+    daily['median_change_pct'] = pd.Series(change, index=frame['trade_date']).groupby(level=0).median()
+    return daily[BREADTH_COLUMNS]
+
+
+class MarketBreadthService:
+    """市场宽度"""
+
+    @classmethod
+    @mysql_reads()
+    def build(cls, start_date: str, end_date: str = None) -> int:
+        """
+        计算区间内每个交易日的市场宽度并写入 market_breadth (按 CHUNK_DAYS 分段，每段带 WARMUP_DAYS 预热)
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD，默认今天
+
+        Returns:
+            写入的交易日数
+        """
+        end = pd.Timestamp(end_date or datetime.now().strftime("%Y%m%d"))
+        names = {s.code: s.name for s in DataService.stock_universe()}
+
+        written = 0
+        chunk_start = pd.Timestamp(start_date)
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + pd.Timedelta(days=CHUNK_DAYS - 1), end)
+            panel = DataService.get_kline_panel(
+                start_date=(chunk_start - pd.Timedelta(days=WARMUP_DAYS)).strftime("%Y%m%d"),
+                end_date=chunk_end.strftime("%Y%m%d"),
+                columns=['close', 'high', 'change_pct', 'amount'],
+            )
+            breadth = compute_breadth(panel, names)
+            written += cls._save(breadth[breadth.index >= chunk_start])
+            chunk_start = chunk_end + pd.Timedelta(days=1)
+        return written
+
+    @classmethod
+    @mysql_reads()
+    def update(cls, end_date: str = None) -> Dict[str, Any]:
+        """
+        增量更新：从 market_breadth 最后一个交易日的次日算到 end_date
+
+        表为空时从 stock_kline 最早一天开始全量计算
+        """
+        df = _query_dataframe("SELECT MAX(trade_date) AS trade_date FROM market_breadth")
+        last = df['trade_date'].iloc[0] if not df.empty else None
+        if last is None:
+            first = _query_dataframe("SELECT MIN(trade_date) AS trade_date FROM stock_kline")['trade_date'].iloc[0]
+            if first is None:
+                return {"start_date": None, "days": 0}
+            start_date = pd.Timestamp(first).strftime("%Y%m%d")
+        else:
+            start_date = (pd.Timestamp(last) + pd.Timedelta(days=1)).strftime("%Y%m%d")
+
+        if end_date and start_date > end_date:
+            return {"start_date": start_date, "days": 0}
+        return {"start_date": start_date, "days": cls.build(start_date, end_date)}
+
+    @staticmethod
+    def _save(breadth: pd.DataFrame) -> int:
+        if breadth.empty:
+            return 0
+        columns = ["trade_date"] + BREADTH_COLUMNS
+        values = [
+            (day.strftime("%Y-%m-%d"), *[None if pd.isna(v) else float(v) for v in row])
+            for day, row in zip(breadth.index, breadth[BREADTH_COLUMNS].itertuples(index=False))
+        ]
+        updates = ", ".join(f"{c}=VALUES({c})" for c in BREADTH_COLUMNS)
+        conn = _get_astock_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(
+                f"INSERT INTO market_breadth ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+                f"ON DUPLICATE KEY UPDATE {updates}",
+                values,
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return len(values)
+
+    @staticmethod
+    def history(start_date: str, end_date: str = None) -> List[Dict[str, Any]]:
+        """
+        逐日市场宽度
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD，默认今天
+        """
+        end_date = end_date or datetime.now().strftime("%Y%m%d")
+        df = _query_dataframe(
+            f"SELECT trade_date, {', '.join(BREADTH_COLUMNS)} FROM market_breadth "
+            "WHERE trade_date >= %s AND trade_date <= %s ORDER BY trade_date",
+            [start_date, end_date],
+        )
+        records = []
+        for row in df.to_dict("records"):
+            item = {"trade_date": str(row.pop("trade_date"))}
+            for key, value in row.items():
+                if value is None:
+                    item[key] = None
+                elif key.startswith(("above_ma", "median", "amount")):
+                    item[key] = float(value)
+                else:
+                    item[key] = int(value)
+            records.append(item)
+        return records
@@ -0,0 +1,198 @@
+"""
+行情数据嵌入式存储 (DuckDB / SQLite)
+单机研究环境和测试可不依赖 MySQL：由 scripts/export_market_db.py 将 astock 的行情表导出为单个
+数据库文件，DataService 的读取查询在 MARKET_DB_BACKEND=duckdb/sqlite 时改查该文件。
+DuckDB 为列式存储，全市场扫描和聚合只读取所需列，导出时按 (stock_code, trade_date) 排序，
+按股票/日期过滤可跳过大部分数据块。
+
+嵌入式库只读，写入 (同步脚本、因子计算等) 及写入前的读取 (data_service.mysql_reads) 仍走 MySQL，同步后重新导出即可；
+导出完成后文件被替换，已打开的连接在下次查询时自动重连。
+"""
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Iterator, List, Tuple
+
+import pandas as pd
+
+from app.config import settings
+
+
+# 支持的嵌入式后端
+EMBEDDED_BACKENDS = ("duckdb", "sqlite")
+
+# 导出的行情表 (schema.sql 中由同步脚本维护的表)
+MARKET_TABLES = [
+    "stock_info", "stock_kline", "stock_kline_minute", "stock_limit_streak", "market_snapshot",
+    "lhb_seat_trade", "lhb_seat_stats", "market_breadth", "emotion_cycle", "stock_adj_factor",
+    "data_sync_version",
+]
+
+# 按列名还原为与 pymysql 一致的 Python 类型：DATE -> date，TIME -> timedelta
+DATE_COLUMNS = {"trade_date", "ex_date", "as_of"}
+TIME_COLUMNS = {"time_minute", "snapshot_time"}
+
+# MySQL 字段类型 -> 嵌入式库字段类型
+COLUMN_TYPES = {
+    "duckdb": {
+        "int": "BIGINT", "decimal": "DOUBLE", "date": "DATE", "time": "TIME",
+        "datetime": "TIMESTAMP", "blob": "BLOB", "text": "VARCHAR",
+    },
+    "sqlite": {
+        "int": "INTEGER", "decimal": "REAL", "date": "TEXT", "time": "TEXT",
+        "datetime": "TEXT", "blob": "BLOB", "text": "TEXT",
+    },
+}
+
+_DATE_PARAM = re.compile(r"^\d{8}$")
+
+_local = threading.local()
+
+
+def column_type(mysql_type: str, backend: str) -> str:
+    """MySQL information_schema.COLUMNS.DATA_TYPE -> 嵌入式库字段类型"""
+    mysql_type = mysql_type.lower()
+    if mysql_type.endswith("int"):
+        kind = "int"
+    elif mysql_type in ("decimal", "float", "double"):
+        kind = "decimal"
+    elif mysql_type in ("date", "time"):
+        kind = mysql_type
+    elif mysql_type in ("datetime", "timestamp"):
+        kind = "datetime"
+    elif mysql_type.endswith("blob") or mysql_type.endswith("binary"):
+        kind = "blob"
+    else:
+        kind = "text"
+    return COLUMN_TYPES[backend][kind]
+
+
+def format_time(value) -> Any:
+    """TIME 值 (pymysql 返回 timedelta) -> HH:MM:SS"""
+    if isinstance(value, timedelta):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return value
+
+
+def _connect(backend: str, path: str):
+    if backend == "duckdb":
+        import duckdb
+        return duckdb.connect(path, read_only=True)
+    import sqlite3
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+
+
+def _get_conn():
+    """当前线程的只读连接 (文件被重新导出后重连)"""
+    backend, path = settings.MARKET_DB_BACKEND, settings.MARKET_DB_PATH
+    if backend not in EMBEDDED_BACKENDS:
+        raise ValueError(f"不支持的行情存储: {backend}. 支持: mysql/{'/'.join(EMBEDDED_BACKENDS)}")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"行情数据库文件不存在: {path}，请先执行 scripts/export_market_db.py")
+
+    key = (backend, path, os.path.getmtime(path))
+    cached = getattr(_local, "conn", None)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    if cached is not None:
+        cached[1].close()
+    conn = _connect(backend, path)
+    _local.conn = (key, conn)
+    return conn
+
+
+def _param(value) -> Any:
+    """参数转换：YYYYMMDD 字符串和日期对象 -> YYYY-MM-DD (MySQL 可直接比较，嵌入式库需要 ISO 格式)"""
+    if isinstance(value, str) and _DATE_PARAM.match(value):
+        try:
+            return datetime.strptime(value, "%Y%m%d").date().isoformat()
+        except ValueError:
+            return value
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """日期/时间列还原为与 MySQL 查询结果相同的类型 (缺失值为 None)"""
+    for column in DATE_COLUMNS & set(df.columns):
+        values = pd.to_datetime(df[column])
+        df[column] = pd.Series([d.date() if pd.notna(d) else None for d in values], index=df.index, dtype=object)
+    for column in TIME_COLUMNS & set(df.columns):
+        values = pd.to_timedelta(df[column].map(lambda v: None if v is None else str(v)))
+        df[column] = values.astype(object).where(values.notna(), None)
+    return df
+
+
+def query_dataframe(query: str, params: List = None) -> pd.DataFrame:
+    """
+    在嵌入式库上执行查询 (SQL 与 MySQL 版本相同，%s 占位符)
+
+    Args:
+        query: SQL
+        params: 参数列表
+
+    Returns:
+        DataFrame，日期列为 date、时间列为 timedelta，数值列为 float/int
+    """
+    conn = _get_conn()
+    params = [_param(p) for p in (params or [])]
+    query = query.replace("%s", "?")
+    if settings.MARKET_DB_BACKEND == "duckdb":
+        df = conn.execute(query, params).fetchdf()
+    else:
+        cursor = conn.execute(query, params)
+        df = pd.DataFrame(cursor.fetchall(), columns=[c[0] for c in cursor.description])
+    return _normalize(df)
+
+
+def iter_query(query: str, params: List = None, batch_size: int = 50_000) -> Iterator[pd.DataFrame]:
+    """
+    分批读取查询结果 (内存中最多保留一批)
+
+    使用独立连接：流式响应逐批迭代期间，线程池中的同一线程可能处理其他请求，不能共用线程本地连接
+    """
+    backend, path = settings.MARKET_DB_BACKEND, settings.MARKET_DB_PATH
+    if backend not in EMBEDDED_BACKENDS:
+        raise ValueError(f"不支持的行情存储: {backend}. 支持: mysql/{'/'.join(EMBEDDED_BACKENDS)}")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"行情数据库文件不存在: {path}，请先执行 scripts/export_market_db.py")
+
+    conn = _connect(backend, path)
+    try:
+        cursor = conn.execute(query.replace("%s", "?"), [_param(p) for p in (params or [])])
+        columns = [c[0] for c in cursor.description]
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield _normalize(pd.DataFrame(rows, columns=columns))
+    finally:
+        conn.close()
+
+
+def create_table_sql(table: str, columns: List[Tuple[str, str]], backend: str) -> str:
+    """按 MySQL 字段定义 [(列名, DATA_TYPE)] 生成嵌入式库的建表语句"""
+    fields = ", ".join(f"{name} {column_type(mysql_type, backend)}" for name, mysql_type in columns)
+    return f"CREATE TABLE {table} ({fields})"
+
+
+def sort_keys(columns: List[str]) -> List[str]:
+    """导出时的排序键：按股票、日期聚集，便于 DuckDB 跳过数据块、SQLite 走索引"""
+    return [c for c in ("stock_code", "code", "trade_date", "ex_date", "time_minute") if c in columns]
+
+
+def index_statements(table: str, columns: List[str]) -> List[str]:
+    """SQLite 索引 (DuckDB 依赖排序后的数据块统计，不建索引)"""
+    statements = []
+    keys = sort_keys(columns)
+    if keys:
+        statements.append(f"CREATE INDEX idx_{table}_keys ON {table} ({', '.join(keys)})")
+    if "trade_date" in columns and keys and keys[0] != "trade_date":
+        statements.append(f"CREATE INDEX idx_{table}_date ON {table} (trade_date)")
+    return statements
+
@@ -0,0 +1,167 @@
+"""
+分时数据分区 Service
+stock_kline_minute 按 trade_date 做 RANGE COLUMNS 分区，每个交易日一个分区，
+提前创建未来交易日的分区，过期数据先归档到冷存储 (cold_archive) 再整分区 DROP，
+插入和查询只涉及少数分区，与历史数据量无关
+"""
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from app.services.data_service import _get_astock_conn, _query_mysql
+
+
+TABLE = "stock_kline_minute"
+
+# 默认保留的交易日数 (与 sync_stock_kline_minute 一致)
+RETENTION_DAYS = 5
+
+# 提前创建分区的自然日数
+AHEAD_DAYS = 7
+
+MAX_PARTITION = "pmax"
+
+
+def partition_name(day: date) -> str:
+    """分区名 pYYYYMMDD，保存 trade_date <= day 的数据 (与上一分区之间的非交易日也落在此分区)"""
+    return f"p{day.strftime('%Y%m%d')}"
+
+
+def _partition_clause(day: date) -> str:
+    return f"PARTITION {partition_name(day)} VALUES LESS THAN ('{(day + timedelta(days=1)).isoformat()}')"
+
+
+class MinutePartitionService:
+    """分时数据分区管理"""
+
+    @staticmethod
+    def partitions() -> List[Dict[str, Any]]:
+        """
+        当前分区列表 (按范围升序)
+
+        Returns:
+            [{"name", "upper": 分区上界 date (MAXVALUE 为 None)}]，未分区的表返回空列表
+        """
+        df = _query_mysql(
+            """
+            SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS description
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+            """,
+            [TABLE],
+        )
+        result = []
+        for row in df.itertuples():
+            bound = str(row.description).strip("'")
+            upper = None if bound.upper() == "MAXVALUE" else datetime.strptime(bound, "%Y-%m-%d").date()
+            result.append({"name": row.name, "upper": upper})
+        return result
+
+    @staticmethod
+    def _execute(statements: List[str]):
+        conn = _get_astock_conn()
+        try:
+            cursor = conn.cursor()
+            for statement in statements:
+                cursor.execute(statement)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @classmethod
+    def migrate(cls) -> Dict[str, Any]:
+        """
+        将未分区的表改为按日分区 (一次性，数据量大时耗时较长)
+
+        分区列必须包含在主键中，主键改为 (id, trade_date)；已有数据的每个交易日一个分区
+        """
+        existing = cls.partitions()
+        if existing:
+            return {"migrated": False, "partitions": len(existing)}
+
+        days = _query_mysql(f"SELECT DISTINCT trade_date FROM {TABLE} ORDER BY trade_date")
+        clauses = [_partition_clause(d) for d in days['trade_date']] if not days.empty else []
+        clauses.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+        cls._execute([
+            f"ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, trade_date)",
+            f"ALTER TABLE {TABLE} PARTITION BY RANGE COLUMNS(trade_date) ({', '.join(clauses)})",
+        ])
+        return {"migrated": True, "partitions": len(clauses)}
+
+    @classmethod
+    def ensure_partitions(cls, ahead_days: int = AHEAD_DAYS, today: Optional[date] = None) -> List[str]:
+        """
+        为今天起 ahead_days 天内的工作日创建分区 (从 pmax 拆分，pmax 为空时不移动数据)
+
+        Returns:
+            新建的分区名
+        """
+        existing = cls.partitions()
+        if not existing:
+            raise ValueError(f"{TABLE} 未分区，请先执行 migrate")
+
+        last = max((p["upper"] for p in existing if p["upper"]), default=None)
+        today = today or date.today()
+        days = [
+            today + timedelta(days=i) for i in range(ahead_days + 1)
+            if (today + timedelta(days=i)).weekday() < 5
+        ]
+        # 分区上界为次日，已覆盖的日期不再创建
+        days = [d for d in days if last is None or d >= last]
+        if not days:
+            return []
+
+        clauses = [_partition_clause(d) for d in days]
+        clauses.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+        cls._execute([f"ALTER TABLE {TABLE} REORGANIZE PARTITION {MAX_PARTITION} INTO ({', '.join(clauses)})"])
+        return [partition_name(d) for d in days]
+
+    @classmethod
+    def expired_partitions(cls, keep_days: int = RETENTION_DAYS) -> List[Dict[str, Any]]:
+        """
+        超出保留期的分区：只保留最近 keep_days 个有数据的交易日
+
+        Returns:
+            分区列表 (同 partitions)，分区内所有日期都早于保留的最早交易日
+        """
+        recent = _query_mysql(
+            f"SELECT DISTINCT trade_date FROM {TABLE} ORDER BY trade_date DESC LIMIT %s",
+            [keep_days],
+        )
+        if len(recent) < keep_days:
+            return []
+        cutoff = min(recent['trade_date'])
+        return [p for p in cls.partitions() if p["upper"] is not None and p["upper"] <= cutoff]
+
+    @classmethod
+    def drop_expired(cls, keep_days: int = RETENTION_DAYS, archive: bool = True) -> List[str]:
+        """
+        整分区删除过期的分时数据 (DROP PARTITION，不逐行删除)
+
+        Args:
+            keep_days: 保留的交易日数
+            archive: 删除前先写入冷存储 (Parquet)，并合并已结束月份的归档文件
+
+        Returns:
+            删除的分区名
+        """
+        expired = cls.expired_partitions(keep_days)
+        if not expired:
+            return []
+
+        if archive:
+            from app.services.cold_archive import ColdArchive
+            ColdArchive.archive_before(max(p["upper"] for p in expired))
+            ColdArchive.compact_finished()
+
+        names = [p["name"] for p in expired]
+        cls._execute([f"ALTER TABLE {TABLE} DROP PARTITION {', '.join(names)}"])
+        return names
+
+    @classmethod
+    def maintain(cls, keep_days: int = RETENTION_DAYS, ahead_days: int = AHEAD_DAYS) -> Dict[str, Any]:
+        """未分区时先迁移，再创建未来分区并删除过期分区"""
+        migrated = cls.migrate()
+        created = cls.ensure_partitions(ahead_days)
+        dropped = cls.drop_expired(keep_days)
+        return {"migrated": migrated["migrated"], "created": created, "dropped": dropped}
@@ -72,7 +72,7 @@ class ParameterOptimizer:
                 "total_return": -999,
                 "annual_return": -999,
                 "sharpe_ratio": -999,
-                "max_drawdown": 100,
+                "max_drawdown": -100,
                 "win_rate": 0,
                 "total_trades": 0,
                 "final_value": 0,
@@ -85,16 +85,16 @@ class ParameterOptimizer:
         method: str = "grid",
         n_iter: int = 50,
         initial_capital: float = 100000,
-        n_jobs: int = 4
+        n_jobs: int = 4,
+        combinations: List[Dict[str, Any]] = None
     ) -> List[OptimizationResult]:
-        """执行参数优化"""
-        combinations = self._generate_param_combinations(method, n_iter)
+        """执行参数优化 (combinations 不传时按 method 由 param_grid 生成)"""
+        if combinations is None:
+            combinations = self._generate_param_combinations(method, n_iter)
         self.results = []
 
-        if self.objective in ["max_drawdown"]:
-            reverse = False
-        else:
-            reverse = self.maximize
+        # max_drawdown 为负值 (performance_metrics / _format_stats)，与其他指标一样越大越好
+        reverse = self.maximize
 
         with ThreadPoolExecutor(max_workers=n_jobs) as executor:
             futures = {
@@ -118,7 +118,7 @@ class ParameterOptimizer:
                     results_with_params.append((params, {
                         "total_return": -999,
                         "sharpe_ratio": -999,
-                        "max_drawdown": 100,
+                        "max_drawdown": -100,
                     }))
 
         results_with_params.sort(
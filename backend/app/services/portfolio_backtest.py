@@ -0,0 +1,386 @@
+"""
+组合回测 Service
+基于 日期 x 股票 宽表的向量化多标的回测：截面排序选股、定期调仓、最大持仓数、交易成本
+"""
+from typing import Dict, Any, List, Optional, Union
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import DataService
+from app.services.backtest_engine import performance_metrics
+from app.services.execution_model import AShareExecutionModel, limit_pct_array, limit_prices
+
+
+# 截面排序因子 (值越大越优先)
+FACTORS = {
+    "momentum": "N日涨幅",
+    "reversal": "N日跌幅 (反转)",
+    "turnover": "N日平均换手率",
+    "amount": "N日平均成交额",
+    "volume_ratio": "量比 (当日成交量 / 前N日均量)",
+}
+
+
+class PortfolioBacktester:
+    """组合回测引擎"""
+
+    def __init__(
+        self,
+        initial_capital: float = 1000000,
+        factor: str = "momentum",
+        factor_window: int = 5,
+        top_n: int = 3,
+        max_positions: int = 3,
+        rebalance: Union[int, str] = 5,
+        commission: float = 0.001,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        min_amount: Optional[float] = None,
+        execution_model: Optional[AShareExecutionModel] = None
+    ):
+        """
+        Args:
+            initial_capital: 初始资金
+            factor: 排序因子，见 FACTORS
+            factor_window: 因子计算窗口 (交易日)
+            top_n: 每次调仓选取的股票数
+            max_positions: 最大持仓数 (同 init_strategies.max_positions)，每只股票目标权重 1/max_positions
+            rebalance: 调仓周期，整数为每 N 个交易日 (持有 N 天)，或 "weekly"/"monthly"
+            commission: 单边交易成本 (按成交金额)
+            min_price: 最低股价过滤
+            max_price: 最高股价过滤
+            min_amount: 最低成交额过滤 (元)
+            execution_model: A股成交模型，传入时按整手、涨跌停、印花税/最低佣金成交，
+                             commission 不再生效
+        """
+        if factor not in FACTORS:
+            raise ValueError(f"不支持的因子: {factor}. 支持: {list(FACTORS.keys())}")
+        if max_positions < 1:
+            raise ValueError("max_positions 必须大于 0")
+
+        self.initial_capital = initial_capital
+        self.factor = factor
+        self.factor_window = factor_window
+        self.top_n = min(top_n, max_positions)
+        self.max_positions = max_positions
+        self.rebalance = rebalance
+        self.commission = commission
+        self.min_price = min_price
+        self.max_price = max_price
+        self.min_amount = min_amount
+        self.execution_model = execution_model
+        self.names: Dict[str, str] = {}
+
+    # ============ 数据 ============
+
+    def load_panel(
+        self,
+        start_date: str,
+        end_date: str,
+        stock_codes: List[str] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """一次查询加载股票池K线并转为宽表"""
+        if self.execution_model is not None:
+            # 股票名称用于识别 ST 的涨跌幅限制
+            self.names = {s.code: s.name for s in DataService.stock_universe(stock_codes=stock_codes)}
+        panel = DataService.get_kline_panel(
+            stock_codes=stock_codes,
+            start_date=start_date,
+            end_date=end_date,
+            columns=['open', 'close', 'volume', 'amount', 'turnover_rate'],
+        )
+        return DataService.pivot_kline_panel(
+            panel, ['open', 'close', 'volume', 'amount', 'turnover_rate']
+        )
+
+    # ============ 信号 ============
+
+    def compute_scores(self, data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """计算截面因子得分 (只使用当日及之前的数据)，不可交易的股票为 NaN"""
+        close = data['close']
+        n = self.factor_window
+
+        if self.factor == "momentum":
+            score = close / close.shift(n) - 1
+        elif self.factor == "reversal":
+            score = 1 - close / close.shift(n)
+        elif self.factor == "turnover":
+            score = data['turnover_rate'].rolling(n, min_periods=n).mean()
+        elif self.factor == "amount":
+            score = data['amount'].rolling(n, min_periods=n).mean()
+        else:
+            volume = data['volume']
+            score = volume / volume.shift(1).rolling(n, min_periods=n).mean()
+
+        mask = close.notna()
+        if self.min_price is not None:
+            mask &= close >= self.min_price
+        if self.max_price is not None:
+            mask &= close <= self.max_price
+        if self.min_amount is not None:
+            mask &= data['amount'] >= self.min_amount
+
+        return score.where(mask).replace([np.inf, -np.inf], np.nan)
+
+    def rebalance_dates(self, dates: pd.DatetimeIndex) -> np.ndarray:
+        """调仓信号日在 dates 中的位置 (信号日收盘后选股，次日开盘成交)"""
+        if isinstance(self.rebalance, str):
+            if self.rebalance == "weekly":
+                period = dates.to_period("W")
+            elif self.rebalance == "monthly":
+                period = dates.to_period("M")
+            else:
+                raise ValueError(f"不支持的调仓周期: {self.rebalance}")
+            # 每周/每月最后一个交易日出信号
+            is_last = np.r_[period[1:] != period[:-1], True]
+            positions = np.flatnonzero(is_last)
+        else:
+            step = max(1, int(self.rebalance))
+            positions = np.arange(self.factor_window, len(dates), step)
+        # 最后一天出信号无法在次日成交
+        return positions[positions < len(dates) - 1]
+
+    def select_targets(self, scores: pd.DataFrame, signal_positions: np.ndarray) -> np.ndarray:
+        """
+        截面排序选股
+
+        Returns:
+            bool 矩阵 (调仓次数 x 股票数)，True 表示入选
+        """
+        values = scores.to_numpy()[signal_positions]
+        filled = np.where(np.isnan(values), -np.inf, values)
+        selected = np.zeros(values.shape, dtype=bool)
+        if values.shape[1] == 0 or self.top_n == 0:
+            return selected
+
+        k = min(self.top_n, values.shape[1])
+        top_idx = np.argpartition(-filled, k - 1, axis=1)[:, :k]
+        rows = np.arange(values.shape[0])[:, None]
+        selected[rows, top_idx] = True
+        selected &= ~np.isnan(values)
+        return selected
+
+    # ============ 回测 ============
+
+    def run(
+        self,
+        start_date: str = None,
+        end_date: str = None,
+        stock_codes: List[str] = None,
+        data: Dict[str, pd.DataFrame] = None
+    ) -> Dict[str, Any]:
+        """
+        运行组合回测
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD
+            stock_codes: 股票池，不传则为全市场
+            data: 已加载的宽表 (open/close/volume/amount/turnover_rate)，传入时不再查询数据库
+
+        Returns:
+            回测结果：指标、权益曲线、调仓记录
+        """
+        if data is None:
+            data = self.load_panel(start_date, end_date, stock_codes)
+
+        close_df = data['close']
+        if close_df.empty:
+            return {"error": "没有K线数据"}
+
+        dates = close_df.index
+        codes = close_df.columns
+        open_ = data['open'].to_numpy(dtype=float)
+        close = close_df.to_numpy(dtype=float)
+        # 停牌日沿用最近收盘价估值
+        close_filled = close_df.ffill().to_numpy(dtype=float)
+
+        scores = self.compute_scores(data)
+        signal_positions = self.rebalance_dates(dates)
+        selected = self.select_targets(scores, signal_positions)
+
+        n_days, n_codes = close.shape
+        shares = np.zeros(n_codes)
+        holdings = np.zeros((n_days, n_codes))
+        cash_series = np.full(n_days, float(self.initial_capital))
+        cash = float(self.initial_capital)
+        total_cost = 0.0
+        traded_value = 0.0
+        blocked = 0
+        rebalances = []
+
+        if self.execution_model is not None:
+            prev_close = np.vstack([np.full(n_codes, np.nan), close_filled[:-1]])
+            up_limit, down_limit = limit_prices(prev_close, limit_pct_array(codes, self.names))
+
+        exec_positions = signal_positions + 1
+        boundaries = np.r_[exec_positions, n_days]
+        if len(exec_positions):
+            cash_series[:exec_positions[0]] = cash
+
+        # 仅在调仓日循环，调仓日之间持股不变，估值向量化计算
+        for k, exec_pos in enumerate(exec_positions):
+            price = open_[exec_pos]
+            tradable = ~np.isnan(price)
+            mark = np.where(tradable, price, close_filled[exec_pos - 1])
+            mark = np.nan_to_num(mark)
+            value = cash + float(shares @ mark)
+
+            if self.execution_model is None:
+                target = np.zeros(n_codes)
+                buy_mask = selected[k] & tradable
+                # 停牌股票无法交易，保持原持仓
+                target[~tradable] = shares[~tradable]
+                n_buy = int(buy_mask.sum())
+                if n_buy:
+                    slot = self._slot_value(value, float(target @ mark), n_buy)
+                    target[buy_mask] = slot / price[buy_mask]
+                    # 费用从现金中扣除：超出部分按最坏情况 (减仓也会产生费用) 从各仓位等额扣减
+                    shortfall = float(target @ mark) + float((np.abs(target - shares) * mark).sum()) * self.commission - value
+                    if shortfall > 0:
+                        slot = max(slot - shortfall / (1 - self.commission) / n_buy, 0.0)
+                        target[buy_mask] = slot / price[buy_mask]
+
+                delta_value = np.abs(target - shares) * mark
+                cost = float(delta_value.sum()) * self.commission
+                cash = value - float(target @ mark) - cost
+                traded = float(delta_value.sum())
+            else:
+                target, cash, cost, traded, n_blocked = self._rebalance_a_share(
+                    shares, cash, value, price, mark, selected[k], scores.iloc[signal_positions[k]].to_numpy(),
+                    up_limit[exec_pos], down_limit[exec_pos],
+                )
+                blocked += n_blocked
+
+            total_cost += cost
+            traded_value += traded
+            shares = target
+
+            end = boundaries[k + 1]
+            holdings[exec_pos:end] = shares
+            cash_series[exec_pos:end] = cash
+
+            rebalances.append({
+                "signal_date": dates[signal_positions[k]].strftime("%Y-%m-%d"),
+                "trade_date": dates[exec_pos].strftime("%Y-%m-%d"),
+                "holdings": codes[shares > 0].tolist(),
+                "cost": round(cost, 2),
+            })
+
+        equity = cash_series + np.nansum(holdings * np.nan_to_num(close_filled), axis=1)
+        equity_series = pd.Series(equity, index=dates)
+
+        result = self._metrics(equity_series)
+        result.update({
+            "total_cost": round(total_cost, 2),
+            "turnover": round(traded_value / self.initial_capital, 4),
+            "rebalance_count": len(rebalances),
+            "benchmark_return": self._benchmark_return(close_df),
+            "equity_curve": [
+                {"date": d.strftime("%Y-%m-%d"), "equity": round(float(v), 2)}
+                for d, v in equity_series.items()
+            ],
+            "rebalances": rebalances,
+        })
+        if self.execution_model is not None:
+            result["execution_model"] = self.execution_model.to_dict()
+            result["blocked_orders"] = blocked
+        return result
+
+    def _rebalance_a_share(
+        self,
+        shares: np.ndarray,
+        cash: float,
+        value: float,
+        price: np.ndarray,
+        mark: np.ndarray,
+        selected: np.ndarray,
+        score: np.ndarray,
+        up_limit: np.ndarray,
+        down_limit: np.ndarray
+    ):
+        """
+        按A股规则调仓：先卖后买，整手成交，涨停买不进、跌停卖不出
+
+        调仓在信号日次日开盘成交，上次买入至少已隔一个交易日，T+1 天然满足。
+
+        Returns:
+            (新持仓, 现金, 费用, 成交金额, 被涨跌停阻止的订单数)
+        """
+        model = self.execution_model
+        tradable = ~np.isnan(price)
+        fill = np.nan_to_num(price)
+        can_buy = model.can_buy(price, up_limit) | np.isnan(up_limit)
+        can_sell = model.can_sell(price, down_limit) | np.isnan(down_limit)
+
+        target = np.zeros(len(shares))
+        buy_mask = selected & tradable
+        # 停牌股票无法交易，保持原持仓
+        target[~tradable] = shares[~tradable]
+        frozen = float(target[~tradable] @ mark[~tradable])
+        slot = self._slot_value(value, frozen, int(buy_mask.sum()))
+        # 目标股数按含滑点和费用的买入成本计算
+        gross = 1 + model.commission_rate + model.transfer_fee
+        target[buy_mask] = model.round_lots(slot / (model.buy_price(price[buy_mask]) * gross))
+
+        sell_mask = (target < shares) & tradable
+        sell_blocked = sell_mask & ~can_sell
+        target[sell_blocked] = shares[sell_blocked]
+        sell_mask &= can_sell
+
+        buy_mask = (target > shares) & tradable
+        buy_blocked = buy_mask & ~can_buy
+        target[buy_blocked] = shares[buy_blocked]
+        buy_mask &= can_buy
+
+        sell_value = (shares[sell_mask] - target[sell_mask]) * model.sell_price(fill[sell_mask])
+        sell_fee = model.sell_cost(sell_value)
+        cash += float(sell_value.sum() - sell_fee.sum())
+        cost = float(sell_fee.sum())
+        traded = float(sell_value.sum())
+
+        # 按得分从高到低买入，资金不足时减少股数
+        buy_price = model.buy_price(fill)
+        for i in np.flatnonzero(buy_mask)[np.argsort(-score[buy_mask], kind="stable")]:
+            qty = min(target[i] - shares[i], float(model.affordable_shares(cash, buy_price[i])))
+            target[i] = shares[i] + qty
+            if qty <= 0:
+                continue
+            amount = float(qty * buy_price[i])
+            fee = float(model.buy_cost(amount))
+            cash -= amount + fee
+            cost += fee
+            traded += amount
+
+        return target, cash, cost, traded, int(sell_blocked.sum() + buy_blocked.sum())
+
+    def _slot_value(self, value: float, frozen: float, n_buy: int) -> float:
+        """
+        每只入选股票的目标市值
+
+        单只不超过总资产的 1/max_positions，全部入选股票合计不超过扣除停牌持仓后的资产
+
+        Args:
+            value: 调仓前总资产
+            frozen: 无法交易的停牌持仓市值
+            n_buy: 入选且可交易的股票数
+        """
+        if n_buy == 0:
+            return 0.0
+        return min(value / self.max_positions, max(value - frozen, 0.0) / n_buy)
+
+    def _metrics(self, equity: pd.Series) -> Dict[str, Any]:
+        """计算组合绩效指标 (百分比口径与 BacktestEngine 一致，最大回撤为负值)"""
+        returns = equity.pct_change().dropna()
+        result = performance_metrics(equity, self.initial_capital)
+        result.update({
+            "win_rate": round(float((returns > 0).mean() * 100), 2) if len(returns) else 0.0,
+            "trading_days": len(equity),
+        })
+        return result
+
+    @staticmethod
+    def _benchmark_return(close: pd.DataFrame) -> float:
+        """等权买入持有股票池的收益率 (%)"""
+        daily = close.pct_change(fill_method=None).mean(axis=1).fillna(0)
+        return round(float(((1 + daily).prod() - 1) * 100), 4)
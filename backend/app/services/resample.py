@@ -0,0 +1,254 @@
+"""
+K线重采样 Service
+由 stock_kline 合成周线/月线，由 stock_kline_minute (5分钟) 合成 15/30/60/120 分钟线，
+不再为其他周期调用上游接口。结果按请求缓存在进程内，K线/分时/复权因子同步后自动失效
+"""
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import (
+    DataService, _query_dataframe, sync_versions, _cold_minute_range, _read_cold_minute
+)
+
+
+# 日K线重采样周期 -> pandas Period 频率 (周一至周日为一周)
+DAILY_PERIODS = {
+    "weekly": "W",
+    "monthly": "M",
+}
+
+# 支持的分钟周期 (5分钟数据合成)
+MINUTE_PERIODS = [15, 30, 60, 120]
+
+MINUTE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'amount', 'avg_price']
+
+# 交易时段 (距当日0点的分钟数)：上午 09:30-11:30，下午 13:00-15:00
+MORNING_OPEN = 9 * 60 + 30
+MORNING_MINUTES = 120
+AFTERNOON_OPEN = 13 * 60
+
+
+def resample_daily(panel: pd.DataFrame, period: str) -> pd.DataFrame:
+    """
+    日K线长表 -> 周线/月线
+
+    按自然周/自然月分组，日期取周期内最后一个交易日；开盘取首日、收盘取末日、高低取极值，
+    成交量/成交额/换手率累加，涨跌幅按日涨跌幅连乘 (跨除权日仍为真实涨幅)，
+    振幅以周期前收盘为基准
+
+    Args:
+        panel: get_kline_panel 返回的长表，按 (stock_code, trade_date) 排序
+        period: weekly/monthly
+
+    Returns:
+        与输入相同列的长表
+    """
+    if period not in DAILY_PERIODS:
+        raise ValueError(f"不支持的周期: {period}. 支持: {list(DAILY_PERIODS.keys())}")
+    if panel.empty:
+        return panel
+
+    keys = [panel['stock_code'], panel['trade_date'].dt.to_period(DAILY_PERIODS[period]).rename('period')]
+    grouped = panel.groupby(keys, sort=False)
+
+    aggregations = {"trade_date": "last"}
+    for column, how in (("open", "first"), ("high", "max"), ("low", "min"), ("close", "last"),
+                        ("volume", "sum"), ("amount", "sum"), ("turnover_rate", "sum")):
+        if column in panel.columns:
+            aggregations[column] = how
+    bars = grouped.agg(aggregations)
+
+    if 'change_pct' in panel.columns:
+        growth = (1 + panel['change_pct'] / 100).groupby(keys, sort=False).prod(min_count=1)
+        bars['change_pct'] = (growth - 1) * 100
+        if {'high', 'low', 'close'} <= set(panel.columns) and 'amplitude' in panel.columns:
+            prev_close = bars['close'] / growth
+            bars['amplitude'] = (bars['high'] - bars['low']) / prev_close * 100
+
+    bars = bars.reset_index(level='period', drop=True).reset_index()
+    return bars[[c for c in panel.columns if c in bars.columns]]
+
+
+def minute_buckets(minutes: np.ndarray, period: int) -> np.ndarray:
+    """
+    5分钟K线时间 (距0点分钟数，K线结束时间) -> 所属 N 分钟K线的结束时间
+
+    按连续交易时长切分，午间休市不计：60分钟线为 10:30/11:30/14:00/15:00，
+    120分钟线为 11:30/15:00；09:30 的集合竞价并入第一根
+    """
+    elapsed = np.where(minutes <= MORNING_OPEN + MORNING_MINUTES, minutes - MORNING_OPEN,
+                       MORNING_MINUTES + minutes - AFTERNOON_OPEN)
+    end = np.ceil(np.maximum(elapsed, 1) / period) * period
+    return np.where(end <= MORNING_MINUTES, MORNING_OPEN + end, AFTERNOON_OPEN + end - MORNING_MINUTES)
+
+
+def resample_minute(frame: pd.DataFrame, period: int) -> pd.DataFrame:
+    """
+    5分钟K线 -> N 分钟K线
+
+    Args:
+        frame: 列为 trade_date, time_minute(Timedelta) 及 MINUTE_COLUMNS，按时间排序
+        period: 分钟数，见 MINUTE_PERIODS
+
+    Returns:
+        相同列的 DataFrame，time_minute 为每根K线的结束时间
+    """
+    if period not in MINUTE_PERIODS:
+        raise ValueError(f"不支持的分钟周期: {period}. 支持: {MINUTE_PERIODS}")
+    if frame.empty:
+        return frame
+
+    minutes = (frame['time_minute'].dt.total_seconds() // 60).to_numpy()
+    bucket = pd.to_timedelta(minute_buckets(minutes, period), unit="min")
+    keys = [frame['trade_date'], pd.Series(bucket, index=frame.index, name='bucket')]
+    grouped = frame.groupby(keys, sort=False)
+
+    bars = grouped.agg(
+        open=('open', 'first'), high=('high', 'max'), low=('low', 'min'), close=('close', 'last'),
+        volume=('volume', 'sum'), amount=('amount', 'sum'),
+    )
+    # 均价按成交量加权
+    weighted = (frame['avg_price'] * frame['volume']).groupby(keys, sort=False).sum()
+    bars['avg_price'] = (weighted / bars['volume'].where(bars['volume'] > 0)).fillna(bars['close'])
+
+    bars = bars.reset_index().rename(columns={'bucket': 'time_minute'})
+    return bars[['trade_date', 'time_minute'] + MINUTE_COLUMNS]
+
+
+class ResampleService:
+    """K线重采样 (进程内缓存，K线/分时/复权因子同步后失效)"""
+
+    _lock = threading.Lock()
+    # 请求参数 -> 结果
+    _cache: Dict[Tuple, pd.DataFrame] = {}
+    _version: Tuple = ()
+    _checked_at: float = 0.0
+
+    # 检查同步时间的间隔 (秒)
+    CHECK_INTERVAL = 60
+    CACHE_SIZE = 64
+
+    # 影响重采样结果的数据集
+    SOURCES = ["stock_kline", "stock_kline_minute", "stock_adj_factor"]
+
+    @classmethod
+    def _cached(cls, key: Tuple) -> Optional[pd.DataFrame]:
+        if time.time() - cls._checked_at >= cls.CHECK_INTERVAL:
+            version = sync_versions(cls.SOURCES)
+            with cls._lock:
+                cls._checked_at = time.time()
+                if version != cls._version:
+                    cls._version = version
+                    cls._cache.clear()
+        return cls._cache.get(key)
+
+    @classmethod
+    def _store(cls, key: Tuple, value: pd.DataFrame) -> pd.DataFrame:
+        with cls._lock:
+            if len(cls._cache) >= cls.CACHE_SIZE:
+                cls._cache.pop(next(iter(cls._cache)))
+            cls._cache[key] = value
+        return value
+
+    @classmethod
+    def invalidate(cls):
+        """清空缓存 (同进程内同步数据后调用)"""
+        with cls._lock:
+            cls._cache.clear()
+            cls._checked_at = 0.0
+
+    @classmethod
+    def kline(
+        cls,
+        period: str,
+        stock_codes: List[str] = None,
+        start_date: str = None,
+        end_date: str = None,
+        columns: List[str] = None,
+        adjust: str = ""
+    ) -> pd.DataFrame:
+        """
+        周线/月线长表 (缓存)
+
+        Args:
+            period: weekly/monthly
+            stock_codes: 股票代码列表，不传则取全市场
+            start_date: 开始日期，格式 YYYYMMDD (首尾周期可能不完整)
+            end_date: 结束日期，格式 YYYYMMDD
+            columns: 需要的字段，默认 KLINE_PANEL_COLUMNS
+            adjust: 复权类型：qfq前复权/hfq后复权/空字符串不复权
+
+        Returns:
+            DataFrame，列为 stock_code, trade_date 及所选字段
+        """
+        if period not in DAILY_PERIODS:
+            raise ValueError(f"不支持的周期: {period}. 支持: {list(DAILY_PERIODS.keys())}")
+        key = ("kline", period, tuple(stock_codes or ()), start_date, end_date, tuple(columns or ()), adjust)
+        cached = cls._cached(key)
+        if cached is not None:
+            return cached
+
+        panel = DataService.get_kline_panel(stock_codes, start_date, end_date, columns, adjust)
+        return cls._store(key, resample_daily(panel, period))
+
+    @staticmethod
+    def load_minute(stock_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """读取区间内的5分钟K线 (早于数据库保留期的部分从冷存储读取)"""
+        cold_range = _cold_minute_range(start_date, end_date)
+        cold = _read_cold_minute(stock_code, *cold_range, MINUTE_COLUMNS) if cold_range else None
+
+        df = _query_dataframe(
+            f"""
+            SELECT trade_date, time_minute, {', '.join(MINUTE_COLUMNS)} FROM stock_kline_minute
+            WHERE stock_code = %s AND trade_date >= %s AND trade_date <= %s
+            ORDER BY trade_date ASC, time_minute ASC
+            """,
+            [stock_code, start_date, end_date],
+        )
+        if not df.empty:
+            df[MINUTE_COLUMNS] = df[MINUTE_COLUMNS].astype(float)
+            df['time_minute'] = pd.to_timedelta(df['time_minute'])
+        if cold is not None and not cold.empty:
+            df = pd.concat([cold, df], ignore_index=True) if not df.empty else cold
+        if df.empty:
+            return pd.DataFrame(columns=['trade_date', 'time_minute'] + MINUTE_COLUMNS)
+        return df
+
+    @classmethod
+    def minute(cls, stock_code: str, period: int, start_date: str, end_date: str = None) -> pd.DataFrame:
+        """
+        N 分钟K线 (缓存)
+
+        Args:
+            stock_code: 股票代码
+            period: 分钟数，见 MINUTE_PERIODS
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD，默认同 start_date
+
+        Returns:
+            DataFrame，列为 trade_date, time_minute(K线结束时间) 及 MINUTE_COLUMNS
+        """
+        if period not in MINUTE_PERIODS:
+            raise ValueError(f"不支持的分钟周期: {period}. 支持: {MINUTE_PERIODS}")
+        end_date = end_date or start_date
+        key = ("minute", stock_code, period, start_date, end_date)
+        cached = cls._cached(key)
+        if cached is not None:
+            return cached
+
+        frame = cls.load_minute(stock_code, start_date, end_date)
+        return cls._store(key, resample_minute(frame, period))
+
+    @staticmethod
+    def to_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+        """重采样结果 -> 接口返回的字典列表 (日期转字符串、NaN 转 None)"""
+        out = frame.copy()
+        if 'trade_date' in out.columns:
+            out['trade_date'] = pd.to_datetime(out['trade_date']).dt.strftime("%Y-%m-%d")
+        if 'time_minute' in out.columns:
+            seconds = out['time_minute'].dt.total_seconds().astype(int)
+            out['time_minute'] = [f"{s // 3600:02d}:{s % 3600 // 60:02d}" for s in seconds]
+        return out.astype(object).where(out.notna(), None).to_dict("records")
@@ -0,0 +1,244 @@
+"""
+选股器 Service
+全市场最新交易日指标常驻内存 (列式 numpy 数组)，按游资策略的过滤字段 (init_strategies.py)
+做布尔掩码组合筛选，结果按过滤条件哈希缓存，K线同步出新交易日后自动重建
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, Any, Optional
+import numpy as np
+import pandas as pd
+
+from app.services.data_service import DataService, _query_dataframe
+from app.services.execution_model import is_st, limit_pct_array, limit_prices
+
+
+# 过滤字段 -> (指标列, 比较方式)，字段名与 init_strategies.py 一致
+FILTER_FIELDS = {
+    "min_turnover_rate": ("turnover_rate", ">="),
+    "max_turnover_rate": ("turnover_rate", "<="),
+    "min_volume_ratio": ("volume_ratio", ">="),
+    "max_volume_ratio": ("volume_ratio", "<="),
+    "min_price": ("close", ">="),
+    "max_price": ("close", "<="),
+    "min_amplitude": ("amplitude", ">="),
+    "max_amplitude": ("amplitude", "<="),
+    "min_change_pct": ("change_pct", ">="),
+    "max_change_pct": ("change_pct", "<="),
+    "min_consecutive_limit": ("consecutive_limit", ">="),
+    "limit_up_days": ("limit_up_days", ">="),
+    "min_market_cap": ("market_cap", ">="),
+    "max_market_cap": ("market_cap", "<="),
+    "min_circulating_market_cap": ("circulating_market_cap", ">="),
+    "max_circulating_market_cap": ("circulating_market_cap", "<="),
+    "min_amount": ("amount", ">="),
+}
+
+# 指标列
+METRIC_COLUMNS = [
+    "close", "change_pct", "turnover_rate", "volume_ratio", "amplitude", "amount",
+    "market_cap", "circulating_market_cap", "consecutive_limit", "limit_up_days",
+]
+
+# 计算连板/量比需要的历史交易日数
+HISTORY_DAYS = 30
+VOLUME_RATIO_WINDOW = 5
+LIMIT_UP_WINDOW = 5
+
+
+class ScreenerService:
+    """选股器 (进程内单例状态)"""
+
+    _lock = threading.Lock()
+    _table: Optional[Dict[str, np.ndarray]] = None
+    _trade_date: Optional[str] = None
+    _checked_at: float = 0.0
+    # 过滤条件哈希 -> 排序后的行号
+    _cache: Dict[str, np.ndarray] = {}
+
+    # 检查数据库是否有新交易日的间隔 (秒)
+    CHECK_INTERVAL = 60
+    CACHE_SIZE = 256
+
+    # ============ 指标表 ============
+
+    @staticmethod
+    def latest_trade_date() -> Optional[str]:
+        df = _query_dataframe("SELECT MAX(trade_date) AS trade_date FROM stock_kline")
+        if df.empty or df['trade_date'].iloc[0] is None:
+            return None
+        return pd.Timestamp(df['trade_date'].iloc[0]).strftime("%Y%m%d")
+
+    @staticmethod
+    def build_table(panel: pd.DataFrame, names: Dict[str, str]) -> Dict[str, np.ndarray]:
+        """
+        由最近 HISTORY_DAYS 个交易日的长表K线计算最新交易日的指标表
+
+        市值: 本地没有股本数据，按 成交额 / 换手率 估算流通市值 (亿元)，总市值同流通市值
+
+        Returns:
+            {列名: 数组}，包含 code/name/is_st 及 METRIC_COLUMNS，只保留最新交易日有K线的股票
+        """
+        fields = ['close', 'volume', 'amount', 'amplitude', 'change_pct', 'turnover_rate']
+        wide = DataService.pivot_kline_panel(panel, fields)
+        close = wide['close']
+        if close.empty:
+            return {"code": np.array([], dtype=object)}
+
+        codes = close.columns.to_numpy()
+        last = {field: frame.iloc[-1].to_numpy(dtype=float) for field, frame in wide.items()}
+        traded = ~np.isnan(last['close'])
+
+        volume = wide['volume'].to_numpy(dtype=float)
+        prev_mean = np.nanmean(volume[-VOLUME_RATIO_WINDOW - 1:-1], axis=0) if len(volume) > 1 else np.full(len(codes), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            volume_ratio = last['volume'] / prev_mean
+            circ_cap = last['amount'] / (last['turnover_rate'] / 100) / 1e8
+
+        # 涨停: 收盘价达到按前收盘计算的涨停价
+        close_values = close.to_numpy(dtype=float)
+        prev_close = np.vstack([np.full(len(codes), np.nan), close_values[:-1]])
+        up_limit, _ = limit_prices(prev_close, limit_pct_array(codes, names))
+        is_limit = close_values >= up_limit - 0.005
+        consecutive = np.cumprod(is_limit[::-1], axis=0).sum(axis=0)
+        limit_days = is_limit[-LIMIT_UP_WINDOW:].sum(axis=0)
+
+        table = {
+            "code": codes,
+            "name": np.array([names.get(c, "") for c in codes], dtype=object),
+            "is_st": np.array([is_st(names.get(c)) for c in codes], dtype=bool),
+            "close": last['close'],
+            "change_pct": last['change_pct'],
+            "turnover_rate": last['turnover_rate'],
+            "volume_ratio": np.where(np.isfinite(volume_ratio), volume_ratio, np.nan),
+            "amplitude": last['amplitude'],
+            "amount": last['amount'],
+            "market_cap": np.where(np.isfinite(circ_cap), circ_cap, np.nan),
+            "circulating_market_cap": np.where(np.isfinite(circ_cap), circ_cap, np.nan),
+            "consecutive_limit": consecutive.astype(int),
+            "limit_up_days": limit_days.astype(int),
+        }
+        return {key: values[traded] for key, values in table.items()}
+
+    @classmethod
+    def refresh(cls, trade_date: str = None) -> Dict[str, Any]:
+        """重建指标表并清空结果缓存"""
+        trade_date = trade_date or cls.latest_trade_date()
+        if trade_date is None:
+            return {"trade_date": None, "stocks": 0}
+
+        start = (pd.Timestamp(trade_date) - pd.Timedelta(days=HISTORY_DAYS * 2)).strftime("%Y%m%d")
+        panel = DataService.get_kline_panel(
+            start_date=start, end_date=trade_date,
+            columns=['close', 'volume', 'amount', 'amplitude', 'change_pct', 'turnover_rate'],
+        )
+        names = {s.code: s.name for s in DataService.stock_universe()}
+        table = cls.build_table(panel, names)
+
+        with cls._lock:
+            cls._table = table
+            cls._trade_date = trade_date
+            cls._cache = {}
+            cls._checked_at = time.time()
+        return {"trade_date": trade_date, "stocks": len(table["code"])}
+
+    @classmethod
+    def _ensure_fresh(cls):
+        """首次使用或距上次检查超过 CHECK_INTERVAL 时，检查是否有新交易日"""
+        if cls._table is not None and time.time() - cls._checked_at < cls.CHECK_INTERVAL:
+            return
+        latest = cls.latest_trade_date()
+        if cls._table is None or latest != cls._trade_date:
+            cls.refresh(latest)
+        else:
+            cls._checked_at = time.time()
+
+    # ============ 筛选 ============
+
+    @staticmethod
+    def filter_hash(filters: Dict[str, Any]) -> str:
+        """过滤条件哈希 (忽略未设置的字段和顺序)"""
+        normalized = {k: v for k, v in sorted(filters.items()) if v is not None}
+        return hashlib.md5(json.dumps(normalized, sort_keys=True, default=str).encode()).hexdigest()
+
+    @classmethod
+    def mask(cls, table: Dict[str, np.ndarray], filters: Dict[str, Any]) -> np.ndarray:
+        """按过滤条件计算布尔掩码 (NaN 指标不满足任何数值条件)"""
+        mask = np.ones(len(table["code"]), dtype=bool)
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field == "exclude_st":
+                if value:
+                    mask &= ~table["is_st"]
+            elif field == "code_prefixes":
+                mask &= np.array([c.startswith(tuple(value)) for c in table["code"]], dtype=bool)
+            elif field in FILTER_FIELDS:
+                column, op = FILTER_FIELDS[field]
+                values = table[column]
+                with np.errstate(invalid="ignore"):
+                    mask &= (values >= value) if op == ">=" else (values <= value)
+            else:
+                raise ValueError(f"不支持的过滤字段: {field}. 支持: {list(FILTER_FIELDS.keys())}")
+        return mask
+
+    @classmethod
+    def screen(
+        cls,
+        filters: Dict[str, Any],
+        sort_by: str = "turnover_rate",
+        ascending: bool = False,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        筛选股票
+
+        Args:
+            filters: 过滤条件，字段见 FILTER_FIELDS，另支持 exclude_st、code_prefixes
+            sort_by: 排序指标，见 METRIC_COLUMNS
+            ascending: 是否升序
+            limit: 返回数量
+
+        Returns:
+            {"trade_date", "total", "cached", "items"}
+        """
+        if sort_by not in METRIC_COLUMNS:
+            raise ValueError(f"不支持的排序字段: {sort_by}. 支持: {METRIC_COLUMNS}")
+
+        cls._ensure_fresh()
+        table, trade_date = cls._table, cls._trade_date
+        key = cls.filter_hash({**filters, "_sort": sort_by, "_asc": ascending})
+
+        idx = cls._cache.get(key)
+        cached = idx is not None
+        if not cached:
+            idx = np.flatnonzero(cls.mask(table, filters))
+            values = table[sort_by][idx].astype(float)
+            # NaN 始终排在最后
+            keys = values if ascending else -values
+            idx = idx[np.argsort(np.where(np.isnan(keys), np.inf, keys), kind="stable")]
+            with cls._lock:
+                if len(cls._cache) >= cls.CACHE_SIZE:
+                    cls._cache.pop(next(iter(cls._cache)))
+                cls._cache[key] = idx
+
+        return {
+            "trade_date": trade_date,
+            "total": len(idx),
+            "cached": cached,
+            "filter_hash": key,
+            "items": [cls._row(table, i) for i in idx[:limit]],
+        }
+
+    @staticmethod
+    def _row(table: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+        row = {"code": table["code"][i], "name": table["name"][i]}
+        for column in METRIC_COLUMNS:
+            value = table[column][i]
+            if isinstance(value, (np.integer, int)):
+                row[column] = int(value)
+            else:
+                row[column] = None if np.isnan(value) else round(float(value), 4)
+        return row
@@ -0,0 +1,420 @@
+"""
+增量信号引擎
+按 (策略, 股票) 持久化紧凑的指标状态，每日同步K线后只推进一根K线，
+产生的买卖信号批量写入 strategy_signals
+"""
+import json
+import math
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app.database import engine
+from app.models.backtest_strategy import BacktestStrategy
+from app.models.trading import StrategySignal, StrategySignalState
+from app.services.data_service import DataService
+from app.services.backtest_engine import BacktestEngine
+from app.services.signals import indicator_strength
+
+
+# strategy_signals.source：内置/预置策略的信号只由增量信号引擎写入
+SIGNAL_SOURCE = "engine"
+
+# 预置回测策略 (BacktestStrategyService.init_builtin_strategies) -> (信号类型, 参数名映射)
+BUILTIN_STRATEGY_ALIASES = {
+    "双均线交叉": ("ma_cross", {"n1": "fast_period", "n2": "slow_period"}),
+    "RSI超买超卖": ("rsi", {}),
+    "MACD策略": ("macd", {"period_fast": "macd_fast", "period_slow": "macd_slow", "signal": "macd_signal"}),
+    "布林带策略": ("bollinger", {}),
+}
+
+
+def resolve_builtin(strategy: BacktestStrategy) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    将回测策略映射为内置信号类型及参数
+
+    strategy_type 为内置信号类型的策略，以及预置的回测策略 (按名称映射)；
+    自定义代码策略返回 None。
+    """
+    if strategy.strategy_type in BacktestEngine.BUILTIN_STRATEGIES:
+        signal_type, rename = strategy.strategy_type, {}
+    elif strategy.name in BUILTIN_STRATEGY_ALIASES:
+        signal_type, rename = BUILTIN_STRATEGY_ALIASES[strategy.name]
+    else:
+        return None
+
+    _, defaults = BacktestEngine.BUILTIN_STRATEGIES[signal_type]
+    params = dict(defaults)
+    try:
+        definition = json.loads(strategy.params_definition or "[]")
+    except ValueError:
+        definition = []
+    for p in definition:
+        if "name" in p and p.get("default") is not None:
+            params[rename.get(p["name"], p["name"])] = p["default"]
+    return signal_type, params
+
+
+# ============ 增量指标 ============
+
+def _mean(values: List[float]) -> float:
+    return sum(values) / len(values)
+
+
+def _strength(strategy_type: str, close: float, open_: float = None, **indicators) -> float:
+    """单根K线的信号强度 (indicator_strength 口径，分母为 0 等无效值记为 0)"""
+    value = float(indicator_strength(strategy_type, close, open_, **indicators))
+    return value if math.isfinite(value) else 0.0
+
+
+def _step_indicators(strategy_type: str, params: Dict[str, Any], state: Dict[str, Any],
+                     bar: Dict[str, float]) -> Tuple[bool, bool, float, str]:
+    """
+    推进一根K线，更新 state 中的指标累加器
+
+    与 signals 模块的向量化计算逐根一致。
+
+    Returns:
+        (买入条件, 卖出条件, 信号强度, 原因)
+    """
+    close, open_ = bar["close"], bar["open"]
+    closes = state.setdefault("closes", [])
+    prev = state.setdefault("prev", {})
+
+    if strategy_type == "ma_cross":
+        fast_period, slow_period = int(params["fast_period"]), int(params["slow_period"])
+        closes.append(close)
+        del closes[:-max(fast_period, slow_period)]
+        if len(closes) < max(fast_period, slow_period):
+            return False, False, 0.0, ""
+        fast, slow = _mean(closes[-fast_period:]), _mean(closes[-slow_period:])
+        pf, ps = prev.get("fast"), prev.get("slow")
+        prev.update(fast=fast, slow=slow)
+        if pf is None or ps is None:
+            return False, False, 0.0, ""
+        return (
+            fast > slow and pf < ps,
+            slow > fast and ps < pf,
+            _strength(strategy_type, close, fast=fast, slow=slow),
+            f"MA{fast_period} {'上穿' if fast > slow else '下穿'} MA{slow_period}",
+        )
+
+    if strategy_type == "rsi":
+        period = int(params["rsi_period"])
+        closes.append(close)
+        del closes[:-(period + 1)]
+        if len(closes) < period + 1:
+            return False, False, 0.0, ""
+        deltas = [b - a for a, b in zip(closes[:-1], closes[1:])]
+        gain = sum(d for d in deltas if d > 0) / period
+        loss = sum(-d for d in deltas if d < 0) / period
+        if loss == 0:
+            value = 100.0 if gain > 0 else math.nan
+        else:
+            value = 100 - 100 / (1 + gain / loss)
+        return (
+            value < params["rsi_lower"],
+            value > params["rsi_upper"],
+            _strength(strategy_type, close, rsi=value),
+            f"RSI({period})={value:.1f}",
+        )
+
+    if strategy_type == "macd":
+        ema = state.setdefault("ema", {})
+        for key, span in (("fast", params["macd_fast"]), ("slow", params["macd_slow"])):
+            alpha = 2 / (span + 1)
+            ema[key] = close if key not in ema else alpha * close + (1 - alpha) * ema[key]
+        line = ema["fast"] - ema["slow"]
+        alpha = 2 / (params["macd_signal"] + 1)
+        ema["signal"] = line if "signal" not in ema else alpha * line + (1 - alpha) * ema["signal"]
+        hist = line - ema["signal"]
+        prev_hist = prev.get("hist")
+        prev["hist"] = hist
+        if prev_hist is None:
+            return False, False, 0.0, ""
+        return (
+            hist > 0 and prev_hist < 0,
+            hist < 0 and prev_hist > 0,
+            _strength(strategy_type, close, hist=hist),
+            f"MACD柱 {'上穿' if hist > 0 else '下穿'} 0轴",
+        )
+
+    if strategy_type == "bollinger":
+        period = int(params["bb_period"])
+        closes.append(close)
+        del closes[:-period]
+        if len(closes) < period:
+            return False, False, 0.0, ""
+        mid = _mean(closes)
+        std = math.sqrt(sum((c - mid) ** 2 for c in closes) / (period - 1)) if period > 1 else math.nan
+        upper, lower = mid + std * params["bb_std"], mid - std * params["bb_std"]
+        return (
+            close < lower,
+            close > upper,
+            _strength(strategy_type, close, mid=mid, std=std),
+            f"收盘 {close:.2f} {'跌破下轨' if close < lower else '突破上轨'}",
+        )
+
+    if strategy_type == "simple_trend":
+        return close > open_, close < open_, _strength(strategy_type, close, open_), \
+            "收阳" if close > open_ else "收阴"
+
+    if strategy_type == "stop_loss_profit":
+        entry = state.get("entry_price")
+        if entry is None:
+            return True, False, 0.0, "空仓买入"
+        change = (close / entry - 1) * 100
+        stop = change <= -params["stop_loss_pct"]
+        profit = change >= params["stop_profit_pct"]
+        return False, stop or profit, _strength(strategy_type, close, entry=entry), \
+            f"{'止损' if stop else '止盈'} {change:.1f}%"
+
+    raise ValueError(f"不支持的策略类型: {strategy_type}")
+
+
+def advance(strategy_type: str, params: Dict[str, Any], state: Dict[str, Any],
+            position: bool, bar: Dict[str, float]) -> Tuple[Optional[str], bool, float, str]:
+    """
+    推进一根K线并按持仓状态产生信号 (与回测策略的 next() 逻辑一致)
+
+    Returns:
+        (信号 buy/sell/None, 新持仓状态, 信号强度, 原因)
+    """
+    entry, exit_, strength, reason = _step_indicators(strategy_type, params, state, bar)
+    if not position and entry:
+        state["entry_price"] = bar["close"]
+        return "buy", True, strength, reason
+    if position and exit_:
+        state.pop("entry_price", None)
+        return "sell", False, strength, reason
+    return None, position, strength, reason
+
+
+# ============ 引擎 ============
+
+class SignalEngine:
+    """增量信号引擎"""
+
+    def __init__(self, warmup_bars: int = 250):
+        """
+        Args:
+            warmup_bars: 新的 (策略, 股票) 首次运行时用于初始化状态的历史K线数
+        """
+        self.warmup_bars = warmup_bars
+
+    @staticmethod
+    def resolve_strategies(strategy_ids: List[int] = None) -> List[Dict[str, Any]]:
+        """
+        获取可增量运行的策略
+
+        自定义代码策略无法拆分为增量指标，不参与 (见 resolve_builtin)
+        """
+        with Session(engine) as session:
+            statement = select(BacktestStrategy).where(BacktestStrategy.is_active == True)  # noqa: E712
+            if strategy_ids:
+                statement = statement.where(BacktestStrategy.id.in_(strategy_ids))
+            rows = session.exec(statement).all()
+
+        strategies = []
+        for row in rows:
+            resolved = resolve_builtin(row)
+            if resolved is None:
+                continue
+            signal_type, params = resolved
+            strategies.append({
+                "id": row.id,
+                "name": row.name,
+                "signal_type": signal_type,
+                "params": params,
+            })
+        return strategies
+
+    @staticmethod
+    def list_signals(
+        strategy_id: Optional[int] = None,
+        stock_code: Optional[str] = None,
+        signal_type: Optional[str] = None,
+        source: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[StrategySignal]:
+        """获取策略信号列表 (按生成时间倒序)，source 可筛选增量引擎 (engine) 或全市场扫描 (scan) 的信号"""
+        with Session(engine) as session:
+            query = select(StrategySignal)
+            if strategy_id:
+                query = query.where(StrategySignal.strategy_id == strategy_id)
+            if stock_code:
+                query = query.where(StrategySignal.stock_code == stock_code)
+            if signal_type:
+                query = query.where(StrategySignal.signal_type == signal_type)
+            if source:
+                query = query.where(StrategySignal.source == source)
+
+            query = query.order_by(StrategySignal.created_at.desc(), StrategySignal.id.desc())
+            return session.exec(query.offset(offset).limit(limit)).all()
+
+    @staticmethod
+    def load_states(strategy_ids: List[int]) -> Dict[Tuple[int, str], StrategySignalState]:
+        """一次查询加载策略的全部状态"""
+        with Session(engine) as session:
+            rows = session.exec(
+                select(StrategySignalState).where(StrategySignalState.strategy_id.in_(strategy_ids))
+            ).all()
+        return {(r.strategy_id, r.stock_code): r for r in rows}
+
+    def run(
+        self,
+        trade_date: str,
+        strategy_ids: List[int] = None,
+        stock_codes: List[str] = None
+    ) -> Dict[str, Any]:
+        """
+        推进到 trade_date 并生成信号
+
+        已有状态且停在上一交易日的只推进一根K线；中间有缺口的补推缺失的K线；
+        没有状态的用最近 warmup_bars 根K线初始化。信号和状态各一次批量写入。
+
+        Args:
+            trade_date: 交易日期，格式 YYYYMMDD
+            strategy_ids: 指定策略，不传则为全部可增量运行的策略
+            stock_codes: 指定股票，不传则为当日有K线的全部股票
+
+        Returns:
+            运行汇总：策略数、股票数、信号数
+        """
+        target = datetime.strptime(trade_date, "%Y%m%d").date()
+        strategies = self.resolve_strategies(strategy_ids)
+        if not strategies:
+            return {"trade_date": str(target), "strategies": 0, "stocks": 0, "signals": 0}
+
+        today = DataService.get_kline_panel(
+            stock_codes=stock_codes, start_date=trade_date, end_date=trade_date,
+            columns=['open', 'close'],
+        )
+        codes = today['stock_code'].tolist()
+        states = self.load_states([s["id"] for s in strategies])
+
+        # 需要推进的股票及其最早的状态日期 (None 表示有策略尚无状态，需要初始化)
+        earliest: Dict[str, Optional[date]] = {}
+        for code in codes:
+            lasts = [
+                states[(s["id"], code)].last_date if (s["id"], code) in states else None
+                for s in strategies
+            ]
+            pending = [d for d in lasts if d is None or d < target]
+            if pending:
+                earliest[code] = None if None in pending else min(pending)
+        history = self._load_history(earliest, target)
+
+        names = {s.code: s.name for s in DataService.stock_universe(stock_codes=codes)} if codes else {}
+        now = datetime.now()
+        signals: List[Dict[str, Any]] = []
+        updates: List[Dict[str, Any]] = []
+        inserts: List[Dict[str, Any]] = []
+
+        for code in earliest:
+            bars = history.get(code)
+            if not bars:
+                continue
+            for s in strategies:
+                row = states.get((s["id"], code))
+                if row is not None and row.last_date >= target:
+                    continue
+                state = json.loads(row.state) if row else {}
+                position = bool(row.position) if row else False
+                pending = bars if row is None else [b for b in bars if b[0] > row.last_date]
+                if not pending:
+                    continue
+
+                signal = None
+                for _, open_, close in pending:
+                    signal, position, strength, reason = advance(
+                        s["signal_type"], s["params"], state, position,
+                        {"open": open_, "close": close},
+                    )
+                last_date, _, last_close = pending[-1]
+                # 只有目标交易日的信号写入 (初始化/补推的历史信号只用于更新持仓状态)
+                if signal and last_date == target:
+                    signals.append({
+                        "strategy_id": s["id"],
+                        "stock_code": code,
+                        "stock_name": names.get(code),
+                        "signal_type": signal,
+                        "signal_strength": round(float(strength), 4),
+                        "confidence": 0,
+                        "target_price": last_close,
+                        "reason": f"{s['name']} {target}: {reason}",
+                        "source": SIGNAL_SOURCE,
+                        "trade_date": target,
+                        "created_at": now,
+                    })
+
+                values = {
+                    "state": json.dumps(state, separators=(",", ":")),
+                    "position": position,
+                    "last_date": last_date,
+                    "updated_at": now,
+                }
+                if row is None:
+                    inserts.append({"strategy_id": s["id"], "stock_code": code, **values})
+                else:
+                    updates.append({"id": row.id, **values})
+
+        with Session(engine) as session:
+            if signals:
+                session.execute(insert(StrategySignal), signals)
+            if inserts:
+                session.execute(insert(StrategySignalState), inserts)
+            if updates:
+                session.bulk_update_mappings(StrategySignalState, updates)
+            session.commit()
+
+        return {
+            "trade_date": str(target),
+            "strategies": len(strategies),
+            "stocks": len(codes),
+            "advanced": len(inserts) + len(updates),
+            "initialized": len(inserts),
+            "signals": len(signals),
+            "buy": sum(1 for s in signals if s["signal_type"] == "buy"),
+            "sell": sum(1 for s in signals if s["signal_type"] == "sell"),
+        }
+
+    def _load_history(
+        self,
+        earliest: Dict[str, Optional[date]],
+        target: date
+    ) -> Dict[str, List[Tuple[date, float, float]]]:
+        """
+        批量加载需要推进的K线
+
+        状态停在上一交易日的股票只取当日一根；没有状态的取最近 warmup_bars 根 (按自然日粗略估算起点)
+
+        Returns:
+            {stock_code: [(trade_date, open, close)]}，按日期排序
+        """
+        if not earliest:
+            return {}
+        end = target.strftime("%Y%m%d")
+        groups: Dict[str, List[str]] = {}
+        for code, last in earliest.items():
+            if last is None:
+                start = (target - timedelta(days=int(self.warmup_bars * 1.5))).strftime("%Y%m%d")
+            else:
+                start = (last + timedelta(days=1)).strftime("%Y%m%d")
+            groups.setdefault(start, []).append(code)
+
+        history = {}
+        for start, codes in groups.items():
+            panel = DataService.get_kline_panel(
+                stock_codes=codes, start_date=start, end_date=end, columns=['open', 'close'],
+            )
+            if panel.empty:
+                continue
+            dates = panel['trade_date'].dt.date.tolist()
+            opens, closes = panel['open'].tolist(), panel['close'].tolist()
+            for code, idx in panel.groupby('stock_code', sort=False).indices.items():
+                idx = idx[-self.warmup_bars:]
+                history[code] = [(dates[i], opens[i], closes[i]) for i in idx]
+        return history
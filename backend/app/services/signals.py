@@ -0,0 +1,169 @@
+"""
+内置策略的向量化信号
+与 BacktestEngine 中 backtesting.py 策略逻辑一致，输入可以是单只股票的 Series，
+也可以是 日期 x 股票 的宽表 DataFrame (逐列计算)
+"""
+from typing import Dict, Any, Tuple, Union
+import numpy as np
+import pandas as pd
+
+Frame = Union[pd.Series, pd.DataFrame]
+
+
+# ============ 指标 ============
+
+def sma(close: Frame, period: int) -> Frame:
+    return close.rolling(period).mean()
+
+
+def rsi(close: Frame, period: int) -> Frame:
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def macd_hist(close: Frame, fast: int, slow: int, signal: int) -> Frame:
+    ema_fast = close.ewm(span=fast, adjust=False).mean()
+    ema_slow = close.ewm(span=slow, adjust=False).mean()
+    macd_line = ema_fast - ema_slow
+    signal_line = macd_line.ewm(span=signal, adjust=False).mean()
+    return macd_line - signal_line
+
+
+def bollinger(close: Frame, period: int, std_dev: float) -> Tuple[Frame, Frame]:
+    mid = close.rolling(period).mean()
+    std = close.rolling(period).std()
+    return mid + std * std_dev, mid - std * std_dev
+
+
+def crossover(a: Frame, b) -> Frame:
+    """a 上穿 b (同 backtesting.lib.crossover)"""
+    if not isinstance(b, (pd.Series, pd.DataFrame)):
+        b = a * 0 + b
+    return (a > b) & (a.shift(1) < b.shift(1))
+
+
+# ============ 信号 ============
+
+def ma_cross_signals(data: Dict[str, Frame], fast_period: int = 10, slow_period: int = 20):
+    close = data['Close']
+    fast, slow = sma(close, fast_period), sma(close, slow_period)
+    return crossover(fast, slow), crossover(slow, fast)
+
+
+def rsi_signals(data: Dict[str, Frame], rsi_period: int = 14, rsi_upper: int = 70, rsi_lower: int = 30):
+    value = rsi(data['Close'], rsi_period)
+    return value < rsi_lower, value > rsi_upper
+
+
+def macd_signals(data: Dict[str, Frame], macd_fast: int = 12, macd_slow: int = 26, macd_signal: int = 9):
+    hist = macd_hist(data['Close'], macd_fast, macd_slow, macd_signal)
+    return crossover(hist, 0), crossover(-hist, 0)
+
+
+def bollinger_signals(data: Dict[str, Frame], bb_period: int = 20, bb_std: float = 2.0):
+    close = data['Close']
+    upper, lower = bollinger(close, bb_period, bb_std)
+    return close < lower, close > upper
+
+
+def simple_trend_signals(data: Dict[str, Frame]):
+    close, open_ = data['Close'], data['Open']
+    return close > open_, close < open_
+
+
+def stop_loss_profit_signals(data: Dict[str, Frame], **_):
+    """空仓即买入，卖出由止盈止损决定 (见 simulate_signals 的 stop_loss_pct/stop_profit_pct)"""
+    has_bar = data['Close'].notna()
+    return has_bar, has_bar & False
+
+
+# 策略类型 -> 信号函数 (参数名与 BacktestEngine.BUILTIN_STRATEGIES 一致)
+BUILTIN_SIGNALS = {
+    "ma_cross": ma_cross_signals,
+    "rsi": rsi_signals,
+    "macd": macd_signals,
+    "bollinger": bollinger_signals,
+    "simple_trend": simple_trend_signals,
+    "stop_loss_profit": stop_loss_profit_signals,
+}
+
+
+def generate_signals(strategy_type: str, data: Dict[str, Frame], params: Dict[str, Any] = None):
+    """
+    生成内置策略的买卖信号
+
+    Args:
+        strategy_type: 策略类型
+        data: {"Open": ..., "High": ..., "Low": ..., "Close": ..., "Volume": ...}，
+              单只股票的 DataFrame 也可直接传入
+        params: 策略参数，未传的使用默认值
+
+    Returns:
+        (entries, exits)，与输入同形状的 bool Series/DataFrame
+    """
+    if strategy_type not in BUILTIN_SIGNALS:
+        raise ValueError(f"不支持的策略类型: {strategy_type}. 支持: {list(BUILTIN_SIGNALS.keys())}")
+
+    from app.services.backtest_engine import BacktestEngine
+    _, defaults = BacktestEngine.BUILTIN_STRATEGIES[strategy_type]
+    params = params or {}
+    kwargs = {name: params.get(name, default) for name, default in defaults.items()}
+    return BUILTIN_SIGNALS[strategy_type](data, **kwargs)
+
+
+def indicator_strength(strategy_type: str, close, open_=None, **indicators):
+    """
+    指标值 -> 信号强度 (数值越大越偏多)，向量化扫描 (signal_strength) 与增量引擎共用同一口径
+
+    ma_cross: 快慢均线偏离 (%)；rsi: 50 - RSI；macd: 柱/收盘价 (%)；
+    bollinger: 相对中轨的标准差倍数取负 (跌破下轨为正)；simple_trend: 当日涨幅 (%)；
+    stop_loss_profit: 相对买入价的涨幅 (%)，没有买入价时为 0
+
+    Args:
+        strategy_type: 策略类型
+        close: 收盘价，标量或 Series/DataFrame
+        open_: 开盘价 (simple_trend)
+        indicators: fast/slow (ma_cross)、rsi、hist (macd)、mid/std (bollinger)、entry (stop_loss_profit)
+
+    Returns:
+        与 close 同形状；分母为 0 时为 NaN/Inf (标量由调用方处理)
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if strategy_type == "ma_cross":
+            return (np.divide(indicators["fast"], indicators["slow"]) - 1) * 100
+        if strategy_type == "rsi":
+            return 50 - indicators["rsi"]
+        if strategy_type == "macd":
+            return np.divide(indicators["hist"], close) * 100
+        if strategy_type == "bollinger":
+            return -np.divide(close - indicators["mid"], indicators["std"])
+        if strategy_type == "simple_trend":
+            return (np.divide(close, open_) - 1) * 100
+        if strategy_type == "stop_loss_profit" and indicators.get("entry") is not None:
+            return (np.divide(close, indicators["entry"]) - 1) * 100
+    return close * 0.0
+
+
+def signal_strength(strategy_type: str, data: Dict[str, Frame], params: Dict[str, Any] = None) -> Frame:
+    """信号强度 (与 generate_signals 同形状，口径见 indicator_strength)"""
+    from app.services.backtest_engine import BacktestEngine
+    _, defaults = BacktestEngine.BUILTIN_STRATEGIES[strategy_type]
+    params = {name: (params or {}).get(name, default) for name, default in defaults.items()}
+    close = data['Close']
+
+    indicators = {}
+    if strategy_type == "ma_cross":
+        indicators = {"fast": sma(close, params["fast_period"]), "slow": sma(close, params["slow_period"])}
+    elif strategy_type == "rsi":
+        indicators = {"rsi": rsi(close, params["rsi_period"])}
+    elif strategy_type == "macd":
+        indicators = {"hist": macd_hist(close, params["macd_fast"], params["macd_slow"], params["macd_signal"])}
+    elif strategy_type == "bollinger":
+        indicators = {
+            "mid": close.rolling(params["bb_period"]).mean(),
+            "std": close.rolling(params["bb_period"]).std(),
+        }
+    return indicator_strength(strategy_type, close, data.get('Open'), **indicators)
@@ -0,0 +1,316 @@
+"""
+行情快照 Service
+涨停/跌停/炸板池、龙虎榜、资金流、热度排名等 AKShare 数据只能实时获取，
+每个交易日收盘后 (资金流和热度盘中每隔几分钟) 保存一份快照到 market_snapshot，
+历史日期直接从快照读取，不再调用上游接口
+"""
+import json
+import zlib
+from datetime import date, datetime
+from typing import Dict, Any, List, Optional, Callable, Iterator, Tuple
+
+from app.services.cache_service import CacheService
+from app.services.data_service import DataService, _get_astock_conn, _query_dataframe
+
+
+# 数据集 -> (获取函数 fetch(date, **params), 是否盘中定时快照, 需要快照的参数组合)
+# 获取函数带日期的数据集可以在快照缺失时按日期回补
+SNAPSHOT_DATASETS: Dict[str, Tuple[Callable[..., List[Any]], bool, List[Dict[str, Any]]]] = {
+    "zt_pool": (lambda date: DataService.get_zt_pool_em(date), False, [{}]),
+    "zt_pool_previous": (lambda date: DataService.get_zt_pool_previous_em(date), False, [{}]),
+    "zt_pool_dtgc": (lambda date: DataService.get_zt_pool_dtgc_em(date), False, [{}]),
+    "zt_pool_zbgc": (lambda date: DataService.get_zt_pool_zbgc_em(date), False, [{}]),
+    "lhb_detail": (lambda date: DataService.get_lhb_detail_em(date, date), False, [{}]),
+    "market_fund_flow": (lambda date: DataService.get_market_fund_flow(), True, [{}]),
+    "sector_fund_flow": (
+        lambda date, indicator="今日", sector_type="行业资金流":
+            DataService.get_sector_fund_flow_rank(indicator, sector_type),
+        True,
+        [{"indicator": "今日", "sector_type": "行业资金流"}, {"indicator": "今日", "sector_type": "概念资金流"}],
+    ),
+    "individual_fund_flow": (
+        lambda date, indicator="今日": DataService.get_individual_fund_flow_rank(indicator),
+        True,
+        [{"indicator": "今日"}],
+    ),
+    "hot_rank": (lambda date: DataService.get_hot_rank_em(), True, [{}]),
+    "market_activity": (lambda date: DataService.get_market_activity_legu(), True, [{}]),
+    "high_low": (lambda date, symbol="all": DataService.get_a_high_low_statistics(symbol), False, [{"symbol": "all"}]),
+}
+
+# 上游接口支持按日期查询的数据集
+DATED_DATASETS = {"zt_pool", "zt_pool_previous", "zt_pool_dtgc", "zt_pool_zbgc", "lhb_detail"}
+
+
+def _params_key(params: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(params or {}, ensure_ascii=False, sort_keys=True)
+
+
+def _to_dict(item: Any) -> Dict[str, Any]:
+    return item.model_dump() if hasattr(item, "model_dump") else dict(item)
+
+
+def encode_rows(rows: List[Dict[str, Any]]) -> bytes:
+    """行列表 -> zlib 压缩的列式 JSON (字段名只存一次)"""
+    columns: List[str] = []
+    for row in rows:
+        for key in row:
+            if key not in columns:
+                columns.append(key)
+    payload = {"columns": columns, "rows": [[row.get(c) for c in columns] for row in rows]}
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"), 6)
+
+
+def decode_rows(blob: bytes) -> List[Dict[str, Any]]:
+    payload = json.loads(zlib.decompress(blob).decode("utf-8"))
+    columns = payload["columns"]
+    return [dict(zip(columns, values)) for values in payload["rows"]]
+
+
+class SnapshotService:
+    """行情快照"""
+
+    @staticmethod
+    def _check(dataset: str):
+        if dataset not in SNAPSHOT_DATASETS:
+            raise ValueError(f"不支持的快照数据集: {dataset}. 支持: {list(SNAPSHOT_DATASETS.keys())}")
+
+    # ============ 写入 ============
+
+    @classmethod
+    def capture(
+        cls,
+        dataset: str,
+        trade_date: str = None,
+        params: Optional[Dict[str, Any]] = None,
+        rows: Optional[List[Any]] = None
+    ) -> int:
+        """
+        获取并保存一份快照
+
+        Args:
+            dataset: 数据集，见 SNAPSHOT_DATASETS
+            trade_date: 交易日期，格式 YYYYMMDD，默认今天
+            params: 上游接口参数
+            rows: 已获取的数据，不传则调用上游接口
+
+        Returns:
+            快照行数
+        """
+        cls._check(dataset)
+        trade_date = trade_date or datetime.now().strftime("%Y%m%d")
+        # 实时数据集只能记为当天的快照，否则会以当天数据覆盖历史
+        if dataset not in DATED_DATASETS and trade_date != datetime.now().strftime("%Y%m%d"):
+            raise ValueError(f"{dataset} 只能获取实时数据，不能补录 {trade_date} 的快照")
+        if rows is None:
+            fetch = SNAPSHOT_DATASETS[dataset][0]
+            rows = fetch(trade_date, **(params or {}))
+        records = [_to_dict(item) for item in rows]
+
+        now = datetime.now()
+        # 补录历史日期时快照时间记为收盘
+        snapshot_time = now.strftime("%H:%M:%S") if trade_date == now.strftime("%Y%m%d") else "15:00:00"
+        conn = _get_astock_conn()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                INSERT INTO market_snapshot (dataset, trade_date, snapshot_time, params_key, row_count, payload)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE row_count=VALUES(row_count), payload=VALUES(payload)
+                """,
+                (dataset, trade_date, snapshot_time, _params_key(params), len(records), encode_rows(records)),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return len(records)
+
+    @classmethod
+    def capture_all(cls, intraday: bool = False, trade_date: str = None) -> Dict[str, Any]:
+        """
+        保存全部数据集的快照
+
+        非交易日不保存；补录历史日期时只保存上游支持按日期查询的数据集 (DATED_DATASETS)
+
+        Args:
+            intraday: True 只保存盘中定时快照的数据集 (资金流、热度)
+            trade_date: 交易日期，格式 YYYYMMDD，默认今天
+
+        Returns:
+            {"saved": {数据集: 行数}, "errors": {数据集: 错误}, "skipped": [跳过的数据集]}，
+            非交易日附带 reason
+        """
+        today = datetime.now().strftime("%Y%m%d")
+        trade_date = trade_date or today
+        saved: Dict[str, int] = {}
+        errors: Dict[str, str] = {}
+        skipped: List[str] = []
+        if not CacheService.is_trading_day(trade_date):
+            return {"saved": saved, "errors": errors, "skipped": list(SNAPSHOT_DATASETS), "reason": "非交易日"}
+
+        for dataset, (_, is_intraday, variants) in SNAPSHOT_DATASETS.items():
+            if intraday and not is_intraday:
+                continue
+            if trade_date != today and dataset not in DATED_DATASETS:
+                skipped.append(dataset)
+                continue
+            for params in variants:
+                name = dataset if not params else f"{dataset}:{_params_key(params)}"
+                try:
+                    saved[name] = cls.capture(dataset, trade_date, params)
+                except Exception as e:
+                    errors[name] = str(e)
+        return {"saved": saved, "errors": errors, "skipped": skipped}
+
+    # ============ 查询 ============
+
+    @classmethod
+    def get(
+        cls,
+        dataset: str,
+        trade_date: str,
+        params: Optional[Dict[str, Any]] = None,
+        at: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        读取某日快照
+
+        Args:
+            dataset: 数据集
+            trade_date: 交易日期，格式 YYYYMMDD
+            params: 上游接口参数
+            at: 快照时间 HH:MM[:SS]，取该时间及之前的最后一份，默认当日最后一份
+
+        Returns:
+            {"trade_date", "snapshot_time", "data"}，没有快照返回 None
+        """
+        cls._check(dataset)
+        query = """
+            SELECT trade_date, snapshot_time, payload FROM market_snapshot
+            WHERE dataset = %s AND trade_date = %s AND params_key = %s
+        """
+        args = [dataset, trade_date, _params_key(params)]
+        if at:
+            query += " AND snapshot_time <= %s"
+            args.append(at if len(at) > 5 else f"{at}:00")
+        query += " ORDER BY snapshot_time DESC LIMIT 1"
+
+        df = _query_dataframe(query, args)
+        if df.empty:
+            return None
+        row = df.iloc[0]
+        return {
+            "trade_date": str(row['trade_date']),
+            "snapshot_time": _format_time(row['snapshot_time']),
+            "data": decode_rows(row['payload']),
+        }
+
+    @classmethod
+    def iter_days(
+        cls,
+        dataset: str,
+        start_date: str,
+        end_date: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Tuple[date, List[Dict[str, Any]]]]:
+        """按日期顺序逐日返回区间内每个交易日的最后一份快照"""
+        cls._check(dataset)
+        df = _query_dataframe(
+            """
+            SELECT s.trade_date, s.payload FROM market_snapshot s
+            JOIN (
+                SELECT trade_date, MAX(snapshot_time) AS snapshot_time FROM market_snapshot
+                WHERE dataset = %s AND params_key = %s AND trade_date >= %s AND trade_date <= %s
+                GROUP BY trade_date
+            ) m ON s.trade_date = m.trade_date AND s.snapshot_time = m.snapshot_time
+            WHERE s.dataset = %s AND s.params_key = %s
+            ORDER BY s.trade_date
+            """,
+            [dataset, _params_key(params), start_date, end_date, dataset, _params_key(params)],
+        )
+        for row in df.itertuples():
+            yield row.trade_date, decode_rows(row.payload)
+
+    @classmethod
+    def get_range(
+        cls,
+        dataset: str,
+        start_date: str,
+        end_date: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """读取区间内每个交易日的最后一份快照，按日期拼接"""
+        return [row for _, rows in cls.iter_days(dataset, start_date, end_date, params) for row in rows]
+
+    @staticmethod
+    def list_snapshots(dataset: str = None, trade_date: str = None) -> List[Dict[str, Any]]:
+        """快照目录 (不含数据)"""
+        query = "SELECT dataset, trade_date, snapshot_time, params_key, row_count FROM market_snapshot WHERE 1=1"
+        params = []
+        if dataset:
+            query += " AND dataset = %s"
+            params.append(dataset)
+        if trade_date:
+            query += " AND trade_date = %s"
+            params.append(trade_date)
+        query += " ORDER BY trade_date DESC, dataset, snapshot_time DESC LIMIT 1000"
+
+        df = _query_dataframe(query, params)
+        return [
+            {
+                "dataset": r.dataset,
+                "trade_date": str(r.trade_date),
+                "snapshot_time": _format_time(r.snapshot_time),
+                "params": json.loads(r.params_key),
+                "row_count": int(r.row_count),
+            }
+            for r in df.itertuples()
+        ]
+
+    @classmethod
+    def serve(
+        cls,
+        dataset: str,
+        date: Optional[str] = None,
+        at: Optional[str] = None,
+        **params
+    ) -> Dict[str, Any]:
+        """
+        路由统一入口：今天实时获取，历史日期读快照
+
+        历史快照缺失时，按日期查询的数据集从上游回补一次并保存；其余数据集返回错误。
+        今天实时获取失败时退回当日最后一份快照。
+
+        Returns:
+            {"data": [...]}，来自快照时附带 snapshot_time
+        """
+        today = datetime.now().strftime("%Y%m%d")
+        date = date or today
+        fetch = SNAPSHOT_DATASETS[dataset][0]
+
+        if date != today or at:
+            snapshot = cls.get(dataset, date, params or None, at)
+            if snapshot is not None:
+                return {"data": snapshot["data"], "snapshot_time": snapshot["snapshot_time"]}
+            if dataset not in DATED_DATASETS or at:
+                return {"error": f"没有 {date} 的 {dataset} 快照", "data": []}
+            rows = fetch(date, **params)
+            cls.capture(dataset, date, params or None, rows=rows)
+            return {"data": rows}
+
+        try:
+            return {"data": fetch(date, **params)}
+        except Exception as e:
+            snapshot = cls.get(dataset, date, params or None)
+            if snapshot is None:
+                raise
+            return {"data": snapshot["data"], "snapshot_time": snapshot["snapshot_time"], "error": str(e)}
+
+
+def _format_time(value) -> str:
+    """TIME 列 (pymysql 返回 timedelta) -> HH:MM:SS"""
+    if hasattr(value, "total_seconds"):
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return str(value)
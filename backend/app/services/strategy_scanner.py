@@ -0,0 +1,278 @@
+"""
+全市场策略扫描 Service
+收盘后对启用的自定义代码策略扫描全市场：在进程池中按分片运行，信号批量写入 strategy_signals (source=scan)。
+内置/预置策略的信号由增量信号引擎 (signal_engine, source=engine) 统一生成，扫描器不重复写入
+"""
+import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+
+from app.database import engine, reset_engines_after_fork
+from app.models.backtest_strategy import BacktestStrategy
+from app.models.trading import StrategySignal
+from app.services.data_service import DataService
+from app.services.signal_engine import resolve_builtin
+
+
+# strategy_signals.source，重复扫描同一交易日时按 (来源, 策略, 交易日) 覆盖旧信号
+SIGNAL_SOURCE = "scan"
+
+
+def _load_frames(stock_codes: List[str], start_date: str, end_date: str, lookback: int) -> Dict[str, pd.DataFrame]:
+    panel = DataService.get_kline_panel(
+        stock_codes=stock_codes,
+        start_date=start_date,
+        end_date=end_date,
+        columns=['open', 'high', 'low', 'close', 'volume'],
+    )
+    return {code: df.tail(lookback) for code, df in DataService.split_kline_panel(panel).items()}
+
+
+def _scan_custom_shard(
+    stock_codes: List[str],
+    start_date: str,
+    end_date: str,
+    lookback: int,
+    code: str,
+    params: Dict[str, Any],
+    min_bars: int
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    扫描一个分片的自定义策略 (在子进程中执行)
+
+    在最近 lookback 根K线上运行策略，记录最后一根K线 next() 中新下的订单作为当日信号。
+    分片内全部股票都运行失败时 (策略本身有错) 按分片失败抛出
+
+    Returns:
+        (信号列表, 运行失败的股票 [{"stock_code", "error"}])
+    """
+    from backtesting import Backtest, Strategy
+
+    local_ns: Dict[str, Any] = {}
+    exec(compile(code, "<string>", "exec"), local_ns)
+    strategy_class = next(
+        (obj for obj in local_ns.values()
+         if isinstance(obj, type) and issubclass(obj, Strategy) and obj is not Strategy),
+        None,
+    )
+    if strategy_class is None:
+        raise ValueError("未找到策略类")
+    for key, value in params.items():
+        if hasattr(strategy_class, key):
+            setattr(strategy_class, key, value)
+
+    class SignalRecorder(strategy_class):
+        """记录最后一根K线新下的订单 (订单在下一根K线才成交，回测结果中看不到)"""
+        scan_signal = None
+
+        def next(self):
+            before = {id(order) for order in self._broker.orders}
+            super().next()
+            new = [order for order in self._broker.orders if id(order) not in before]
+            if new:
+                self.scan_signal = (len(self.data) - 1, "buy" if new[-1].size > 0 else "sell")
+
+    results, failures = [], []
+    scanned = 0
+    frames = _load_frames(stock_codes, start_date, end_date, lookback)
+    for stock_code, df in frames.items():
+        if len(df) < min_bars or df.index[-1].strftime("%Y%m%d") != end_date:
+            continue
+        scanned += 1
+        try:
+            stats = Backtest(df, SignalRecorder, cash=100000, commission=0.001, exclusive_orders=True).run()
+        except Exception as e:
+            failures.append({"stock_code": stock_code, "error": str(e)})
+            continue
+        recorded = stats._strategy.scan_signal
+        if not recorded or recorded[0] != len(df) - 1:
+            continue
+
+        close = df['Close'].to_numpy(dtype=float)
+        win_rate = stats.get('Win Rate [%]', np.nan)
+        results.append({
+            "stock_code": stock_code,
+            "signal_type": recorded[1],
+            "signal_strength": float((close[-1] / close[-2] - 1) * 100) if len(close) > 1 else 0.0,
+            # 自定义策略的置信度取其在回看窗口内的胜率
+            "confidence": 0.0 if pd.isna(win_rate) else float(win_rate) / 100,
+            "target_price": float(close[-1]),
+        })
+    if failures and len(failures) == scanned:
+        raise RuntimeError(failures[0]["error"])
+    return results, failures
+
+
+class StrategyScanner:
+    """全市场策略扫描"""
+
+    def __init__(
+        self,
+        lookback: int = 120,
+        n_jobs: int = 4,
+        shard_size: int = 200,
+        min_bars: int = 30
+    ):
+        """
+        Args:
+            lookback: 每只股票使用的最近K线数
+            n_jobs: 自定义策略的并行进程数
+            shard_size: 自定义策略每个分片的股票数
+            min_bars: 最少K线数，不足的股票跳过
+        """
+        self.lookback = lookback
+        self.n_jobs = max(1, n_jobs)
+        self.shard_size = max(1, shard_size)
+        self.min_bars = min_bars
+
+    @staticmethod
+    def active_strategies(strategy_ids: List[int] = None) -> List[BacktestStrategy]:
+        with Session(engine) as session:
+            statement = select(BacktestStrategy).where(BacktestStrategy.is_active == True)  # noqa: E712
+            if strategy_ids:
+                statement = statement.where(BacktestStrategy.id.in_(strategy_ids))
+            return session.exec(statement).all()
+
+    def _start_date(self, trade_date: str) -> str:
+        """按自然日粗略估算 lookback 根K线的起点"""
+        end = datetime.strptime(trade_date, "%Y%m%d")
+        return (end - timedelta(days=int(self.lookback * 1.6) + 10)).strftime("%Y%m%d")
+
+    def scan_custom(
+        self,
+        code: str,
+        params: Dict[str, Any],
+        stock_codes: List[str],
+        trade_date: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        在进程池中按分片扫描自定义策略
+
+        Returns:
+            (信号列表, 失败的分片 [{"stocks": 股票数, "error": 错误信息}], 运行失败的股票 [{"stock_code", "error"}])
+        """
+        shards = [stock_codes[i:i + self.shard_size] for i in range(0, len(stock_codes), self.shard_size)]
+        args = (self._start_date(trade_date), trade_date, self.lookback, code, params, self.min_bars)
+        results, errors, failures = [], [], []
+
+        if self.n_jobs == 1 or len(shards) <= 1:
+            for shard in shards:
+                try:
+                    found, failed = _scan_custom_shard(shard, *args)
+                except Exception as e:
+                    errors.append({"stocks": len(shard), "error": str(e)})
+                    continue
+                results.extend(found)
+                failures.extend(failed)
+            return results, errors, failures
+
+        with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=reset_engines_after_fork) as executor:
+            futures = {executor.submit(_scan_custom_shard, shard, *args): shard for shard in shards}
+            for future in as_completed(futures):
+                try:
+                    found, failed = future.result()
+                except Exception as e:
+                    errors.append({"stocks": len(futures[future]), "error": str(e)})
+                    continue
+                results.extend(found)
+                failures.extend(failed)
+        return results, errors, failures
+
+    def run(
+        self,
+        trade_date: str,
+        strategy_ids: List[int] = None,
+        stock_codes: List[str] = None,
+        dry_run: bool = False
+    ) -> Dict[str, Any]:
+        """
+        扫描启用的自定义代码策略并写入信号 (内置/预置策略由增量信号引擎负责，不扫描)
+
+        Args:
+            trade_date: 交易日期，格式 YYYYMMDD
+            strategy_ids: 指定策略，不传则为全部启用策略
+            stock_codes: 指定股票，不传则为当日有K线的全部股票
+            dry_run: 只返回信号不写库
+
+        Returns:
+            扫描汇总及每个策略的信号数。status 为 ok / partial (部分股票运行失败，其余股票的信号照常写入) /
+            error (有分片失败，该策略信号不写入，保留此前的扫描结果)；失败时附 failed_stocks 和 error
+        """
+        started = datetime.now()
+        strategies = [s for s in self.active_strategies(strategy_ids) if resolve_builtin(s) is None and s.code]
+        today = DataService.get_kline_panel(
+            stock_codes=stock_codes, start_date=trade_date, end_date=trade_date, columns=['close'],
+        ) if strategies else pd.DataFrame(columns=['stock_code'])
+        codes = today['stock_code'].tolist()
+        names = {s.code: s.name for s in DataService.stock_universe(stock_codes=codes)} if codes else {}
+        day = datetime.strptime(trade_date, "%Y%m%d").date()
+
+        rows: List[Dict[str, Any]] = []
+        per_strategy = []
+        for strategy in strategies:
+            params = {
+                p["name"]: p["default"] for p in _params_definition(strategy)
+                if "name" in p and p.get("default") is not None
+            }
+            found, errors, failures = self.scan_custom(strategy.code, params, codes, trade_date) if codes else ([], [], [])
+
+            status = "error" if errors else "partial" if failures else "ok"
+            summary = {"strategy_id": strategy.id, "name": strategy.name, "mode": "process_pool",
+                       "status": status, "signals": len(found)}
+            if errors or failures:
+                summary["failed_stocks"] = sum(e["stocks"] for e in errors) + len(failures)
+                summary["error"] = (errors or failures)[0]["error"]
+            per_strategy.append(summary)
+            if errors:
+                continue
+            for item in found:
+                rows.append({
+                    "strategy_id": strategy.id,
+                    "stock_name": names.get(item["stock_code"]),
+                    "reason": f"扫描 {day} {strategy.name}",
+                    "source": SIGNAL_SOURCE,
+                    "trade_date": day,
+                    "created_at": started,
+                    **item,
+                })
+
+        if not dry_run:
+            self._save(rows, [s["strategy_id"] for s in per_strategy if s["status"] != "error"], day)
+
+        return {
+            "trade_date": str(day),
+            "stocks": len(codes),
+            "strategies": per_strategy,
+            "signals": len(rows),
+            "elapsed": round((datetime.now() - started).total_seconds(), 2),
+            "items": rows if dry_run else [],
+        }
+
+    @staticmethod
+    def _save(rows: List[Dict[str, Any]], strategy_ids: List[int], day: date):
+        """覆盖写入：删除这些策略同一交易日此前的扫描信号，再批量插入"""
+        if not strategy_ids:
+            return
+        with Session(engine) as session:
+            session.execute(
+                delete(StrategySignal).where(
+                    StrategySignal.source == SIGNAL_SOURCE,
+                    StrategySignal.strategy_id.in_(strategy_ids),
+                    StrategySignal.trade_date == day,
+                )
+            )
+            if rows:
+                session.execute(insert(StrategySignal), rows)
+            session.commit()
+
+
+def _params_definition(strategy: BacktestStrategy) -> List[Dict[str, Any]]:
+    try:
+        return json.loads(strategy.params_definition or "[]")
+    except ValueError:
+        return []
@@ -0,0 +1,283 @@
+"""
+滚动前推 (Walk-Forward) 优化 Service
+在训练窗口上用 ParameterOptimizer 选参，在随后的测试窗口上样本外验证，
+各折在进程池中并行运行，拼接样本外权益曲线
+"""
+from typing import Dict, Any, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from app.database import reset_engines_after_fork
+from app.services.backtest_engine import BacktestEngine, performance_metrics, simulation_result
+from app.services.execution_model import AShareExecutionModel, limit_pct, simulate_signals
+from app.services.optimizer import ParameterOptimizer
+from app.services.signals import generate_signals
+
+
+def make_folds(
+    n_bars: int,
+    train_size: int,
+    test_size: int,
+    step: Optional[int] = None,
+    anchored: bool = False
+) -> List[Tuple[int, int, int, int]]:
+    """
+    按交易日切分训练/测试窗口
+
+    Args:
+        n_bars: K线数量 (交易日)
+        train_size: 训练窗口交易日数
+        test_size: 测试窗口交易日数
+        step: 每折前推的交易日数，默认等于 test_size (测试窗口首尾相接)
+        anchored: True 为锚定窗口 (训练起点固定)，False 为滚动窗口
+
+    Returns:
+        [(train_start, train_end, test_start, test_end)]，左闭右开的位置
+    """
+    if train_size < 1 or test_size < 1:
+        raise ValueError("train_size 和 test_size 必须大于 0")
+
+    step = step or test_size
+    folds = []
+    train_end = train_size
+    while train_end < n_bars:
+        train_start = 0 if anchored else train_end - train_size
+        test_end = min(train_end + test_size, n_bars)
+        folds.append((train_start, train_end, train_end, test_end))
+        train_end += step
+    return folds
+
+
+def _param_key(params: Dict[str, Any]) -> Tuple:
+    return tuple(sorted(params.items()))
+
+
+def _run_fold(
+    fold_no: int,
+    bounds: Tuple[int, int, int, int],
+    df: pd.DataFrame,
+    signal_cache: Dict[Tuple, Tuple[np.ndarray, np.ndarray]],
+    combinations: List[Dict[str, Any]],
+    objective: str,
+    initial_capital: float,
+    sim_kwargs: "_SimKwargs"
+) -> Dict[str, Any]:
+    """
+    运行一折 (在子进程中执行)
+
+    信号已在全区间上预先计算 (指标只依赖历史数据，与折无关)，这里只对窗口切片做撮合
+    """
+    train_start, train_end, test_start, test_end = bounds
+    model = AShareExecutionModel()
+
+    def evaluate(start: int, end: int, params: Dict[str, Any]) -> Dict[str, Any]:
+        entries, exits = signal_cache[_param_key(params)]
+        window = df.iloc[start:end]
+        sim = simulate_signals(
+            window, entries[start:end], exits[start:end], model,
+            initial_capital=initial_capital, **sim_kwargs(params),
+        )
+        return simulation_result(sim, window.index, initial_capital)
+
+    optimizer = ParameterOptimizer(
+        param_grid={},
+        objective=objective,
+    )
+    optimizer.optimize(
+        backtest_func=lambda _df, **p: evaluate(train_start, train_end, p),
+        df=df.iloc[train_start:train_end],
+        initial_capital=initial_capital,
+        n_jobs=1,
+        combinations=combinations,
+    )
+    best = optimizer.get_best()
+    test = evaluate(test_start, test_end, best.params)
+    test_equity = [item["equity"] for item in test["equity_curve"]]
+
+    return {
+        "fold": fold_no,
+        "train_start": df.index[train_start].strftime("%Y-%m-%d"),
+        "train_end": df.index[train_end - 1].strftime("%Y-%m-%d"),
+        "test_start": df.index[test_start].strftime("%Y-%m-%d"),
+        "test_end": df.index[test_end - 1].strftime("%Y-%m-%d"),
+        "best_params": best.params,
+        "train_metrics": best.metrics,
+        "test_metrics": {k: test[k] for k in best.metrics if k in test},
+        "test_equity": test_equity,
+    }
+
+
+class _SimKwargs:
+    """按参数生成 simulate_signals 的撮合参数 (止盈止损也可被优化)，需可序列化以传入子进程"""
+
+    def __init__(self, pct: float, stop_defaults: Optional[Dict[str, Any]] = None):
+        self.pct = pct
+        self.stop_defaults = stop_defaults
+
+    def __call__(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        kwargs = {"pct": self.pct}
+        if self.stop_defaults is not None:
+            kwargs["stop_loss_pct"] = params.get("stop_loss_pct", self.stop_defaults["stop_loss_pct"])
+            kwargs["stop_profit_pct"] = params.get("stop_profit_pct", self.stop_defaults["stop_profit_pct"])
+        return kwargs
+
+
+class WalkForwardOptimizer:
+    """滚动前推优化器 (内置策略，向量化引擎 + A股成交模型)"""
+
+    def __init__(
+        self,
+        strategy_type: str,
+        param_grid: Dict[str, List[Any]],
+        objective: str = "sharpe_ratio",
+        train_size: int = 250,
+        test_size: int = 60,
+        step: Optional[int] = None,
+        anchored: bool = False,
+        method: str = "grid",
+        n_iter: int = 50,
+        initial_capital: float = 100000,
+        n_jobs: int = 4
+    ):
+        """
+        Args:
+            strategy_type: 内置策略类型
+            param_grid: 参数网格
+            objective: 选参指标
+            train_size: 训练窗口交易日数
+            test_size: 测试窗口交易日数
+            step: 每折前推交易日数，默认等于 test_size
+            anchored: 是否锚定训练起点
+            method: grid/random
+            n_iter: random 方法的采样次数
+            initial_capital: 初始资金
+            n_jobs: 并行进程数
+        """
+        if strategy_type not in BacktestEngine.BUILTIN_STRATEGIES:
+            raise ValueError(
+                f"不支持的策略类型: {strategy_type}. 支持: {list(BacktestEngine.BUILTIN_STRATEGIES.keys())}"
+            )
+        self.strategy_type = strategy_type
+        self.param_grid = param_grid
+        self.objective = objective
+        self.train_size = train_size
+        self.test_size = test_size
+        self.step = step
+        self.anchored = anchored
+        self.method = method
+        self.n_iter = n_iter
+        self.initial_capital = initial_capital
+        self.n_jobs = max(1, n_jobs)
+
+    def _signal_cache(
+        self,
+        df: pd.DataFrame,
+        combinations: List[Dict[str, Any]]
+    ) -> Dict[Tuple, Tuple[np.ndarray, np.ndarray]]:
+        """在全区间上为每组参数计算一次信号，各折复用"""
+        cache = {}
+        for params in combinations:
+            key = _param_key(params)
+            if key not in cache:
+                entries, exits = generate_signals(self.strategy_type, df, params)
+                cache[key] = (entries.to_numpy(), exits.to_numpy())
+        return cache
+
+    def run(
+        self,
+        df: pd.DataFrame,
+        stock_code: Optional[str] = None,
+        stock_name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        运行滚动前推优化
+
+        Args:
+            df: K线 DataFrame(Open, High, Low, Close, Volume)
+            stock_code: 股票代码，用于确定涨跌停比例
+            stock_name: 股票名称，用于识别 ST
+
+        Returns:
+            各折选参及样本内外指标、拼接后的样本外权益曲线和指标
+        """
+        df = df[['Open', 'High', 'Low', 'Close', 'Volume']].astype(float)
+        df.index = pd.to_datetime(df.index)
+        folds = make_folds(len(df), self.train_size, self.test_size, self.step, self.anchored)
+        if not folds:
+            raise ValueError(f"K线数量 {len(df)} 不足以切分训练窗口 {self.train_size}")
+
+        combinations = ParameterOptimizer(self.param_grid)._generate_param_combinations(
+            self.method, self.n_iter
+        )
+        if not combinations:
+            raise ValueError("参数组合为空")
+        signal_cache = self._signal_cache(df, combinations)
+
+        pct = limit_pct(stock_code, stock_name) if stock_code else 0.10
+        stop_defaults = None
+        if self.strategy_type == "stop_loss_profit":
+            _, stop_defaults = BacktestEngine.BUILTIN_STRATEGIES[self.strategy_type]
+        sim_kwargs = _SimKwargs(pct, stop_defaults)
+
+        args = (df, signal_cache, combinations, self.objective, self.initial_capital, sim_kwargs)
+        if self.n_jobs == 1 or len(folds) == 1:
+            results = [_run_fold(i, bounds, *args) for i, bounds in enumerate(folds, 1)]
+        else:
+            with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=reset_engines_after_fork) as executor:
+                futures = [executor.submit(_run_fold, i, bounds, *args) for i, bounds in enumerate(folds, 1)]
+                results = [future.result() for future in futures]
+
+        result = self._stitch(df, folds, results)
+        result["total_combinations"] = len(signal_cache)
+        return result
+
+    def _stitch(
+        self,
+        df: pd.DataFrame,
+        folds: List[Tuple[int, int, int, int]],
+        results: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """按折拼接样本外权益曲线 (每折以上一折期末权益为起点复利)"""
+        values, dates = [], []
+        capital = float(self.initial_capital)
+        covered = 0
+        for (_, _, test_start, test_end), fold in zip(folds, results):
+            equity = np.asarray(fold.pop("test_equity"), dtype=float)
+            # step 小于 test_size 时测试窗口重叠，只保留未覆盖的部分
+            start = max(test_start, covered)
+            if start >= test_end:
+                continue
+            # 以未覆盖部分前一根的权益为基准换算，与上一折期末权益衔接
+            base = equity[start - test_start - 1] if start > test_start else self.initial_capital
+            scaled = equity / base * capital
+            values.extend(scaled[start - test_start:].tolist())
+            dates.extend(df.index[start:test_end])
+            capital = values[-1]
+            covered = test_end
+
+        oos = pd.Series(values, index=pd.DatetimeIndex(dates))
+        metrics = performance_metrics(oos, self.initial_capital) if len(oos) else {}
+
+        chosen: Dict[Tuple, int] = {}
+        for fold in results:
+            key = _param_key(fold["best_params"])
+            chosen[key] = chosen.get(key, 0) + 1
+
+        return {
+            "strategy_type": self.strategy_type,
+            "objective": self.objective,
+            "mode": "anchored" if self.anchored else "rolling",
+            "train_size": self.train_size,
+            "test_size": self.test_size,
+            "folds": results,
+            "oos_metrics": metrics,
+            "oos_equity_curve": [
+                {"date": d.strftime("%Y-%m-%d"), "equity": round(float(v), 2)} for d, v in oos.items()
+            ],
+            # 各组参数被选中的折数，集中度越高说明参数越稳定
+            "param_stability": sorted(
+                [{"params": dict(key), "folds": count} for key, count in chosen.items()],
+                key=lambda x: -x["folds"],
+            ),
+        }
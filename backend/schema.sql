@@ -32,9 +32,9 @@ CREATE TABLE IF NOT EXISTS stock_kline (
     INDEX idx_code (stock_code)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='日K线数据';
 
--- 分时数据
+-- 分时数据 (按交易日 RANGE 分区，分区由 MinutePartitionService 每日创建和删除)
 CREATE TABLE IF NOT EXISTS stock_kline_minute (
-    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    id BIGINT NOT NULL AUTO_INCREMENT,
     trade_date DATE NOT NULL COMMENT '交易日期',
     stock_code VARCHAR(10) NOT NULL COMMENT '股票代码',
     time_minute TIME NOT NULL COMMENT '分钟时间',
@@ -46,7 +46,128 @@ CREATE TABLE IF NOT EXISTS stock_kline_minute (
     amount DECIMAL(20,4) COMMENT '成交额',
     avg_price DECIMAL(20,4) COMMENT '均价',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, trade_date),
     UNIQUE KEY uk_code_date_time (stock_code, trade_date, time_minute),
     INDEX idx_date (trade_date),
     INDEX idx_code (stock_code)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='分时数据';
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='分时数据'
+PARTITION BY RANGE COLUMNS(trade_date) (
+    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+);
+
+-- 涨跌停与连板 (由 stock_kline 计算)
+CREATE TABLE IF NOT EXISTS stock_limit_streak (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    trade_date DATE NOT NULL COMMENT '交易日期',
+    stock_code VARCHAR(10) NOT NULL COMMENT '股票代码',
+    close DECIMAL(20,4) COMMENT '收盘价',
+    change_pct DECIMAL(10,4) COMMENT '涨跌幅(%)',
+    is_limit_up TINYINT NOT NULL DEFAULT 0 COMMENT '是否涨停',
+    is_limit_down TINYINT NOT NULL DEFAULT 0 COMMENT '是否跌停',
+    is_broken TINYINT NOT NULL DEFAULT 0 COMMENT '是否炸板(最高触及涨停、收盘未封住)',
+    streak INT NOT NULL DEFAULT 0 COMMENT '连板数',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uk_code_date (stock_code, trade_date),
+    INDEX idx_date_streak (trade_date, streak)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='涨跌停与连板';
+
+-- 行情快照 (涨停池、龙虎榜、资金流、热度排名等只能实时获取的数据)
+CREATE TABLE IF NOT EXISTS market_snapshot (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    dataset VARCHAR(32) NOT NULL COMMENT '数据集',
+    trade_date DATE NOT NULL COMMENT '交易日期',
+    snapshot_time TIME NOT NULL COMMENT '快照时间',
+    params_key VARCHAR(128) NOT NULL DEFAULT '{}' COMMENT '上游接口参数(JSON)',
+    row_count INT NOT NULL DEFAULT 0 COMMENT '行数',
+    payload MEDIUMBLOB NOT NULL COMMENT 'zlib压缩的列式JSON',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uk_snapshot (dataset, trade_date, params_key, snapshot_time),
+    INDEX idx_date (trade_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='行情快照';
+
+-- 龙虎榜营业部席位明细 (营业部 -> 日期/股票/净额 的倒排索引)
+CREATE TABLE IF NOT EXISTS lhb_seat_trade (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    seat_name VARCHAR(128) NOT NULL COMMENT '营业部名称',
+    trade_date DATE NOT NULL COMMENT '上榜日期',
+    stock_code VARCHAR(10) NOT NULL COMMENT '股票代码',
+    buy_amount DECIMAL(20,2) COMMENT '买入金额(元)',
+    sell_amount DECIMAL(20,2) COMMENT '卖出金额(元)',
+    net_amount DECIMAL(20,2) COMMENT '净额(元)',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uk_seat_date_code (seat_name, trade_date, stock_code),
+    INDEX idx_date_code (trade_date, stock_code)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='龙虎榜营业部席位明细';
+
+-- 营业部滚动统计 (净买入后的跟随收益、胜率)
+CREATE TABLE IF NOT EXISTS lhb_seat_stats (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    seat_name VARCHAR(128) NOT NULL COMMENT '营业部名称',
+    window_name VARCHAR(8) NOT NULL COMMENT '统计窗口: 1m/3m/6m/1y',
+    as_of DATE NOT NULL COMMENT '统计截止日期',
+    trades INT NOT NULL DEFAULT 0 COMMENT '净买入次数',
+    stocks INT NOT NULL DEFAULT 0 COMMENT '股票数',
+    net_amount DECIMAL(20,2) COMMENT '净买入合计(元)',
+    avg_ret_1 DECIMAL(10,4) COMMENT '次日平均收益(%)',
+    avg_ret_3 DECIMAL(10,4) COMMENT '3日平均收益(%)',
+    avg_ret_5 DECIMAL(10,4) COMMENT '5日平均收益(%)',
+    win_rate_1 DECIMAL(10,4) COMMENT '次日胜率(%)',
+    win_rate_3 DECIMAL(10,4) COMMENT '3日胜率(%)',
+    win_rate_5 DECIMAL(10,4) COMMENT '5日胜率(%)',
+    UNIQUE KEY uk_seat_window (seat_name, window_name),
+    INDEX idx_window_trades (window_name, trades)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='营业部滚动统计';
+
+-- 市场宽度 (由 stock_kline 计算)
+CREATE TABLE IF NOT EXISTS market_breadth (
+    trade_date DATE PRIMARY KEY COMMENT '交易日期',
+    total INT NOT NULL DEFAULT 0 COMMENT '交易股票数',
+    advance INT NOT NULL DEFAULT 0 COMMENT '上涨家数',
+    decline INT NOT NULL DEFAULT 0 COMMENT '下跌家数',
+    flat INT NOT NULL DEFAULT 0 COMMENT '平盘家数',
+    limit_up INT NOT NULL DEFAULT 0 COMMENT '涨停家数',
+    limit_down INT NOT NULL DEFAULT 0 COMMENT '跌停家数',
+    new_high_20 INT NOT NULL DEFAULT 0 COMMENT '20日新高家数',
+    new_low_20 INT NOT NULL DEFAULT 0 COMMENT '20日新低家数',
+    new_high_60 INT NOT NULL DEFAULT 0 COMMENT '60日新高家数',
+    new_low_60 INT NOT NULL DEFAULT 0 COMMENT '60日新低家数',
+    new_high_120 INT NOT NULL DEFAULT 0 COMMENT '120日新高家数',
+    new_low_120 INT NOT NULL DEFAULT 0 COMMENT '120日新低家数',
+    above_ma_20 DECIMAL(8,4) COMMENT '站上20日均线比例(%)',
+    above_ma_60 DECIMAL(8,4) COMMENT '站上60日均线比例(%)',
+    above_ma_120 DECIMAL(8,4) COMMENT '站上120日均线比例(%)',
+    median_change_pct DECIMAL(10,4) COMMENT '涨跌幅中位数(%)',
+    amount DECIMAL(24,2) COMMENT '成交额合计(元)',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='市场宽度';
+
+-- 情绪周期历史表 (每个交易日的周期输入和阶段，优先取涨停/炸板/跌停池快照，缺失时由连板表推算)
+CREATE TABLE IF NOT EXISTS emotion_cycle (
+    trade_date DATE PRIMARY KEY COMMENT '交易日期',
+    zt_count INT NOT NULL DEFAULT 0 COMMENT '涨停家数',
+    zbgc_count INT NOT NULL DEFAULT 0 COMMENT '炸板家数',
+    dtgc_count INT NOT NULL DEFAULT 0 COMMENT '跌停家数',
+    highest_board INT NOT NULL DEFAULT 0 COMMENT '最高板',
+    zbgc_rate DECIMAL(8,2) COMMENT '炸板率(%)',
+    phase VARCHAR(10) NOT NULL COMMENT '周期阶段',
+    position INT NOT NULL COMMENT '建议仓位(%)',
+    source VARCHAR(10) NOT NULL COMMENT '数据来源: snapshot/local',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='情绪周期历史';
+
+-- 复权比例 (除权除息日由 stock_kline 识别，累计相乘即为后复权因子)
+CREATE TABLE IF NOT EXISTS stock_adj_factor (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    stock_code VARCHAR(10) NOT NULL COMMENT '股票代码',
+    ex_date DATE NOT NULL COMMENT '除权除息日',
+    ratio DECIMAL(20,10) NOT NULL COMMENT '复权比例(前收盘/除权参考价)',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE KEY uk_code_date (stock_code, ex_date),
+    INDEX idx_ex_date (ex_date)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='复权比例';
+
+-- 数据同步时间 (同步脚本写入，进程内缓存据此失效)
+CREATE TABLE IF NOT EXISTS data_sync_version (
+    dataset VARCHAR(50) PRIMARY KEY COMMENT '数据集(表名)',
+    synced_at TIMESTAMP(6) NOT NULL COMMENT '最近同步时间'
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='数据同步时间';
@@ -113,6 +113,19 @@ CREATE TABLE IF NOT EXISTS strategy_signals (
     INDEX idx_trade_date (trade_date)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='策略信号表';
 
+-- 策略信号状态表 (增量信号引擎)
+CREATE TABLE IF NOT EXISTS strategy_signal_states (
+    id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    strategy_id INT NOT NULL COMMENT '策略ID',
+    stock_code VARCHAR(10) NOT NULL COMMENT '股票代码',
+    state TEXT COMMENT '指标状态 JSON',
+    position TINYINT(1) NOT NULL DEFAULT 0 COMMENT '是否持仓',
+    last_date DATE NOT NULL COMMENT '最后一根K线日期',
+    updated_at DATETIME NOT NULL,
+    UNIQUE KEY uk_strategy_stock (strategy_id, stock_code),
+    INDEX idx_strategy (strategy_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='策略信号状态表';
+
 -- 交易日历表
 CREATE TABLE IF NOT EXISTS trade_calendar (
     id BIGINT PRIMARY KEY AUTO_INCREMENT,
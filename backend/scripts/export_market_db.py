@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+导出行情数据到嵌入式数据库 (DuckDB / SQLite)
+从 MySQL 流式读取 astock 行情表，按 (stock_code, trade_date) 排序写入单个文件，
+配置 MARKET_DB_BACKEND=duckdb/sqlite 与 MARKET_DB_PATH 后 DataService 直接读取该文件。
+先写临时文件再替换，导出期间不影响正在读取的进程
+
+用法: python scripts/export_market_db.py [duckdb|sqlite] [输出路径] [表名 ...]
+"""
+import sys
+sys.path.insert(0, '.')
+
+import os
+from datetime import datetime
+
+import pandas as pd
+import pymysql
+
+from app.config import settings
+from app.services.data_service import _get_astock_conn
+from app.services.market_store import (
+    EMBEDDED_BACKENDS, MARKET_TABLES, create_table_sql, format_time, index_statements, sort_keys
+)
+
+# 每批读取/写入的行数
+BATCH_SIZE = 100_000
+
+
+def _table_columns(table: str) -> list:
+    """MySQL 中表的 [(列名, DATA_TYPE)]"""
+    conn = _get_astock_conn()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+            ORDER BY ORDINAL_POSITION
+            """,
+            [table],
+        )
+        return list(cursor.fetchall())
+    finally:
+        conn.close()
+
+
+def _iso(value):
+    return value.isoformat(sep=" ") if isinstance(value, datetime) else value.isoformat() if value is not None else None
+
+
+def _convert(rows: list, columns: list) -> list:
+    """DECIMAL -> float，TIME -> HH:MM:SS，日期时间 -> ISO 字符串 (写入时由嵌入式库转换为字段类型)"""
+    converters = []
+    for _, mysql_type in columns:
+        mysql_type = mysql_type.lower()
+        if mysql_type in ("decimal", "float", "double"):
+            converters.append(lambda v: None if v is None else float(v))
+        elif mysql_type == "time":
+            converters.append(format_time)
+        elif mysql_type in ("date", "datetime", "timestamp"):
+            converters.append(_iso)
+        else:
+            converters.append(None)
+    return [tuple(v if f is None else f(v) for f, v in zip(converters, row)) for row in rows]
+
+
+def _export_table(target, backend: str, table: str) -> int:
+    columns = _table_columns(table)
+    if not columns:
+        print(f"  {table}: MySQL 中不存在，跳过")
+        return 0
+    names = [name for name, _ in columns]
+    target.execute(create_table_sql(table, columns, backend))
+
+    keys = sort_keys(names)
+    query = f"SELECT {', '.join(names)} FROM {table}" + (f" ORDER BY {', '.join(keys)}" if keys else "")
+    placeholders = ", ".join(["?"] * len(names))
+
+    conn = _get_astock_conn()
+    total = 0
+    try:
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        cursor.execute(query)
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                break
+            rows = _convert(rows, columns)
+            if backend == "duckdb":
+                batch = pd.DataFrame(rows, columns=names)
+                target.register("batch", batch)
+                target.execute(f"INSERT INTO {table} SELECT * FROM batch")
+                target.unregister("batch")
+            else:
+                target.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+            total += len(rows)
+    finally:
+        conn.close()
+
+    if backend == "sqlite":
+        for statement in index_statements(table, names):
+            target.execute(statement)
+    print(f"  {table}: {total} 行")
+    return total
+
+
+def export_market_db(backend: str = None, path: str = None, tables: list = None):
+    """
+    导出行情表到嵌入式数据库文件
+
+    Args:
+        backend: duckdb/sqlite，默认取 MARKET_DB_BACKEND (为 mysql 时用 duckdb)
+        path: 输出文件，默认 MARKET_DB_PATH
+        tables: 导出的表，默认 MARKET_TABLES
+    """
+    backend = backend or (settings.MARKET_DB_BACKEND if settings.MARKET_DB_BACKEND in EMBEDDED_BACKENDS else "duckdb")
+    if backend not in EMBEDDED_BACKENDS:
+        raise ValueError(f"不支持的嵌入式存储: {backend}. 支持: {'/'.join(EMBEDDED_BACKENDS)}")
+    path = path or settings.MARKET_DB_PATH
+    tables = tables or MARKET_TABLES
+
+    print(f"[{datetime.now()}] 开始导出行情数据到 {backend}: {path}")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    if backend == "duckdb":
+        import duckdb
+        target = duckdb.connect(tmp)
+    else:
+        import sqlite3
+        target = sqlite3.connect(tmp)
+    try:
+        total = sum(_export_table(target, backend, table) for table in tables)
+        target.commit()
+    finally:
+        target.close()
+
+    os.replace(tmp, path)
+    print(f"[{datetime.now()}] 导出完成，共 {total} 行")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    export_market_db(
+        backend=args[0] if len(args) > 0 else None,
+        path=args[1] if len(args) > 1 else None,
+        tables=args[2:] or None,
+    )
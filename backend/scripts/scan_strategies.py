@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+全市场策略扫描
+收盘并同步K线后运行，对启用的自定义代码策略扫描全市场，信号批量写入 strategy_signals
+(内置/预置策略的信号由 sync_strategy_signals.py 的增量信号引擎生成)
+
+用法:
+    python scripts/scan_strategies.py                      # 扫描今天
+    python scripts/scan_strategies.py --date 20240105      # 指定交易日
+    python scripts/scan_strategies.py --strategy-ids 1 2 --dry-run
+"""
+import sys
+sys.path.insert(0, '.')
+
+import argparse
+from datetime import datetime
+from app.database import create_db_and_tables
+from app.services.strategy_scanner import StrategyScanner
+
+
+def scan_strategies(
+    trade_date: str = None,
+    strategy_ids: list = None,
+    lookback: int = 120,
+    n_jobs: int = 4,
+    dry_run: bool = False
+):
+    """
+    扫描策略信号
+
+    Args:
+        trade_date: 交易日期，格式 YYYYMMDD，默认今天
+        strategy_ids: 指定策略，默认全部启用策略
+        lookback: 每只股票使用的最近K线数
+        n_jobs: 自定义策略的并行进程数
+        dry_run: 只打印不写库
+    """
+    trade_date = trade_date or datetime.now().strftime("%Y%m%d")
+    print(f"[{datetime.now()}] 开始扫描策略信号: {trade_date}")
+    # 补齐 strategy_signals 的 source/trade_date 列 (API 尚未重启时)
+    create_db_and_tables()
+
+    scanner = StrategyScanner(lookback=lookback, n_jobs=n_jobs)
+    summary = scanner.run(trade_date, strategy_ids=strategy_ids, dry_run=dry_run)
+
+    print(f"股票 {summary['stocks']} 只")
+    for s in summary['strategies']:
+        line = f"  [{s['strategy_id']}] {s['name']} ({s['mode']}) {s['status']}: {s['signals']} 条信号"
+        if s['status'] != "ok":
+            line += f"，失败 {s['failed_stocks']} 只: {s['error']}"
+        print(line)
+    print(f"[{datetime.now()}] 扫描完成，共 {summary['signals']} 条信号，耗时 {summary['elapsed']} 秒"
+          + (" (dry-run 未写库)" if dry_run else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="全市场策略扫描")
+    parser.add_argument("--date", help="交易日期 YYYYMMDD，默认今天")
+    parser.add_argument("--strategy-ids", type=int, nargs="*", help="指定策略ID")
+    parser.add_argument("--lookback", type=int, default=120, help="最近K线数")
+    parser.add_argument("--n-jobs", type=int, default=4, help="自定义策略并行进程数")
+    parser.add_argument("--dry-run", action="store_true", help="只打印不写库")
+    args = parser.parse_args()
+
+    scan_strategies(args.date, args.strategy_ids, args.lookback, args.n_jobs, args.dry_run)
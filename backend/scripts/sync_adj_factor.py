@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+增量计算复权因子
+在日K线同步完成后运行，重扫最近的K线识别新的除权除息日；因子表为空或传入 --rebuild 时全量计算
+"""
+import sys
+sys.path.insert(0, '.')
+
+from datetime import datetime
+from app.services.adj_factor import AdjFactorService
+
+
+def sync_adj_factor(rebuild: bool = False):
+    """
+    计算复权因子
+
+    Args:
+        rebuild: 是否全量重算
+    """
+    print(f"[{datetime.now()}] 开始计算复权因子...")
+
+    if rebuild:
+        summary = AdjFactorService.build()
+    else:
+        summary = AdjFactorService.update()
+        print(f"起始日期: {summary['start_date'] or '全量'}")
+
+    print(f"[{datetime.now()}] 完成，{summary['stocks']} 只股票，{summary['events']} 次除权除息")
+
+
+if __name__ == "__main__":
+    sync_adj_factor(rebuild="--rebuild" in sys.argv)
@@ -9,7 +9,14 @@ sys.path.insert(0, '.')
 from datetime import datetime
 from scripts.sync_stock_info import sync_stock_info
 from scripts.sync_stock_kline import sync_stock_kline
+from scripts.sync_adj_factor import sync_adj_factor
 from scripts.sync_stock_kline_minute import sync_stock_kline_minute
+from scripts.sync_limit_ladder import sync_limit_ladder
+from scripts.sync_market_breadth import sync_market_breadth
+from scripts.sync_market_snapshots import sync_market_snapshots
+from scripts.sync_emotion_cycle import sync_emotion_cycle
+from scripts.sync_lhb_seats import sync_lhb_seats
+from scripts.sync_strategy_signals import sync_strategy_signals
 
 
 def main():
@@ -18,17 +25,36 @@ def main():
     print("=" * 50)
 
     # 1. 同步股票基本信息
-    print("\n[1/3] 同步股票基本信息...")
+    print("\n[1/7] 同步股票基本信息...")
     sync_stock_info()
 
-    # 2. 同步历史K线（过去一年）
-    print("\n[2/3] 同步历史K线...")
+    # 2. 同步历史K线（过去一年，不复权），再识别除权除息日更新复权因子
+    print("\n[2/7] 同步历史K线并计算复权因子...")
     sync_stock_kline()
+    sync_adj_factor()
 
     # 3. 同步分时数据（过去5天）
-    print("\n[3/3] 同步分时数据...")
+    print("\n[3/7] 同步分时数据...")
     sync_stock_kline_minute()
 
+    # 4. 增量计算连板数、市场宽度 (依赖当日K线)
+    print("\n[4/7] 计算连板数和市场宽度...")
+    sync_limit_ladder()
+    sync_market_breadth()
+
+    # 5. 保存行情快照 (涨停池、龙虎榜、资金流、热度)，再计算情绪周期 (依赖快照和连板表)
+    print("\n[5/7] 保存行情快照并计算情绪周期...")
+    sync_market_snapshots()
+    sync_emotion_cycle()
+
+    # 6. 同步龙虎榜营业部席位 (依赖龙虎榜快照)
+    print("\n[6/7] 同步营业部席位...")
+    sync_lhb_seats()
+
+    # 7. 增量生成策略信号 (依赖当日K线)
+    print("\n[7/7] 生成策略信号...")
+    sync_strategy_signals()
+
     print("\n" + "=" * 50)
     print("所有同步任务完成!")
     print("=" * 50)
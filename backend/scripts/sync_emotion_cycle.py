@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+增量计算情绪周期
+在连板表计算和行情快照保存之后运行，重算 emotion_cycle 最后几个交易日并推进到今天；表为空时全量计算
+"""
+import sys
+sys.path.insert(0, '.')
+
+from datetime import datetime
+from app.services.emotion_cycle import EmotionCycleService
+
+
+def sync_emotion_cycle(start_date: str = None):
+    """
+    计算情绪周期
+
+    Args:
+        start_date: 重算起始日期，格式 YYYYMMDD，不传则增量
+    """
+    print(f"[{datetime.now()}] 开始计算情绪周期...")
+
+    if start_date:
+        days = EmotionCycleService.build(start_date)
+    else:
+        summary = EmotionCycleService.update()
+        days = summary["days"]
+        print(f"起始日期: {summary['start_date']}")
+
+    print(f"[{datetime.now()}] 完成，写入 {days} 个交易日")
+
+
+if __name__ == "__main__":
+    sync_emotion_cycle(sys.argv[1] if len(sys.argv) > 1 else None)
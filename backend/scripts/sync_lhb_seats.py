@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+同步龙虎榜营业部席位明细并重算营业部统计
+默认同步当日；--start/--end 可回补历史区间 (只抓取尚未入库的股票)
+"""
+import sys
+sys.path.insert(0, '.')
+
+import argparse
+from datetime import datetime
+import pandas as pd
+from app.services.lhb_seats import LhbSeatService
+
+
+def sync_lhb_seats(start_date: str = None, end_date: str = None, n_jobs: int = 4):
+    """
+    同步营业部席位
+
+    Args:
+        start_date: 开始日期，格式 YYYYMMDD，默认今天
+        end_date: 结束日期，格式 YYYYMMDD，默认同 start_date
+        n_jobs: 并发请求数
+    """
+    start_date = start_date or datetime.now().strftime("%Y%m%d")
+    end_date = end_date or start_date
+    print(f"[{datetime.now()}] 开始同步营业部席位: {start_date} - {end_date}")
+
+    for day in pd.bdate_range(start_date, end_date):
+        trade_date = day.strftime("%Y%m%d")
+        try:
+            result = LhbSeatService.ingest(trade_date, n_jobs=n_jobs)
+        except Exception as e:
+            print(f"  {trade_date} 失败: {e}")
+            continue
+        if result["stocks"]:
+            print(f"  {trade_date}: 上榜 {result['stocks']} 只，抓取 {result['fetched']} 只，"
+                  f"席位 {result['rows']} 条，失败 {len(result['errors'])} 只")
+
+    summary = LhbSeatService.refresh_stats(end_date)
+    print(f"[{datetime.now()}] 完成，统计 {summary['trades']} 笔净买入，写入 {summary['rows']} 条营业部统计")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="同步龙虎榜营业部席位")
+    parser.add_argument("--start", help="开始日期 YYYYMMDD，默认今天")
+    parser.add_argument("--end", help="结束日期 YYYYMMDD")
+    parser.add_argument("--jobs", type=int, default=4, help="并发请求数")
+    args = parser.parse_args()
+    sync_lhb_seats(args.start, args.end, args.jobs)
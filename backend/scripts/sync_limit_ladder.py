@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+增量计算涨跌停与连板数
+在日K线同步完成后运行，从 stock_limit_streak 最后一个交易日推进到最新K线；表为空时全量重建
+"""
+import sys
+sys.path.insert(0, '.')
+
+from datetime import datetime
+from app.services.limit_ladder import LimitLadderService
+
+
+def sync_limit_ladder(rebuild: bool = False):
+    """
+    计算连板数
+
+    Args:
+        rebuild: 是否按 stock_kline 全量重建
+    """
+    print(f"[{datetime.now()}] 开始计算连板数...")
+
+    if rebuild:
+        summary = LimitLadderService.build()
+    else:
+        summary = LimitLadderService.update()
+        print(f"起始日期: {summary.get('start_date') or '全量'}")
+
+    print(f"[{datetime.now()}] 完成，股票 {summary['stocks']} 只，写入 {summary['rows']} 条")
+
+
+if __name__ == "__main__":
+    sync_limit_ladder(rebuild="--rebuild" in sys.argv)
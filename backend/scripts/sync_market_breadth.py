@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+增量计算市场宽度
+在日K线同步完成后运行，从 market_breadth 最后一个交易日推进到最新K线；表为空时全量计算
+"""
+import sys
+sys.path.insert(0, '.')
+
+from datetime import datetime
+from app.services.market_breadth import MarketBreadthService
+
+
+def sync_market_breadth(start_date: str = None):
+    """
+    计算市场宽度
+
+    Args:
+        start_date: 重算起始日期，格式 YYYYMMDD，不传则增量
+    """
+    print(f"[{datetime.now()}] 开始计算市场宽度...")
+
+    if start_date:
+        days = MarketBreadthService.build(start_date)
+    else:
+        summary = MarketBreadthService.update()
+        days = summary["days"]
+        print(f"起始日期: {summary['start_date']}")
+
+    print(f"[{datetime.now()}] 完成，写入 {days} 个交易日")
+
+
+if __name__ == "__main__":
+    sync_market_breadth(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+保存行情快照
+默认收盘后保存全部数据集一次；--date 补录历史日期时只保存涨停池、龙虎榜等按日期查询的数据集；--intraday 在交易时段内每隔 --interval 分钟保存资金流和热度排名
+"""
+import sys
+sys.path.insert(0, '.')
+
+import argparse
+import time
+from datetime import datetime
+from app.services.cache_service import CacheService
+from app.services.snapshot_service import SnapshotService
+
+
+def _in_session(now: datetime) -> bool:
+    """是否处于交易时段 (9:30-11:30, 13:00-15:00)"""
+    hm = now.strftime("%H:%M")
+    return "09:30" <= hm <= "11:30" or "13:00" <= hm <= "15:00"
+
+
+def sync_market_snapshots(trade_date: str = None):
+    """
+    收盘后保存全部数据集的快照
+
+    Args:
+        trade_date: 交易日期，格式 YYYYMMDD，默认今天
+    """
+    print(f"[{datetime.now()}] 开始保存行情快照...")
+    summary = SnapshotService.capture_all(trade_date=trade_date)
+    if summary.get("reason"):
+        print(f"  {trade_date or '今天'} {summary['reason']}，跳过")
+        return
+    for name, count in summary["saved"].items():
+        print(f"  {name}: {count} 条")
+    for name, error in summary["errors"].items():
+        print(f"  {name} 失败: {error}")
+    if summary["skipped"]:
+        print(f"  历史日期只能补录按日期查询的数据集，跳过: {', '.join(summary['skipped'])}")
+    print(f"[{datetime.now()}] 完成，成功 {len(summary['saved'])} 个，失败 {len(summary['errors'])} 个")
+
+
+def run_intraday(interval: int = 5):
+    """
+    盘中定时快照，收盘后退出
+
+    Args:
+        interval: 间隔分钟数
+    """
+    today = datetime.now().strftime("%Y%m%d")
+    if not CacheService.is_trading_day(today):
+        print(f"{today} 非交易日，退出")
+        return
+
+    while datetime.now().strftime("%H:%M") <= "15:00":
+        now = datetime.now()
+        if _in_session(now):
+            summary = SnapshotService.capture_all(intraday=True)
+            print(f"[{now:%H:%M:%S}] 保存 {len(summary['saved'])} 个，失败 {len(summary['errors'])} 个")
+        time.sleep(interval * 60)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="保存行情快照")
+    parser.add_argument("--date", help="交易日期 YYYYMMDD，默认今天")
+    parser.add_argument("--intraday", action="store_true", help="盘中定时快照")
+    parser.add_argument("--interval", type=int, default=5, help="盘中快照间隔 (分钟)")
+    args = parser.parse_args()
+
+    if args.intraday:
+        run_intraday(args.interval)
+    else:
+        sync_market_snapshots(args.date)
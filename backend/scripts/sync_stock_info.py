@@ -5,19 +5,10 @@
 import sys
 sys.path.insert(0, '.')
 
-import pymysql
 from datetime import datetime
+from app.services.data_service import _get_astock_conn
 from app.provider.akshare import get_stock_info_a_code_name
 
-DB_CONFIG = {
-    'host': '127.0.0.1',
-    'port': 13306,
-    'user': 'root',
-    'password': 'asset123456',
-    'database': 'astock',
-    'charset': 'utf8mb4'
-}
-
 
 def sync_stock_info():
     """同步股票基本信息"""
@@ -28,7 +19,7 @@ def sync_stock_info():
     print(f"获取到 {len(results)} 条股票数据")
 
     # 连接数据库
-    conn = pymysql.connect(**DB_CONFIG)
+    conn = _get_astock_conn()
     cursor = conn.cursor()
 
     # 插入数据
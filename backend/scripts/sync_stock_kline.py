@@ -6,19 +6,10 @@
 import sys
 sys.path.insert(0, '.')
 
-import pymysql
 from datetime import datetime, timedelta
+from app.services.data_service import _get_astock_conn, mark_synced
 from app.provider.akshare import get_stock_info_a_code_name, get_stock_zh_a_hist
 
-DB_CONFIG = {
-    'host': '127.0.0.1',
-    'port': 13306,
-    'user': 'root',
-    'password': 'asset123456',
-    'database': 'astock',
-    'charset': 'utf8mb4'
-}
-
 
 def sync_stock_kline(start_date: str = None, end_date: str = None, stock_codes: list = None):
     """
@@ -38,7 +29,7 @@ def sync_stock_kline(start_date: str = None, end_date: str = None, stock_codes:
     print(f"时间范围: {start_date} - {end_date}")
 
     # 连接数据库
-    conn = pymysql.connect(**DB_CONFIG)
+    conn = _get_astock_conn()
     cursor = conn.cursor()
 
     # 获取股票代码
@@ -90,6 +81,7 @@ def sync_stock_kline(start_date: str = None, end_date: str = None, stock_codes:
             print(f"处理股票 {code} 失败: {e}")
 
     conn.commit()
+    mark_synced('stock_kline')
     print(f"[{datetime.now()}] 同步完成，共 {total_records} 条K线数据")
 
     cursor.execute('SELECT COUNT(*) FROM stock_kline')
@@ -1,32 +1,25 @@
 #!/usr/bin/env python3
 """
 同步分时数据到数据库
-同步过去5天的数据（分时数据量大，只保留近5日）
+同步过去5天的数据（分时数据量大，数据库只保留近5个交易日，过期分区归档为 Parquet 后整体删除）
 """
 import sys
 sys.path.insert(0, '.')
 
-import pymysql
 from datetime import datetime, timedelta
+from app.services.data_service import _get_astock_conn, mark_synced
+from app.services.minute_partitions import MinutePartitionService, RETENTION_DAYS
 from app.provider.akshare import get_stock_info_a_code_name, get_stock_zh_a_hist_min_em
 
-DB_CONFIG = {
-    'host': '127.0.0.1',
-    'port': 13306,
-    'user': 'root',
-    'password': 'asset123456',
-    'database': 'astock',
-    'charset': 'utf8mb4'
-}
 
-
-def sync_stock_kline_minute(days: int = 5, stock_codes: list = None):
+def sync_stock_kline_minute(days: int = 5, stock_codes: list = None, keep_days: int = RETENTION_DAYS):
     """
     同步分时数据
 
     Args:
-        days: 保留天数，默认5天
+        days: 同步天数，默认5天
         stock_codes: 股票代码列表，默认同步所有股票
+        keep_days: 数据库保留的交易日数，更早的分区在同步后归档并删除
     """
     end_date = datetime.now().strftime("%Y%m%d")
     start_date = (datetime.now() - timedelta(days=days)).strftime("%Y%m%d")
@@ -34,8 +27,14 @@ def sync_stock_kline_minute(days: int = 5, stock_codes: list = None):
     print(f"[{datetime.now()}] 开始同步分时数据...")
     print(f"时间范围: {start_date} - {end_date} (最近{days}天)")
 
+    # 按日分区：未分区时先迁移，并提前创建今后几天的分区
+    MinutePartitionService.migrate()
+    created = MinutePartitionService.ensure_partitions()
+    if created:
+        print(f"新建分区: {', '.join(created)}")
+
     # 连接数据库
-    conn = pymysql.connect(**DB_CONFIG)
+    conn = _get_astock_conn()
     cursor = conn.cursor()
 
     # 获取股票代码
@@ -64,8 +63,8 @@ def sync_stock_kline_minute(days: int = 5, stock_codes: list = None):
             )
 
             if results:
-                for r in results:
-                    cursor.execute(insert_sql, (
+                cursor.executemany(insert_sql, [
+                    (
                         str(r.日期) if r.日期 else None,
                         code,
                         r.时间,
@@ -76,7 +75,9 @@ def sync_stock_kline_minute(days: int = 5, stock_codes: list = None):
                         r.成交量,
                         r.成交额,
                         r.均价
-                    ))
+                    )
+                    for r in results
+                ])
                 total_records += len(results)
 
             if (i + 1) % 100 == 0:
@@ -87,8 +88,13 @@ def sync_stock_kline_minute(days: int = 5, stock_codes: list = None):
             print(f"处理股票 {code} 失败: {e}")
 
     conn.commit()
+    mark_synced('stock_kline_minute')
     print(f"[{datetime.now()}] 同步完成，共 {total_records} 条分时数据")
 
+    dropped = MinutePartitionService.drop_expired(keep_days)
+    if dropped:
+        print(f"归档并删除过期分区: {', '.join(dropped)}")
+
     cursor.execute('SELECT COUNT(*) FROM stock_kline_minute')
     print(f"数据库现有: {cursor.fetchone()[0]} 条分时数据")
 
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+增量生成策略信号
+在日K线同步完成后运行，每个 (策略, 股票) 只推进当日一根K线，信号写入 strategy_signals
+"""
+import sys
+sys.path.insert(0, '.')
+
+from datetime import datetime
+from app.database import create_db_and_tables
+from app.services.signal_engine import SignalEngine
+
+
+def sync_strategy_signals(trade_date: str = None):
+    """
+    生成策略信号
+
+    Args:
+        trade_date: 交易日期，格式 YYYYMMDD，默认今天
+    """
+    trade_date = trade_date or datetime.now().strftime("%Y%m%d")
+    print(f"[{datetime.now()}] 开始生成策略信号: {trade_date}")
+    # 补齐 strategy_signals 的 source/trade_date 列 (API 尚未重启时)
+    create_db_and_tables()
+
+    summary = SignalEngine().run(trade_date)
+
+    print(f"策略 {summary['strategies']} 个，股票 {summary['stocks']} 只，"
+          f"推进 {summary.get('advanced', 0)} 个状态 (新建 {summary.get('initialized', 0)})")
+    print(f"[{datetime.now()}] 完成，共 {summary['signals']} 条信号 "
+          f"(买入 {summary.get('buy', 0)}，卖出 {summary.get('sell', 0)})")
+
+
+if __name__ == "__main__":
+    sync_strategy_signals(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,46 @@
+"""
+复权因子单元测试 (不访问数据库)
+"""
+import pandas as pd
+import pytest
+
+from app.services.adj_factor import adjust_ratios
+
+
+def _panel() -> pd.DataFrame:
+    return pd.DataFrame({
+        "stock_code": ["600000"] * 3 + ["000001"] * 2,
+        "trade_date": pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-02", "2024-01-03"]),
+        "close": [10.0, 9.0, 9.9, 20.0, 20.2],
+        "change_pct": [0.0, 0.0, 10.0, 1.0, 1.0],
+    })
+
+
+class TestAdjustRatios:
+    """除权日识别"""
+
+    def test_ex_date_ratio(self):
+        ratios = adjust_ratios(_panel())
+        assert ratios["stock_code"].tolist() == ["600000"]
+        assert ratios["ex_date"].tolist() == [pd.Timestamp("2024-01-03")]
+        assert ratios["ratio"].iloc[0] == pytest.approx(10.0 / 9.0)
+
+    def test_seed_checks_first_bar(self):
+        ratios = adjust_ratios(_panel(), {"600000": 10.0, "000001": 19.0})
+        assert ratios["stock_code"].tolist() == ["600000", "000001"]
+        # 参考价 round(20 / 1.01, 2) = 19.80
+        assert ratios["ratio"].iloc[1] == pytest.approx(19.0 / 19.80)
+
+    def test_rounding_noise_is_not_ex_date(self):
+        panel = pd.DataFrame({
+            "stock_code": ["600000"] * 2,
+            "trade_date": pd.to_datetime(["2024-01-02", "2024-01-03"]),
+            "close": [10.0, 10.33],
+            "change_pct": [0.0, 3.3],
+        })
+        assert adjust_ratios(panel).empty
+
+    def test_empty(self):
+        panel = pd.DataFrame({"stock_code": ["600000"], "trade_date": [pd.Timestamp("2024-01-02")],
+                              "close": [None], "change_pct": [None]})
+        assert list(adjust_ratios(panel).columns) == ["stock_code", "ex_date", "ratio"]
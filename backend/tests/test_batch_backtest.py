@@ -0,0 +1,48 @@
+"""
+批量回测单元测试 (不访问数据库)
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routers import backtest
+from app.services.batch_backtest import BatchBacktestService
+
+
+def _results():
+    return [
+        {"stock_code": "600000", "status": "ok", "total_return": 5.0, "annual_return": 1.0, "sharpe_ratio": 0.5,
+         "max_drawdown": -10.0, "win_rate": 50.0, "total_trades": 4, "final_value": 105000},
+        {"stock_code": "000001", "status": "ok", "total_return": -2.0, "annual_return": -1.0, "sharpe_ratio": -0.2,
+         "max_drawdown": -3.0, "win_rate": 40.0, "total_trades": 2, "final_value": 98000},
+        {"stock_code": "300750", "status": "skipped", "bars": 0},
+    ]
+
+
+class TestSummarize:
+    """汇总报告"""
+
+    def test_ranking(self):
+        summary = BatchBacktestService.summarize(_results(), objective="max_drawdown", top_n=1)
+        assert (summary["ok"], summary["skipped"]) == (2, 1)
+        assert summary["best"][0]["stock_code"] == "000001"
+        assert summary["positive_ratio"] == 50.0
+
+    def test_unknown_objective(self):
+        with pytest.raises(ValueError):
+            BatchBacktestService.summarize(_results(), objective="profit")
+
+
+class TestBatchRoute:
+    """批量回测接口"""
+
+    def test_unknown_objective_rejected_before_streaming(self, monkeypatch):
+        monkeypatch.setattr(backtest, "_resolve_universe", lambda request: pytest.fail("不应开始回测"))
+        app = FastAPI()
+        app.include_router(backtest.router)
+        r = TestClient(app).post("/api/backtest/batch", json={
+            "start_date": "20240101", "end_date": "20240201", "strategy_type": "ma_cross",
+            "stock_codes": ["600000"], "objective": "profit",
+        })
+        assert r.status_code == 400
+        assert "profit" in r.json()["detail"]
@@ -0,0 +1,58 @@
+"""
+图表多级细节单元测试 (不访问数据库)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.chart_lod import aggregate_bars, lttb_indices
+
+
+def _bars(n: int = 10) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    close = 10 + np.cumsum(rng.normal(0, 0.2, n))
+    return pd.DataFrame({
+        "trade_date": pd.bdate_range("2024-01-01", periods=n),
+        "open": close - 0.1,
+        "high": close + 0.3,
+        "low": close - 0.3,
+        "close": close,
+        "volume": rng.uniform(100, 200, n),
+        "change_pct": rng.normal(0, 1, n),
+    })
+
+
+class TestAggregateBars:
+    """K线合并"""
+
+    def test_ohlc(self):
+        frame = _bars(5)
+        bars = aggregate_bars(frame, 2)
+        assert bars["bars"].tolist() == [2, 2, 1]
+        assert bars["open"].tolist() == frame["open"].iloc[[0, 2, 4]].tolist()
+        assert bars["close"].tolist() == frame["close"].iloc[[1, 3, 4]].tolist()
+        assert bars["high"].iloc[0] == frame["high"].iloc[:2].max()
+        assert bars["volume"].iloc[1] == pytest.approx(frame["volume"].iloc[2:4].sum())
+        assert bars["trade_date"].tolist() == frame["trade_date"].iloc[[1, 3, 4]].tolist()
+
+    def test_composable(self):
+        frame = _bars(10)
+        direct = aggregate_bars(frame, 4)
+        nested = aggregate_bars(aggregate_bars(frame, 2), 2)
+        pd.testing.assert_frame_equal(direct, nested)
+
+
+class TestLttb:
+    """LTTB 降采样"""
+
+    def test_keeps_ends_and_peak(self):
+        y = np.zeros(100)
+        y[37] = 5.0
+        idx = lttb_indices(np.arange(100), y, 10)
+        assert len(idx) == 10
+        assert idx[0] == 0 and idx[-1] == 99
+        assert 37 in idx
+        assert np.all(np.diff(idx) > 0)
+
+    def test_no_downsample_below_threshold(self):
+        assert lttb_indices(np.arange(5), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
@@ -0,0 +1,47 @@
+"""
+数据服务单元测试 (不访问数据库)
+"""
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.services import data_service
+from app.services.data_service import DataService
+
+
+@pytest.fixture
+def minute_db(monkeypatch):
+    """三个交易日的分时数据，记录每次分块查询的日期范围"""
+    days = [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)]
+    chunks = []
+
+    def query(sql, params=None):
+        if "DISTINCT trade_date" in sql:
+            return pd.DataFrame({"trade_date": days})
+        chunks.append((params[1], params[2]))
+        selected = [d for d in days if params[1] <= d <= params[2]]
+        return pd.DataFrame({
+            "trade_date": selected,
+            "time_minute": [pd.Timedelta(hours=9, minutes=35)] * len(selected),
+            **{c: [1.0] * len(selected) for c in ["open", "high", "low", "close", "volume", "amount"]},
+        })
+
+    monkeypatch.setattr(data_service, "_cold_minute_range", lambda start, end: None)
+    monkeypatch.setattr(data_service, "_query_dataframe", query)
+    return chunks
+
+
+class TestIterMinuteDays:
+    """分时数据分块读取"""
+
+    def test_chunks(self, minute_db):
+        out = [d for d, _ in DataService.iter_minute_days("600000", "20240101", "20240110", chunk_days=2)]
+        assert out == [date(2024, 1, 2), date(2024, 1, 3), date(2024, 1, 4)]
+        assert minute_db == [(date(2024, 1, 2), date(2024, 1, 3)), (date(2024, 1, 4), date(2024, 1, 4))]
+
+    @pytest.mark.parametrize("chunk_days", [0, -5])
+    def test_non_positive_chunk_reads_one_day_at_a_time(self, minute_db, chunk_days):
+        out = [d for d, _ in DataService.iter_minute_days("600000", "20240101", "20240110", chunk_days=chunk_days)]
+        assert len(out) == 3
+        assert len(minute_db) == 3
@@ -0,0 +1,28 @@
+"""
+数据库建表/补列单元测试 (临时 SQLite 文件)
+"""
+from sqlalchemy import create_engine, inspect
+
+from app.database import add_missing_columns
+
+
+class TestAddMissingColumns:
+    """已有表补列"""
+
+    def test_adds_new_signal_columns(self, tmp_path):
+        bind = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+        with bind.begin() as conn:
+            conn.exec_driver_sql(
+                "CREATE TABLE strategy_signals (id INTEGER PRIMARY KEY, strategy_id INTEGER NOT NULL, "
+                "stock_code VARCHAR NOT NULL, stock_name VARCHAR, signal_type VARCHAR NOT NULL, "
+                "signal_strength FLOAT NOT NULL, confidence FLOAT NOT NULL, target_price FLOAT, stop_loss FLOAT, "
+                "reason VARCHAR, plan_id INTEGER, created_at DATETIME NOT NULL)"
+            )
+        added = add_missing_columns(bind)
+        assert sorted(added) == ["strategy_signals.source", "strategy_signals.trade_date"]
+        columns = {c["name"] for c in inspect(bind).get_columns("strategy_signals")}
+        assert {"source", "trade_date"} <= columns
+        indexes = {tuple(i["column_names"]) for i in inspect(bind).get_indexes("strategy_signals")}
+        assert {("source",), ("trade_date",)} <= indexes
+        # 再次运行不重复添加
+        assert add_missing_columns(bind) == []
@@ -0,0 +1,31 @@
+"""
+情绪周期单元测试 (不访问数据库)
+"""
+import pandas as pd
+
+from app.services.emotion_cycle import CYCLE_COLUMNS, EmotionCycleService, classify_emotion_cycle
+
+
+def _inputs(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["trade_date", "zt_count", "zbgc_count", "dtgc_count", "highest_board"])
+    df["trade_date"] = pd.to_datetime(df["trade_date"])
+    return df.set_index("trade_date")
+
+
+class TestCompute:
+    """逐日计算"""
+
+    def test_rate_matches_classifier_without_limit_up(self):
+        local = _inputs([("2024-01-02", 0, 0, 30, 0), ("2024-01-03", 40, 4, 1, 3)])
+        cycles = EmotionCycleService.compute(local, _inputs([]))
+        assert list(cycles.columns) == CYCLE_COLUMNS
+        assert cycles["zbgc_rate"].tolist() == [100.0, 10.0]
+        assert cycles["phase"].iloc[0] == classify_emotion_cycle(0, 0, 30, 0)["phase"]
+
+    def test_snapshot_preferred_over_local(self):
+        local = _inputs([("2024-01-02", 10, 5, 0, 2)])
+        snapshot = _inputs([("2024-01-02", 90, 9, 0, 6)])
+        cycles = EmotionCycleService.compute(local, snapshot)
+        assert cycles["source"].tolist() == ["snapshot"]
+        assert cycles["zbgc_rate"].tolist() == [10.0]
+        assert cycles["phase"].tolist() == ["高潮"]
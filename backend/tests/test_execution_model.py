@@ -0,0 +1,59 @@
+"""
+A股成交模型单元测试 (不访问数据库)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.execution_model import AShareExecutionModel, limit_pct, limit_prices, simulate_signals
+
+
+class TestLimits:
+    """涨跌停"""
+
+    @pytest.mark.parametrize("code,name,expected", [
+        ("600000", "浦发银行", 0.10),
+        ("000001", "*ST平安", 0.05),
+        ("300750", "ST宁德", 0.20),
+        ("688981", None, 0.20),
+        ("830799", None, 0.30),
+    ])
+    def test_limit_pct(self, code, name, expected):
+        assert limit_pct(code, name) == expected
+
+    def test_limit_prices_round_to_cent(self):
+        up, down = limit_prices(np.array([10.05, 3.33]), 0.10)
+        assert up.tolist() == [11.06, 3.66]
+        assert down.tolist() == [9.05, 3.0]
+
+
+class TestSimulateSignals:
+    """信号撮合"""
+
+    def _df(self) -> pd.DataFrame:
+        open_ = np.full(10, 10.0)
+        # 第 2、6 根开盘一字涨停 (前收盘 10 元)
+        open_[[2, 6]] = 11.0
+        close = np.full(10, 10.0)
+        return pd.DataFrame(
+            {"Open": open_, "High": open_, "Low": open_, "Close": close, "Volume": 1e6},
+            index=pd.date_range("2024-01-01", periods=10),
+        )
+
+    def test_blocked_buys_only_counted_when_flat(self):
+        entries = np.zeros(10, dtype=bool)
+        exits = np.zeros(10, dtype=bool)
+        entries[[1, 2, 5]] = True
+        exits[8] = True
+        sim = simulate_signals(self._df(), entries, exits, AShareExecutionModel())
+
+        # 第 1 根信号次日涨停买不进 (空仓，计入)；第 5 根信号时已持仓 (不计入)
+        assert sim["blocked_buys"] == 1
+        assert len(sim["trades"]) == 1
+        assert sim["trades"][0]["entry_time"].startswith("2024-01-04")
+        assert sim["trades"][0]["exit_time"].startswith("2024-01-10")
+
+    def test_lot_rounding_and_fees(self):
+        model = AShareExecutionModel()
+        assert float(model.affordable_shares(10000, 10.0)) == 900
+        assert float(model.buy_cost(1000)) == pytest.approx(5.0 + 0.01)
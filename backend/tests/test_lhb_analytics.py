@@ -0,0 +1,39 @@
+"""
+龙虎榜事件研究单元测试 (不访问数据库)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.lhb_analytics import forward_metrics
+
+
+def _panel() -> pd.DataFrame:
+    return pd.DataFrame({
+        "stock_code": ["600000"] * 4 + ["000001"] * 2,
+        "trade_date": pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05",
+                                      "2024-01-02", "2024-01-03"]),
+        "close": [10.0, 11.0, 9.0, 12.0, 5.0, 6.0],
+        "high": [10.0, 12.0, 10.0, 13.0, 5.0, 6.5],
+        "low": [10.0, 10.5, 8.0, 11.0, 5.0, 5.5],
+    })
+
+
+class TestForwardMetrics:
+    """后续收益路径"""
+
+    def test_returns_stay_within_stock(self):
+        metrics = forward_metrics(_panel())
+        assert metrics["ret_1"].tolist()[:3] == pytest.approx([10.0, -200 / 11, 100 / 3])
+        assert np.isnan(metrics["ret_1"].iloc[3])
+        assert metrics["ret_3"].iloc[0] == pytest.approx(20.0)
+        assert metrics["ret_1"].iloc[4] == pytest.approx(20.0)
+        assert metrics["ret_10"].isna().all()
+
+    def test_path_extremes(self):
+        metrics = forward_metrics(_panel())
+        assert metrics["max_drawdown"].iloc[0] == pytest.approx(-20.0)
+        assert metrics["max_gain"].iloc[0] == pytest.approx(30.0)
+        assert metrics["max_gain"].iloc[4] == pytest.approx(30.0)
+        # 最后一个交易日没有后续路径
+        assert metrics[["max_drawdown", "max_gain"]].iloc[[3, 5]].isna().all().all()
@@ -0,0 +1,38 @@
+"""
+龙虎榜营业部席位单元测试 (不访问数据库)
+"""
+import pandas as pd
+import pytest
+
+from app.services import lhb_seats
+from app.services.lhb_seats import LhbSeatService
+
+
+class TestSeatTrades:
+    """营业部区间明细"""
+
+    def test_no_trades_in_window(self, monkeypatch):
+        monkeypatch.setattr(lhb_seats, "_query_dataframe", lambda query, params=None: pd.DataFrame())
+        result = LhbSeatService.seat_trades("某营业部", "20240101", "20240131")
+        assert result == {"seat_name": "某营业部", "stats": {"trades": 0}, "trades": []}
+
+
+class TestComputeStats:
+    """窗口统计"""
+
+    def test_windows_and_win_rate(self):
+        trades = pd.DataFrame({
+            "seat_name": ["A", "A", "B"],
+            "trade_date": pd.to_datetime(["2024-03-25", "2024-01-10", "2024-03-20"]),
+            "stock_code": ["600000", "000001", "600000"],
+            "net_amount": [1.0, 2.0, 3.0],
+            "ret_1": [1.0, -1.0, None],
+            "ret_3": [2.0, 1.0, -1.0],
+            "ret_5": [None, None, None],
+        })
+        stats = LhbSeatService.compute_stats(trades, pd.Timestamp("2024-03-31")).set_index(["window_name", "seat_name"])
+        assert stats.loc[("1m", "A"), "trades"] == 1
+        assert stats.loc[("3m", "A"), "trades"] == 2
+        assert stats.loc[("3m", "A"), "win_rate_1"] == pytest.approx(50.0)
+        assert stats.loc[("3m", "A"), "avg_ret_3"] == pytest.approx(1.5)
+        assert pd.isna(stats.loc[("1m", "B"), "win_rate_1"])
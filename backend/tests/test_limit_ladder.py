@@ -0,0 +1,71 @@
+"""
+连板天梯单元测试 (不访问数据库)
+"""
+import numpy as np
+import pandas as pd
+
+from app.services import limit_ladder
+from app.services.limit_ladder import LimitLadderService, limit_flags, streak_counts
+
+
+class TestStreakCounts:
+    """连板数"""
+
+    def test_resets_on_break_and_stock_change(self):
+        codes = np.array(["600000"] * 5 + ["000001"] * 3)
+        up = np.array([1, 1, 0, 1, 1, 1, 1, 0], dtype=bool)
+        assert streak_counts(codes, up).tolist() == [1, 2, 0, 1, 2, 1, 2, 0]
+
+    def test_seed_only_extends_leading_run(self):
+        codes = np.array(["600000"] * 4 + ["000001"] * 2)
+        up = np.array([1, 1, 0, 1, 0, 1], dtype=bool)
+        seed = np.array([3] * 4 + [2] * 2)
+        assert streak_counts(codes, up, seed).tolist() == [4, 5, 0, 1, 0, 1]
+
+    def test_empty(self):
+        assert streak_counts(np.array([]), np.array([], dtype=bool)).tolist() == []
+
+
+class TestLimitFlags:
+    """涨跌停/炸板标记"""
+
+    def test_main_board_limit_and_broken(self):
+        panel = pd.DataFrame({
+            "stock_code": ["600000"] * 3,
+            "close": [11.0, 11.5, 10.35],
+            "high": [11.0, 12.1, 11.0],
+            "change_pct": [10.0, 4.5455, -10.0],
+        })
+        flags = limit_flags(panel)
+        assert flags["is_limit_up"].tolist() == [True, False, False]
+        assert flags["is_broken"].tolist() == [False, True, False]
+        assert flags["is_limit_down"].tolist() == [False, False, True]
+
+    def test_no_limit_day_ignored(self):
+        panel = pd.DataFrame({"stock_code": ["600000"], "close": [20.0], "high": [20.0], "change_pct": [100.0]})
+        assert not limit_flags(panel)[["is_limit_up", "is_broken"]].to_numpy().any()
+
+
+class TestUpdate:
+    """增量更新的起点"""
+
+    def _run(self, monkeypatch, last, end_date=None):
+        calls = []
+        monkeypatch.setattr(
+            limit_ladder, "_query_dataframe",
+            lambda sql, params=None: pd.DataFrame({"trade_date": [last]}),
+        )
+        monkeypatch.setattr(
+            LimitLadderService, "build",
+            classmethod(lambda cls, start_date=None, end_date=None, **kw: calls.append((start_date, end_date)) or {}),
+        )
+        LimitLadderService.update(end_date)
+        return calls
+
+    def test_rescans_lookback_window(self, monkeypatch):
+        calls = self._run(monkeypatch, pd.Timestamp("2024-03-31").date())
+        start = (pd.Timestamp("2024-03-31") - pd.Timedelta(days=limit_ladder.RESCAN_DAYS)).strftime("%Y%m%d")
+        assert calls == [(start, None)]
+
+    def test_empty_table_rebuilds(self, monkeypatch):
+        assert self._run(monkeypatch, None) == [(None, None)]
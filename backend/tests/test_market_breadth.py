@@ -0,0 +1,49 @@
+"""
+市场宽度单元测试 (不访问数据库)
+"""
+import numpy as np
+import pandas as pd
+
+from app.services.market_breadth import BREADTH_COLUMNS, compute_breadth
+
+
+def _panel(days: int = 25) -> pd.DataFrame:
+    """一只单边上涨、一只单边下跌的股票"""
+    dates = pd.bdate_range("2024-01-01", periods=days)
+    frames = []
+    for code, step in (("000001", -0.1), ("600000", 0.1)):
+        close = 10 + step * np.arange(days)
+        frames.append(pd.DataFrame({
+            "stock_code": code,
+            "trade_date": dates,
+            "close": close,
+            "high": close,
+            "change_pct": np.r_[0.0, (close[1:] / close[:-1] - 1) * 100],
+            "amount": 100.0,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+class TestComputeBreadth:
+    """逐日宽度"""
+
+    def test_counts(self):
+        daily = compute_breadth(_panel())
+        assert list(daily.columns) == BREADTH_COLUMNS
+        assert daily["total"].eq(2).all()
+        assert daily["flat"].iloc[0] == 2
+        assert daily[["advance", "decline"]].iloc[1:].eq(1).all().all()
+        assert daily["amount"].eq(200.0).all()
+
+    def test_window_needs_full_history(self):
+        daily = compute_breadth(_panel())
+        # 第 20 个交易日起才有 20 日窗口，窗口不跨越股票边界
+        assert daily["new_high_20"].iloc[:19].eq(0).all()
+        assert daily["new_high_20"].iloc[19:].eq(1).all()
+        assert daily["new_low_20"].iloc[19:].eq(1).all()
+        assert daily["above_ma_20"].iloc[:19].isna().all()
+        assert daily["above_ma_20"].iloc[19:].eq(50.0).all()
+        assert daily["above_ma_60"].isna().all()
+
+    def test_empty(self):
+        assert compute_breadth(_panel().iloc[:0]).empty
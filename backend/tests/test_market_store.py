@@ -0,0 +1,66 @@
+"""
+嵌入式行情库单元测试 (临时 SQLite 文件，不访问 MySQL)
+"""
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from app.config import settings
+from app.services import data_service
+from app.services.data_service import _query_dataframe, mysql_reads
+from app.services.market_store import iter_query, query_dataframe
+
+
+@pytest.fixture
+def sqlite_store(tmp_path, monkeypatch):
+    path = str(tmp_path / "market.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE stock_kline_minute (stock_code TEXT, trade_date TEXT, time_minute TEXT, close REAL)")
+    conn.executemany(
+        "INSERT INTO stock_kline_minute VALUES (?, ?, ?, ?)",
+        [("600000", "2024-01-02", "09:35:00", 10.0), ("600000", "2024-01-03", "14:55:00", 10.5),
+         ("000001", "2024-01-03", "15:00:00", 9.0)],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(settings, "MARKET_DB_BACKEND", "sqlite")
+    monkeypatch.setattr(settings, "MARKET_DB_PATH", path)
+    return path
+
+
+class TestQuery:
+    """MySQL 风格 SQL 在嵌入式库上执行"""
+
+    def test_placeholders_and_date_params(self, sqlite_store):
+        df = query_dataframe(
+            "SELECT stock_code, trade_date, time_minute, close FROM stock_kline_minute "
+            "WHERE stock_code = %s AND trade_date >= %s ORDER BY trade_date",
+            ["600000", "20240103"],
+        )
+        assert df["close"].tolist() == [10.5]
+        # 日期列还原为 date，时间列还原为 timedelta (与 pymysql 一致)
+        assert df["trade_date"].tolist() == [date(2024, 1, 3)]
+        assert df["time_minute"].tolist() == [timedelta(hours=14, minutes=55)]
+
+    def test_date_object_param(self, sqlite_store):
+        df = query_dataframe("SELECT COUNT(*) AS cnt FROM stock_kline_minute WHERE trade_date = %s", [date(2024, 1, 3)])
+        assert int(df["cnt"].iloc[0]) == 2
+
+    def test_iter_query_batches(self, sqlite_store):
+        batches = list(iter_query("SELECT trade_date FROM stock_kline_minute WHERE close > %s ORDER BY close", [0], 2))
+        assert [len(b) for b in batches] == [2, 1]
+        assert batches[0]["trade_date"].tolist() == [date(2024, 1, 3), date(2024, 1, 2)]
+
+
+class TestMysqlReads:
+    """写入任务的读取走 MySQL"""
+
+    def test_scope_bypasses_embedded_store(self, sqlite_store, monkeypatch):
+        calls = []
+        monkeypatch.setattr(data_service, "_query_mysql", lambda query, params=None: calls.append(query))
+        assert len(_query_dataframe("SELECT * FROM stock_kline_minute")) == 3
+        with mysql_reads():
+            _query_dataframe("SELECT MAX(trade_date) AS trade_date FROM stock_kline_minute")
+        assert calls == ["SELECT MAX(trade_date) AS trade_date FROM stock_kline_minute"]
+        assert len(_query_dataframe("SELECT * FROM stock_kline_minute")) == 3
@@ -0,0 +1,31 @@
+"""
+参数优化单元测试 (不访问数据库)
+"""
+import pandas as pd
+
+from app.services.optimizer import ParameterOptimizer
+
+
+def _backtest(df, depth):
+    """回撤为负值 (与 performance_metrics 口径一致)"""
+    return {"total_return": 10.0, "sharpe_ratio": 1.0, "max_drawdown": -depth}
+
+
+class TestObjectiveOrder:
+    """按目标指标排序"""
+
+    def test_max_drawdown_prefers_shallowest(self):
+        optimizer = ParameterOptimizer(param_grid={"depth": [39.6, 14.0, 25.0]}, objective="max_drawdown")
+        optimizer.optimize(_backtest, pd.DataFrame(), n_jobs=1)
+        assert optimizer.get_best().params == {"depth": 14.0}
+        assert [r.metrics["max_drawdown"] for r in optimizer.results] == [-14.0, -25.0, -39.6]
+
+    def test_failed_run_ranks_last(self):
+        def backtest(df, depth):
+            if depth == 0:
+                raise ValueError("回测失败")
+            return _backtest(df, depth)
+
+        optimizer = ParameterOptimizer(param_grid={"depth": [0, 30.0]}, objective="max_drawdown")
+        optimizer.optimize(backtest, pd.DataFrame(), n_jobs=1)
+        assert optimizer.get_best().params == {"depth": 30.0}
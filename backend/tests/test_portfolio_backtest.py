@@ -0,0 +1,57 @@
+"""
+组合回测单元测试 (不访问数据库)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.execution_model import AShareExecutionModel
+from app.services.portfolio_backtest import PortfolioBacktester
+
+
+def _data(closes: dict) -> dict:
+    """开盘价等于收盘价的宽表"""
+    close = pd.DataFrame(closes, index=pd.bdate_range("2024-01-01", periods=len(next(iter(closes.values())))))
+    return {
+        "open": close.copy(),
+        "close": close,
+        "volume": close * 0 + 1e6,
+        "amount": close * 1e6,
+        "turnover_rate": close * 0 + 1.0,
+    }
+
+
+def _cash_after_rebalance(result: dict) -> float:
+    """最后两天价格同比例变化时，由权益反推持仓市值与现金"""
+    e1, e2 = (point["equity"] for point in result["equity_curve"][-2:])
+    held = (e2 - e1) / (2.0 - 1.0)
+    return e1 - held
+
+
+class TestSizing:
+    """仓位分配"""
+
+    def test_costs_do_not_overdraw_cash(self):
+        # 第 2 天开盘买入，最后一天价格翻倍
+        data = _data({"600000": [10.0, 10.5, 10.0, 10.0, 20.0]})
+        bt = PortfolioBacktester(initial_capital=100000, factor_window=1, top_n=1, max_positions=1,
+                                 rebalance=100, commission=0.01)
+        result = bt.run(data=data)
+        cash = _cash_after_rebalance(result)
+        assert cash >= -0.01
+        assert result["total_cost"] == pytest.approx(100000 * 0.01, rel=0.02)
+
+    def test_a_share_costs_do_not_overdraw_cash(self):
+        data = _data({"600000": [10.0, 10.5, 10.0, 10.0, 20.0]})
+        bt = PortfolioBacktester(initial_capital=100000, factor_window=1, top_n=1, max_positions=1,
+                                 rebalance=100, execution_model=AShareExecutionModel(commission_rate=0.01))
+        cash = _cash_after_rebalance(bt.run(data=data))
+        assert 0 <= cash < 10.0 * 100 * 1.02
+
+    def test_suspended_holding_reduces_slots(self):
+        bt = PortfolioBacktester(max_positions=2, top_n=2)
+        assert bt._slot_value(100.0, 0.0, 2) == 50.0
+        # 停牌持仓占 60%，剩余资产平分给两个入选股票
+        assert bt._slot_value(100.0, 60.0, 2) == 20.0
+        assert bt._slot_value(100.0, 120.0, 1) == 0.0
+        assert bt._slot_value(100.0, 0.0, 0) == 0.0
@@ -0,0 +1,65 @@
+"""
+K线重采样单元测试 (不访问数据库)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.resample import minute_buckets, resample_daily
+
+
+def _hhmm(minutes: np.ndarray) -> list:
+    return [f"{int(m) // 60:02d}:{int(m) % 60:02d}" for m in minutes]
+
+
+class TestMinuteBuckets:
+    """分钟K线分桶"""
+
+    MINUTES = np.array([9 * 60 + 30, 9 * 60 + 35, 10 * 60 + 30, 11 * 60 + 30, 13 * 60 + 5, 14 * 60, 15 * 60])
+
+    @pytest.mark.parametrize("period, expected", [
+        (15, ["09:45", "09:45", "10:30", "11:30", "13:15", "14:00", "15:00"]),
+        (30, ["10:00", "10:00", "10:30", "11:30", "13:30", "14:00", "15:00"]),
+        (60, ["10:30", "10:30", "10:30", "11:30", "14:00", "14:00", "15:00"]),
+        (120, ["11:30", "11:30", "11:30", "11:30", "15:00", "15:00", "15:00"]),
+    ])
+    def test_bucket_end(self, period, expected):
+        assert _hhmm(minute_buckets(self.MINUTES, period)) == expected
+
+
+class TestResampleDaily:
+    """日线 -> 周线/月线"""
+
+    @staticmethod
+    def _panel() -> pd.DataFrame:
+        return pd.DataFrame({
+            "stock_code": ["600000"] * 4,
+            "trade_date": pd.to_datetime(["2024-01-04", "2024-01-05", "2024-01-08", "2024-01-09"]),
+            "open": [1.0, 2.0, 3.0, 4.0],
+            "high": [2.0, 3.0, 5.0, 4.5],
+            "low": [0.5, 1.5, 2.5, 3.5],
+            "close": [1.5, 2.5, 4.0, 4.2],
+            "volume": [1.0, 2.0, 3.0, 4.0],
+            "change_pct": [10.0, 10.0, 10.0, 5.0],
+            "amplitude": [0.0, 0.0, 0.0, 0.0],
+        })
+
+    def test_weekly(self):
+        bars = resample_daily(self._panel(), "weekly")
+        assert list(bars.columns) == list(self._panel().columns)
+        assert bars["trade_date"].tolist() == [pd.Timestamp("2024-01-05"), pd.Timestamp("2024-01-09")]
+        assert bars[["open", "high", "low", "close", "volume"]].to_numpy().tolist() == [
+            [1.0, 3.0, 0.5, 2.5, 3.0], [3.0, 5.0, 2.5, 4.2, 7.0],
+        ]
+        assert bars["change_pct"].tolist() == pytest.approx([21.0, 15.5])
+        # 振幅以周期前收盘 2.5 / 1.21 为基准
+        assert bars["amplitude"].iloc[0] == pytest.approx((3.0 - 0.5) / (2.5 / 1.21) * 100)
+
+    def test_monthly_single_bar(self):
+        bars = resample_daily(self._panel(), "monthly")
+        assert len(bars) == 1
+        assert bars["close"].iloc[0] == 4.2
+
+    def test_unknown_period(self):
+        with pytest.raises(ValueError):
+            resample_daily(self._panel(), "yearly")
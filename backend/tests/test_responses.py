@@ -0,0 +1,42 @@
+"""
+响应编码单元测试 (不访问数据库)
+"""
+import pandas as pd
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.testclient import TestClient
+
+from app.responses import accepted_types, table_stream
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=10)
+
+    @app.get("/stream")
+    def stream(request: Request):
+        frame = pd.DataFrame({"stock_code": ["600000"] * 50, "close": range(50)})
+        chunks = iter([("600000", frame), ("000001", frame.assign(stock_code="000001"))])
+        return table_stream(request, chunks, frame.iloc[0:0])
+
+    return TestClient(app)
+
+
+class TestTableStream:
+    """批量流式响应"""
+
+    def test_ndjson_not_gzipped(self):
+        r = _client().get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert r.headers["content-type"] == "application/x-ndjson"
+        assert r.headers.get("content-encoding") != "gzip"
+        lines = r.text.strip().split("\n")
+        assert len(lines) == 2
+        assert '"stock_code":"000001"' in lines[1]
+
+
+class TestAcceptedTypes:
+    """Accept 头解析"""
+
+    def test_q_order(self):
+        accept = "application/json;q=0.5, application/msgpack, */*;q=0"
+        assert accepted_types(accept) == ["application/msgpack", "application/json"]
@@ -0,0 +1,45 @@
+"""
+选股器过滤单元测试 (不访问数据库)
+"""
+import numpy as np
+import pytest
+
+from app.services.screener import FILTER_FIELDS, METRIC_COLUMNS, ScreenerService
+
+
+def _table() -> dict:
+    table = {column: np.array([1.0, 2.0, np.nan]) for column in METRIC_COLUMNS}
+    table["volume_ratio"] = np.array([0.4, 1.0, 1.6])
+    table["code"] = np.array(["600000", "000001", "300750"])
+    table["is_st"] = np.array([False, True, False])
+    return table
+
+
+class TestMask:
+    """过滤掩码"""
+
+    def test_volume_ratio_range(self):
+        mask = ScreenerService.mask(_table(), {"min_volume_ratio": 0.5, "max_volume_ratio": 1.5})
+        assert mask.tolist() == [False, True, False]
+
+    def test_nan_fails_numeric_filter(self):
+        mask = ScreenerService.mask(_table(), {"min_price": 0.0})
+        assert mask.tolist() == [True, True, False]
+
+    def test_st_and_prefix(self):
+        mask = ScreenerService.mask(_table(), {"exclude_st": True, "code_prefixes": ["60", "00"]})
+        assert mask.tolist() == [True, False, False]
+
+    def test_unknown_field(self):
+        with pytest.raises(ValueError):
+            ScreenerService.mask(_table(), {"min_foo": 1})
+
+    def test_strategy_presets_supported(self):
+        """init_strategies.py 中策略的指标过滤字段都能用于选股 (仓位字段除外)"""
+        from init_strategies import STRATEGIES
+        fields = {
+            k for s in STRATEGIES for k in s
+            if k.startswith(("min_", "max_")) and k.split("_", 1)[1] in METRIC_COLUMNS
+        }
+        assert "max_volume_ratio" in fields
+        assert fields <= set(FILTER_FIELDS)
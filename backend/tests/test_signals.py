@@ -0,0 +1,41 @@
+"""
+信号强度单元测试：向量化扫描与增量引擎口径一致 (不访问数据库)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.backtest_engine import BacktestEngine
+from app.services.signal_engine import _step_indicators
+from app.services.signals import signal_strength
+
+
+def _bars(n: int = 80) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    open_ = close * (1 + rng.normal(0, 0.01, n))
+    return pd.DataFrame({"Open": open_, "Close": close})
+
+
+@pytest.mark.parametrize("strategy_type", ["ma_cross", "rsi", "macd", "bollinger", "simple_trend"])
+def test_engine_matches_vectorized(strategy_type):
+    _, params = BacktestEngine.BUILTIN_STRATEGIES[strategy_type]
+    bars = _bars()
+    expected = signal_strength(strategy_type, bars, params)
+
+    state = {}
+    actual = [
+        _step_indicators(strategy_type, params, state, {"open": o, "close": c})[2]
+        for o, c in zip(bars["Open"], bars["Close"])
+    ]
+    # 预热期后逐根一致
+    tail = slice(40, None)
+    assert np.allclose(np.asarray(actual)[tail], expected.to_numpy()[tail], atol=1e-6)
+
+
+def test_oversold_is_bullish():
+    """持续下跌：RSI 与布林带强度都为正 (偏多)"""
+    bars = pd.DataFrame({"Open": np.linspace(20, 10, 40), "Close": np.linspace(20, 10, 40) * 0.99})
+    bars.loc[39, "Close"] = 8.0
+    assert signal_strength("rsi", bars).iloc[-1] > 0
+    assert signal_strength("bollinger", bars).iloc[-1] > 0
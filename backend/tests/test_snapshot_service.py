@@ -0,0 +1,44 @@
+"""
+行情快照单元测试 (不访问数据库)
+"""
+import pytest
+
+from app.services.cache_service import CacheService
+from app.services.snapshot_service import DATED_DATASETS, SNAPSHOT_DATASETS, SnapshotService
+
+
+@pytest.fixture
+def captured(monkeypatch):
+    """记录 capture 调用的数据集，不获取也不写入"""
+    calls = []
+    monkeypatch.setattr(SnapshotService, "capture", classmethod(lambda cls, dataset, trade_date, params: calls.append(dataset) or 1))
+    monkeypatch.setattr(CacheService, "is_trading_day", classmethod(lambda cls, date: date != "20240106"))
+    return calls
+
+
+class TestCaptureAll:
+    """批量快照"""
+
+    def test_past_day_only_dated_datasets(self, captured):
+        summary = SnapshotService.capture_all(trade_date="20240105")
+        assert set(captured) == DATED_DATASETS
+        assert set(summary["skipped"]) == set(SNAPSHOT_DATASETS) - DATED_DATASETS
+
+    def test_today_captures_everything(self, captured):
+        summary = SnapshotService.capture_all()
+        assert set(captured) == set(SNAPSHOT_DATASETS)
+        assert summary["skipped"] == []
+
+    def test_non_trading_day(self, captured):
+        summary = SnapshotService.capture_all(trade_date="20240106")
+        assert captured == []
+        assert summary["reason"] == "非交易日"
+
+
+class TestCapture:
+    """单个快照"""
+
+    def test_live_dataset_rejects_past_day(self):
+        with pytest.raises(ValueError):
+            SnapshotService.capture("hot_rank", "20240105", rows=[])
+
@@ -0,0 +1,111 @@
+"""
+策略扫描单元测试 (不访问数据库)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import strategy_scanner
+from app.services.strategy_scanner import StrategyScanner
+
+
+# 收盘价高于 50 的股票运行时报错，其余股票在最后一根K线买入
+PICKY_STRATEGY = """
+from backtesting import Strategy
+
+class Picky(Strategy):
+    def init(self):
+        if self.data.Close[-1] > 50:
+            raise ValueError("too expensive")
+
+    def next(self):
+        if len(self.data) == 40:
+            self.buy()
+"""
+
+
+def _frame(price: float, n: int = 40) -> pd.DataFrame:
+    close = np.full(n, price)
+    return pd.DataFrame(
+        {"Open": close, "High": close, "Low": close, "Close": close, "Volume": np.full(n, 1e6)},
+        index=pd.bdate_range(end="2024-01-05", periods=n),
+    )
+
+
+@pytest.fixture
+def frames(monkeypatch):
+    data = {"600000": _frame(10.0), "600001": _frame(80.0), "600002": _frame(12.0)}
+    monkeypatch.setattr(
+        strategy_scanner, "_load_frames",
+        lambda codes, start, end, lookback: {c: data[c] for c in codes if c in data},
+    )
+    return data
+
+
+class TestScanCustom:
+    """自定义策略分片扫描"""
+
+    def test_broken_strategy_reports_errors(self):
+        scanner = StrategyScanner(n_jobs=1, shard_size=2)
+        found, errors, failures = scanner.scan_custom("this is not python", {}, ["600000", "600001", "600002"], "20240105")
+        assert found == [] and failures == []
+        assert [e["stocks"] for e in errors] == [2, 1]
+        assert all(e["error"] for e in errors)
+
+    def test_missing_strategy_class(self):
+        scanner = StrategyScanner(n_jobs=1)
+        _, errors, _ = scanner.scan_custom("x = 1", {}, ["600000"], "20240105")
+        assert errors == [{"stocks": 1, "error": "未找到策略类"}]
+
+    def test_failed_stocks_are_reported(self, frames):
+        scanner = StrategyScanner(n_jobs=1, shard_size=3)
+        found, errors, failures = scanner.scan_custom(PICKY_STRATEGY, {}, list(frames), "20240105")
+        assert errors == []
+        assert sorted(s["stock_code"] for s in found) == ["600000", "600002"]
+        assert [f["stock_code"] for f in failures] == ["600001"]
+        assert "too expensive" in failures[0]["error"]
+
+    def test_shard_where_every_stock_fails(self, frames):
+        scanner = StrategyScanner(n_jobs=1, shard_size=1)
+        found, errors, failures = scanner.scan_custom(PICKY_STRATEGY, {}, ["600000", "600001"], "20240105")
+        assert [s["stock_code"] for s in found] == ["600000"]
+        assert failures == []
+        assert errors[0]["stocks"] == 1 and "too expensive" in errors[0]["error"]
+
+
+class TestRun:
+    """扫描汇总"""
+
+    @pytest.fixture
+    def scanner(self, monkeypatch):
+        from app.models.backtest_strategy import BacktestStrategy
+        strategies = [
+            BacktestStrategy(id=1, name="双均线交叉", strategy_type="custom", code="x", is_active=True),
+            BacktestStrategy(id=2, name="ok", strategy_type="custom", code="ok", is_active=True),
+            BacktestStrategy(id=3, name="partial", strategy_type="custom", code="partial", is_active=True),
+            BacktestStrategy(id=4, name="broken", strategy_type="custom", code="broken", is_active=True),
+        ]
+        outcomes = {
+            "ok": ([{"stock_code": "600000", "signal_type": "buy"}], [], []),
+            "partial": ([{"stock_code": "600000", "signal_type": "sell"}], [], [{"stock_code": "600001", "error": "boom"}]),
+            "broken": ([], [{"stocks": 2, "error": "syntax"}], []),
+        }
+        scanner = StrategyScanner(n_jobs=1)
+        monkeypatch.setattr(StrategyScanner, "active_strategies", staticmethod(lambda ids=None: strategies))
+        monkeypatch.setattr(strategy_scanner.DataService, "get_kline_panel",
+                            staticmethod(lambda **kw: pd.DataFrame({"stock_code": ["600000", "600001"]})))
+        monkeypatch.setattr(strategy_scanner.DataService, "stock_universe", staticmethod(lambda stock_codes=None: []))
+        monkeypatch.setattr(scanner, "scan_custom", lambda code, params, codes, day: outcomes[code])
+        return scanner
+
+    def test_builtin_left_to_engine_and_status(self, scanner):
+        summary = scanner.run("20240105", dry_run=True)
+        by_id = {s["strategy_id"]: s for s in summary["strategies"]}
+        # 预置策略 (按名称映射) 由增量信号引擎负责
+        assert sorted(by_id) == [2, 3, 4]
+        assert by_id[2]["status"] == "ok"
+        assert (by_id[3]["status"], by_id[3]["failed_stocks"], by_id[3]["error"]) == ("partial", 1, "boom")
+        assert (by_id[4]["status"], by_id[4]["failed_stocks"]) == ("error", 2)
+        # 失败的策略不写入，其余信号按 (来源, 交易日) 标记
+        assert [item["strategy_id"] for item in summary["items"]] == [2, 3]
+        assert {(item["source"], str(item["trade_date"])) for item in summary["items"]} == {("scan", "2024-01-05")}
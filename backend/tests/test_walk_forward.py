@@ -0,0 +1,55 @@
+"""
+滚动前推优化单元测试 (样本外权益曲线拼接，不访问数据库)
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.backtest_engine import BacktestEngine
+from app.services.walk_forward import WalkForwardOptimizer
+
+
+CAPITAL = 100000.0
+
+
+def _optimizer(test_size: int, step: int) -> WalkForwardOptimizer:
+    strategy_type = next(iter(BacktestEngine.BUILTIN_STRATEGIES))
+    return WalkForwardOptimizer(
+        strategy_type=strategy_type,
+        param_grid={},
+        train_size=5,
+        test_size=test_size,
+        step=step,
+        initial_capital=CAPITAL,
+        n_jobs=1,
+    )
+
+
+def _fold(test_start: int, test_end: int) -> dict:
+    """每折从初始资金起步，每根K线收益 1%"""
+    bars = np.arange(1, test_end - test_start + 1)
+    return {"best_params": {"n": 1}, "test_equity": (CAPITAL * 1.01 ** bars).tolist()}
+
+
+class TestStitch:
+    """样本外权益曲线拼接"""
+
+    def _stitch(self, test_size: int, step: int, folds: list) -> pd.Series:
+        df = pd.DataFrame(index=pd.date_range("2024-01-01", periods=folds[-1][3]))
+        result = _optimizer(test_size, step)._stitch(df, folds, [_fold(f[2], f[3]) for f in folds])
+        return pd.Series([p["equity"] for p in result["oos_equity_curve"]])
+
+    def test_adjacent_folds_compound(self):
+        folds = [(0, 5, 5, 10), (5, 10, 10, 15)]
+        equity = self._stitch(5, 5, folds)
+        expected = CAPITAL * 1.01 ** np.arange(1, 11)
+        assert np.allclose(equity, expected, atol=0.01)
+
+    def test_overlapping_folds_continuous(self):
+        # step < test_size：第二折测试窗口与第一折重叠 3 根，只取未覆盖部分并与上一折期末衔接
+        folds = [(0, 5, 5, 11), (3, 8, 8, 14)]
+        equity = self._stitch(6, 3, folds)
+        expected = CAPITAL * 1.01 ** np.arange(1, 10)
+        assert len(equity) == 9
+        assert np.allclose(equity, expected, atol=0.01)
+        assert equity.pct_change().dropna().max() == pytest.approx(0.01, abs=1e-6)